@@ -1,8 +1,9 @@
 """Render adaptativo temporal, transaccional y con fallback al master estático."""
 from __future__ import annotations
-import os, pathlib, shutil, subprocess, tempfile, uuid
+import math, os, pathlib, shutil, subprocess, tempfile, uuid
 from typing import Any, Dict
 from alternative_tools import analyze_loudness_ffmpeg
+from audio_tools import extract_loudnorm_stats
 
 BAND_FILTERS = {
     "subbass_db": (45.0, 0.7, "lowshelf"), "bass_db": (120.0, 0.8, "bell"),
@@ -10,6 +11,20 @@ BAND_FILTERS = {
     "air_db": (9000.0, 0.7, "highshelf"),
 }
 
+# Prefijo de banda MTS (analysis_mts._safe_name) y ponderación K aproximada por banda (dB).
+_MTS_BANDS = {"subbass_db": "subbass_", "bass_db": "bass_", "mid_db": "mid_", "high_mid_db": "high_mid_", "air_db": "air_"}
+_MTS_WIDTH_HZ = {"subbass_": 40.0, "bass_": 190.0, "low_mid_": 250.0, "mid_": 1500.0, "high_mid_": 4000.0, "air_": 10000.0}
+_K_WEIGHT_DB = {"subbass_": -4.0, "bass_": -0.5, "low_mid_": 0.0, "mid_": 0.2, "high_mid_": 3.0, "air_": 4.0}
+# La verificación en la misma pasada mide antes del encoder: sólo es fiel en contenedores sin pérdida.
+ONE_SHOT_SUFFIXES = {".wav", ".flac", ".aif", ".aiff"}
+
+def _env_float(name: str, default: float) -> float:
+    try: return float(os.getenv(name, "").strip() or default)
+    except ValueError: return default
+
+def _one_shot_enabled() -> bool:
+    return os.getenv("TONEFINISH_ADAPTIVE_ONE_SHOT", "1").strip().lower() not in {"0", "false", "no", "off"}
+
 def _envelope(start: float, end: float, ramp: float) -> str:
     ramp = min(ramp, max(0.01, (end-start)/2.0))
     return (f"if(lt(t,{start:.4f}),0,if(lt(t,{start+ramp:.4f}),(t-{start:.4f})/{ramp:.4f},"
@@ -40,15 +55,100 @@ def build_adaptive_filter(decisions: Dict[str, Any]) -> tuple[str, str, list[Dic
                              "smoothing_ms":round(smoothing*1000,1)})
     return ";".join(parts), current, executed
 
+def _band_fractions(bands: Dict[str, Any]) -> Dict[str, float]:
+    """Fracción de energía ponderada K de cada banda MTS dentro de un frame."""
+    power={}
+    for name, raw in (bands or {}).items():
+        prefix=next((p for p in sorted(_MTS_WIDTH_HZ, key=len, reverse=True) if str(name).startswith(p)), None)
+        if prefix is None: continue
+        try: db=float(raw)
+        except (TypeError, ValueError): continue
+        power[prefix]=10**((db+_K_WEIGHT_DB[prefix])/10.0)*_MTS_WIDTH_HZ[prefix]
+    total=sum(power.values())
+    return {k: v/total for k, v in power.items()} if total>0 else {}
+
+def predict_automation_delta_db(decisions: Dict[str, Any], mts_data: Dict[str, Any] | None) -> float | None:
+    """
+    Predice el cambio de loudness integrado que introduce la automatización.
+    Usa la energía por banda y el RMS de cada frame MTS con gating estilo BS.1770;
+    devuelve None si no hay timeline utilizable.
+    """
+    timeline=[p for p in ((mts_data or {}).get("timeline") or []) if isinstance(p, dict)]
+    window=float(((mts_data or {}).get("source") or {}).get("window_seconds", 1.0) or 1.0)
+    frames=[]
+    for point in timeline:
+        try: frames.append((float(point.get("t", 0.0))+window/2.0, 10**(float(point.get("rms_db"))/10.0), point.get("bands") or {}))
+        except (TypeError, ValueError): continue
+    frames=[f for f in frames if f[1]>10**(-70.0/10.0)]
+    if not frames: return None
+    gate=sum(f[1] for f in frames)/len(frames)*10**(-10.0/10.0)
+    frames=[f for f in frames if f[1]>=gate]
+    sections=[]
+    for section in decisions.get("section_decisions", []):
+        start=float(section.get("start_s",0)); end=float(section.get("end_s",start))
+        smoothing=max(150.0,min(500.0,float((section.get("guards") or {}).get("smoothing_ms",180))))/1000.0
+        gains={band: max(-0.8,min(0.8,float(raw))) for band, raw in ((section.get("actions") or {}).get("eq_db") or {}).items()
+               if band in BAND_FILTERS}
+        if end>start and gains: sections.append((start,end,min(smoothing,max(0.01,(end-start)/2.0)),gains))
+    before=after=0.0
+    for t, power, bands in frames:
+        fractions=_band_fractions(bands); ratio=1.0
+        for start, end, ramp, gains in sections:
+            if not start<=t<end: continue
+            level=min(1.0, (t-start)/ramp, (end-t)/ramp)
+            for band, gain in gains.items():
+                ratio+=fractions.get(_MTS_BANDS[band], 0.0)*(10**(gain*level/10.0)-1.0)
+        before+=power; after+=power*max(ratio, 1e-6)
+    return 10.0*math.log10(after/before) if before>0 else None
+
+def _render_one_shot(source: pathlib.Path, graph: str, out: str, gain: float, limit: float,
+                     final: pathlib.Path) -> Dict[str, float]:
+    """Automatización + calibración + limitador en un grafo; loudnorm mide la misma pasada."""
+    graph=(f"{graph};[{out}]volume={gain:.4f}dB,alimiter=limit={limit:.8f}:level=false,asplit=2[ad_final][ad_meter];"
+           f"[ad_meter]loudnorm=print_format=json[ad_measure]")
+    cmd=["ffmpeg","-y","-hide_banner","-nostats","-i",str(source),"-filter_complex",graph,
+         "-map","[ad_final]","-map_metadata","0",str(final),"-map","[ad_measure]","-f","null","-"]
+    result=subprocess.run(cmd,capture_output=True,text=True,timeout=600)
+    if result.returncode: raise RuntimeError(result.stderr.strip()[-2000:] or "FFmpeg adaptive one-shot failed")
+    return extract_loudnorm_stats(result.stderr)
+
 def render_adaptive_candidate(source: pathlib.Path, decisions: Dict[str,Any], target_lufs: float,
-                              true_peak: float) -> Dict[str,Any]:
+                              true_peak: float, *, mts_data: Dict[str,Any] | None = None,
+                              source_stats: Dict[str,Any] | None = None, one_shot: bool | None = None,
+                              tolerance_lu: float | None = None) -> Dict[str,Any]:
+    """
+    Renderiza el candidato adaptativo en un temporal.
+    Con MTS y loudness del master estático predice la ganancia de calibración y
+    resuelve render + verificación en una sola pasada; si la medición queda fuera
+    de tolerancia (o no hay datos para predecir) usa el flujo medir/recalibrar.
+    """
     graph,out,executed=build_adaptive_filter(decisions)
     report={"status":"not_applied","executed_automations":executed,"fallback":"static_master"}
     if not executed:
         report["reason"]="no_executable_automation"; return report
     temp_dir=pathlib.Path(tempfile.mkdtemp(prefix="tonefinish-adaptive-"))
     raw=temp_dir/"automation.wav"; final=temp_dir/("candidate"+source.suffix.lower())
+    limit=10**(float(true_peak)/20.0)
+    tolerance=float(tolerance_lu if tolerance_lu is not None else _env_float("TONEFINISH_ADAPTIVE_ONE_SHOT_TOLERANCE_LU", 0.3))
     try:
+        source_i=(source_stats or {}).get("input_i")
+        delta=predict_automation_delta_db(decisions, mts_data) if source_i is not None else None
+        if (one_shot if one_shot is not None else _one_shot_enabled()) and delta is not None \
+                and source.suffix.lower() in ONE_SHOT_SUFFIXES:
+            gain=max(-3.0,min(3.0,float(target_lufs)-(float(source_i)+delta)))
+            report.update({"predicted_delta_db":round(delta,3),"predicted_gain_db":round(gain,3)})
+            try:
+                measured=_render_one_shot(source,graph,out,gain,limit,final)
+                miss=abs(measured["input_i"]-float(target_lufs))
+                report["one_shot_miss_lu"]=round(miss,3)
+                if miss<=tolerance:
+                    report.update({"status":"candidate_ready","candidate_path":str(final),"temporary_dir":str(temp_dir),
+                                   "calibration_mode":"one_shot","calibration_gain_db":round(gain,3),
+                                   "post_stats":{k:measured.get(k) for k in ("input_i","input_tp","input_lra","input_thresh","target_offset")}})
+                    return report
+            except (RuntimeError, ValueError) as exc:
+                report["one_shot_error"]=str(exc)[-500:]
+        report["calibration_mode"]="two_pass"
         cmd=["ffmpeg","-y","-v","error","-i",str(source),"-filter_complex",graph,"-map",f"[{out}]",
              "-map_metadata","0",str(raw)]
         result=subprocess.run(cmd,capture_output=True,text=True,timeout=600)
@@ -56,7 +156,6 @@ def render_adaptive_candidate(source: pathlib.Path, decisions: Dict[str,Any], ta
         stats=analyze_loudness_ffmpeg(str(raw))
         if stats is None: raise RuntimeError("No se pudo medir candidato adaptativo")
         gain=max(-3.0,min(3.0,float(target_lufs)-stats.input_i))
-        limit=10**(float(true_peak)/20.0)
         calibration=f"volume={gain:.4f}dB,alimiter=limit={limit:.8f}:level=false"
         result=subprocess.run(["ffmpeg","-y","-v","error","-i",str(raw),"-af",calibration,
                                "-map_metadata","0",str(final)],capture_output=True,text=True,timeout=600)
@@ -18,47 +18,24 @@ import tempfile
 from dataclasses import dataclass
 from typing import Optional, Tuple, List, Any
 
-# Intentar importar pedalboard (opcional)
-try:
-    import pedalboard  # type: ignore
-    from pedalboard import (  # type: ignore
-        Pedalboard, Compressor, Gain, Limiter,
-        HighpassFilter, LowpassFilter, HighShelfFilter, LowShelfFilter,
-        PeakFilter, NoiseGate, Clipping
-    )
-    from pedalboard.io import AudioFile  # type: ignore
-    PEDALBOARD_AVAILABLE = True
-except ImportError:
-    PEDALBOARD_AVAILABLE = False
-    # Dummy variables para evitar errores de tipo
-    pedalboard = None  # type: ignore
-    Pedalboard = Compressor = Gain = Limiter = None  # type: ignore
-    HighpassFilter = LowpassFilter = HighShelfFilter = LowShelfFilter = None  # type: ignore
-    PeakFilter = NoiseGate = Clipping = AudioFile = None  # type: ignore
-
-# Intentar importar numpy (requerido para pedalboard)
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except ImportError:
-    NUMPY_AVAILABLE = False
-    np = None  # type: ignore
-
-# Intentar importar essentia (opcional - para verificación de True Peak)
-try:
-    import essentia.standard as essentia_std  # type: ignore
-    ESSENTIA_AVAILABLE = True
-except ImportError:
-    ESSENTIA_AVAILABLE = False
-    essentia_std = None  # type: ignore
-
-# Intentar importar soundfile (opcional - para I/O eficiente)
-try:
-    import soundfile as sf  # type: ignore
-    SOUNDFILE_AVAILABLE = True
-except ImportError:
-    SOUNDFILE_AVAILABLE = False
-    sf = None  # type: ignore
+from lazy_imports import lazy_module, module_available
+
+# Dependencias opcionales de carga diferida: sólo se importan al usarse, así
+# abrir la aplicación no paga pedalboard/NumPy/essentia si no se llegan a usar.
+PEDALBOARD_AVAILABLE = module_available("pedalboard")
+pedalboard = lazy_module("pedalboard", globals(), "pedalboard")
+
+# NumPy (requerido para pedalboard y essentia)
+NUMPY_AVAILABLE = module_available("numpy")
+np = lazy_module("numpy", globals(), "np")
+
+# Essentia (opcional - para verificación de True Peak)
+ESSENTIA_AVAILABLE = module_available("essentia")
+essentia_std = lazy_module("essentia.standard", globals(), "essentia_std")
+
+# soundfile (opcional - para I/O eficiente)
+SOUNDFILE_AVAILABLE = module_available("soundfile")
+sf = lazy_module("soundfile", globals(), "sf")
 
 
 @dataclass
@@ -337,6 +314,9 @@ def process_with_pedalboard(
         return False
     
     try:
+        from pedalboard import Compressor, Gain, HighpassFilter, LowpassFilter, NoiseGate, Pedalboard
+        from pedalboard.io import AudioFile
+
         # Leer audio
         with AudioFile(input_path) as f:
             audio = f.read(f.frames)
@@ -420,6 +400,9 @@ def apply_eq_pedalboard(
         return False
     
     try:
+        from pedalboard import HighShelfFilter, LowShelfFilter, PeakFilter, Pedalboard
+        from pedalboard.io import AudioFile
+
         with AudioFile(input_path) as f:
             audio = f.read(f.frames)
             sample_rate = f.samplerate
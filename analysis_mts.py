@@ -7,6 +7,8 @@ import pathlib
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
+import tracing
+from lazy_imports import lazy_module, module_available
 from adaptive_rollout_safety import (
     get_rollout_flags,
     write_adaptive_guard_artifacts,
@@ -19,12 +21,8 @@ from event_detection import detect_events_from_timeline
 from master_decision_engine import write_master_decisions_artifacts
 from section_detection import detect_sections_from_timeline
 
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except Exception:
-    np = None  # type: ignore
-    NUMPY_AVAILABLE = False
+NUMPY_AVAILABLE = module_available("numpy")
+np = lazy_module("numpy", globals(), "np")
 
 
 def _to_db(value: float, floor: float = -120.0) -> float:
@@ -241,6 +239,7 @@ def _build_master_validation_report(
     }
 
 
+@tracing.traced("build_mts_analysis", "mts")
 def build_mts_analysis(
     input_path: pathlib.Path,
     window_s: float = 1.0,
@@ -372,6 +371,7 @@ def build_mts_analysis(
     }
 
 
+@tracing.traced("write_mts_artifacts", "mts")
 def write_mts_artifacts(
     input_path: pathlib.Path,
     output_path: pathlib.Path,
@@ -477,8 +477,10 @@ def write_mts_artifacts(
         target = _as_float((validation_context or {}).get("target_lufs"))
         tp_target = _as_float((validation_context or {}).get("true_peak_target"))
         if target is not None and tp_target is not None:
-            adaptive_report = render_adaptive_candidate(
-                output_path, decisions_paths.get("data", {}), target, tp_target)
+            with tracing.span("render_adaptive_candidate", "mts"):
+                adaptive_report = render_adaptive_candidate(
+                    output_path, decisions_paths.get("data", {}), target, tp_target,
+                    mts_data=mts, source_stats=(validation_context or {}).get("post_stats"))
     candidate_stats = adaptive_report.get("post_stats") if adaptive_report.get("status") == "candidate_ready" else None
     guard_paths = write_adaptive_guard_artifacts(
         output_path=output_path,
@@ -2,21 +2,405 @@
 Sistema de preview de audio para comparación antes/después.
 
 Permite generar previews temporales y reproducirlas sin procesar el archivo completo.
+El motor de preview mantiene en memoria el fragmento decodificado de la fuente y
+los fragmentos ya renderizados (por hash de grafo), transmite el render al
+reproductor mediante un pipe y, cuando sólo cambian etapas finales (ganancia,
+limitador), re-renderiza desde el intermedio pre-tail cacheado.
 """
 
 import subprocess
 import pathlib
+import struct
 import tempfile
+import threading
 import os
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+from audio_tools import get_audio_duration
+from render_cache import graph_hash
+
+PREVIEW_SAMPLE_RATE = 44100
+PREVIEW_CHANNELS = 2
+# Etapas baratas que se re-renderizan sobre el intermedio cacheado.
+PREVIEW_TAIL_FUNCTION_IDS = frozenset({
+    "audio.autogain.output_gain", "audio.saturation.hard_clip", "audio.limiter.true_peak",
+})
+_CHUNK_BYTES = 64 * 1024
+# Espera máxima al primer bloque antes de dar el stream por iniciado.
+_STREAM_STARTUP_TIMEOUT_S = 10.0
+# Tamaño de datos "desconocido" para WAV transmitido por pipe.
+_STREAMING_DATA_BYTES = 0x7FFFFFF0
+
+
+def _preview_cache_bytes() -> int:
+    raw = os.getenv("TONEFINISH_PREVIEW_CACHE_MB", "").strip()
+    try:
+        return max(0, int(float(raw) * 1024 * 1024)) if raw else 256 * 1024 * 1024
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+def wav_header(sample_rate: int, channels: int, data_bytes: Optional[int] = None) -> bytes:
+    """Cabecera WAV IEEE float32; sin tamaño conocido usa el valor de streaming."""
+    size = _STREAMING_DATA_BYTES if data_bytes is None else int(data_bytes)
+    block_align = channels * 4
+    return (
+        b"RIFF" + struct.pack("<I", min(0xFFFFFFFF, 36 + size)) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 3, channels, sample_rate,
+                                sample_rate * block_align, block_align, 32)
+        + b"data" + struct.pack("<I", size)
+    )
+
+
+def split_preview_actions(actions: Sequence) -> tuple[list, list]:
+    """Separa el bloque final de etapas baratas (ganancia/clip/limitador) del resto."""
+    actions = list(actions)
+    cut = len(actions)
+    while cut > 0 and actions[cut - 1].function_id in PREVIEW_TAIL_FUNCTION_IDS:
+        cut -= 1
+    return actions[:cut], actions[cut:]
+
+
+def compile_preview_graphs(actions: Sequence, context) -> tuple[str, str, str, str]:
+    """
+    Compila las acciones en dos grafos independientes (pre-tail y tail), ambos
+    desde `[0:a]`, para que el motor pueda reutilizar el intermedio pre-tail.
+
+    Retorna (pre_chain, pre_label, tail_chain, tail_label).
+    """
+    from processes.orchestrator import orchestrator
+
+    # El gobernador de headroom se evalúa sobre el plan completo, no por mitades.
+    orchestrator.compile(actions, context)
+    pre_actions, tail_actions = split_preview_actions(actions)
+    pre = orchestrator.compile(pre_actions, context)
+    tail = orchestrator.compile(tail_actions, context)
+    return pre.filter_chain, pre.output_label, tail.filter_chain, tail.output_label
+
+
+def build_preview_plan(
+    settings: Mapping[str, Any],
+    band_stats: Optional[Mapping[str, float]] = None,
+    sample_rate: int = PREVIEW_SAMPLE_RATE,
+    channels: int = PREVIEW_CHANNELS,
+) -> tuple[list, Any]:
+    """
+    Plan de preview desde las opciones de la UI: el preproceso del catálogo
+    (`migrate_legacy_preprocess_config`) seguido del limitador, así mover el
+    limitador sólo re-renderiza el tail. Sin `band_stats` la EQ dinámica se
+    omite. El headroom de entrada y los limitadores de etapa (autogain) no
+    entran: sin el loudnorm de dos pasadas que los compensa, el fragmento
+    sonaría ~17 dB por debajo del original. Así suena al nivel de la fuente
+    más el procesamiento y el A/B es comparable.
+    """
+    from processes.contracts import AudioFunctionAction, AudioProcessContext
+    from processes.orchestrator import migrate_legacy_preprocess_config
+
+    config = dict(settings)
+    config["band_stats"] = dict(band_stats or {})
+    config["dynamic_eq"] = bool(config.get("dynamic_eq")) and bool(band_stats)
+    config["autogain_enabled"] = False
+    actions = migrate_legacy_preprocess_config(**config)
+
+    true_peak = float(settings.get("true_peak", -1.0))
+    if settings.get("master_limiter_enabled", True):
+        ceiling = min(true_peak, float(settings.get("limiter_ceiling_db", true_peak)))
+        actions.append(AudioFunctionAction("audio.limiter.true_peak", params={
+            "ceiling_db": max(-9.0, min(0.0, ceiling)),
+            "release_ms": float(settings.get("limiter_release_ms", 150.0)),
+            "lookahead_ms": 5.0, "mode": str(settings.get("master_limiter_mode", "transparent")),
+            "oversampling": 4,
+        }))
+    context = AudioProcessContext(
+        "preview", sample_rate, channels, analysis={"true_peak": true_peak, "sample_rate": sample_rate},
+    )
+    return actions, context
+
+
+class PreviewEngine:
+    """
+    Motor de preview con caché en memoria.
+
+    - Fuente: fragmento decodificado a float32 (44.1 kHz estéreo) por archivo y ventana.
+    - Renders: fragmentos procesados por hash de grafo pre-tail y pre-tail + tail.
+    Ambas cachés son LRU con tope compartido (`TONEFINISH_PREVIEW_CACHE_MB`).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = PREVIEW_SAMPLE_RATE,
+        channels: int = PREVIEW_CHANNELS,
+        max_cache_bytes: Optional[int] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_cache_bytes = _preview_cache_bytes() if max_cache_bytes is None else max_cache_bytes
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"source_hits": 0, "source_misses": 0, "render_hits": 0,
+                        "tail_only_renders": 0, "full_renders": 0}
+
+    # --- caché -------------------------------------------------------------
+    def _get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+            return data
+
+    def _put(self, key: tuple, data: bytes) -> None:
+        with self._lock:
+            self._cache[key] = data
+            self._cache.move_to_end(key)
+            total = sum(len(item) for item in self._cache.values())
+            while total > self.max_cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                total -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # --- fuente ------------------------------------------------------------
+    def excerpt_window(self, input_path: pathlib.Path, duration: float,
+                       start_time: Optional[float] = None) -> tuple[float, float]:
+        """Ventana del preview; sin inicio explícito usa el centro (duración cacheada)."""
+        if start_time is None:
+            total_duration = get_audio_duration(str(input_path)) or 0.0
+            start_time = max(0.0, (total_duration / 2.0) - (duration / 2.0))
+        return round(float(start_time), 3), round(float(duration), 3)
+
+    def source_excerpt(self, input_path: pathlib.Path, duration: float = 30.0,
+                       start_time: Optional[float] = None) -> tuple[tuple, bytes]:
+        """Decodifica (una vez) el fragmento de la fuente a float32 intercalado."""
+        start, length = self.excerpt_window(input_path, duration, start_time)
+        stat = pathlib.Path(input_path).stat()
+        key = ("source", str(pathlib.Path(input_path).resolve()), stat.st_size, stat.st_mtime_ns,
+               start, length, self.sample_rate, self.channels)
+        cached = self._get(key)
+        if cached is not None:
+            self.metrics["source_hits"] += 1
+            return key, cached
+        self.metrics["source_misses"] += 1
+        cmd = [
+            "ffmpeg", "-hide_banner", "-nostdin", "-v", "error",
+            "-ss", str(start), "-t", str(length), "-i", str(input_path),
+            "-f", "f32le", "-ar", str(self.sample_rate), "-ac", str(self.channels), "-",
+        ]
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or "No se pudo decodificar el preview")
+        self._put(key, result.stdout)
+        return key, result.stdout
+
+    # --- render ------------------------------------------------------------
+    def _filter_cmd(self, filter_complex: str, output_label: str) -> list[str]:
+        return [
+            "ffmpeg", "-hide_banner", "-v", "error",
+            "-f", "f32le", "-ar", str(self.sample_rate), "-ac", str(self.channels), "-i", "-",
+            "-filter_complex", filter_complex, "-map", f"[{output_label}]",
+            "-f", "f32le", "-ar", str(self.sample_rate), "-ac", str(self.channels), "-",
+        ]
+
+    def _run_stages(self, pcm: bytes, stages: Sequence[tuple[str, str]],
+                    sink: Optional[Callable[[bytes], None]] = None) -> list[bytes]:
+        """
+        Encadena procesos FFmpeg por pipes (stdin -> stdout) y devuelve la salida
+        de cada etapa. La salida final se entrega a `sink` a medida que se produce.
+        """
+        procs = [
+            subprocess.Popen(self._filter_cmd(chain, label), stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            for chain, label in stages
+        ]
+        outputs = [bytearray() for _ in procs]
+
+        def feed() -> None:
+            try:
+                for offset in range(0, len(pcm), _CHUNK_BYTES):
+                    procs[0].stdin.write(pcm[offset:offset + _CHUNK_BYTES])
+            except (BrokenPipeError, OSError):
+                pass
+            finally:
+                try:
+                    procs[0].stdin.close()
+                except OSError:
+                    pass
+
+        def pump(index: int) -> None:
+            target = procs[index + 1].stdin
+            try:
+                for chunk in iter(lambda: procs[index].stdout.read(_CHUNK_BYTES), b""):
+                    outputs[index].extend(chunk)
+                    target.write(chunk)
+            except (BrokenPipeError, OSError):
+                pass
+            finally:
+                try:
+                    target.close()
+                except OSError:
+                    pass
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        threads += [threading.Thread(target=pump, args=(i,), daemon=True) for i in range(len(procs) - 1)]
+        for thread in threads:
+            thread.start()
+        for chunk in iter(lambda: procs[-1].stdout.read(_CHUNK_BYTES), b""):
+            outputs[-1].extend(chunk)
+            if sink is not None:
+                try:
+                    sink(chunk)
+                except (BrokenPipeError, OSError):
+                    # El reproductor se cerró: se termina el render para cachearlo igual.
+                    sink = None
+        for thread in threads:
+            thread.join()
+        errors = []
+        for proc in procs:
+            stderr = proc.stderr.read().decode("utf-8", "replace")
+            if proc.wait() != 0:
+                errors.append(stderr.strip() or f"ffmpeg salió con código {proc.returncode}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return [bytes(output) for output in outputs]
+
+    def render(
+        self,
+        input_path: pathlib.Path,
+        filter_complex: str = "",
+        output_label: str = "out",
+        tail_complex: str = "",
+        tail_label: str = "out",
+        duration: float = 30.0,
+        start_time: Optional[float] = None,
+        sink: Optional[Callable[[bytes], None]] = None,
+    ) -> bytes:
+        """
+        Renderiza el fragmento de preview y devuelve float32 intercalado.
+
+        `filter_complex` es el grafo pre-tail y `tail_complex` las etapas finales;
+        ambos leen de `[0:a]`. Si el intermedio pre-tail ya está en caché sólo se
+        ejecuta el tail.
+        """
+        source_key, pcm = self.source_excerpt(input_path, duration, start_time)
+        filter_complex = (filter_complex or "").strip()
+        tail_complex = (tail_complex or "").strip()
+        pre_key = ("render", source_key, graph_hash(filter_complex), output_label) if filter_complex else source_key
+        final_key = ("render", pre_key, graph_hash(tail_complex), tail_label) if tail_complex else pre_key
+
+        final = self._get(final_key)
+        if final is not None:
+            if final_key != source_key:
+                self.metrics["render_hits"] += 1
+            if sink is not None:
+                for offset in range(0, len(final), _CHUNK_BYTES):
+                    sink(final[offset:offset + _CHUNK_BYTES])
+            return final
+
+        intermediate = self._get(pre_key)
+        if intermediate is not None and tail_complex:
+            self.metrics["tail_only_renders"] += 1
+            (final,) = self._run_stages(intermediate, [(tail_complex, tail_label)], sink)
+            self._put(final_key, final)
+            return final
+
+        self.metrics["full_renders"] += 1
+        stages = [(filter_complex, output_label)] if filter_complex else []
+        if tail_complex:
+            stages.append((tail_complex, tail_label))
+        outputs = self._run_stages(pcm, stages, sink)
+        if filter_complex:
+            self._put(pre_key, outputs[0])
+        self._put(final_key, outputs[-1])
+        return outputs[-1]
+
+    # --- streaming ---------------------------------------------------------
+    def stream(
+        self,
+        input_path: pathlib.Path,
+        filter_complex: str = "",
+        output_label: str = "out",
+        tail_complex: str = "",
+        tail_label: str = "out",
+        duration: float = 30.0,
+        start_time: Optional[float] = None,
+        players: Optional[Iterable[Sequence[str]]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        first_audio: Optional[threading.Event] = None,
+    ) -> tuple[subprocess.Popen, threading.Thread]:
+        """
+        Arranca el reproductor leyendo WAV por stdin y renderiza en un hilo:
+        la reproducción empieza con los primeros bloques del render.
+
+        Un fallo del render se entrega a `on_error`; `first_audio` se marca con
+        el primer bloque enviado o al terminar el hilo, con o sin error.
+        """
+        player = _spawn_stream_player(self.sample_rate, self.channels, players)
+
+        def write(chunk: bytes) -> None:
+            player.stdin.write(chunk)
+            player.stdin.flush()
+            if first_audio is not None:
+                first_audio.set()
+
+        def run() -> None:
+            try:
+                self.render(input_path, filter_complex, output_label, tail_complex,
+                            tail_label, duration, start_time, sink=write)
+            except Exception as exc:
+                if on_error is not None:
+                    on_error(exc)
+            finally:
+                if first_audio is not None:
+                    first_audio.set()
+                try:
+                    player.stdin.close()
+                except OSError:
+                    pass
+
+        thread = threading.Thread(target=run, name="tonefinish-preview-stream", daemon=True)
+        thread.start()
+        return player, thread
+
+
+STREAM_PLAYERS = (
+    ("ffplay", "-nodisp", "-autoexit", "-v", "quiet", "-f", "wav", "-i", "-"),
+    ("aplay", "-q", "-t", "wav", "-"),
+    ("play", "-q", "-t", "wav", "-"),
+)
+
+
+def _spawn_stream_player(sample_rate: int, channels: int,
+                         players: Optional[Iterable[Sequence[str]]] = None) -> subprocess.Popen:
+    for player_cmd in players or STREAM_PLAYERS:
+        try:
+            proc = subprocess.Popen(
+                list(player_cmd), stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            continue
+        proc.stdin.write(wav_header(sample_rate, channels))
+        return proc
+    raise RuntimeError("No se encontró reproductor con entrada por pipe (ffplay, aplay, play)")
+
+
+# Instancia compartida: la caché sobrevive entre clics aunque la UI cree
+# un AudioPreview nuevo en cada reproducción.
+preview_engine = PreviewEngine()
 
 
 class AudioPreview:
     """Maneja la generación y reproducción de previews de audio."""
     
-    def __init__(self):
+    def __init__(self, engine: Optional[PreviewEngine] = None):
+        self.engine = engine or preview_engine
         self.preview_file: Optional[pathlib.Path] = None
         self.player_process: Optional[subprocess.Popen] = None
+        self._stream_thread: Optional[threading.Thread] = None
+        # Último error del reproductor o del render en streaming.
+        self.last_error: Optional[str] = None
         
     def generate_preview(
         self,
@@ -46,65 +430,94 @@ class AudioPreview:
         temp_dir = tempfile.gettempdir()
         self.preview_file = pathlib.Path(temp_dir) / f"tonefinish_preview_{os.getpid()}.wav"
         
-        # Si no se especifica start_time, usar el centro del audio
-        if start_time is None:
-            # Obtener duración total
-            probe_cmd = [
-                "ffprobe",
-                "-v", "quiet",
-                "-print_format", "json",
-                "-show_format",
-                str(input_path)
-            ]
-            result = subprocess.run(probe_cmd, capture_output=True, text=True)
-            import json
-            probe_data = json.loads(result.stdout)
-            total_duration = float(probe_data["format"]["duration"])
-            start_time = max(0, (total_duration / 2.0) - (duration / 2.0))
-        
-        # Generar preview con filtros aplicados (o copia directa si no hay filtros)
-        if filter_complex and filter_complex.strip():
-            # Con filtros
-            cmd = [
-                "ffmpeg",
-                "-y",  # Sobrescribir sin preguntar
-                "-ss", str(start_time),
-                "-t", str(duration),
-                "-i", str(input_path),
-                "-filter_complex", filter_complex,
-                "-map", "[out]",
-                "-ar", "44100",
-                "-ac", "2",
-                str(self.preview_file)
-            ]
-        else:
-            # Sin filtros - copia directa del segmento
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-ss", str(start_time),
-                "-t", str(duration),
-                "-i", str(input_path),
-                "-ar", "44100",
-                "-ac", "2",
-                str(self.preview_file)
-            ]
-        
-        if not verbose:
-            cmd.insert(1, "-v")
-            cmd.insert(2, "quiet")
-        else:
-            print(f"$ {' '.join(cmd)}")
-        
-        subprocess.run(cmd, check=True)
+        if verbose:
+            print(f"$ preview {input_path} [{filter_complex or 'sin filtros'}]")
+        # El motor reutiliza el fragmento decodificado y los renders previos.
+        pcm = self.engine.render(
+            input_path, filter_complex, "out", duration=duration, start_time=start_time,
+        )
+        with open(self.preview_file, "wb") as handle:
+            handle.write(wav_header(self.engine.sample_rate, self.engine.channels, len(pcm)))
+            handle.write(pcm)
         return self.preview_file
     
-    def play(self, audio_file: Optional[pathlib.Path] = None) -> None:
+    def stream(
+        self,
+        input_path: pathlib.Path,
+        filter_complex: str = "",
+        tail_complex: str = "",
+        duration: float = 30.0,
+        start_time: Optional[float] = None,
+        output_label: str = "out",
+        tail_label: str = "out",
+        players: Optional[Iterable[Sequence[str]]] = None,
+        startup_timeout: float = _STREAM_STARTUP_TIMEOUT_S,
+    ) -> bool:
+        """
+        Reproduce el preview mientras se renderiza (pipe al reproductor).
+        
+        Returns:
+            True si el reproductor arrancó y el render entregó audio (o sigue
+            en curso tras `startup_timeout`); False si no hay reproductor o el
+            render falló al arrancar. El motivo queda en `last_error`.
+        """
+        self.stop()
+        self.last_error = None
+        first_audio = threading.Event()
+
+        def report(exc: Exception) -> None:
+            self.last_error = str(exc) or exc.__class__.__name__
+
+        try:
+            self.player_process, self._stream_thread = self.engine.stream(
+                input_path, filter_complex, output_label, tail_complex, tail_label,
+                duration=duration, start_time=start_time, players=players,
+                on_error=report, first_audio=first_audio,
+            )
+        except (RuntimeError, OSError) as exc:
+            report(exc)
+            return False
+        first_audio.wait(startup_timeout)
+        if self.last_error is not None:
+            self.stop()
+            return False
+        return True
+
+    def stream_plan(
+        self,
+        input_path: pathlib.Path,
+        actions: Sequence,
+        context,
+        duration: float = 30.0,
+        start_time: Optional[float] = None,
+        **kwargs,
+    ) -> bool:
+        """
+        Compila el plan en grafos pre-tail y tail (`compile_preview_graphs`) y
+        lo reproduce: si sólo cambió el tail, el motor parte del intermedio
+        cacheado. Un plan que no compila devuelve False con el motivo en
+        `last_error`.
+        """
+        try:
+            pre_chain, pre_label, tail_chain, tail_label = compile_preview_graphs(actions, context)
+        except ValueError as exc:
+            self.stop()
+            self.last_error = str(exc)
+            return False
+        return self.stream(
+            input_path, pre_chain, tail_chain, duration=duration, start_time=start_time,
+            output_label=pre_label, tail_label=tail_label, **kwargs,
+        )
+    
+    def play(self, audio_file: Optional[pathlib.Path] = None) -> bool:
         """
         Reproduce un archivo de audio usando el reproductor del sistema.
         
         Args:
             audio_file: Archivo a reproducir (None = usar preview generado)
+            
+        Returns:
+            True si el reproductor arrancó
         """
         if audio_file is None:
             audio_file = self.preview_file
@@ -132,7 +545,7 @@ class AudioPreview:
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL
                 )
-                return
+                return True
             except FileNotFoundError:
                 continue
         
@@ -1,15 +1,23 @@
 import math
 import os
 import pathlib
+import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from typing import Callable, Dict, Optional, Tuple
 
-from audio_tools import get_audio_duration, get_audio_info, run_ffmpeg, run_ffmpeg_with_progress, _FFMPEG_BIN
-from alternative_tools import analyze_loudness_ffmpeg, toolchain
+from audio_tools import (
+    extract_loudnorm_stats, get_audio_duration, get_audio_info, get_processing_limits, run_ffmpeg,
+    run_ffmpeg_with_progress, _FFMPEG_BIN,
+)
+from alternative_tools import LoudnessStats, analyze_loudness_ffmpeg, toolchain
+import ffmpeg_accounting
+import render_cache
 from filter_graph_builder import FilterGraphBuilder
 from mastering_config import MasteringConfig
 from processes.contracts import AudioFunctionAction, AudioProcessContext
-from processes.audit import TAIL_FUNCTION_IDS
+from processes.audit import TAIL_FUNCTION_IDS, build_execution_audit
 from processes.orchestrator import migrate_legacy_preprocess_config, orchestrator
 from mastering_modules.repair import (
     resolve_repair_levels as module_resolve_repair_levels,
@@ -25,6 +33,28 @@ from config import (
     TRUE_PEAK_SAFETY_MARGIN_DB,
 )
 
+DELIVERABLE_METER_PREFIX = "tf_deliverable_"
+# Intermedio en coma flotante: el preproceso compartido no recorta ni redondea.
+INTERMEDIATE_BIT_DEPTH = "32f"
+# Opciones de `normalize_audio` que sólo afectan la etapa final (loudness,
+# limitador, fades, formato): el resto configura el preproceso.
+_TAIL_OPTION_NAMES = frozenset({
+    "master_limiter_enabled", "master_limiter_mode", "master_limiter_ceiling_db",
+    "master_limiter_release_ms", "master_limiter_lookahead_ms", "output_sr",
+    "output_bit_depth", "output_format", "metadata", "fade_in", "fade_out",
+    "auto_fade_cap", "trim_edge_silence", "limiter_ceiling_db", "limiter_release_ms",
+    "enable_clipper", "clipper_ceiling_db",
+})
+# FFmpeg 7 antepone el nombre del filtro a la instancia (`loudnorm@tf_deliverable_0`);
+# FFmpeg 6 registra sólo la instancia (`tf_deliverable_0`).
+_DELIVERABLE_METER_RE = re.compile(
+    rf"\[(?:loudnorm@)?{DELIVERABLE_METER_PREFIX}(\d+) @ [^\]]+\]\s*(\{{[\s\S]*?\}})\s*"
+)
+_DELIVERABLE_LINE_RE = re.compile(
+    r"^Entregable \d+ \((.+)\): I=(\S+) LUFS, TP=(\S+) dBTP, LRA=(\S+) LU$", re.MULTILINE
+)
+
+
 def _resolve_ffmpeg_target_compensation(
     *,
     target_lufs: float,
@@ -85,6 +115,13 @@ def _with_safe_filter_threading_if_needed(cmd: list[str]) -> list[str]:
     return _with_safe_filter_threading(cmd)
 
 
+def _render_key(cmd: list[str], input_path: pathlib.Path, output_path: pathlib.Path, filter_chain: str = ""):
+    """Clave de caché del render; None si la caché está desactivada."""
+    if not render_cache.render_cache_enabled():
+        return None
+    return render_cache.build_render_key(cmd, input_path, output_path, filter_chain)
+
+
 def resolve_repair_levels(
     stats: Dict[str, float] | None,
     noise_level: str,
@@ -227,12 +264,26 @@ def normalize_audio(
     enable_clipper: bool = False,
     clipper_ceiling_db: float = -1.5,
     audio_actions: list[Dict[str, object]] | None = None,
+    output_specs: list[Dict[str, object]] | None = None,
 ) -> str:
-    """Normaliza y procesa usando exclusivamente acciones del catálogo DSP."""
+    """
+    Normaliza y procesa usando exclusivamente acciones del catálogo DSP.
+
+    `output_specs` agrega entregables extra (formato, sample rate, bit depth,
+    metadata) al mismo render: el grafo se abre con `asplit` tras el clipper y
+    cada rama tiene su propio resample, limiter y medición (ver
+    `parse_deliverable_stats`).
+    """
     if output_path.exists() and not overwrite:
         raise FileExistsError(
             f"El archivo de salida {output_path} ya existe. Usa --overwrite para reemplazarlo."
         )
+    deliverables = _resolve_output_specs(output_specs, metadata)
+    for deliverable in deliverables:
+        if deliverable["path"].exists() and not overwrite:
+            raise FileExistsError(
+                f"El archivo de salida {deliverable['path']} ya existe. Usa --overwrite para reemplazarlo."
+            )
 
     measured_input_lra = float(stats.get("input_lra", float("nan")))
     if autogain_enabled and math.isfinite(measured_input_lra) and measured_input_lra <= 4.5:
@@ -377,8 +428,8 @@ def normalize_audio(
             two_pass_normalize = True
 
     # Si hay preproceso significativo, los stats originales ya no son válidos
-    # porque saturación, glue, etc. cambian el nivel.
-    if preprocess_needed:
+    # porque saturación, glue, etc. cambian el nivel. Sin master no se usan.
+    if preprocess_needed and master_enabled:
         if two_pass_normalize:
             # Modo de dos pasadas REAL: procesar a temporal, analizar, luego normalizar
             # Esto es más lento pero mucho más preciso
@@ -397,18 +448,25 @@ def normalize_audio(
                     str(tmp_path),
                 ]
                 tmp_cmd = _with_safe_filter_threading_if_needed(tmp_cmd)
-                tmp_result = run_ffmpeg(tmp_cmd, verbose=verbose)
-                if tmp_result.returncode != 0 and _is_ffmpeg_filter_assertion(tmp_result.stderr):
-                    tmp_cmd_safe = _with_safe_filter_threading(tmp_cmd)
-                    tmp_result = run_ffmpeg(tmp_cmd_safe, verbose=verbose)
-                if tmp_result.returncode != 0:
-                    raise RuntimeError(f"Pasada 1 falló: {tmp_result.stderr.strip()}")
-                
-                # Analizar el audio preprocesado
-                measured_stats = analyze_loudness_ffmpeg(str(tmp_path))
-                
-                if measured_stats:
-                    master_loudness_stats = measured_stats
+                # Sólo interesa la medición de la pasada 1: se cachea sin el audio temporal.
+                measure_key = _render_key(tmp_cmd, input_path, tmp_path, tmp_filter_complex)
+                cached_measure = render_cache.lookup_render(measure_key)
+                if cached_measure and cached_measure.get("stats"):
+                    master_loudness_stats = LoudnessStats(**cached_measure["stats"])
+                else:
+                    tmp_result = run_ffmpeg(tmp_cmd, verbose=verbose)
+                    if tmp_result.returncode != 0 and _is_ffmpeg_filter_assertion(tmp_result.stderr):
+                        tmp_cmd_safe = _with_safe_filter_threading(tmp_cmd)
+                        tmp_result = run_ffmpeg(tmp_cmd_safe, verbose=verbose)
+                    if tmp_result.returncode != 0:
+                        raise RuntimeError(f"Pasada 1 falló: {tmp_result.stderr.strip()}")
+
+                    # Analizar el audio preprocesado
+                    measured_stats = analyze_loudness_ffmpeg(str(tmp_path))
+
+                    if measured_stats:
+                        master_loudness_stats = measured_stats
+                        render_cache.store_render(measure_key, None, stats=asdict(measured_stats))
             finally:
                 try:
                     tmp_path.unlink(missing_ok=True)
@@ -441,6 +499,8 @@ def normalize_audio(
 
     # Si master_enabled=False, solo aplicamos los filtros de preprocess (si hay)
     if not master_enabled:
+        if deliverables:
+            raise ValueError("Los entregables extra requieren la etapa de master activa.")
         if filter_chain:
             # Solo aplicar preprocess, sin loudnorm/limiter/fades
             filter_complex = FilterGraphBuilder.preprocess_to_output(filter_chain, filter_output)
@@ -473,9 +533,14 @@ def normalize_audio(
                 *codec_args,
                 str(output_path),
             ]
+        cache_key = _render_key(cmd, input_path, output_path, filter_chain)
+        cached = render_cache.lookup_render(cache_key, output_path)
+        if cached is not None:
+            return str(cached.get("stderr", ""))
         result = run_ffmpeg(cmd, verbose=verbose)
         if result.returncode != 0:
             raise RuntimeError(f"ffmpeg falló: {result.stderr.strip()}")
+        render_cache.store_render(cache_key, output_path, result.stderr)
         return result.stderr
 
     info = get_audio_info(str(input_path))
@@ -539,20 +604,33 @@ def normalize_audio(
         )], master_context, current_label)
         graph_parts.append(clip_graph.filter_chain)
         current_label = clip_graph.output_label
+    if deliverables:
+        # Una sola decodificación y un solo preproceso: cada entregable cuelga de aquí.
+        branch_labels = [f"deliverable_{index}" for index in range(len(deliverables))]
+        graph_parts.append(
+            f"[{current_label}]asplit={len(deliverables) + 1}[primary]"
+            + "".join(f"[{label}]" for label in branch_labels)
+        )
+        current_label = "primary"
     if output_sr:
         graph_parts.append(f"[{current_label}]aresample={output_sr}[resampled]")
         current_label = "resampled"
 
-    if limiter_actions or master_limiter_enabled:
+    limiting = bool(limiter_actions or master_limiter_enabled)
+    if limiting:
         safe_ceiling = min(
             effective_true_peak,
             master_limiter_ceiling_db if master_limiter_ceiling_db is not None else effective_true_peak,
         )
-        limiter_context = AudioProcessContext(
-            audio_id=str(input_path), sample_rate=int(output_sr or input_sr),
-            channels=input_channels, duration=master_context.duration,
-            analysis={"true_peak": stats.get("input_tp"), "sample_rate": int(output_sr or input_sr)},
-        )
+
+        def limiter_context_for(sample_rate: int) -> AudioProcessContext:
+            return AudioProcessContext(
+                audio_id=str(input_path), sample_rate=sample_rate,
+                channels=input_channels, duration=master_context.duration,
+                analysis={"true_peak": stats.get("input_tp"), "sample_rate": sample_rate},
+            )
+
+        limiter_context = limiter_context_for(int(output_sr or input_sr))
         effective_limiter_actions = [AudioFunctionAction(
             action.function_id, action.enabled,
             {**dict(action.params), "ceiling_db": min(float(action.params.get("ceiling_db", safe_ceiling)), safe_ceiling)},
@@ -569,6 +647,39 @@ def normalize_audio(
         current_label = limiter_graph.output_label
 
     graph_parts.append(f"[{current_label}]anull[out]")
+    deliverable_args: list[str] = []
+    meter_labels: list[str] = []
+    for index, deliverable in enumerate(deliverables):
+        label = f"deliverable_{index}"
+        branch_sr = deliverable["sample_rate"]
+        if branch_sr:
+            graph_parts.append(f"[{label}]aresample={branch_sr}[{label}_resampled]")
+            label = f"{label}_resampled"
+        if limiting:
+            # El ceiling se respeta a la frecuencia final de cada entregable.
+            branch_graph = orchestrator.compile(
+                effective_limiter_actions, limiter_context_for(int(branch_sr or input_sr)), label,
+            )
+            branch_chain, label = FilterGraphBuilder.namespaced(
+                branch_graph.filter_chain, branch_graph.output_label, label, f"deliverable_{index}_",
+            )
+            graph_parts.append(branch_chain)
+        graph_parts.append(
+            f"[{label}]asplit=2[deliverable_{index}_out][deliverable_{index}_meter_in];"
+            f"[deliverable_{index}_meter_in]loudnorm@{DELIVERABLE_METER_PREFIX}{index}="
+            f"print_format=json[deliverable_{index}_meter]"
+        )
+        meter_labels.append(f"deliverable_{index}_meter")
+        deliverable_args.extend([
+            "-map", f"[deliverable_{index}_out]",
+            *_build_metadata_args(deliverable["metadata"]),
+            *_build_codec_args(None, deliverable["bit_depth"], deliverable["format"]),
+            str(deliverable["path"]),
+        ])
+    if meter_labels:
+        for label in meter_labels:
+            deliverable_args.extend(["-map", f"[{label}]"])
+        deliverable_args.extend(["-f", "null", "-"])
     filter_complex = ";".join(part for part in graph_parts if part)
     codec_args_final = []
     skip_next = False
@@ -583,23 +694,33 @@ def normalize_audio(
     cmd = [
         "ffmpeg", "-hide_banner", "-nostdin", "-y" if overwrite else "-n",
         "-i", str(input_path), "-filter_complex", filter_complex, "-map", "[out]",
-        *metadata_args, *codec_args_final, str(output_path),
+        *metadata_args, *codec_args_final, str(output_path), *deliverable_args,
     ]
     cmd = _with_safe_filter_threading_if_needed(cmd)
     cmd_str = " ".join(cmd)
-    # Usar run_ffmpeg_with_progress si hay callback, sino run_ffmpeg normal
-    if progress_callback:
-        duration = get_audio_duration(str(input_path))
-        if duration and duration > 0:
-            result = run_ffmpeg_with_progress(cmd, duration, progress_callback, verbose=verbose)
+    # La caché de renders guarda una sola salida: los renders con entregables no se cachean.
+    cache_key = None if deliverables else _render_key(cmd, input_path, output_path, filter_complex)
+    cached = render_cache.lookup_render(cache_key, output_path)
+    if cached is not None:
+        if progress_callback:
+            progress_callback(100.0, "Reutilizado (caché)")
+        return str(cached.get("stderr", ""))
+    # El costo del render se atribuye a los function_id del catálogo que forman el grafo.
+    render_function_ids = sorted({action.function_id for action in [*ai_actions, *master_actions]})
+    with ffmpeg_accounting.call_site("normalize_audio", function_ids=render_function_ids):
+        # Usar run_ffmpeg_with_progress si hay callback, sino run_ffmpeg normal
+        if progress_callback:
+            duration = get_audio_duration(str(input_path))
+            if duration and duration > 0:
+                result = run_ffmpeg_with_progress(cmd, duration, progress_callback, verbose=verbose)
+            else:
+                result = run_ffmpeg(cmd, verbose=verbose)
         else:
             result = run_ffmpeg(cmd, verbose=verbose)
-    else:
-        result = run_ffmpeg(cmd, verbose=verbose)
-    
-    if result.returncode != 0 and _is_ffmpeg_filter_assertion(result.stderr):
-        retry_cmd = _with_safe_filter_threading(cmd)
-        result = run_ffmpeg(retry_cmd, verbose=verbose)
+
+        if result.returncode != 0 and _is_ffmpeg_filter_assertion(result.stderr):
+            retry_cmd = _with_safe_filter_threading(cmd)
+            result = run_ffmpeg(retry_cmd, verbose=verbose)
 
     if result.returncode != 0:
         raise RuntimeError(
@@ -607,9 +728,167 @@ def normalize_audio(
             f"CMD: {cmd_str}\n"
             f"{result.stderr.strip()}"
         )
+    if deliverables:
+        return _split_deliverable_meters(result.stderr, deliverables)
+    render_cache.store_render(cache_key, output_path, result.stderr)
     return result.stderr
 
 
+def _resolve_output_specs(
+    output_specs: list[Dict[str, object]] | None,
+    metadata: Dict[str, str] | None,
+) -> list[Dict[str, object]]:
+    """Normaliza las especificaciones de entregables extra de `normalize_audio`."""
+    deliverables: list[Dict[str, object]] = []
+    for spec in output_specs or []:
+        if not spec.get("path"):
+            raise ValueError("Cada entregable necesita 'path'.")
+        path = pathlib.Path(str(spec["path"]))
+        output_format = str(spec.get("format") or path.suffix.lstrip(".") or "wav").lower()
+        sample_rate = spec.get("sample_rate")
+        bit_depth = spec.get("bit_depth")
+        deliverables.append({
+            "path": ensure_output_path(path, output_format),
+            "format": output_format,
+            "sample_rate": int(sample_rate) if sample_rate else None,
+            "bit_depth": str(bit_depth) if bit_depth else None,
+            "metadata": spec.get("metadata", metadata),
+        })
+    return deliverables
+
+
+def _split_deliverable_meters(stderr_text: str, deliverables: list[Dict[str, object]]) -> str:
+    """
+    Separa las mediciones por rama del log del render.
+
+    Los bloques JSON de los medidores se quitan del log, también los de un
+    índice que no corresponde a ningún entregable (los parsers existentes toman
+    el último bloque loudnorm, que debe seguir siendo el del master), y se
+    agregan como líneas de resumen que lee `parse_deliverable_stats`.
+    """
+    lines: list[tuple[int, str]] = []
+    for match in _DELIVERABLE_METER_RE.finditer(stderr_text or ""):
+        index = int(match.group(1))
+        if index >= len(deliverables):
+            continue
+        measured = extract_loudnorm_stats(match.group(2))
+        lines.append((index, (
+            f"Entregable {index} ({deliverables[index]['path']}): "
+            f"I={measured.get('input_i', float('nan')):.2f} LUFS, "
+            f"TP={measured.get('input_tp', float('nan')):.2f} dBTP, "
+            f"LRA={measured.get('input_lra', float('nan')):.2f} LU"
+        )))
+    cleaned = _DELIVERABLE_METER_RE.sub("", stderr_text or "")
+    summary = "\n".join(line for _index, line in sorted(lines))
+    return f"{cleaned}\n{summary}\n" if summary else cleaned
+
+
+def parse_deliverable_stats(log: str) -> Dict[str, Dict[str, float]]:
+    """Mediciones por entregable (`output_i`, `output_tp`, `output_lra`) indexadas por ruta."""
+    deliverable_stats: Dict[str, Dict[str, float]] = {}
+    for match in _DELIVERABLE_LINE_RE.finditer(log or ""):
+        deliverable_stats[match.group(1)] = {
+            "output_i": float(match.group(2)),
+            "output_tp": float(match.group(3)),
+            "output_lra": float(match.group(4)),
+        }
+    return deliverable_stats
+
+
+def render_loudness_targets(
+    input_path: pathlib.Path,
+    targets: list[Dict[str, object]],
+    stats: Dict[str, float],
+    overwrite: bool = False,
+    verbose: bool = False,
+    max_workers: int | None = None,
+    **options,
+) -> list[Dict[str, object]]:
+    """
+    Renderiza el mismo master a varios objetivos de loudness (-14, -16, -9...).
+
+    El preproceso se ejecuta una sola vez a un intermedio en coma flotante que
+    se mide una vez; después cada objetivo aplica en paralelo sólo su etapa
+    final (`audio.loudness.normalize` + limitador). `targets` lleva `path`,
+    `target_lufs` y opcionalmente `true_peak` y `output_specs` (entregables
+    de ese objetivo); `options` son los kwargs de `normalize_audio`; su
+    `progress_callback` sigue sólo al preproceso. Cada resultado trae log,
+    medición final y el registro de `build_execution_audit`.
+    """
+    if not targets:
+        return []
+    resolved = [{
+        "path": pathlib.Path(str(target["path"])),
+        "target_lufs": float(target["target_lufs"]),
+        "true_peak": float(target.get("true_peak", -1.0)),
+        "output_specs": target.get("output_specs") or None,
+    } for target in targets]
+    for target in resolved:
+        if target["path"].exists() and not overwrite:
+            raise FileExistsError(
+                f"El archivo de salida {target['path']} ya existe. Usa --overwrite para reemplazarlo."
+            )
+    progress_callback = options.pop("progress_callback", None)
+    options = {key: value for key, value in options.items() if key != "output_specs"}
+    raw_actions = options.pop("audio_actions", None)
+    actions = [
+        item if isinstance(item, AudioFunctionAction) else AudioFunctionAction.from_dict(item)
+        for item in raw_actions or []
+    ]
+    preprocess_actions = [action for action in actions if action.function_id not in TAIL_FUNCTION_IDS]
+    tail_actions = [action for action in actions if action.function_id in TAIL_FUNCTION_IDS]
+    preprocess_options = {key: value for key, value in options.items() if key not in _TAIL_OPTION_NAMES}
+    tail_options = {key: value for key, value in options.items() if key in _TAIL_OPTION_NAMES}
+    # El primer objetivo fija el headroom del preproceso compartido.
+    reference = resolved[0]
+
+    with tempfile.TemporaryDirectory(prefix="tonefinish_targets_") as temp_dir:
+        intermediate = pathlib.Path(temp_dir) / "preprocess.wav"
+        normalize_audio(
+            input_path, intermediate, stats, reference["target_lufs"], reference["true_peak"],
+            True, verbose, **{
+                **preprocess_options, "progress_callback": progress_callback,
+                "master_enabled": False, "output_sr": None,
+                "output_bit_depth": INTERMEDIATE_BIT_DEPTH, "output_format": "wav",
+                "audio_actions": [action.to_dict() for action in preprocess_actions] if raw_actions else None,
+            },
+        )
+        measured = analyze_loudness_ffmpeg(str(intermediate))
+        intermediate_stats = asdict(measured) if measured else dict(stats)
+
+        def render_target(target: Dict[str, object]) -> Dict[str, object]:
+            target_tail = [
+                AudioFunctionAction(
+                    action.function_id, action.enabled,
+                    {**dict(action.params), "target_lufs": target["target_lufs"],
+                     "true_peak_db": min(float(action.params.get("true_peak_db", target["true_peak"])), target["true_peak"])},
+                    action.target, action.reason, action.confidence, action.operation, action.evidence,
+                ) if action.function_id == "audio.loudness.normalize" else action
+                for action in tail_actions
+            ]
+            log = normalize_audio(
+                intermediate, target["path"], intermediate_stats, target["target_lufs"], target["true_peak"],
+                overwrite, verbose, **tail_options,
+                audio_actions=[action.to_dict() for action in target_tail] or None,
+                output_specs=target["output_specs"],
+            )
+            after = analyze_loudness_ffmpeg(str(target["path"]))
+            after_stats = asdict(after) if after else {}
+            executed = [*preprocess_actions, *target_tail] or [AudioFunctionAction(
+                "audio.loudness.normalize",
+                params={"target_lufs": target["target_lufs"], "true_peak_db": target["true_peak"]},
+            )]
+            audit = build_execution_audit(
+                executed, before_stats=stats, after_stats=after_stats,
+                target_lufs=target["target_lufs"], true_peak=target["true_peak"],
+            )
+            return {**target, "log": log, "post_stats": after_stats, "execution_audit": audit}
+
+        workers = max(1, min(len(resolved), int(max_workers or get_processing_limits()["max_ffmpeg_processes"])))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(render_target, resolved))
+
+
 def apply_output_gain(
     input_path: pathlib.Path,
     output_path: pathlib.Path,
@@ -658,9 +937,14 @@ def apply_output_gain(
         *codec_args,
         str(output_path),
     ]
+    cache_key = _render_key(cmd, input_path, output_path, graph.filter_chain)
+    cached = render_cache.lookup_render(cache_key, output_path)
+    if cached is not None:
+        return str(cached.get("stderr", ""))
     result = run_ffmpeg(cmd, verbose=verbose)
     if result.returncode != 0:
         raise RuntimeError(f"ffmpeg falló en ajuste de ganancia: {result.stderr.strip()}")
+    render_cache.store_render(cache_key, output_path, result.stderr)
     return result.stderr
 
 
@@ -679,6 +963,8 @@ def _build_codec_args(
                 codec_args.extend(["-c:a", "pcm_s24le"])
             elif output_bit_depth == "16":
                 codec_args.extend(["-c:a", "pcm_s16le"])
+            elif output_bit_depth == INTERMEDIATE_BIT_DEPTH:
+                codec_args.extend(["-c:a", "pcm_f32le"])
         elif fmt in ("aiff", "aif"):
             if output_bit_depth == "24":
                 codec_args.extend(["-c:a", "pcm_s24be"])
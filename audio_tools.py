@@ -7,6 +7,10 @@ import threading
 from array import array
 from typing import Dict, List, Optional, Any, Tuple
 
+import ffmpeg_accounting
+import tracing
+from ffmpeg_concurrency import FfmpegConcurrencyController
+
 
 # Caché en memoria para evitar llamadas repetidas a FFprobe en la misma sesión
 _audio_info_cache: Dict[str, Dict] = {}
@@ -38,7 +42,18 @@ _FFMPEG_THREADS = _read_int_env(
     1,
     max(1, _CPU_COUNT),
 )
-_FFMPEG_SEMAPHORE = threading.BoundedSemaphore(_MAX_FFMPEG_PROCS)
+# Techo del control adaptativo: TONEFINISH_MAX_FFMPEG_PROCS explícito es un
+# tope del usuario; sin él, el límite puede crecer hasta un proceso por núcleo.
+_FFMPEG_PROCS_CEILING = (
+    _MAX_FFMPEG_PROCS
+    if os.getenv("TONEFINISH_MAX_FFMPEG_PROCS", "").strip()
+    else _read_int_env("TONEFINISH_FFMPEG_PROCS_CEILING", max(_MAX_FFMPEG_PROCS, _CPU_COUNT), 1, 256)
+)
+_FFMPEG_LIMITER = FfmpegConcurrencyController(
+    initial=_MAX_FFMPEG_PROCS,
+    max_limit=_FFMPEG_PROCS_CEILING,
+    adaptive=os.getenv("TONEFINISH_FFMPEG_ADAPTIVE", "1").strip().lower() not in {"0", "false", "no", "off"},
+)
 _RUNNING_FFMPEG_PROCS: set[subprocess.Popen[str]] = set()
 _RUNNING_FFMPEG_LOCK = threading.Lock()
 _FFMPEG_RETRY_ATTEMPTS = _read_int_env("TONEFINISH_FFMPEG_RETRY_ATTEMPTS", 2, 0, 5)
@@ -150,7 +165,8 @@ def _run_with_ffmpeg_retries(cmd: List[str]) -> subprocess.CompletedProcess[str]
     max_tries = max(1, _FFMPEG_RETRY_ATTEMPTS + 1)
     last: subprocess.CompletedProcess[str] | None = None
     for attempt in range(1, max_tries + 1):
-        process = subprocess.Popen(
+        started = time.perf_counter()
+        process = ffmpeg_accounting.AccountedPopen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -163,6 +179,9 @@ def _run_with_ffmpeg_retries(cmd: List[str]) -> subprocess.CompletedProcess[str]
         finally:
             with _RUNNING_FFMPEG_LOCK:
                 _RUNNING_FFMPEG_PROCS.discard(process)
+        ffmpeg_accounting.record_process(
+            cmd, process, time.perf_counter() - started, stderr or "", _cached_input_duration(cmd)
+        )
         result = subprocess.CompletedProcess(
             args=cmd,
             # Preserve negative return codes (e.g. SIGABRT=-6, SIGSEGV=-11).
@@ -182,6 +201,20 @@ def _run_with_ffmpeg_retries(cmd: List[str]) -> subprocess.CompletedProcess[str]
     return last if last is not None else subprocess.CompletedProcess(cmd, 1, "", "")
 
 
+def _cached_input_duration(cmd: List[str]) -> float | None:
+    """Duración de la entrada si ya está en la caché de `get_audio_info` (sin lanzar ffprobe)."""
+    for flag, value in zip(cmd, cmd[1:]):
+        if flag == "-i":
+            duration = (_audio_info_cache.get(value) or {}).get("duration")
+            return float(duration) if isinstance(duration, (int, float)) and duration > 0 else None
+    return None
+
+
+def get_ffmpeg_usage_report(since: float | None = None, by: str = "call_site") -> List[Dict[str, Any]]:
+    """Costo agregado de los FFmpeg ejecutados (CPU, RSS, factor de tiempo real) por sitio de llamada."""
+    return ffmpeg_accounting.summarize(ffmpeg_accounting.accountant().records(since=since), by=by)
+
+
 def cancel_running_ffmpeg_processes() -> int:
     """Intenta terminar procesos ffmpeg activos y retorna cuántos fueron señalados."""
     with _RUNNING_FFMPEG_LOCK:
@@ -210,21 +243,33 @@ def get_processing_limits() -> Dict[str, int]:
     """Retorna límites efectivos de recursos para procesamiento."""
     return {
         "cpu_count": _CPU_COUNT,
-        "max_ffmpeg_processes": _MAX_FFMPEG_PROCS,
+        "max_ffmpeg_processes": _FFMPEG_LIMITER.limit,
         "ffmpeg_threads_per_process": _FFMPEG_THREADS,
     }
 
 
+def set_ffmpeg_load_thresholds(cpu_soft_limit: float, memory_soft_limit: float, min_free_ram_gb: float) -> None:
+    """Umbrales de CPU/RAM a partir de los cuales el control adaptativo reduce procesos FFmpeg."""
+    _FFMPEG_LIMITER.set_thresholds(cpu_soft_limit, memory_soft_limit, min_free_ram_gb)
+
+
+def get_ffmpeg_concurrency_metrics() -> Dict[str, Any]:
+    """Estado del control adaptativo de FFmpeg (límite, en curso, ajustes, última muestra)."""
+    return _FFMPEG_LIMITER.metrics()
+
+
 def set_processing_limits(max_ffmpeg_processes: int | None = None, ffmpeg_threads_per_process: int | None = None) -> Dict[str, int]:
     """Ajusta límites globales de FFmpeg para la sesión actual."""
-    global _MAX_FFMPEG_PROCS, _FFMPEG_THREADS, _FFMPEG_SEMAPHORE
+    global _MAX_FFMPEG_PROCS, _FFMPEG_THREADS
 
     new_max_procs = _MAX_FFMPEG_PROCS if max_ffmpeg_processes is None else max(1, min(8, int(max_ffmpeg_processes)))
     new_threads = _FFMPEG_THREADS if ffmpeg_threads_per_process is None else max(1, min(max(1, _CPU_COUNT), int(ffmpeg_threads_per_process)))
 
     _MAX_FFMPEG_PROCS = new_max_procs
     _FFMPEG_THREADS = new_threads
-    _FFMPEG_SEMAPHORE = threading.BoundedSemaphore(_MAX_FFMPEG_PROCS)
+    # Punto de partida del control adaptativo; los procesos en curso no se
+    # cortan y el límite sigue ajustándose según la carga.
+    _FFMPEG_LIMITER.reset(_MAX_FFMPEG_PROCS)
     return get_processing_limits()
 
 
@@ -366,20 +411,25 @@ def run_ffmpeg(cmd: List[str], verbose: bool = False, optimize: bool = True) ->
     
     if verbose:
         print(" ".join(cmd))
-    if cmd and cmd[0] == _FFMPEG_BIN:
-        _FFMPEG_SEMAPHORE.acquire()
-        try:
-            result = _run_with_ffmpeg_retries(cmd)
-        finally:
-            _FFMPEG_SEMAPHORE.release()
-        return _rerun_with_fallback_ffmpeg(result, verbose=verbose, optimize=optimize)
-
-    return subprocess.run(
-        cmd,
-        text=True,
-        capture_output=True,
-        check=False,
-    )
+    with tracing.span("run_ffmpeg", "ffmpeg", cmd=tracing.ffmpeg_signature(cmd)) as span_args:
+        if cmd and cmd[0] == _FFMPEG_BIN:
+            with _FFMPEG_LIMITER.slot():
+                result = _run_with_ffmpeg_retries(cmd)
+            result = _rerun_with_fallback_ffmpeg(result, verbose=verbose, optimize=optimize)
+        else:
+            # ffprobe y otros binarios: también quedan en la contabilidad de recursos.
+            started = time.perf_counter()
+            process = ffmpeg_accounting.AccountedPopen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            stdout, stderr = process.communicate()
+            ffmpeg_accounting.record_process(cmd, process, time.perf_counter() - started, stderr or "")
+            result = subprocess.CompletedProcess(cmd, process.returncode, stdout or "", stderr or "")
+        span_args["returncode"] = result.returncode
+        return result
 
 
 def run_ffmpeg_with_progress(
@@ -405,14 +455,27 @@ def run_ffmpeg_with_progress(
     Returns:
         CompletedProcess con stdout y stderr combinados
     """
-    import re
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    from io import StringIO
-    
     if not cmd or (cmd[0] not in {"ffmpeg", _FFMPEG_BIN}):
         return run_ffmpeg(cmd, verbose, optimize)
-    
+
     cmd = _prepare_ffmpeg_cmd(cmd, optimize)
+    with tracing.span("run_ffmpeg", "ffmpeg", cmd=tracing.ffmpeg_signature(cmd), progress=True) as span_args:
+        result = _run_ffmpeg_with_progress(cmd, duration_seconds, progress_callback, verbose, optimize)
+        span_args["returncode"] = result.returncode
+        return result
+
+
+def _run_ffmpeg_with_progress(
+    cmd: List[str],
+    duration_seconds: float,
+    progress_callback,
+    verbose: bool,
+    optimize: bool,
+) -> subprocess.CompletedProcess[str]:
+    import re
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from io import StringIO
+
     
     # Agregar -progress pipe:1
     progress_cmd = cmd.copy()
@@ -432,9 +495,10 @@ def run_ffmpeg_with_progress(
     max_tries = max(1, _FFMPEG_RETRY_ATTEMPTS + 1)
     for attempt in range(1, max_tries + 1):
         process: subprocess.Popen[str] | None = None
-        _FFMPEG_SEMAPHORE.acquire()
+        _FFMPEG_LIMITER.acquire()
+        started = time.perf_counter()
         try:
-            process = subprocess.Popen(
+            process = ffmpeg_accounting.AccountedPopen(
                 progress_cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -510,7 +574,7 @@ def run_ffmpeg_with_progress(
             if process is not None:
                 with _RUNNING_FFMPEG_LOCK:
                     _RUNNING_FFMPEG_PROCS.discard(process)
-            _FFMPEG_SEMAPHORE.release()
+            _FFMPEG_LIMITER.release()
 
         completed = subprocess.CompletedProcess(
             args=progress_cmd,
@@ -518,6 +582,9 @@ def run_ffmpeg_with_progress(
             stdout=stdout_output.getvalue(),
             stderr=stderr_output.getvalue(),
         )
+        ffmpeg_accounting.record_process(
+            progress_cmd, process, time.perf_counter() - started, completed.stderr, duration_seconds or None
+        )
         if completed.returncode == 0:
             if progress_callback:
                 progress_callback(100.0, "Completado")
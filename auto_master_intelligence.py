@@ -20,13 +20,10 @@ from audio_analysis import (
     analyze_silence_edges,
 )
 from config import BAND_CONFIG, BAND_HEADROOM_DB, MAX_SATURATION_DRIVE_DB, MULTIBAND_LIMITER_DEFAULTS
+from lazy_imports import lazy_module, module_available
 
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except Exception:
-    np = None  # type: ignore
-    NUMPY_AVAILABLE = False
+NUMPY_AVAILABLE = module_available("numpy")
+np = lazy_module("numpy", globals(), "np")
 
 # Importar análisis de diagnóstico (métricas precisas de LUFS/LRA/True Peak)
 try:
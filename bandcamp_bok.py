@@ -32,6 +32,8 @@ import json
 import urllib.request
 from typing import Any, Dict, Optional
 
+import tracing
+
 
 # ── Templates por defecto ──
 
@@ -126,12 +128,14 @@ def _call_api(
             "Authorization": "Bearer %s" % api_key,
         },
     )
-    try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            body = json.loads(resp.read())
-            return str(body["choices"][0]["message"]["content"]).strip()
-    except Exception:
-        return None
+    with tracing.span("ai_request", "ai", model=model) as span_args:
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                body = json.loads(resp.read())
+                return str(body["choices"][0]["message"]["content"]).strip()
+        except Exception as exc:
+            span_args["error"] = type(exc).__name__
+            return None
 
 
 def call_deepseek(
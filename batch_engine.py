@@ -0,0 +1,1980 @@
+"""
+Motor de procesamiento por lotes sin dependencias de Qt.
+
+`BatchEngine` es el núcleo que antes vivía en `ui.workers.BatchWorker` (un
+`QObject`): los runners headless (`main.py batch`, el runner de jobs SpASM)
+lo usan directamente, sin importar PySide6 ni el resto de la UI. Los eventos
+se publican por `EventHook` (`connect`/`emit`, síncronos en el hilo del lote);
+`ui.workers.BatchWorker` sólo los reenvía a señales Qt.
+
+`engine_from_settings()` arma el motor desde un diccionario plano de opciones
+(el payload de un job o un preset JSON) completando con `DEFAULT_BATCH_SETTINGS`.
+"""
+
+from __future__ import annotations
+
+import pathlib
+import math
+import re
+import os
+import shutil
+import tempfile
+import time
+import threading
+import json
+import copy
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Optional, Tuple, NamedTuple
+
+from logic_backend import (
+    analyze_audio,
+    analyze_audio_with_filter,
+    evaluate_mix,
+    write_analysis_toml,
+    apply_output_gain,
+    build_preprocess_chain,
+    ensure_output_path,
+    normalize_audio,
+    resolve_repair_levels,
+)
+from analysis_mts import write_mts_artifacts
+from adaptive_rollout_phase8 import (
+    build_rollout_report,
+    collect_rollout_item,
+    write_rollout_report,
+)
+from adaptive_rollout_safety import get_rollout_flags
+from auto_master_intelligence import AudioCharacteristics
+from output_naming import mastered_output_stem
+from audio_tools import get_ffmpeg_usage_report
+from audio_processing import parse_deliverable_stats, render_loudness_targets
+from batch_pipeline import PipelineStage, StagedPipeline, pipeline_depth
+from process_pool import BatchProcessPool, ProcessJob, process_pool_workers
+import ffmpeg_accounting
+import tracing
+from logic_backend import (
+    adapt_preset_to_audio,
+    call_many,
+    get_runtime_resource_info,
+    cancel_running_ffmpeg_processes,
+    ensure_ffmpeg_available,
+    extract_loudnorm_stats,
+    get_processing_limits,
+)
+from cache import get_cached_analysis, save_analysis_cache
+from config import (
+    DEFAULT_BAND_RANGE_DB,
+    DEFAULT_MAX_ADJUST_DB,
+    INPUT_FORMATS,
+    LOUDNESS_PRESETS,
+    TRANSPARENT_BAND_RANGE_DB,
+    TRANSPARENT_MAX_ADJUST_DB,
+    TRUE_PEAK_SAFETY_MARGIN_DB,
+)
+from resource_governor import CpuBudget, ResourceGovernor
+from resource_monitor import shared_resource_monitor
+
+
+# Tipo para resultados de pre-análisis batch
+BatchAnalysisResult = Dict[str, Tuple[
+    Dict[str, float],  # band_stats
+    Optional[float],   # voice_rms
+    Dict[str, float],  # raw_stats
+]]
+
+class SingleFileAnalysis(NamedTuple):
+    path: pathlib.Path
+    raw_stats: Dict[str, float]
+    band_stats: Dict[str, float]
+    voice_rms: Optional[float]
+
+
+def _build_runtime_resource_info() -> Dict[str, Any]:
+    try:
+        info = get_runtime_resource_info()
+        if isinstance(info, dict):
+            return info
+    except Exception:
+        pass
+
+    monitor = shared_resource_monitor()
+    snapshot = monitor.snapshot()
+    gpu_snapshot = monitor.gpu_snapshot()
+    return {
+        "summary": snapshot.format_summary(),
+        "cpu": {
+            "cpu_count": snapshot.cpu_count,
+            "cpu_percent": snapshot.cpu_percent,
+            "memory_percent": snapshot.memory_percent,
+            "memory_available_gb": snapshot.memory_available_gb,
+            "ffmpeg_processes": snapshot.ffmpeg_processes,
+        },
+        "gpu": {
+            "available": gpu_snapshot is not None,
+            "backend": gpu_snapshot.backend if gpu_snapshot else "none",
+            "device_count": gpu_snapshot.device_count if gpu_snapshot else 0,
+            "name": gpu_snapshot.name if gpu_snapshot else None,
+            "driver_version": gpu_snapshot.driver_version if gpu_snapshot else None,
+            "utilization_percent": gpu_snapshot.utilization_percent if gpu_snapshot else None,
+            "memory_total_mb": gpu_snapshot.memory_total_mb if gpu_snapshot else None,
+            "memory_used_mb": gpu_snapshot.memory_used_mb if gpu_snapshot else None,
+            "memory_free_mb": gpu_snapshot.memory_free_mb if gpu_snapshot else None,
+        },
+    }
+
+
+def _batch_cpu_budget() -> CpuBudget:
+    """Concurrencia por etapa del lote según el perfil de recursos actual."""
+    try:
+        return ResourceGovernor().build().cpu
+    except Exception:
+        return CpuBudget(1, 1, 1, 1, 75.0, 80.0, 2.0)
+
+
+def _format_runtime_resource_lines(resource_info: Dict[str, Any]) -> list[str]:
+    lines = [f"Recursos runtime: {resource_info.get('summary', 'N/A')}"]
+    engine_info = resource_info.get("engine")
+    if isinstance(engine_info, dict):
+        req = engine_info.get("requested_engine", "default")
+        resolved = engine_info.get("resolved_backend", "unknown")
+        fallback = engine_info.get("spasm_fallback_python_enabled")
+        cli = engine_info.get("spasm_cli")
+        lines.append(
+            "Engine: "
+            f"requested={req} | resolved={resolved} | "
+            f"fallback_python={'on' if bool(fallback) else 'off'}"
+        )
+        if cli:
+            lines.append(f"Engine CLI: {cli}")
+    cpu_info = resource_info.get("cpu")
+    if isinstance(cpu_info, dict):
+        cpu_count = cpu_info.get("cpu_count")
+        cpu_percent = cpu_info.get("cpu_percent")
+        memory_percent = cpu_info.get("memory_percent")
+        memory_available_gb = cpu_info.get("memory_available_gb")
+        ffmpeg_processes = cpu_info.get("ffmpeg_processes")
+        cpu_line = ["CPU"]
+        if cpu_count is not None:
+            cpu_line.append(f"{cpu_count} cores")
+        if cpu_percent is not None:
+            cpu_line.append(f"{float(cpu_percent):.0f}%")
+        if memory_percent is not None:
+            cpu_line.append(f"RAM {float(memory_percent):.0f}%")
+        if memory_available_gb is not None:
+            cpu_line.append(f"RAM libre {float(memory_available_gb):.1f} GB")
+        if ffmpeg_processes is not None:
+            cpu_line.append(f"FFmpeg {ffmpeg_processes}")
+        lines.append(" | ".join(cpu_line))
+    gpu_info = resource_info.get("gpu")
+    if isinstance(gpu_info, dict):
+        gpu_summary = "GPU no disponible"
+        if gpu_info.get("available"):
+            parts = [f"GPU devices={gpu_info.get('device_count', 'n/a')}"]
+            if gpu_info.get("name"):
+                parts.append(str(gpu_info["name"]))
+            if gpu_info.get("utilization_percent") is not None:
+                parts.append(f"GPU {float(gpu_info['utilization_percent']):.0f}%")
+            if gpu_info.get("memory_free_mb") is not None:
+                parts.append(f"VRAM libre {float(gpu_info['memory_free_mb']):.0f} MB")
+            gpu_summary = " | ".join(parts)
+        lines.append(f"GPU: {gpu_summary}")
+    return lines
+
+
+def _extract_loudnorm_output_stats(output: str) -> Dict[str, float] | None:
+    """Extrae el resumen final `Output ...` de loudnorm desde el log de FFmpeg."""
+    patterns = {
+        "input_i": r"Output Integrated:\s*(-?(?:\d+(?:\.\d+)?|inf|nan))\s*LUFS",
+        "input_tp": r"Output True Peak:\s*(-?(?:\d+(?:\.\d+)?|inf|nan))\s*dBTP",
+        "input_lra": r"Output LRA:\s*(-?(?:\d+(?:\.\d+)?|inf|nan))\s*LU",
+        "input_thresh": r"Output Threshold:\s*(-?(?:\d+(?:\.\d+)?|inf|nan))\s*LUFS",
+        "target_offset": r"Target Offset:\s*(-?(?:\d+(?:\.\d+)?|inf|nan))\s*LU",
+    }
+    stats: Dict[str, float] = {}
+    for key, pattern in patterns.items():
+        match = re.search(pattern, output, re.IGNORECASE)
+        if not match:
+            continue
+        try:
+            stats[key] = float(match.group(1))
+        except ValueError:
+            continue
+    return stats or None
+
+
+def _calibration_safe_mode_enabled() -> bool:
+    raw = (os.getenv("TONEFINISH_CALIBRATION_SAFE_MODE", "0") or "0").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _needs_severe_recalibration(
+    *,
+    post_stats: Dict[str, float],
+    target_lufs: float,
+    true_peak: float,
+) -> bool:
+    """
+    Criterio de calidad para habilitar recalibración post-render.
+    """
+    tp_target_effective = true_peak - TRUE_PEAK_SAFETY_MARGIN_DB
+    lufs_error = abs(float(post_stats.get("input_i", 0.0)) - target_lufs)
+    tp_error = float(post_stats.get("input_tp", 0.0)) - tp_target_effective
+    return lufs_error > 0.30 or tp_error > 0.20
+
+
+def _calibrate_output_from_logs(
+    *,
+    output_path: pathlib.Path,
+    initial_stats: Dict[str, float],
+    target_lufs: float,
+    true_peak: float,
+    limiter_ceiling_db: float | None,
+    limiter_release_ms: float | None,
+    output_sr: int | None,
+    output_bit_depth: str | None,
+    output_format: str | None,
+    metadata: Dict[str, str] | None,
+    verbose: bool,
+    emit_status: Callable[[str], None] | None = None,
+) -> Tuple[Dict[str, float], str]:
+    """Corrige LUFS/TP con realimentación basada en medición post-render."""
+    # Calibración adaptativa: FFmpeg puede no obedecer 1:1 el ajuste pedido.
+    # Se permite una segunda pasada para compensar ese desvío real medido.
+    # Dos pasadas estabilizan mejor LUFS/TP cuando la primera corrección queda corta.
+    # Hasta cuatro pasos acotados permiten corregir renders muy desviados sin
+    # aplicar de una vez una ganancia agresiva (p. ej. 3.9 LU requiere tres
+    # pasos con el límite conservador actual de 1.5 dB).
+    max_iterations = 4
+    lufs_tolerance = 0.20
+    true_peak_tolerance = 0.15
+    min_step_db = 0.08
+    tp_target_effective = true_peak - TRUE_PEAK_SAFETY_MARGIN_DB
+    stats = initial_stats
+    log_lines: list[str] = []
+    # Respuesta esperada del sistema: ~1 dB aplicado -> ~1 dB medido.
+    # Se actualiza con la respuesta observada para compensar "desobediencia".
+    gain_response = 1.0
+
+    for attempt in range(1, max_iterations + 1):
+        measured_lufs = float(stats.get("input_i", float("nan")))
+        measured_tp = float(stats.get("input_tp", float("nan")))
+        if not (math.isfinite(measured_lufs) and math.isfinite(measured_tp)):
+            break
+
+        delta_lufs = target_lufs - measured_lufs
+        tp_headroom = tp_target_effective - measured_tp
+        needs_lufs = abs(delta_lufs) > lufs_tolerance
+        needs_tp = measured_tp > (tp_target_effective + true_peak_tolerance)
+        if not needs_lufs and not needs_tp:
+            break
+
+        max_step_db = 0.85
+        if abs(delta_lufs) > 3.0 or measured_tp > (tp_target_effective + 0.5):
+            max_step_db = 1.5
+        if abs(delta_lufs) > 5.0:
+            max_step_db = 2.0
+        if abs(delta_lufs) > 8.0:
+            max_step_db = 2.5
+
+        if needs_tp and not needs_lufs:
+            gain_db = tp_headroom
+        else:
+            gain_db = delta_lufs
+            if gain_db > 0:
+                gain_db = min(gain_db, tp_headroom)
+            if needs_tp:
+                gain_db = min(gain_db, tp_headroom)
+        if abs(gain_response) > 0.05:
+            gain_db = gain_db / gain_response
+        gain_db = max(-max_step_db, min(max_step_db, gain_db))
+        if abs(gain_db) < min_step_db:
+            if needs_tp:
+                gain_db = -min_step_db
+            else:
+                break
+
+        if emit_status:
+            emit_status(
+                f"Calibrando salida ({attempt}/{max_iterations}): "
+                f"{gain_db:+.2f} dB, LUFS {measured_lufs:.2f}, TP {measured_tp:.2f} dBTP"
+            )
+
+        temp_path = output_path.with_name(f"{output_path.stem}.cal{attempt}{output_path.suffix}")
+        with tracing.span("calibration_iteration", "calibration", attempt=attempt, gain_db=round(gain_db, 3)):
+            apply_output_gain(
+                input_path=output_path,
+                output_path=temp_path,
+                gain_db=gain_db,
+                true_peak=true_peak,
+                limiter_ceiling_db=limiter_ceiling_db,
+                limiter_release_ms=limiter_release_ms,
+                output_sr=output_sr,
+                output_bit_depth=output_bit_depth,
+                output_format=output_format,
+                metadata=metadata,
+                overwrite=True,
+                verbose=verbose,
+            )
+            temp_path.replace(output_path)
+            stats, _ = analyze_audio(output_path, target_lufs, true_peak, verbose=False)
+        new_lufs = float(stats.get("input_i", float("nan")))
+        new_tp = float(stats.get("input_tp", float("nan")))
+        if (
+            math.isfinite(new_lufs)
+            and abs(gain_db) >= min_step_db
+            and math.isfinite(measured_lufs)
+        ):
+            observed_response = (new_lufs - measured_lufs) / gain_db
+            # Evitar valores extremos por ruido de medición.
+            observed_response = max(0.35, min(1.65, observed_response))
+            gain_response = 0.5 * gain_response + 0.5 * observed_response
+        log_lines.append(
+            "Calibracion "
+            f"{attempt}: gain={gain_db:+.2f} dB | "
+            f"LUFS {measured_lufs:.2f}->{new_lufs:.2f} | "
+            f"TP {measured_tp:.2f}->{new_tp:.2f} dBTP | "
+            f"resp={gain_response:.2f}"
+        )
+
+    return stats, "\n".join(log_lines)
+
+
+def _resolve_batch_deliverables(
+    output_specs: list[Dict[str, Any]] | None,
+    *,
+    output_path: pathlib.Path,
+    temp_dir: pathlib.Path,
+) -> list[tuple[Dict[str, Any], pathlib.Path]]:
+    """
+    Entregables extra de un tema: spec para el render temporal y ruta final.
+
+    Cada spec se nombra como la salida principal más su `suffix` opcional; el
+    formato define la extensión. Dos entregables no pueden compartir destino.
+    """
+    resolved: list[tuple[Dict[str, Any], pathlib.Path]] = []
+    taken = {output_path}
+    for spec in output_specs or []:
+        fmt = str(spec.get("format") or "wav").lower()
+        suffix = str(spec.get("suffix") or "")
+        final_path = ensure_output_path(output_path.with_name(f"{output_path.stem}{suffix}"), fmt)
+        if final_path in taken:
+            raise ValueError(f"Entregable duplicado: {final_path.name} (usa 'suffix' para distinguirlo).")
+        taken.add(final_path)
+        temp_spec = {**spec, "format": fmt, "path": str(temp_dir / final_path.name)}
+        resolved.append((temp_spec, final_path))
+    return resolved
+
+
+def _resolve_batch_loudness_targets(
+    loudness_targets: list[Dict[str, Any]] | None,
+    *,
+    output_path: pathlib.Path,
+    temp_dir: pathlib.Path,
+) -> list[tuple[Dict[str, Any], pathlib.Path]]:
+    """Objetivos de loudness extra de un tema: target para el render temporal y ruta final."""
+    resolved: list[tuple[Dict[str, Any], pathlib.Path]] = []
+    taken = {output_path}
+    for item in loudness_targets or []:
+        target_lufs = float(item["target_lufs"])
+        suffix = str(item.get("suffix") or f" ({target_lufs:g} LUFS)")
+        final_path = output_path.with_name(f"{output_path.stem}{suffix}{output_path.suffix}")
+        if final_path in taken:
+            raise ValueError(f"Objetivo de loudness duplicado: {final_path.name}.")
+        taken.add(final_path)
+        target = {
+            "path": str(temp_dir / final_path.name),
+            "target_lufs": target_lufs,
+            "true_peak": float(item.get("true_peak", -1.0)),
+        }
+        resolved.append((target, final_path))
+    return resolved
+
+
+def _verify_worker_ai_source(worker: Any, input_path: pathlib.Path) -> None:
+    expected = getattr(worker, "_ai_source_fingerprint", None)
+    actions = getattr(worker, "_ai_audio_actions", None)
+    if expected and actions:
+        from processes.audit import verify_audio_source
+
+        verify_audio_source(input_path, str(expected))
+
+
+def _build_preprocess_kwargs(
+    worker: Any,
+    *,
+    input_path: pathlib.Path,
+    band_stats: Dict[str, float] | None,
+    dynamic_eq: bool,
+    noise_level: str,
+    declip_level: str,
+    declick_level: str,
+    band_range_db: float,
+    max_adjust_db: float,
+) -> Dict[str, Any]:
+    _verify_worker_ai_source(worker, input_path)
+    return {
+        "input_path": input_path,
+        "band_stats": band_stats,
+        "dynamic_eq": dynamic_eq,
+        "stereo_width": worker.stereo_width,
+        "deesser": worker.deesser,
+        "deesser_freq_hz": worker.deesser_freq_hz,
+        "deesser_intensity": worker.deesser_intensity,
+        "tone_low_db": worker.tone_low_db,
+        "sub_bass_db": worker.sub_bass_db,
+        "tone_mid_db": worker.tone_mid_db,
+        "tone_high_db": worker.tone_high_db,
+        "tone_tilt_db": worker.tone_tilt_db,
+        "band_adjust_db": worker.band_adjust_db,
+        "band_widths": worker.band_widths,
+        "auto_band_gain": worker.auto_band_gain,
+        "saturation_enabled": worker.saturation_enabled,
+        "saturation_per_band": worker.saturation_per_band,
+        "saturation_type": worker.saturation_type,
+        "saturation_drive_db": worker.saturation_drive_db,
+        "saturation_mix": worker.saturation_mix,
+        "saturation_band_drive_db": worker.saturation_band_drive_db,
+        "saturation_band_mix": worker.saturation_band_mix,
+        "process_order": getattr(worker, "_auto_process_order", None) or worker.process_order,
+        "stereo_dynamic": worker.stereo_dynamic,
+        "stereo_dynamic_band_mix": worker.stereo_dynamic_band_mix,
+        "stereo_dynamic_threshold_db": worker.stereo_dynamic_threshold_db,
+        "stereo_dynamic_ratio": worker.stereo_dynamic_ratio,
+        "stereo_dynamic_attack_ms": worker.stereo_dynamic_attack_ms,
+        "stereo_dynamic_release_ms": worker.stereo_dynamic_release_ms,
+        "stereo_dynamic_mix": worker.stereo_dynamic_mix,
+        "noise_reduction_level": noise_level,
+        "declip_level": declip_level,
+        "declick_level": declick_level,
+        "pink_noise_level": worker.pink_noise_level,
+        "glue_enabled": worker.glue_enabled,
+        "glue_threshold_db": worker.glue_threshold_db,
+        "glue_ratio": worker.glue_ratio,
+        "glue_attack_ms": worker.glue_attack_ms,
+        "glue_release_ms": worker.glue_release_ms,
+        "glue_makeup_db": worker.glue_makeup_db,
+        "band_range_db": band_range_db,
+        "max_adjust_db": max_adjust_db,
+        "headroom_db": worker.headroom_db,
+        "autogain_maxgain": worker.autogain_maxgain,
+        "repair_enabled": worker.repair_enabled,
+        "mix_enabled": worker.mix_enabled,
+        "autogain_enabled": worker.autogain_enabled,
+        "multiband_limiter_enabled": worker.multiband_limiter_enabled,
+        "multiband_limiter_thresholds": worker.multiband_limiter_thresholds,
+        "audio_actions": getattr(worker, "_ai_audio_actions", None),
+    }
+
+
+def _build_normalize_kwargs(
+    worker: Any,
+    *,
+    input_path: pathlib.Path,
+    dynamic_eq: bool,
+    band_stats: Dict[str, float] | None,
+    output_format: str | None,
+    noise_level: str,
+    declip_level: str,
+    declick_level: str,
+    fade_in: float,
+    fade_out: float,
+    master_enabled: bool | None = None,
+    progress_callback: Callable[[float, str], None] | None = None,
+) -> Dict[str, Any]:
+    _verify_worker_ai_source(worker, input_path)
+    raw_band_mix = list(worker.stereo_dynamic_band_mix or [])
+    normalized_band_mix = [
+        (float(v) / 100.0) if float(v) > 1.0 else float(v)
+        for v in raw_band_mix
+    ]
+    stereo_dynamic_per_band = any(v > 0.0 for v in normalized_band_mix)
+
+    return {
+        "dynamic_eq": dynamic_eq,
+        "band_stats": band_stats,
+        "master_limiter_enabled": worker.master_limiter_enabled,
+        "master_limiter_mode": worker.master_limiter_mode,
+        "master_limiter_ceiling_db": worker.master_limiter_ceiling_db,
+        "master_limiter_release_ms": worker.master_limiter_release_ms,
+        "master_limiter_lookahead_ms": worker.master_limiter_lookahead_ms,
+        "output_sr": worker.output_sr,
+        "output_bit_depth": worker.output_bit_depth,
+        "output_format": output_format,
+        "stereo_width": worker.stereo_width,
+        "deesser": worker.deesser,
+        "deesser_freq_hz": worker.deesser_freq_hz,
+        "deesser_intensity": worker.deesser_intensity,
+        "tone_low_db": worker.tone_low_db,
+        "sub_bass_db": worker.sub_bass_db,
+        "tone_mid_db": worker.tone_mid_db,
+        "tone_high_db": worker.tone_high_db,
+        "tone_tilt_db": worker.tone_tilt_db,
+        "band_adjust_db": worker.band_adjust_db,
+        "band_widths": worker.band_widths,
+        "auto_band_gain": worker.auto_band_gain,
+        "saturation_enabled": worker.saturation_enabled,
+        "saturation_per_band": worker.saturation_per_band,
+        "saturation_type": worker.saturation_type,
+        "saturation_drive_db": worker.saturation_drive_db,
+        "saturation_mix": worker.saturation_mix,
+        "saturation_band_drive_db": worker.saturation_band_drive_db,
+        "saturation_band_mix": worker.saturation_band_mix,
+        "process_order": getattr(worker, "_auto_process_order", None) or worker.process_order,
+        "stereo_dynamic": worker.stereo_dynamic,
+        "stereo_dynamic_per_band": stereo_dynamic_per_band,
+        "stereo_dynamic_band_mix": normalized_band_mix,
+        "stereo_dynamic_threshold_db": worker.stereo_dynamic_threshold_db,
+        "stereo_dynamic_ratio": worker.stereo_dynamic_ratio,
+        "stereo_dynamic_attack_ms": worker.stereo_dynamic_attack_ms,
+        "stereo_dynamic_release_ms": worker.stereo_dynamic_release_ms,
+        "stereo_dynamic_mix": worker.stereo_dynamic_mix,
+        "glue_enabled": worker.glue_enabled,
+        "glue_threshold_db": worker.glue_threshold_db,
+        "glue_ratio": worker.glue_ratio,
+        "glue_attack_ms": worker.glue_attack_ms,
+        "glue_release_ms": worker.glue_release_ms,
+        "glue_makeup_db": worker.glue_makeup_db,
+        "limiter_ceiling_db": worker.limiter_ceiling_db,
+        "limiter_release_ms": worker.limiter_release_ms,
+        "metadata": worker.metadata,
+        "noise_reduction_level": noise_level,
+        "declip_level": declip_level,
+        "declick_level": declick_level,
+        "pink_noise_level": worker.pink_noise_level,
+        "fade_in": fade_in,
+        "fade_out": fade_out,
+        "transparent_mode": worker.transparent_mode,
+        "headroom_db": worker.headroom_db,
+        "autogain_maxgain": worker.autogain_maxgain,
+        "repair_enabled": worker.repair_enabled,
+        "mix_enabled": worker.mix_enabled,
+        "master_enabled": worker.master_enabled if master_enabled is None else master_enabled,
+        "autogain_enabled": worker.autogain_enabled,
+        "multiband_limiter_enabled": worker.multiband_limiter_enabled,
+        "multiband_limiter_thresholds": worker.multiband_limiter_thresholds,
+        "progress_callback": progress_callback,
+        "audio_actions": getattr(worker, "_ai_audio_actions", None),
+    }
+
+
+def _analyze_single_file_for_batch(
+    audio_path: pathlib.Path,
+    target_lufs: float,
+    true_peak: float,
+    band_range_db: float,
+    use_cache: bool = True,
+) -> SingleFileAnalysis:
+    """
+    Analiza un archivo individual para el batch.
+    Retorna: (path, raw_stats, band_stats, voice_rms)
+    
+    Esta función está diseñada para ejecutarse en el pool de procesos del lote
+    (`ProcessJob`), así que argumentos y resultado deben ser picklables.
+    Usa el caché cuando está disponible.
+    """
+    # Intentar obtener del caché primero
+    if use_cache:
+        cached = get_cached_analysis(audio_path)
+        if cached:
+            # Solo necesitamos re-analizar para obtener raw_stats (depende de target_lufs)
+            raw_stats, _ = analyze_audio(audio_path, target_lufs, true_peak, verbose=False)
+            return SingleFileAnalysis(
+                audio_path,
+                raw_stats,
+                cached.get('band_stats', {}),
+                cached.get('voice_rms'),
+            )
+    
+    # Análisis completo: loudness, bandas/voz y (para el caché) la info del
+    # archivo viajan en un único request al backend.
+    calls = [
+        ("analyze_audio", (audio_path, target_lufs, true_peak), {"verbose": False}),
+        ("analyze_eq_and_voice", (audio_path,), {"verbose": False, "band_range_db": band_range_db}),
+    ]
+    if use_cache:
+        calls.append(("get_audio_info", (str(audio_path),), {}))
+    results = call_many(calls)
+    raw_stats, _ = results[0].unwrap()
+    band_stats, _suggestions, voice_rms = results[1].unwrap()
+    
+    # Guardar en caché
+    if use_cache:
+        audio_info = results[2].unwrap()
+        save_analysis_cache(audio_path, raw_stats, band_stats, [], voice_rms, audio_info)
+    
+    return SingleFileAnalysis(audio_path, raw_stats, band_stats, voice_rms)
+
+
+class EventHook:
+    """Señal mínima sin Qt: `connect(callback)` y `emit(*args)` síncrono."""
+
+    def __init__(self) -> None:
+        self._callbacks: list[Callable[..., Any]] = []
+
+    def connect(self, callback: Callable[..., Any]) -> None:
+        self._callbacks.append(callback)
+
+    def disconnect(self, callback: Callable[..., Any]) -> None:
+        self._callbacks.remove(callback)
+
+    def emit(self, *args: Any) -> None:
+        for callback in list(self._callbacks):
+            callback(*args)
+
+
+class BatchEngine:
+    """
+    Motor de lote sin Qt: análisis, render, calibración y reportes por archivo.
+
+    Publica su estado por cuatro `EventHook` con la misma firma que las
+    señales de `ui.workers.BatchWorker` (el adaptador Qt sólo las reenvía):
+
+    - `progress(mensaje, actual, total)`
+    - `processing_progress(porcentaje, tiempo)`: progreso de FFmpeg
+    - `finished(mensaje, resultados)`
+    - `error(mensaje)`
+    """
+
+    def __init__(
+        self,
+        files: list[pathlib.Path],
+        output_dir: pathlib.Path | None,
+        suffix: str,
+        target_lufs: float,
+        true_peak: float,
+        overwrite: bool,
+        verbose: bool,
+        dynamic_eq: bool,
+        master_limiter_enabled: bool,
+        master_limiter_mode: str,
+        master_limiter_ceiling_db: float,
+        master_limiter_release_ms: float,
+        master_limiter_lookahead_ms: float,
+        output_sr: int | None,
+        output_bit_depth: str | None,
+        output_format: str | None,
+        stereo_width: bool,
+        loudness_preset: str,
+        output_preset: str,
+        deesser: bool,
+        deesser_freq_hz: float,
+        deesser_intensity: float,
+        tone_low_db: float,
+        sub_bass_db: float,
+        tone_mid_db: float,
+        tone_high_db: float,
+        tone_tilt_db: float,
+        band_adjust_db: Dict[str, float],
+        band_widths: Dict[str, float],
+        auto_band_gain: bool,
+        saturation_enabled: bool,
+        saturation_per_band: bool,
+        saturation_type: str,
+        saturation_drive_db: float,
+        saturation_mix: float,
+        saturation_band_drive_db: Dict[str, float],
+        saturation_band_mix: Dict[str, float],
+        process_order: list[str],
+        stereo_dynamic: bool,
+        stereo_dynamic_band_mix: list[float],
+        stereo_dynamic_threshold_db: float,
+        stereo_dynamic_ratio: float,
+        stereo_dynamic_attack_ms: float,
+        stereo_dynamic_release_ms: float,
+        stereo_dynamic_mix: float,
+        glue_enabled: bool,
+        glue_threshold_db: float,
+        glue_ratio: float,
+        glue_attack_ms: float,
+        glue_release_ms: float,
+        glue_makeup_db: float,
+        limiter_ceiling_db: float | None,
+        limiter_release_ms: float | None,
+        metadata: Dict[str, str] | None,
+        fade_in: float,
+        fade_out: float,
+        fade_overrides: Dict[str, tuple[float, float]] | None,
+        transparent_mode: bool,
+        headroom_db: float,
+        noise_reduction_level: str,
+        declip_level: str,
+        declick_level: str,
+        pink_noise_level: str = "Off",
+        repair_enabled: bool = True,
+        mix_enabled: bool = True,
+        master_enabled: bool = True,
+        autogain_enabled: bool = True,
+        autogain_maxgain: float | None = None,
+        multiband_limiter_enabled: bool = False,
+        multiband_limiter_thresholds: Dict[str, float] | None = None,
+        mts_enabled: bool = True,
+        checkpoint_path: pathlib.Path | None = None,
+        resume_completed_files: set[str] | None = None,
+        cancel_token_path: pathlib.Path | None = None,
+        global_adjustments: Dict[str, Any] | None = None,
+        ia_providers: list | None = None,
+        ia_status: str = "off",
+        auto_master_style: str = "SUNO",
+        minimal_lra_threshold: float = 4.5,
+        minimal_crest_threshold: float = 8.5,
+        motion_profile_preference: str = "auto",
+        motion_amount: float = 1.0,
+        block_mode: bool = False,
+        output_specs: list[Dict[str, Any]] | None = None,
+        loudness_targets: list[Dict[str, Any]] | None = None,
+        process_pool: BatchProcessPool | None = None,
+        batch_reports: bool = True,
+    ) -> None:
+        self.progress = EventHook()
+        self.processing_progress = EventHook()
+        self.finished = EventHook()
+        self.error = EventHook()
+        self.files = files
+        self.output_dir = output_dir
+        self.suffix = suffix
+        self.output_specs = [dict(spec) for spec in output_specs or []]
+        self.loudness_targets = [dict(item) for item in loudness_targets or []]
+        self.batch_reports = batch_reports
+        self.target_lufs = target_lufs
+        self.true_peak = true_peak
+        self.overwrite = overwrite
+        self.verbose = verbose
+        self.dynamic_eq = dynamic_eq
+        self.master_limiter_enabled = master_limiter_enabled
+        # Back-compat: "brickwall" era el nombre histórico del limitador maestro.
+        self.brickwall = master_limiter_enabled
+        self.master_limiter_mode = master_limiter_mode
+        self.master_limiter_ceiling_db = master_limiter_ceiling_db
+        self.master_limiter_release_ms = master_limiter_release_ms
+        self.master_limiter_lookahead_ms = master_limiter_lookahead_ms
+        self.output_sr = output_sr
+        self.output_bit_depth = output_bit_depth
+        self.output_format = output_format
+        self.stereo_width = stereo_width
+        self.loudness_preset = loudness_preset
+        self.output_preset = output_preset
+        self.deesser = deesser
+        self.deesser_freq_hz = deesser_freq_hz
+        self.deesser_intensity = deesser_intensity
+        self.tone_low_db = tone_low_db
+        self.sub_bass_db = sub_bass_db
+        self.tone_mid_db = tone_mid_db
+        self.tone_high_db = tone_high_db
+        self.tone_tilt_db = tone_tilt_db
+        self.band_adjust_db = band_adjust_db
+        self.band_widths = band_widths
+        self.auto_band_gain = auto_band_gain
+        self.saturation_enabled = saturation_enabled
+        self.saturation_per_band = saturation_per_band
+        self.saturation_type = saturation_type
+        self.saturation_drive_db = saturation_drive_db
+        self.saturation_mix = saturation_mix
+        self.saturation_band_drive_db = saturation_band_drive_db
+        self.saturation_band_mix = saturation_band_mix
+        self.process_order = process_order
+        self.stereo_dynamic = stereo_dynamic
+        self.stereo_dynamic_band_mix = stereo_dynamic_band_mix
+        self.stereo_dynamic_threshold_db = stereo_dynamic_threshold_db
+        self.stereo_dynamic_ratio = stereo_dynamic_ratio
+        self.stereo_dynamic_attack_ms = stereo_dynamic_attack_ms
+        self.stereo_dynamic_release_ms = stereo_dynamic_release_ms
+        self.stereo_dynamic_mix = stereo_dynamic_mix
+        self.glue_enabled = glue_enabled
+        self.glue_threshold_db = glue_threshold_db
+        self.glue_ratio = glue_ratio
+        self.glue_attack_ms = glue_attack_ms
+        self.glue_release_ms = glue_release_ms
+        self.glue_makeup_db = glue_makeup_db
+        self.limiter_ceiling_db = limiter_ceiling_db
+        self.limiter_release_ms = limiter_release_ms
+        self.metadata = metadata
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+        self.fade_overrides = fade_overrides or {}
+        self.transparent_mode = transparent_mode
+        self.headroom_db = headroom_db
+        self.autogain_maxgain = autogain_maxgain
+        self.noise_reduction_level = noise_reduction_level
+        self.declip_level = declip_level
+        self.declick_level = declick_level
+        self.pink_noise_level = pink_noise_level
+        self.repair_enabled = repair_enabled
+        self.mix_enabled = mix_enabled
+        self.master_enabled = master_enabled
+        self.autogain_enabled = autogain_enabled
+        self.multiband_limiter_enabled = multiband_limiter_enabled
+        self.multiband_limiter_thresholds = multiband_limiter_thresholds
+        self.mts_enabled = mts_enabled
+        self.checkpoint_path = checkpoint_path
+        self.resume_completed_files = resume_completed_files or set()
+        self.cancel_token_path = cancel_token_path
+        self.global_adjustments = global_adjustments
+        self.ia_providers = ia_providers or []
+        self.ia_status = ia_status
+        self.auto_master_style = auto_master_style
+        self.minimal_lra_threshold = minimal_lra_threshold
+        self.minimal_crest_threshold = minimal_crest_threshold
+        self.motion_profile_preference = motion_profile_preference
+        self.motion_amount = motion_amount
+        self.block_mode = block_mode
+        # Pool compartido (p. ej. el del daemon de ingesta): el motor lo usa
+        # pero no lo cierra; sin pool propio se crea uno por lote.
+        self.process_pool = process_pool
+        self._base_auto_tunables = {
+            name: copy.deepcopy(getattr(self, name, None))
+            for name in (
+                "dynamic_eq",
+                "band_adjust_db",
+                "band_widths",
+                "stereo_width",
+                "deesser",
+                "glue_enabled",
+                "headroom_db",
+                "multiband_limiter_enabled",
+                "multiband_limiter_thresholds",
+                "noise_reduction_level",
+                "declip_level",
+                "declick_level",
+                "autogain_maxgain",
+            )
+        }
+        self._cancel_event = threading.Event()
+
+    def _restore_auto_tunables(self) -> None:
+        for name, value in self._base_auto_tunables.items():
+            setattr(self, name, copy.deepcopy(value))
+        if hasattr(self, "_auto_process_order"):
+            delattr(self, "_auto_process_order")
+        if hasattr(self, "_ai_audio_actions"):
+            delattr(self, "_ai_audio_actions")
+        if hasattr(self, "_ai_source_fingerprint"):
+            delattr(self, "_ai_source_fingerprint")
+
+    def _apply_auto_master_adjustments_for_file(
+        self,
+        adjustments: Dict[str, Any],
+    ) -> None:
+        actions = adjustments.get("audio_actions")
+        if isinstance(actions, list):
+            self._ai_audio_actions = copy.deepcopy(actions)
+            fingerprint = adjustments.get("source_fingerprint")
+            if fingerprint:
+                self._ai_source_fingerprint = str(fingerprint)
+        eq_adjustments = adjustments.get("eq_adjustments")
+        if isinstance(eq_adjustments, dict) and eq_adjustments:
+            if adjustments.get("band_eq_enabled") is False:
+                self.band_adjust_db = {}
+            else:
+                merged_eq = dict(self.band_adjust_db or {})
+                for band, value in eq_adjustments.items():
+                    try:
+                        merged_eq[str(band)] = max(-6.0, min(6.0, float(value)))
+                    except (TypeError, ValueError):
+                        continue
+                self.band_adjust_db = merged_eq
+                self.dynamic_eq = bool(adjustments.get("dynamic_eq_enabled", True))
+
+        band_widths = adjustments.get("band_widths")
+        if isinstance(band_widths, dict) and band_widths:
+            self.band_widths = {
+                str(band): max(0.0, min(2.0, float(width)))
+                for band, width in band_widths.items()
+                if isinstance(width, (int, float))
+            }
+            if self.band_widths:
+                self.stereo_width = True
+
+        if "headroom_db" in adjustments:
+            try:
+                self.headroom_db = max(-24.0, min(-8.0, float(adjustments["headroom_db"])))
+            except (TypeError, ValueError):
+                pass
+
+        if "deesser_enabled" in adjustments:
+            self.deesser = bool(adjustments.get("deesser_enabled"))
+        if "glue_enabled" in adjustments:
+            self.glue_enabled = bool(adjustments.get("glue_enabled"))
+
+        if adjustments.get("multiband_limiter_enabled") or adjustments.get("band_limiter_enabled"):
+            self.multiband_limiter_enabled = True
+        thresholds = adjustments.get("multiband_limiter_thresholds")
+        if isinstance(thresholds, dict) and thresholds:
+            self.multiband_limiter_thresholds = {
+                str(band): float(value)
+                for band, value in thresholds.items()
+                if isinstance(value, (int, float))
+            }
+
+        repair = adjustments.get("repair_settings")
+        if isinstance(repair, dict):
+            if repair.get("noise_reduction") and repair.get("noise_reduction") != "Off":
+                self.noise_reduction_level = str(repair["noise_reduction"])
+            if repair.get("declip") and repair.get("declip") != "Off":
+                self.declip_level = str(repair["declip"])
+            if repair.get("declick") and repair.get("declick") != "Off":
+                self.declick_level = str(repair["declick"])
+
+        if "autogain_maxgain" in adjustments:
+            try:
+                self.autogain_maxgain = float(adjustments["autogain_maxgain"])
+            except (TypeError, ValueError):
+                pass
+
+        process_order = adjustments.get("process_order")
+        if isinstance(process_order, list) and process_order:
+            self._auto_process_order = [str(item) for item in process_order]
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        cancel_running_ffmpeg_processes()
+        try:
+            from logic_backend import cancel_active_spasm_call
+            cancel_active_spasm_call()
+        except Exception:
+            pass
+
+    def _is_cancelled(self) -> bool:
+        if self._cancel_event.is_set():
+            return True
+        if self.cancel_token_path is not None and self.cancel_token_path.exists():
+            return True
+        return False
+
+    def _save_checkpoint(self, completed_files: list[str]) -> None:
+        if self.checkpoint_path is None:
+            return
+        payload: Dict[str, Any] = {}
+        try:
+            if self.checkpoint_path.exists():
+                with self.checkpoint_path.open("r", encoding="utf-8") as fh:
+                    loaded = json.load(fh)
+                if isinstance(loaded, dict):
+                    payload.update(loaded)
+        except Exception:
+            pass
+        payload.update(
+            {
+                "updated_at": time.time(),
+                "completed_files": completed_files,
+            }
+        )
+        try:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.checkpoint_path.open("w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+
+    def run(self) -> None:
+        # Spans por etapa (análisis, FFmpeg, IA, caché, MTS, calibración);
+        # al final del lote se exportan en `log/` como Chrome trace-event.
+        tracing_active = tracing.tracing_enabled()
+        if tracing_active:
+            tracing.start_tracing()
+        try:
+            self._run_batch()
+        finally:
+            if tracing_active:
+                tracing.stop_tracing()
+
+    def _run_batch(self) -> None:
+        usage_since = time.monotonic()
+        try:
+            ensure_ffmpeg_available()
+            files = [p for p in self.files if p.exists() and p.is_file()]
+            if not files:
+                self.error.emit("No se encontraron archivos seleccionados para procesar.")
+                return
+            completed_files = sorted(set(self.resume_completed_files))
+            if self.resume_completed_files:
+                files = [p for p in files if str(p.resolve()) not in self.resume_completed_files]
+                if not files:
+                    self.finished.emit("Lote ya estaba completado según checkpoint.", [])
+                    return
+
+            band_range = TRANSPARENT_BAND_RANGE_DB if self.transparent_mode else DEFAULT_BAND_RANGE_DB
+            max_adjust = TRANSPARENT_MAX_ADJUST_DB if self.transparent_mode else DEFAULT_MAX_ADJUST_DB
+
+            # Cola simple: un archivo por vez para evitar sobrecarga del sistema.
+            limits = get_processing_limits()
+            self.progress.emit(
+                "Recursos: "
+                f"{limits.get('max_ffmpeg_processes', 1)} procesos ffmpeg, "
+                f"{limits.get('ffmpeg_threads_per_process', 1)} threads/proceso.",
+                0,
+                len(files),
+            )
+            resource_info = _build_runtime_resource_info()
+            resource_lines = _format_runtime_resource_lines(resource_info)
+            self.progress.emit(" | ".join(resource_lines), 0, len(files))
+            effective_master_enabled = True
+            if not self.master_enabled:
+                self.progress.emit(
+                    "Aviso: 'Mastering habilitado' estaba en OFF. Se fuerza ON para render de salida.",
+                    0,
+                    len(files),
+                )
+
+            # Cada archivo se trata como una unidad independiente:
+            # deep analysis -> procesamiento -> validación rápida final.
+            processed = 0
+            results: list[dict] = []
+            output_paths_for_rollout: list[pathlib.Path] = []
+            mts_total = len(files)
+            mts_done = 0
+            mts_futures: dict[Future, dict[str, Any]] = {}
+
+            def collect_ready_mts(wait_one: bool = False) -> None:
+                nonlocal mts_done
+                if not mts_futures:
+                    return
+                if wait_one:
+                    done_set, _ = wait(set(mts_futures.keys()), return_when=FIRST_COMPLETED)
+                    done = list(done_set)
+                else:
+                    done = [future for future in list(mts_futures.keys()) if future.done()]
+                for future in done:
+                    meta = mts_futures.pop(future)
+                    mts_done += 1
+                    try:
+                        mts_paths = future.result()
+                        adaptive_status = "unknown"
+                        adaptive_path = mts_paths.get("adaptive_render_json_path")
+                        if adaptive_path:
+                            try:
+                                adaptive_status = json.loads(pathlib.Path(adaptive_path).read_text(encoding="utf-8")).get("status", "unknown")
+                            except Exception:
+                                adaptive_status = "unreadable"
+                        self.progress.emit(
+                            (
+                                f"Análisis temporal {mts_done}/{mts_total}: {meta['name']} "
+                                f"(ok, adaptive={adaptive_status}) -> {mts_paths['json_path'].name}"
+                            ),
+                            int(meta["idx"]),
+                            len(files),
+                        )
+                    except Exception as mts_exc:
+                        self.progress.emit(
+                            f"Análisis temporal {mts_done}/{mts_total}: {meta['name']} (aviso: {mts_exc})",
+                            int(meta["idx"]),
+                            len(files),
+                        )
+
+            # Pipeline por etapas: el análisis de N+1 y la estrategia IA de N+2
+            # se adelantan mientras se renderiza N; render, calibración,
+            # resultados y checkpoint siguen en orden en este hilo.
+            cpu_budget = _batch_cpu_budget()
+            depth = pipeline_depth()
+            mts_workers = cpu_budget.max_secondary_tasks if depth > 0 else 0
+            # Análisis y MTS corren en procesos aislados: usan todos los núcleos
+            # (sin GIL compartido) y un crash nativo sólo reintenta ese archivo.
+            owns_pool = self.process_pool is None
+            process_pool = self.process_pool or BatchProcessPool(process_pool_workers(cpu_budget.max_parallel_analysis))
+            pool_metrics_before = dict(process_pool.metrics)
+            mts_executor = process_pool if mts_workers > 0 else None
+
+            def analysis_stage(audio_path: pathlib.Path, _previous: Dict[str, Any]) -> tuple:
+                with tracing.file_scope(audio_path), tracing.span("analysis_stage", "stage"):
+                    return _analysis_stage(audio_path)
+
+            def _analysis_stage(audio_path: pathlib.Path) -> tuple:
+                try:
+                    analysis = process_pool.run(
+                        ProcessJob(
+                            "batch_engine:_analyze_single_file_for_batch",
+                            (audio_path, self.target_lufs, self.true_peak, band_range, True),
+                            label=audio_path.name,
+                        )
+                    )
+                    return analysis.raw_stats, analysis.band_stats, analysis.voice_rms
+                except Exception:
+                    if self._is_cancelled():
+                        raise
+                    # Si el análisis profundo falla, continuamos con un análisis mínimo
+                    # para no frenar todo el lote.
+                    raw_stats, _ = analyze_audio(audio_path, self.target_lufs, self.true_peak, verbose=False)
+                    return raw_stats, {}, None
+
+            def strategy_stage(audio_path: pathlib.Path, previous: Dict[str, Any]) -> Dict[str, Any]:
+                with tracing.file_scope(audio_path), tracing.span("strategy_stage", "stage"):
+                    return _strategy_stage(audio_path, previous)
+
+            def _strategy_stage(audio_path: pathlib.Path, previous: Dict[str, Any]) -> Dict[str, Any]:
+                raw_stats, band_stats, voice_rms = previous["analysis"]
+                characteristics = AudioCharacteristics(
+                    band_stats=band_stats,
+                    voice_rms=voice_rms,
+                    loudness_metrics={
+                        "lufs": float(raw_stats.get("input_i", -70.0)),
+                        "true_peak": float(raw_stats.get("input_tp", -70.0)),
+                        "lra": float(raw_stats.get("input_lra", 0.0)),
+                        "crest_factor": float(raw_stats.get("crest_factor", 0.0)),
+                        "rms_total": float(raw_stats.get("input_thresh", -70.0)),
+                        "peak_total": float(raw_stats.get("input_tp", -70.0)),
+                    },
+                )
+                return adapt_preset_to_audio(
+                    self.auto_master_style,
+                    characteristics,
+                    minimal_lra_threshold=self.minimal_lra_threshold,
+                    minimal_crest_threshold=self.minimal_crest_threshold,
+                    motion_profile_preference=self.motion_profile_preference,
+                    motion_amount=self.motion_amount,
+                    block_mode=self.block_mode,
+                    ia_providers=self.ia_providers,
+                    target_lufs=self.target_lufs,
+                    true_peak=self.true_peak,
+                    audio_id=str(audio_path),
+                )
+
+            pipeline = StagedPipeline(
+                files,
+                [
+                    PipelineStage("analysis", analysis_stage, cpu_budget.max_parallel_analysis),
+                    PipelineStage("strategy", strategy_stage, cpu_budget.max_secondary_tasks),
+                ],
+                depth=depth,
+                thread_name_prefix="tonefinish-batch",
+            )
+            self.progress.emit(
+                (
+                    f"Pipeline de lote: adelanto={depth} | análisis={cpu_budget.max_parallel_analysis} | "
+                    f"IA={cpu_budget.max_secondary_tasks} | MTS={mts_workers} | procesos={process_pool.workers}"
+                    if depth > 0
+                    else "Pipeline de lote: modo secuencial estricto activo."
+                ),
+                0,
+                len(files),
+            )
+
+            for staged in pipeline:
+                idx = staged.index + 1
+                audio_path = staged.item
+                if self._is_cancelled():
+                    pipeline.close()
+                    if owns_pool:
+                        process_pool.close()
+                    self.error.emit("Proceso cancelado por el usuario.")
+                    return
+                collect_ready_mts(wait_one=False)
+                file_start = time.perf_counter()
+                last_mark = file_start
+                last_mark_us = tracing.now_us()
+                stage_timings: list[tuple[str, float]] = []
+                tracing.set_current_file(audio_path)
+
+                def mark(stage_name: str) -> None:
+                    nonlocal last_mark, last_mark_us
+                    now = time.perf_counter()
+                    now_us = tracing.now_us()
+                    stage_timings.append((stage_name, now - last_mark))
+                    tracing.record(stage_name, "batch", last_mark_us, now_us)
+                    last_mark = now
+                    last_mark_us = now_us
+
+                self.progress.emit(f"Analizando {idx}/{len(files)}: {audio_path.name}", idx, len(files))
+                self.progress.emit(" | ".join(resource_lines), idx, len(files))
+
+                raw_stats, band_stats, voice_rms = staged.result("analysis")
+                mark("análisis")
+
+                self._restore_auto_tunables()
+                ai_master_info: Dict[str, Any] | None = None
+                if True:  # IA siempre; sin tokens/credenciales cae en SUNO Clásico.
+                    provider = self.ia_providers[0] if self.ia_providers else {}
+                    provider_model = str(provider.get("model", ""))
+                    self.progress.emit(
+                        f"Master asistido por IA ({self.ia_status}): consultando estrategia para {audio_path.name}",
+                        idx,
+                        len(files),
+                    )
+                    try:
+                        adjustments = staged.result("strategy")
+                        mark("estrategia IA")
+                        self.global_adjustments = adjustments
+                        self._apply_auto_master_adjustments_for_file(adjustments)
+                        notes = [
+                            str(item)
+                            for item in adjustments.get("notes", [])
+                        ] if isinstance(adjustments.get("notes"), list) else []
+                        used_ai_strategy = adjustments.get("strategy_source") == "ai"
+                        fallback_reason = str(adjustments.get("fallback_reason", "") or "")
+                        if not used_ai_strategy:
+                            fallback_reason = fallback_reason or next(
+                                (
+                                    str(item)
+                                    for item in notes
+                                    if "IA " in str(item) or str(item).startswith(("⚠", "🛟"))
+                                ),
+                                "IA no disponible; se usa SUNO Clásico",
+                            )
+                        ai_master_info = {
+                            "enabled": True,
+                            "status": "applied" if used_ai_strategy else "fallback",
+                            "provider": self.ia_status,
+                            "model": provider_model,
+                            "used_ai_strategy": used_ai_strategy,
+                            "fallback_reason": fallback_reason,
+                            "fallback_preset": adjustments.get("fallback_preset"),
+                            "strategy_source": adjustments.get("strategy_source"),
+                            "diagnosis": adjustments.get("diagnostics", ""),
+                            "notes": notes,
+                            "adjustments": adjustments,
+                            "decision_trace": adjustments.get("decision_trace", {}),
+                        }
+                        if used_ai_strategy:
+                            self.progress.emit(
+                                f"Master asistido por IA: estrategia IA aplicada a {audio_path.name}",
+                                idx,
+                                len(files),
+                            )
+                        else:
+                            note = next(
+                                (
+                                    str(item)
+                                    for item in adjustments.get("notes", [])
+                                    if "IA " in str(item) or str(item).startswith("⚠")
+                                ),
+                                "se usa SUNO Clásico",
+                            )
+                            self.progress.emit(
+                                f"Master asistido por IA: {note}",
+                                idx,
+                                len(files),
+                            )
+                    except Exception as exc:
+                        self.progress.emit(
+                            f"Master asistido por IA: fallo interno ({exc}); se cancela el tema.",
+                            idx,
+                            len(files),
+                        )
+                        # Nunca continuar con ajustes manuales/legacy si falla
+                        # también la construcción canónica de SUNO Clásico.
+                        raise RuntimeError(
+                            f"No se pudo construir una estrategia IA/SUNO canónica: {exc}"
+                        ) from exc
+                out_dir = self.output_dir if self.output_dir else audio_path.parent
+                output_base = out_dir / mastered_output_stem(audio_path.stem, self.suffix)
+                fmt = self.output_format or audio_path.suffix.lstrip(".")
+                output_path = ensure_output_path(output_base, fmt)
+                fade_key = str(audio_path)
+                fade_in = self.fade_in
+                fade_out = self.fade_out
+                if fade_key in self.fade_overrides:
+                    fade_in, fade_out = self.fade_overrides[fade_key]
+                
+                noise_level, declip_level, declick_level = resolve_repair_levels(
+                    raw_stats, self.noise_reduction_level, self.declip_level, self.declick_level
+                )
+                dynamic_eq = self.dynamic_eq
+                if dynamic_eq and not band_stats:
+                    dynamic_eq = False
+
+                self.progress.emit(f"Procesando {idx}/{len(files)}: Construyendo cadena...", idx, len(files))
+                preprocess_kwargs = _build_preprocess_kwargs(
+                    self,
+                    input_path=audio_path,
+                    band_stats=band_stats,
+                    dynamic_eq=dynamic_eq,
+                    noise_level=noise_level,
+                    declip_level=declip_level,
+                    declick_level=declick_level,
+                    band_range_db=band_range,
+                    max_adjust_db=max_adjust,
+                )
+                pre_chain, pre_output = build_preprocess_chain(**preprocess_kwargs)
+                with tempfile.TemporaryDirectory(prefix=f"tonefinish_{audio_path.stem}_") as temp_dir:
+                    temp_dir_path = pathlib.Path(temp_dir)
+                    temp_output_base = temp_dir_path / output_path.name
+                    temp_output_path = ensure_output_path(temp_output_base, fmt)
+                    deliverables = _resolve_batch_deliverables(
+                        self.output_specs if effective_master_enabled else None,
+                        output_path=output_path,
+                        temp_dir=temp_dir_path,
+                    )
+
+                    if pre_chain:
+                        stats, _log = analyze_audio_with_filter(
+                            input_path=audio_path,
+                            target_lufs=self.target_lufs,
+                            true_peak=self.true_peak,
+                            filter_chain=pre_chain,
+                            filter_output=pre_output,
+                            verbose=self.verbose,
+                        )
+                    else:
+                        stats, _log = analyze_audio(
+                            audio_path,
+                            self.target_lufs,
+                            self.true_peak,
+                            verbose=self.verbose,
+                        )
+                    mark("análisis inicial")
+
+                    self.progress.emit("Procesando y normalizando audio...", idx, len(files))
+
+                    # Callback para progreso detallado de FFmpeg
+                    def on_ffmpeg_progress(percent: float, time_str: str) -> None:
+                        if self._is_cancelled():
+                            cancel_running_ffmpeg_processes()
+                            raise RuntimeError("Proceso cancelado por el usuario.")
+                        self.processing_progress.emit(percent, time_str)
+
+                    normalize_kwargs = _build_normalize_kwargs(
+                        self,
+                        input_path=audio_path,
+                        dynamic_eq=dynamic_eq,
+                        band_stats=band_stats,
+                        output_format=fmt,
+                        noise_level=noise_level,
+                        declip_level=declip_level,
+                        declick_level=declick_level,
+                        fade_in=fade_in,
+                        fade_out=fade_out,
+                        master_enabled=effective_master_enabled,
+                        progress_callback=on_ffmpeg_progress,
+                    )
+                    # Objetivos extra (-16 Apple, -9 club...): el master es un
+                    # objetivo más del mismo preproceso intermedio, así el
+                    # preproceso corre una sola vez y sólo la etapa final se
+                    # repite por objetivo, en paralelo.
+                    extra_targets = _resolve_batch_loudness_targets(
+                        self.loudness_targets if effective_master_enabled else None,
+                        output_path=output_path,
+                        temp_dir=temp_dir_path,
+                    )
+                    rendered_targets: list[Dict[str, Any]] = []
+                    normalize_log = ""
+                    try:
+                        if extra_targets:
+                            self.progress.emit(
+                                f"Renderizando el master y {len(extra_targets)} objetivos de loudness extra...",
+                                idx,
+                                len(files),
+                            )
+                            master_target = {
+                                "path": str(temp_output_path),
+                                "target_lufs": self.target_lufs,
+                                "true_peak": self.true_peak,
+                                "output_specs": [spec for spec, _final in deliverables] or None,
+                            }
+                            master_rendered, *rendered_targets = render_loudness_targets(
+                                audio_path,
+                                [master_target, *(target for target, _final in extra_targets)],
+                                stats,
+                                overwrite=True,
+                                verbose=self.verbose,
+                                **normalize_kwargs,
+                            )
+                            normalize_log = str(master_rendered["log"])
+                        else:
+                            normalize_log = normalize_audio(
+                                input_path=audio_path,
+                                output_path=temp_output_path,
+                                stats=stats,
+                                target_lufs=self.target_lufs,
+                                true_peak=self.true_peak,
+                                overwrite=True,
+                                verbose=self.verbose,
+                                output_specs=[spec for spec, _final in deliverables] or None,
+                                **normalize_kwargs,
+                            )
+                    except Exception:
+                        if temp_output_path.exists():
+                            try:
+                                if temp_output_path.stat().st_size == 0:
+                                    temp_output_path.unlink()
+                            except Exception:
+                                pass
+                        raise
+                    mark("render")
+
+                    self.progress.emit("Validando salida temporal...", idx, len(files))
+                    post_stats = _extract_loudnorm_output_stats(normalize_log)
+                    if post_stats is None:
+                        try:
+                            post_stats = extract_loudnorm_stats(normalize_log)
+                        except Exception:
+                            post_stats = None
+                    if post_stats is None:
+                        post_stats, _post_log = analyze_audio(
+                            temp_output_path, self.target_lufs, self.true_peak, verbose=False
+                        )
+                    mark("validación")
+                    severe_recalibration = _needs_severe_recalibration(
+                        post_stats=post_stats,
+                        target_lufs=self.target_lufs,
+                        true_peak=self.true_peak,
+                    )
+                    # Ruta corta por defecto:
+                    # - corrección única obligatoria para desvíos grandes
+                    # - modo seguro opcional para forzar recalibración siempre
+                    needs_calibration = severe_recalibration or _calibration_safe_mode_enabled()
+                    if needs_calibration:
+                        self.progress.emit("Ajustando calibración final...", idx, len(files))
+                        post_stats, _calibration_log = _calibrate_output_from_logs(
+                            output_path=temp_output_path,
+                            initial_stats=post_stats,
+                            target_lufs=self.target_lufs,
+                            true_peak=self.true_peak,
+                            limiter_ceiling_db=self.limiter_ceiling_db,
+                            limiter_release_ms=self.limiter_release_ms,
+                            output_sr=self.output_sr,
+                            output_bit_depth=self.output_bit_depth,
+                            output_format=fmt,
+                            metadata=self.metadata,
+                            verbose=self.verbose,
+                            emit_status=lambda msg: self.progress.emit(msg, idx, len(files)),
+                        )
+                        if _calibration_log:
+                            normalize_log = "\n".join(
+                                part for part in [normalize_log.strip(), _calibration_log] if part
+                            )
+                    # Cada entregable trae su propia medición del mismo render y
+                    # se calibra por separado con sus parámetros de salida.
+                    deliverable_stats = parse_deliverable_stats(normalize_log)
+                    deliverable_results: list[Dict[str, Any]] = []
+                    for spec, final_path in deliverables:
+                        measured = deliverable_stats.get(spec["path"])
+                        if measured is None:
+                            # Sin medición no se puede validar ni calibrar: el
+                            # entregable se copia igual pero queda marcado.
+                            message = "sin medición de loudness en el log del render"
+                            self.progress.emit(f"Aviso entregable ({final_path.name}): {message}", idx, len(files))
+                            deliverable_results.append({"file": final_path.name, "after": None, "error": message})
+                            continue
+                        spec_stats = {
+                            "input_i": measured["output_i"],
+                            "input_tp": measured["output_tp"],
+                            "input_lra": measured["output_lra"],
+                        }
+                        if _needs_severe_recalibration(
+                            post_stats=spec_stats,
+                            target_lufs=self.target_lufs,
+                            true_peak=self.true_peak,
+                        ) or _calibration_safe_mode_enabled():
+                            spec_stats, _spec_log = _calibrate_output_from_logs(
+                                output_path=pathlib.Path(spec["path"]),
+                                initial_stats=spec_stats,
+                                target_lufs=self.target_lufs,
+                                true_peak=self.true_peak,
+                                limiter_ceiling_db=self.limiter_ceiling_db,
+                                limiter_release_ms=self.limiter_release_ms,
+                                output_sr=spec.get("sample_rate"),
+                                output_bit_depth=spec.get("bit_depth"),
+                                output_format=spec["format"],
+                                metadata=spec.get("metadata", self.metadata),
+                                verbose=self.verbose,
+                                emit_status=lambda msg: self.progress.emit(msg, idx, len(files)),
+                            )
+                        deliverable_results.append({"file": final_path.name, "after": spec_stats})
+                    self.progress.emit("Validando mezcla final...", idx, len(files))
+                    pre_rating, pre_advice = evaluate_mix(stats, self.target_lufs, self.true_peak)
+                    post_rating, post_advice = evaluate_mix(post_stats, self.target_lufs, self.true_peak)
+                    mark("evaluación")
+
+                    self.progress.emit("Copiando resultado final al destino...", idx, len(files))
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(temp_output_path, output_path)
+                    for spec, final_path in deliverables:
+                        shutil.copy2(spec["path"], final_path)
+                    target_results: list[Dict[str, Any]] = []
+                    for rendered, (_target, final_path) in zip(rendered_targets, extra_targets):
+                        shutil.copy2(rendered["path"], final_path)
+                        target_results.append({
+                            "file": final_path.name,
+                            "target_lufs": rendered["target_lufs"],
+                            "after": rendered["post_stats"],
+                            "execution_audit": rendered["execution_audit"],
+                        })
+                    mark("copia")
+
+                    self.progress.emit("Escribiendo reporte de análisis...", idx, len(files))
+                    if ai_master_info is not None:
+                        try:
+                            planned = ai_master_info.get("adjustments", {}).get("audio_actions", [])
+                            if isinstance(planned, list) and planned:
+                                from processes.audit import build_execution_audit, effective_execution_actions
+
+                                trace = ai_master_info.setdefault("decision_trace", {})
+                                if isinstance(trace, dict) and isinstance(planned, list):
+                                    executed = [
+                                        action.to_dict()
+                                        for action in effective_execution_actions(planned)
+                                    ]
+                                    trace["executed_actions"] = executed
+                                    trace["final_order"] = [
+                                        item.get("function_id") for item in executed
+                                        if isinstance(item, dict) and item.get("function_id")
+                                    ]
+                                    trace["execution_audit"] = build_execution_audit(
+                                        executed,
+                                        before_stats=stats,
+                                        after_stats=post_stats,
+                                        target_lufs=self.target_lufs,
+                                        true_peak=self.true_peak,
+                                    )
+                                    if trace["execution_audit"]["status"] != "passed":
+                                        self.progress.emit(
+                                            f"Control de calidad IA: {audio_path.name} requiere revisión.",
+                                            idx,
+                                            len(files),
+                                        )
+                            strategy_json_path = output_path.parent / "log" / f"{output_path.stem}.ai_master.json"
+                            strategy_json_path.parent.mkdir(parents=True, exist_ok=True)
+                            strategy_json_path.write_text(
+                                json.dumps(ai_master_info, ensure_ascii=False, indent=2),
+                                encoding="utf-8",
+                            )
+                            ai_master_info["strategy_json"] = strategy_json_path.name
+                        except Exception as exc:
+                            notes = ai_master_info.setdefault("notes", [])
+                            if isinstance(notes, list):
+                                notes.append(f"No se pudo escribir JSON IA: {exc}")
+                    write_analysis_toml(
+                        output_path=output_path,
+                        target_lufs=self.target_lufs,
+                        true_peak=self.true_peak,
+                        loudness_preset=(
+                            "IA" if ai_master_info and ai_master_info.get("used_ai_strategy")
+                            else "SUNO Clásico"
+                        ),
+                        output_preset=self.output_preset,
+                        output_sr=self.output_sr,
+                        output_bit_depth=self.output_bit_depth,
+                        output_format=fmt,
+                        dynamic_eq=dynamic_eq,
+                        stereo_width=self.stereo_width,
+                        brickwall=self.brickwall,
+                        analyze_only=False,
+                        deesser=self.deesser,
+                        fade_in=fade_in,
+                        fade_out=fade_out,
+                        signature=self.metadata,
+                        before_stats=stats,
+                        before_band=band_stats,
+                        before_voice=voice_rms,
+                        after_stats=post_stats,
+                        after_band={},
+                        after_voice=None,
+                        before_rating=pre_rating,
+                        before_advice=pre_advice,
+                        after_rating=post_rating,
+                        after_advice=post_advice,
+                        resource_info=resource_info,
+                        ai_master_info=ai_master_info,
+                    )
+                    mark("reporte")
+                    if self.mts_enabled and mts_executor is not None:
+                        self.progress.emit(
+                            f"Análisis temporal en cola {idx}/{mts_total}: {audio_path.name}",
+                            idx,
+                            len(files),
+                        )
+                        future = mts_executor.submit(ProcessJob(
+                            "analysis_mts:write_mts_artifacts",
+                            kwargs={
+                                "input_path": output_path,
+                                "output_path": output_path,
+                                "validation_context": {
+                                    "target_lufs": self.target_lufs,
+                                    "true_peak_target": self.true_peak,
+                                    "pre_stats": stats,
+                                    "post_stats": post_stats,
+                                    "dynamic_eq": dynamic_eq,
+                                    "deesser_enabled": self.deesser,
+                                    "stereo_dynamic_enabled": self.stereo_dynamic,
+                                    "stereo_dynamic_mix": self.stereo_dynamic_mix,
+                                    "stereo_dynamic_band_mix": self.stereo_dynamic_band_mix,
+                                    "multiband_limiter_enabled": self.multiband_limiter_enabled,
+                                    "multiband_limiter_thresholds": self.multiband_limiter_thresholds,
+                                    "saturation_enabled": self.saturation_enabled,
+                                    "saturation_per_band": self.saturation_per_band,
+                                    "saturation_mix": self.saturation_mix,
+                                    "saturation_drive_db": self.saturation_drive_db,
+                                    "saturation_band_mix": self.saturation_band_mix,
+                                    "saturation_band_drive_db": self.saturation_band_drive_db,
+                                    "global_adjustments": self.global_adjustments,
+                                },
+                            },
+                            label=audio_path.name,
+                        ))
+                        mts_futures[future] = {"idx": idx, "name": audio_path.name}
+                        collect_ready_mts(wait_one=False)
+                    else:
+                        self.progress.emit("Generando log temporal MTS...", idx, len(files))
+                        try:
+                            write_mts_artifacts(
+                                input_path=output_path,
+                                output_path=output_path,
+                                validation_context={
+                                    "target_lufs": self.target_lufs,
+                                    "true_peak_target": self.true_peak,
+                                    "pre_stats": stats,
+                                    "post_stats": post_stats,
+                                    "dynamic_eq": dynamic_eq,
+                                    "deesser_enabled": self.deesser,
+                                    "stereo_dynamic_enabled": self.stereo_dynamic,
+                                    "stereo_dynamic_mix": self.stereo_dynamic_mix,
+                                    "stereo_dynamic_band_mix": self.stereo_dynamic_band_mix,
+                                    "multiband_limiter_enabled": self.multiband_limiter_enabled,
+                                    "multiband_limiter_thresholds": self.multiband_limiter_thresholds,
+                                    "saturation_enabled": self.saturation_enabled,
+                                    "saturation_per_band": self.saturation_per_band,
+                                    "saturation_mix": self.saturation_mix,
+                                    "saturation_drive_db": self.saturation_drive_db,
+                                    "saturation_band_mix": self.saturation_band_mix,
+                                    "saturation_band_drive_db": self.saturation_band_drive_db,
+                                    "global_adjustments": self.global_adjustments,
+                                },
+                            )
+                            mark("mts")
+                        except Exception as mts_exc:
+                            self.progress.emit(f"Aviso MTS ({audio_path.name}): {mts_exc}", idx, len(files))
+                    self.progress.emit("Archivo finalizado.", idx, len(files))
+                    total_seconds = time.perf_counter() - file_start
+                results.append(
+                    {
+                        "file": audio_path.name,
+                        "source": str(audio_path.resolve()),
+                        "before": stats,
+                        "after": post_stats,
+                        "before_rating": pre_rating,
+                        "after_rating": post_rating,
+                        "timings": stage_timings,
+                        "total_seconds": total_seconds,
+                        "deliverables": deliverable_results,
+                        "loudness_targets": target_results,
+                    }
+                )
+                output_paths_for_rollout.append(output_path)
+                processed += 1
+                completed_files.append(str(audio_path.resolve()))
+                self._save_checkpoint(completed_files)
+
+            if mts_executor is not None:
+                while mts_futures:
+                    collect_ready_mts(wait_one=True)
+                self.progress.emit(
+                    f"Análisis temporal finalizado: {mts_done}/{mts_total} archivos.",
+                    len(files),
+                    len(files),
+                )
+            if owns_pool:
+                process_pool.close(wait=True)
+            pool_metrics = {
+                key: value - pool_metrics_before.get(key, 0) for key, value in process_pool.metrics.items()
+            }
+            if pool_metrics["crashes"]:
+                self.progress.emit(
+                    (
+                        f"Pool de procesos: {pool_metrics['crashes']} caída(s) de worker, "
+                        f"{pool_metrics['retried']} reintento(s), {pool_metrics['failed']} fallo(s)."
+                    ),
+                    len(files),
+                    len(files),
+                )
+
+            # Los reportes de lote (rollout, costo FFmpeg, traza) se escriben una
+            # vez por lote; quien procesa archivo por archivo los desactiva.
+            report_outputs = output_paths_for_rollout if self.batch_reports else []
+            # === FASE 8: REPORTE DE ROLLOUT A/B ===
+            try:
+                flags = get_rollout_flags()
+                rollout_percent = int(flags.get("adaptive_rollout_percent", 0) or 0)
+                adaptive_enabled = bool(flags.get("adaptive_master_enabled", False))
+                rollout_items = [
+                    collect_rollout_item(
+                        output_path=out_path,
+                        rollout_percent=rollout_percent,
+                        adaptive_master_enabled=adaptive_enabled,
+                    )
+                    for out_path in report_outputs
+                ]
+                rollout_report = build_rollout_report(
+                    items=rollout_items,
+                    rollout_percent=rollout_percent,
+                    adaptive_master_enabled=adaptive_enabled,
+                )
+                if report_outputs:
+                    report_dir = report_outputs[0].parent / "log"
+                    rollout_paths = write_rollout_report(report_dir=report_dir, report=rollout_report)
+                    summary = rollout_report.get("summary", {}) if isinstance(rollout_report.get("summary"), dict) else {}
+                    self.progress.emit(
+                        (
+                            "Rollout A/B: "
+                            f"canary={summary.get('canary_files', 0)}/{summary.get('total_files', 0)} | "
+                            f"guard_ok={summary.get('guard_ok_files', 0)} | "
+                            f"apply_ready={summary.get('apply_ready_files', 0)} | "
+                            f"enable_apply={summary.get('enable_apply_files', 0)} | "
+                            f"reporte={rollout_paths['json_path'].name}"
+                        ),
+                        len(files),
+                        len(files),
+                    )
+            except Exception as rollout_exc:
+                self.progress.emit(
+                    f"Aviso Rollout A/B: {rollout_exc}",
+                    len(files),
+                    len(files),
+                )
+
+            usage_records = ffmpeg_accounting.accountant().records(since=usage_since)
+            if usage_records and report_outputs:
+                try:
+                    usage_path = ffmpeg_accounting.write_usage_report(
+                        report_outputs[0].parent / "log", usage_records
+                    )
+                    usage_lines = ffmpeg_accounting.format_report(get_ffmpeg_usage_report(since=usage_since), limit=3)
+                    self.progress.emit(
+                        f"Costo FFmpeg ({usage_path.name}): " + " | ".join(usage_lines),
+                        len(files),
+                        len(files),
+                    )
+                except Exception as usage_exc:
+                    self.progress.emit(f"Aviso costo FFmpeg: {usage_exc}", len(files), len(files))
+
+            tracing.set_current_file(None)
+            tracer = tracing.active_tracer()
+            if tracer is not None and report_outputs:
+                try:
+                    trace_path = tracer.write_chrome_trace(
+                        tracing.batch_trace_path(report_outputs[0].parent / "log")
+                    )
+                    self.progress.emit(
+                        f"Traza del lote: {trace_path.name} (python -m tracing {trace_path.name})",
+                        len(files),
+                        len(files),
+                    )
+                except Exception as trace_exc:
+                    self.progress.emit(f"Aviso traza del lote: {trace_exc}", len(files), len(files))
+
+            self.finished.emit(f"Lote completado: {processed} archivos.", results)
+        except Exception as exc:
+            try:
+                pipeline_local = locals().get("pipeline")
+                if pipeline_local is not None:
+                    pipeline_local.close()
+                process_pool_local = locals().get("process_pool")
+                if process_pool_local is not None and process_pool_local is not self.process_pool:
+                    process_pool_local.close()
+            except Exception:
+                pass
+            self.error.emit(str(exc))
+
+
+# ── Opciones planas: payload de job, preset JSON, manifiesto ──
+
+# Valores por defecto de cada opción de `BatchEngine` (los de `normalize_audio`
+# y los de la UI al abrirse). Un preset o manifiesto sólo declara lo que cambia.
+DEFAULT_BATCH_SETTINGS: Dict[str, Any] = {
+    "output_dir": None,
+    "suffix": "O-M-A",
+    "target_lufs": -14.0,
+    "true_peak": -1.0,
+    "overwrite": False,
+    "verbose": False,
+    "dynamic_eq": False,
+    "master_limiter_enabled": False,
+    "master_limiter_mode": "transparent",
+    "master_limiter_ceiling_db": -1.0,
+    "master_limiter_release_ms": 150.0,
+    "master_limiter_lookahead_ms": 5.0,
+    "output_sr": None,
+    "output_bit_depth": None,
+    "output_format": None,
+    "stereo_width": False,
+    "loudness_preset": "Manual",
+    "output_preset": "Manual",
+    "deesser": False,
+    "deesser_freq_hz": 6000.0,
+    "deesser_intensity": 1.0,
+    "tone_low_db": 0.0,
+    "sub_bass_db": 0.0,
+    "tone_mid_db": 0.0,
+    "tone_high_db": 0.0,
+    "tone_tilt_db": 0.0,
+    "band_adjust_db": {},
+    "band_widths": {},
+    "auto_band_gain": False,
+    "saturation_enabled": False,
+    "saturation_per_band": False,
+    "saturation_type": "Tape",
+    "saturation_drive_db": 0.0,
+    "saturation_mix": 0.0,
+    "saturation_band_drive_db": {},
+    "saturation_band_mix": {},
+    "process_order": [],
+    "stereo_dynamic": False,
+    "stereo_dynamic_band_mix": [],
+    "stereo_dynamic_threshold_db": -24.0,
+    "stereo_dynamic_ratio": 1.6,
+    "stereo_dynamic_attack_ms": 20.0,
+    "stereo_dynamic_release_ms": 150.0,
+    "stereo_dynamic_mix": 0.6,
+    "glue_enabled": False,
+    "glue_threshold_db": -18.0,
+    "glue_ratio": 1.4,
+    "glue_attack_ms": 20.0,
+    "glue_release_ms": 120.0,
+    "glue_makeup_db": 0.0,
+    "limiter_ceiling_db": None,
+    "limiter_release_ms": None,
+    "metadata": {},
+    "fade_in": 0.0,
+    "fade_out": 0.0,
+    "fade_overrides": {},
+    "transparent_mode": False,
+    "headroom_db": -17.0,
+    "noise_reduction_level": "Off",
+    "declip_level": "Off",
+    "declick_level": "Off",
+    "pink_noise_level": "Off",
+    "repair_enabled": True,
+    "mix_enabled": True,
+    "master_enabled": True,
+    "autogain_enabled": True,
+    "autogain_maxgain": None,
+    "multiband_limiter_enabled": False,
+    "multiband_limiter_thresholds": {},
+    "mts_enabled": True,
+    "global_adjustments": None,
+    "auto_master_style": "SUNO",
+    "minimal_lra_threshold": 4.5,
+    "minimal_crest_threshold": 8.5,
+    "motion_profile_preference": "auto",
+    "motion_amount": 1.0,
+    "block_mode": False,
+    "output_specs": [],
+    "loudness_targets": [],
+}
+# Opciones numéricas que admiten None ("usar el valor automático").
+_OPTIONAL_FLOAT_SETTINGS = {"limiter_ceiling_db", "limiter_release_ms", "autogain_maxgain"}
+# Claves de un payload de job que no son opciones de proceso.
+_PAYLOAD_ONLY_KEYS = {"files", "checkpoint_path", "resume_completed_files", "progress_socket", "job_id", "priority"}
+
+
+def _coerce_setting(name: str, value: Any) -> Any:
+    default = DEFAULT_BATCH_SETTINGS[name]
+    if value is None:
+        return None if default is None or name in _OPTIONAL_FLOAT_SETTINGS else copy.deepcopy(default)
+    if name in _OPTIONAL_FLOAT_SETTINGS or isinstance(default, float):
+        return float(value)
+    if name == "output_sr":
+        return int(value)
+    if name == "output_dir":
+        return pathlib.Path(value)
+    if isinstance(default, bool):
+        return bool(value)
+    if isinstance(default, dict):
+        return dict(value)
+    if isinstance(default, list):
+        return list(value)
+    if isinstance(default, str) or name in {"output_bit_depth", "output_format"}:
+        return str(value)
+    return value
+
+
+def resolve_batch_settings(*layers: Dict[str, Any] | None) -> Dict[str, Any]:
+    """
+    Combina capas de opciones (defaults < preset < manifiesto < CLI) y
+    convierte cada valor al tipo que espera `BatchEngine`. Una clave
+    desconocida es un error: un preset con un typo no debe ignorarse en silencio.
+    """
+    settings = copy.deepcopy(DEFAULT_BATCH_SETTINGS)
+    for layer in layers:
+        for name, value in (layer or {}).items():
+            if name in _PAYLOAD_ONLY_KEYS:
+                continue
+            if name not in DEFAULT_BATCH_SETTINGS:
+                raise ValueError(f"Opción de lote desconocida: {name}")
+            settings[name] = _coerce_setting(name, value)
+    return settings
+
+
+def engine_from_settings(
+    settings: Dict[str, Any],
+    files: list[pathlib.Path],
+    checkpoint_path: pathlib.Path | None = None,
+    cancel_token_path: pathlib.Path | None = None,
+    process_pool: BatchProcessPool | None = None,
+    batch_reports: bool = True,
+) -> BatchEngine:
+    """Crea el motor con `settings` (completadas con `DEFAULT_BATCH_SETTINGS`)."""
+    return BatchEngine(
+        files=list(files),
+        checkpoint_path=checkpoint_path,
+        resume_completed_files=set(),
+        cancel_token_path=cancel_token_path,
+        process_pool=process_pool,
+        batch_reports=batch_reports,
+        **resolve_batch_settings(settings),
+    )
+
+
+def load_batch_preset(spec: str | pathlib.Path | None) -> Dict[str, Any]:
+    """
+    Preset de lote: un JSON con opciones de `DEFAULT_BATCH_SETTINGS`, o el
+    nombre de un preset de loudness de la UI (p. ej. "Spotify (-14 LUFS / -1.0 dBTP)").
+    """
+    if spec is None or str(spec) == "":
+        return {}
+    if str(spec) in LOUDNESS_PRESETS:
+        target = LOUDNESS_PRESETS[str(spec)]
+        if target is None:
+            return {"loudness_preset": str(spec)}
+        return {"loudness_preset": str(spec), "target_lufs": target[0], "true_peak": target[1]}
+    path = pathlib.Path(spec)
+    if not path.is_file():
+        raise ValueError(f"Preset no encontrado (ni archivo ni preset de loudness): {spec}")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError(f"El preset debe ser un objeto JSON: {path}")
+    resolve_batch_settings(data)  # valida claves y tipos
+    return data
+
+
+def collect_batch_inputs(
+    source: str | pathlib.Path,
+    recursive: bool = False,
+) -> tuple[list[pathlib.Path], Dict[str, Any]]:
+    """
+    Archivos a procesar y opciones propias del origen.
+
+    - Carpeta: archivos de audio admitidos (`INPUT_FORMATS`), ordenados.
+    - Manifiesto JSON: lista de rutas, u objeto con `files` y opciones (el
+      payload de un job SpASM es un manifiesto válido).
+    - Manifiesto de texto: una ruta por línea (`#` comenta).
+
+    Las rutas relativas de un manifiesto se resuelven desde su carpeta.
+    """
+    source = pathlib.Path(source)
+    if source.is_dir():
+        pattern = "**/*" if recursive else "*"
+        files = sorted(
+            path for path in source.glob(pattern)
+            if path.is_file() and path.suffix.lower() in INPUT_FORMATS
+        )
+        return files, {}
+    if not source.is_file():
+        raise ValueError(f"No existe la carpeta o manifiesto: {source}")
+    options: Dict[str, Any] = {}
+    if source.suffix.lower() == ".json":
+        data = json.loads(source.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            options = {key: value for key, value in data.items() if key not in _PAYLOAD_ONLY_KEYS}
+            entries = data.get("files") or []
+        else:
+            entries = data
+        if not isinstance(entries, list):
+            raise ValueError(f"El manifiesto debe listar `files`: {source}")
+    else:
+        entries = [
+            line.strip() for line in source.read_text(encoding="utf-8").splitlines()
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    files = [
+        path if path.is_absolute() else source.parent / path
+        for path in (pathlib.Path(str(entry)) for entry in entries)
+    ]
+    return files, options
@@ -0,0 +1,157 @@
+"""
+Scheduler por etapas para el lote.
+
+Cada archivo recorre etapas encadenadas (análisis -> estrategia IA -> ...) en
+executors propios con concurrencia acotada; el consumidor recibe los archivos
+en el orden original y ejecuta allí la etapa final (render, calibración), de
+modo que resultados y checkpoint siguen siendo deterministas. La cola es
+acotada: sólo se adelantan `depth` archivos respecto del que se consume, así
+el análisis de N+1 y la consulta IA de N+2 se solapan con el render de N sin
+acumular trabajo (ni memoria) de todo el lote.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_PIPELINE_DEPTH = 2
+
+
+def pipeline_depth() -> int:
+    """`TONEFINISH_BATCH_PIPELINE_DEPTH` fija el adelanto; `0` vuelve al modo secuencial."""
+    raw = os.getenv("TONEFINISH_BATCH_PIPELINE_DEPTH", "").strip()
+    try:
+        return max(0, min(16, int(raw))) if raw else DEFAULT_PIPELINE_DEPTH
+    except ValueError:
+        return DEFAULT_PIPELINE_DEPTH
+
+
+@dataclass(frozen=True)
+class PipelineStage:
+    """Etapa previa al consumidor: `func(item, resultados_previos)`."""
+
+    name: str
+    func: Callable[[Any, dict[str, Any]], Any]
+    workers: int = 1
+
+
+class PipelineItem(Generic[T]):
+    """Archivo listo para consumir con los futures de sus etapas previas."""
+
+    def __init__(self, index: int, item: T, futures: dict[str, Future]) -> None:
+        self.index = index
+        self.item = item
+        self._futures = futures
+
+    def result(self, stage: str) -> Any:
+        """Resultado de la etapa; relanza en el consumidor el error que haya tenido."""
+        return self._futures[stage].result()
+
+
+class StagedPipeline(Generic[T]):
+    """Ejecuta las etapas por adelantado y entrega los archivos en orden."""
+
+    def __init__(
+        self,
+        items: Sequence[T],
+        stages: Sequence[PipelineStage],
+        depth: int | None = None,
+        thread_name_prefix: str = "tonefinish-stage",
+    ) -> None:
+        self.items = list(items)
+        self.stages = list(stages)
+        self.depth = pipeline_depth() if depth is None else max(0, int(depth))
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        if self.depth > 0:
+            self._executors = {
+                stage.name: ThreadPoolExecutor(
+                    max_workers=max(1, int(stage.workers)),
+                    thread_name_prefix=f"{thread_name_prefix}-{stage.name}",
+                )
+                for stage in self.stages
+            }
+        self._futures: list[dict[str, Future]] = [
+            {stage.name: Future() for stage in self.stages} for _ in self.items
+        ]
+        self._launched = 0
+        self._closed = threading.Event()
+
+    def __enter__(self) -> "StagedPipeline[T]":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[PipelineItem[T]]:
+        try:
+            for index, item in enumerate(self.items):
+                if self.depth > 0:
+                    self._launch_until(min(len(self.items), index + 1 + self.depth))
+                else:
+                    self._run_inline(index)
+                yield PipelineItem(index, item, self._futures[index])
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Cancela lo adelantado que no empezó; lo que está en curso termina solo."""
+        self._closed.set()
+        for futures in self._futures[self._launched:]:
+            for future in futures.values():
+                future.cancel()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _launch_until(self, limit: int) -> None:
+        while self._launched < limit:
+            self._submit(self._launched, 0, {})
+            self._launched += 1
+
+    def _run_inline(self, index: int) -> None:
+        previous: dict[str, Any] = {}
+        for stage in self.stages:
+            future = self._futures[index][stage.name]
+            try:
+                previous[stage.name] = stage.func(self.items[index], dict(previous))
+                future.set_result(previous[stage.name])
+            except Exception as exc:
+                future.set_exception(exc)
+                self._fail_from(index, self.stages.index(stage) + 1, exc)
+                return
+
+    def _submit(self, index: int, position: int, previous: dict[str, Any]) -> None:
+        if position >= len(self.stages):
+            return
+        stage = self.stages[position]
+        target = self._futures[index][stage.name]
+        if self._closed.is_set() or not target.set_running_or_notify_cancel():
+            return
+
+        def run() -> None:
+            try:
+                value = stage.func(self.items[index], dict(previous))
+            except BaseException as exc:
+                target.set_exception(exc)
+                self._fail_from(index, position + 1, exc)
+                return
+            target.set_result(value)
+            self._submit(index, position + 1, {**previous, stage.name: value})
+
+        try:
+            self._executors[stage.name].submit(run)
+        except RuntimeError as exc:
+            # Executor cerrado (cancelación): la etapa no llega a correr.
+            target.set_exception(exc)
+            self._fail_from(index, position + 1, exc)
+
+    def _fail_from(self, index: int, position: int, exc: BaseException) -> None:
+        for stage in self.stages[position:]:
+            future = self._futures[index][stage.name]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exc)
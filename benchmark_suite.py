@@ -0,0 +1,670 @@
+"""
+Suite de benchmarks reproducible sobre un corpus sintético.
+
+El único benchmark previo (`main.py --benchmark-spectrum`) necesitaba un
+archivo real. Aquí el corpus se genera con NumPy de forma determinista
+(semilla fija por pista): tonos, ruido rosa, transitorios tipo batería, intro
+en silencio, pista saturada y pista mono, en varias duraciones y sample rates.
+
+Sobre ese corpus se cronometran los puntos de entrada de análisis,
+`normalize_audio` con planes de acción representativos, la calibración final,
+MTS, el render adaptativo y la compilación de grafos del orquestador. Los
+casos `startup.*` miden el arranque en frío (un intérprete nuevo por corrida)
+contra `STARTUP_BUDGETS`. El resultado es un JSON con datos de la máquina;
+`compare` lo contrasta con una línea base guardada y marca las regresiones y
+los presupuestos excedidos.
+
+    python scripts/bench.py run --profile quick --output bench.json
+    python scripts/bench.py compare bench.json baseline.json
+    python main.py --benchmark-suite --benchmark-output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Sequence
+
+from lazy_imports import lazy_module, module_available
+
+# NumPy sólo hace falta para sintetizar el corpus: las pruebas que importan
+# `large_action_plan` o `REPO_ROOT` de aquí no deben exigirlo.
+NUMPY_AVAILABLE = module_available("numpy")
+np = lazy_module("numpy", globals(), "np")
+
+SCHEMA_VERSION = 1
+BENCH_SEED = 20240601
+TARGET_LUFS = -14.0
+TRUE_PEAK = -1.0
+SIGNALS = ("tones", "pink_noise", "drums", "silent_intro", "clipped", "mono")
+# Pistas sobre las que corren los casos caros (render, calibración, MTS).
+HEAVY_SIGNALS = ("drums", "clipped")
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "quick": {"lengths": (8.0,), "sample_rates": (48000,), "repeats": 1},
+    "full": {"lengths": (10.0, 60.0), "sample_rates": (44100, 48000), "repeats": 3},
+}
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+DEFAULT_MIN_DELTA_S = 0.01
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent
+# Arranque en frío: cada caso corre en un intérprete nuevo. Presupuestos en
+# segundos de pared, incluido el arranque del propio Python.
+STARTUP_STATEMENTS: Dict[str, str] = {
+    "startup.import_ui_app": "import ui_app",
+    "startup.import_batch_engine": "import batch_engine",
+    "startup.reproducibility_check": (
+        "from runtime_reproducibility import check_runtime_reproducibility; check_runtime_reproducibility()"
+    ),
+}
+STARTUP_BUDGETS: Dict[str, float] = {
+    "startup.import_ui_app": 1.5,
+    "startup.import_batch_engine": 1.0,
+    "startup.reproducibility_check": 1.0,
+}
+# Dependencias pesadas que el arranque no debe importar (ver `lazy_imports`).
+LAZY_STARTUP_MODULES = ("numpy", "cupy", "pedalboard", "essentia", "matplotlib", "soundfile")
+
+BAND_HZ = {"sub_bass": 40.0, "bass": 120.0, "low_mid": 350.0, "mid": 1000.0, "high_mid": 3500.0, "air": 10000.0}
+
+NORMALIZE_PLANS: Dict[str, Dict[str, Any]] = {
+    "plain": {},
+    "repair": {
+        "noise_reduction_level": "Medio",
+        "declip_level": "Medio",
+        "declick_level": "Medio",
+        "deesser": True,
+    },
+    "full_chain": {
+        "dynamic_eq": True,
+        "multiband_limiter_enabled": True,
+        "saturation_enabled": True,
+        "saturation_drive_db": 2.0,
+        "saturation_mix": 0.3,
+        "glue_enabled": True,
+        "stereo_dynamic": True,
+        "master_limiter_enabled": True,
+        "enable_clipper": True,
+    },
+}
+
+
+@dataclass(frozen=True)
+class CorpusTrack:
+    name: str
+    signal: str
+    seconds: float
+    sample_rate: int
+    channels: int
+    path: pathlib.Path
+    sha256: str
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    """`setup` prepara (sin cronometrar) los argumentos de cada corrida de `run`."""
+
+    name: str
+    track: CorpusTrack | None
+    run: Callable[[Dict[str, Any]], Any]
+    setup: Callable[[], Dict[str, Any]] | None = None
+
+    @property
+    def case_id(self) -> str:
+        return f"{self.name}/{self.track.name}" if self.track else self.name
+
+
+# ── Corpus ──
+
+
+def _rng(signal: str, seconds: float, sample_rate: int) -> np.random.Generator:
+    key = f"{signal}:{seconds}:{sample_rate}".encode("utf-8")
+    return np.random.default_rng(BENCH_SEED + zlib.crc32(key))
+
+
+def _tones(t: np.ndarray) -> np.ndarray:
+    swell = 0.6 + 0.4 * np.sin(2 * np.pi * 0.25 * t)
+    return swell * (
+        0.5 * np.sin(2 * np.pi * 110.0 * t)
+        + 0.3 * np.sin(2 * np.pi * 440.0 * t)
+        + 0.15 * np.sin(2 * np.pi * 2500.0 * t)
+    )
+
+
+def _pink_noise(frames: int, rng: np.random.Generator) -> np.ndarray:
+    spectrum = np.fft.rfft(rng.standard_normal(frames))
+    scale = np.ones(spectrum.shape[0])
+    scale[1:] = 1.0 / np.sqrt(np.arange(1, spectrum.shape[0]))
+    pink = np.fft.irfft(spectrum * scale, n=frames)
+    return pink / (np.max(np.abs(pink)) or 1.0)
+
+
+def _drums(t: np.ndarray, sample_rate: int, rng: np.random.Generator) -> np.ndarray:
+    out = np.zeros_like(t)
+    beat = 0.5  # 120 bpm
+    for index, start in enumerate(np.arange(0.0, t[-1] if t.size else 0.0, beat / 2)):
+        begin = int(start * sample_rate)
+        length = min(int(0.2 * sample_rate), t.size - begin)
+        if length <= 0:
+            break
+        local = np.arange(length) / sample_rate
+        if index % 4 == 0:
+            # Bombo: seno con caída de pitch y envolvente exponencial.
+            hit = np.sin(2 * np.pi * (50.0 + 80.0 * np.exp(-local * 30.0)) * local) * np.exp(-local * 18.0)
+        elif index % 4 == 2:
+            hit = 0.6 * rng.standard_normal(length) * np.exp(-local * 25.0)
+        else:
+            hat = np.diff(rng.standard_normal(length + 1))
+            hit = 0.2 * hat * np.exp(-local * 60.0)
+        out[begin:begin + length] += hit
+    return out
+
+
+def synthesize(signal: str, seconds: float, sample_rate: int) -> np.ndarray:
+    """Señal determinista `(frames, canales)` en float64 para una pista del corpus."""
+    if signal not in SIGNALS:
+        raise ValueError(f"Señal de benchmark desconocida: {signal}")
+    frames = max(1, int(round(seconds * sample_rate)))
+    t = np.arange(frames) / sample_rate
+    rng = _rng(signal, seconds, sample_rate)
+    if signal in ("tones", "mono"):
+        mono = _tones(t)
+    elif signal == "pink_noise":
+        mono = _pink_noise(frames, rng)
+    elif signal == "drums":
+        mono = _drums(t, sample_rate, rng) + 0.2 * _tones(t)
+    elif signal == "silent_intro":
+        mono = _tones(t)
+        mono[: min(frames, int(min(2.0, seconds / 4) * sample_rate))] = 0.0
+    else:  # clipped
+        mono = 3.0 * (_tones(t) + 0.5 * _drums(t, sample_rate, rng))
+
+    peak = np.max(np.abs(mono)) or 1.0
+    if signal == "clipped":
+        mono = np.clip(mono, -0.99, 0.99)
+    else:
+        mono = 0.5 * mono / peak
+    if signal == "mono":
+        return mono[:, None]
+    # Estéreo con leve desfase entre canales para que el análisis M/S tenga contenido.
+    right = np.concatenate([np.zeros(min(7, frames)), mono[: max(0, frames - 7)]]) * 0.9
+    return np.stack([mono, right], axis=1)
+
+
+def write_wav(path: pathlib.Path, samples: np.ndarray, sample_rate: int) -> None:
+    pcm = np.round(np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(int(samples.shape[1]))
+        handle.setsampwidth(2)
+        handle.setframerate(int(sample_rate))
+        handle.writeframes(pcm.tobytes())
+
+
+def build_corpus(
+    directory: pathlib.Path,
+    lengths: Sequence[float],
+    sample_rates: Sequence[int],
+    signals: Sequence[str] = SIGNALS,
+) -> list[CorpusTrack]:
+    """Genera (o reutiliza, si el contenido coincide) las pistas WAV del corpus."""
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tracks: list[CorpusTrack] = []
+    for sample_rate in sample_rates:
+        for seconds in lengths:
+            for signal in signals:
+                samples = synthesize(signal, seconds, sample_rate)
+                name = f"{signal}_{seconds:g}s_{sample_rate // 1000}k"
+                path = directory / f"{name}.wav"
+                write_wav(path, samples, sample_rate)
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                tracks.append(CorpusTrack(name, signal, float(seconds), int(sample_rate), int(samples.shape[1]), path, digest))
+    return tracks
+
+
+# ── Datos de la máquina ──
+
+
+def _ffmpeg_version() -> str:
+    try:
+        from audio_tools import _FFMPEG_BIN
+
+        result = subprocess.run([_FFMPEG_BIN, "-version"], capture_output=True, text=True, check=False)
+        return (result.stdout.splitlines() or [""])[0]
+    except Exception:
+        return ""
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": np.__version__ if NUMPY_AVAILABLE else None,
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": _ffmpeg_version(),
+        "audio_engine": os.getenv("FINISHER_AUDIO_ENGINE", ""),
+    }
+
+
+# ── Casos ──
+
+
+def large_action_plan() -> list:
+    """Plan realista de 33 acciones (sólo cortes y control: respeta el gobernador)."""
+    from processes.contracts import BAND_IDS, AudioFunctionAction
+
+    actions = [
+        AudioFunctionAction("audio.autogain.headroom", params={"gain_db": -6.0}),
+        AudioFunctionAction("audio.tone_eq.high_pass", params={"frequency_hz": 25.0}),
+    ]
+    for band in BAND_IDS:
+        actions.append(AudioFunctionAction("audio.tone_eq.band", target=band, params={
+            "frequency_hz": BAND_HZ[band], "gain_db": -0.5, "q": 1.0, "filter_type": "peaking"}))
+        actions.append(AudioFunctionAction("audio.multiband.eq", target=band, params={"gain_db": -0.5}))
+        actions.append(AudioFunctionAction("audio.multiband.compressor", target=band, params={
+            "threshold_db": -20.0, "ratio": 1.5, "attack_ms": 10.0, "release_ms": 120.0}))
+        actions.append(AudioFunctionAction("audio.multiband.limiter", target=band, params={"ceiling_db": -3.0, "release_ms": 50.0}))
+        actions.append(AudioFunctionAction("audio.multiband.stereo_width", target=band, params={"width": 0.95}))
+    actions.append(AudioFunctionAction("audio.autogain.final_peak", params={"ceiling_db": -3.0}))
+    return actions
+
+
+def measure_compile(repeats: int = 200) -> Dict[str, Any]:
+    """Costo de `orchestrator.compile` en frío y con la memoización activa."""
+    from processes.contracts import AudioProcessContext
+    from processes.orchestrator import orchestrator
+
+    actions = large_action_plan()
+    context = AudioProcessContext("bench", 48000, 2, duration=180.0)
+    orchestrator.clear_cache()
+    started = time.perf_counter()
+    for index in range(repeats):
+        orchestrator.compile(actions, AudioProcessContext(f"bench-{index}", 48000, 2, duration=180.0 + index))
+    cold = (time.perf_counter() - started) / repeats
+    orchestrator.compile(actions, context)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        orchestrator.compile(actions, context)
+    warm = (time.perf_counter() - started) / repeats
+    return {"actions": len(actions), "cold_ms": cold * 1000.0, "warm_ms": warm * 1000.0,
+            "speedup": cold / warm if warm else float("inf"), **orchestrator.cache_info()}
+
+
+def cold_start(statement: str) -> list[str]:
+    """
+    Ejecuta `statement` en un intérprete nuevo (cwd en la raíz del repo) y
+    devuelve qué módulos de `LAZY_STARTUP_MODULES` quedaron importados.
+    """
+    probe = (
+        f"{statement}\nimport json, sys\n"
+        f"print(json.dumps([name for name in {list(LAZY_STARTUP_MODULES)!r} if name in sys.modules]))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], cwd=REPO_ROOT, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "arranque fallido")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _startup_case(name: str, statement: str) -> BenchCase:
+    def warm_up() -> Dict[str, Any]:
+        # Corrida sin cronometrar: deja listas las cachés de disco (p. ej. el
+        # reporte de reproducibilidad), como tras el primer arranque real.
+        cold_start(statement)
+        return {}
+
+    return BenchCase(name, None, lambda _: cold_start(statement), setup=warm_up)
+
+
+def _analysis_cases(track: CorpusTrack) -> list[BenchCase]:
+    import logic_backend as backend
+
+    path = track.path
+    return [
+        BenchCase("analysis.get_audio_info", track, lambda _: backend.get_audio_info(str(path), use_cache=False)),
+        BenchCase("analysis.analyze_audio", track, lambda _: backend.analyze_audio(path, TARGET_LUFS, TRUE_PEAK, verbose=False)),
+        BenchCase("analysis.analyze_eq_bands", track, lambda _: backend.analyze_eq_bands(path, verbose=False, band_range_db=6.0)),
+        BenchCase("analysis.analyze_eq_and_voice", track, lambda _: backend.analyze_eq_and_voice(path, verbose=False, band_range_db=6.0)),
+        BenchCase("analysis.analyze_voice_band", track, lambda _: backend.analyze_voice_band(path, verbose=False)),
+        BenchCase("analysis.automaster", track, lambda _: backend.analyze_audio_for_automaster(path, verbose=False)),
+    ]
+
+
+def _heavy_cases(track: CorpusTrack, workdir: pathlib.Path) -> list[BenchCase]:
+    import logic_backend as backend
+
+    path = track.path
+    output = workdir / f"{track.name}.out.wav"
+    measured: Dict[str, Any] = {}
+
+    def source_stats() -> Dict[str, Any]:
+        if not measured:
+            measured["stats"], _ = backend.analyze_audio(path, TARGET_LUFS, TRUE_PEAK, verbose=False)
+            measured["band_stats"], _suggestions, _voice = backend.analyze_eq_and_voice(path, verbose=False, band_range_db=6.0)
+        return measured
+
+    def normalize_case(plan_name: str, plan: Dict[str, Any]) -> BenchCase:
+        def setup() -> Dict[str, Any]:
+            data = source_stats()
+            return {"stats": data["stats"], "band_stats": data["band_stats"]}
+
+        def run(args: Dict[str, Any]) -> Any:
+            return backend.normalize_audio(
+                input_path=path,
+                output_path=output,
+                stats=args["stats"],
+                target_lufs=TARGET_LUFS,
+                true_peak=TRUE_PEAK,
+                overwrite=True,
+                verbose=False,
+                band_stats=args["band_stats"],
+                **plan,
+            )
+
+        return BenchCase(f"normalize.{plan_name}", track, run, setup)
+
+    def catalog_setup() -> Dict[str, Any]:
+        data = source_stats()
+        return {
+            "stats": data["stats"],
+            "band_stats": data["band_stats"],
+            "audio_actions": [action.to_dict() for action in large_action_plan()],
+        }
+
+    def catalog_run(args: Dict[str, Any]) -> Any:
+        return backend.normalize_audio(
+            input_path=path, output_path=output, stats=args["stats"], target_lufs=TARGET_LUFS,
+            true_peak=TRUE_PEAK, overwrite=True, verbose=False, band_stats=args["band_stats"],
+            audio_actions=args["audio_actions"],
+        )
+
+    def calibration_setup() -> Dict[str, Any]:
+        # Render fresco por corrida y medición desviada 2 LU: fuerza iteraciones reales.
+        data = source_stats()
+        rendered = workdir / f"{track.name}.cal.wav"
+        shutil.copyfile(path, rendered)
+        stats = dict(data["stats"])
+        stats["input_i"] = float(stats.get("input_i", TARGET_LUFS)) - 2.0
+        return {"output_path": rendered, "initial_stats": stats}
+
+    def calibration_run(args: Dict[str, Any]) -> Any:
+        from batch_engine import _calibrate_output_from_logs
+
+        return _calibrate_output_from_logs(
+            output_path=args["output_path"], initial_stats=args["initial_stats"], target_lufs=TARGET_LUFS,
+            true_peak=TRUE_PEAK, limiter_ceiling_db=None, limiter_release_ms=None, output_sr=None,
+            output_bit_depth=None, output_format="wav", metadata=None, verbose=False,
+        )
+
+    def mts_run(_args: Dict[str, Any]) -> Any:
+        from analysis_mts import build_mts_analysis
+
+        return build_mts_analysis(input_path=path)
+
+    def adaptive_setup() -> Dict[str, Any]:
+        from analysis_mts import build_mts_analysis
+        from master_decision_engine import build_master_decisions
+
+        mts = build_mts_analysis(input_path=path)
+        return {"mts": mts, "decisions": build_master_decisions(mts_data=mts), "stats": source_stats()["stats"]}
+
+    def adaptive_run(args: Dict[str, Any]) -> Any:
+        from adaptive_master_renderer import discard_adaptive_candidate, render_adaptive_candidate
+
+        report = render_adaptive_candidate(
+            path, args["decisions"], TARGET_LUFS, TRUE_PEAK, mts_data=args["mts"], source_stats=args["stats"],
+        )
+        discard_adaptive_candidate(report)
+        return report
+
+    return [
+        *[normalize_case(name, plan) for name, plan in NORMALIZE_PLANS.items()],
+        BenchCase("normalize.catalog_plan", track, catalog_run, catalog_setup),
+        BenchCase("calibration", track, calibration_run, calibration_setup),
+        BenchCase("mts.build_analysis", track, mts_run),
+        BenchCase("adaptive.render_candidate", track, adaptive_run, adaptive_setup),
+    ]
+
+
+def build_cases(tracks: Sequence[CorpusTrack], workdir: pathlib.Path) -> list[BenchCase]:
+    cases: list[BenchCase] = [BenchCase("orchestrator.compile", None, lambda _: measure_compile(50))]
+    cases.extend(_startup_case(name, statement) for name, statement in STARTUP_STATEMENTS.items())
+    for track in tracks:
+        cases.extend(_analysis_cases(track))
+        if track.signal in HEAVY_SIGNALS:
+            cases.extend(_heavy_cases(track, workdir))
+    return cases
+
+
+# ── Ejecución ──
+
+
+@contextlib.contextmanager
+def _bench_environment() -> Iterator[None]:
+    """Sin caché de renders ni de audio-info: cada corrida mide trabajo real."""
+    previous = os.environ.get("TONEFINISH_RENDER_CACHE")
+    os.environ["TONEFINISH_RENDER_CACHE"] = "0"
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("TONEFINISH_RENDER_CACHE", None)
+        else:
+            os.environ["TONEFINISH_RENDER_CACHE"] = previous
+
+
+def time_case(case: BenchCase, repeats: int) -> Dict[str, Any]:
+    import ffmpeg_accounting
+    from audio_tools import clear_audio_info_cache
+
+    durations: list[float] = []
+    ffmpeg_cpu: list[float] = []
+    ffmpeg_runs: list[int] = []
+    try:
+        for _ in range(max(1, repeats)):
+            args = case.setup() if case.setup else {}
+            clear_audio_info_cache()
+            since = time.monotonic()
+            started = time.perf_counter()
+            case.run(args)
+            durations.append(time.perf_counter() - started)
+            records = ffmpeg_accounting.accountant().records(since=since)
+            ffmpeg_cpu.append(sum(record.cpu_s for record in records))
+            ffmpeg_runs.append(len(records))
+    except Exception as exc:
+        return {"ok": False, "error": f"{type(exc).__name__}: {exc}", "runs": len(durations)}
+    return {
+        "ok": True,
+        "runs": len(durations),
+        "median_s": statistics.median(durations),
+        "min_s": min(durations),
+        "max_s": max(durations),
+        "ffmpeg_cpu_s": statistics.median(ffmpeg_cpu),
+        "ffmpeg_processes": int(statistics.median(ffmpeg_runs)),
+        "audio_seconds": case.track.seconds if case.track else None,
+    }
+
+
+def run_suite(
+    profile: str = "quick",
+    corpus_dir: pathlib.Path | None = None,
+    repeats: int | None = None,
+    only: str | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> Dict[str, Any]:
+    """Genera el corpus, corre los casos (filtrables por subcadena) y devuelve el resultado."""
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de benchmark desconocido: {profile}")
+    settings = PROFILES[profile]
+    repeats = int(repeats or settings["repeats"])
+    with tempfile.TemporaryDirectory(prefix="tonefinish_bench_") as tmp:
+        workdir = pathlib.Path(tmp)
+        tracks = build_corpus(corpus_dir or workdir / "corpus", settings["lengths"], settings["sample_rates"])
+        cases = [case for case in build_cases(tracks, workdir) if not only or only in case.case_id]
+        results: Dict[str, Any] = {}
+        with _bench_environment():
+            for index, case in enumerate(cases, start=1):
+                result = time_case(case, repeats)
+                if case.case_id in STARTUP_BUDGETS and result["ok"]:
+                    result["budget_s"] = STARTUP_BUDGETS[case.case_id]
+                    result["over_budget"] = result["median_s"] > result["budget_s"]
+                results[case.case_id] = result
+                if progress:
+                    status = f"{result['median_s']:.3f} s" if result["ok"] else f"error ({result['error']})"
+                    progress(f"[{index}/{len(cases)}] {case.case_id}: {status}")
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profile": profile,
+        "repeats": repeats,
+        "seed": BENCH_SEED,
+        "machine": machine_info(),
+        "corpus": [
+            {"name": t.name, "signal": t.signal, "seconds": t.seconds, "sample_rate": t.sample_rate,
+             "channels": t.channels, "sha256": t.sha256}
+            for t in tracks
+        ],
+        "results": results,
+    }
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+    min_delta_s: float = DEFAULT_MIN_DELTA_S,
+) -> list[Dict[str, Any]]:
+    """
+    Casos más lentos que la línea base en más de `threshold` (relativo) y
+    `min_delta_s` (absoluto), que ahora fallan y antes no, o que exceden su
+    presupuesto (ver `over_budget`).
+    """
+    regressions: list[Dict[str, Any]] = over_budget(current)
+    base_results = baseline.get("results", {})
+    for case_id, result in sorted(current.get("results", {}).items()):
+        base = base_results.get(case_id)
+        if not base or not base.get("ok"):
+            continue
+        if not result.get("ok"):
+            regressions.append({"case": case_id, "reason": "error", "error": result.get("error", "")})
+            continue
+        before, after = float(base["median_s"]), float(result["median_s"])
+        if after - before > min_delta_s and after > before * (1.0 + threshold):
+            regressions.append({
+                "case": case_id,
+                "reason": "slower",
+                "baseline_s": before,
+                "current_s": after,
+                "ratio": after / before if before > 0 else float("inf"),
+            })
+    return regressions
+
+
+def over_budget(current: Dict[str, Any]) -> list[Dict[str, Any]]:
+    """Casos con presupuesto propio (`STARTUP_BUDGETS`) cuya mediana lo excede."""
+    return [
+        {"case": case_id, "reason": "budget", "current_s": float(result["median_s"]),
+         "budget_s": float(result["budget_s"])}
+        for case_id, result in sorted(current.get("results", {}).items())
+        if result.get("ok") and result.get("over_budget")
+    ]
+
+
+def _format_regression(item: Dict[str, Any]) -> str:
+    if item["reason"] == "error":
+        return f"REGRESIÓN {item['case']}: ahora falla ({item['error']})"
+    if item["reason"] == "budget":
+        return f"PRESUPUESTO {item['case']}: {item['current_s']:.3f} s (máximo {item['budget_s']:.3f} s)"
+    return (
+        f"REGRESIÓN {item['case']}: {item['baseline_s']:.3f} s -> {item['current_s']:.3f} s "
+        f"({item['ratio']:.2f}×)"
+    )
+
+
+def format_comparison(current: Dict[str, Any], baseline: Dict[str, Any], regressions: list[Dict[str, Any]]) -> str:
+    lines: list[str] = []
+    if current.get("corpus") != baseline.get("corpus"):
+        lines.append("Aviso: el corpus difiere de la línea base (perfil, semilla o generador distintos).")
+    fields = ("cpu_count", "machine", "ffmpeg")
+    if any(current.get("machine", {}).get(key) != baseline.get("machine", {}).get(key) for key in fields):
+        lines.append("Aviso: la máquina o la versión de FFmpeg difieren de la línea base.")
+    if not regressions:
+        lines.append("Sin regresiones.")
+    lines.extend(_format_regression(item) for item in regressions)
+    return "\n".join(lines)
+
+
+def _load(path: pathlib.Path) -> Dict[str, Any]:
+    return json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+
+
+def run_and_report(
+    profile: str,
+    output: pathlib.Path | None,
+    baseline: pathlib.Path | None = None,
+    repeats: int | None = None,
+    only: str | None = None,
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> int:
+    """Corre la suite, guarda el JSON y devuelve 1 si hay regresiones o presupuestos excedidos."""
+    result = run_suite(profile, repeats=repeats, only=only, progress=print)
+    if output is not None:
+        output = pathlib.Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Resultados: {output}")
+    if baseline is None:
+        violations = over_budget(result)
+        for item in violations:
+            print(_format_regression(item))
+        return 1 if violations else 0
+    reference = _load(baseline)
+    regressions = compare_results(result, reference, threshold=threshold)
+    print(format_comparison(result, reference, regressions))
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de ToneFinish sobre un corpus sintético.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="genera el corpus y cronometra los casos")
+    run.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    run.add_argument("--output", type=pathlib.Path, default=None)
+    run.add_argument("--baseline", type=pathlib.Path, default=None, help="compara al terminar")
+    run.add_argument("--repeats", type=int, default=None)
+    run.add_argument("--filter", default=None, help="sólo casos cuyo id contenga este texto")
+    run.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    compare = commands.add_parser("compare", help="marca regresiones frente a una línea base")
+    compare.add_argument("current", type=pathlib.Path)
+    compare.add_argument("baseline", type=pathlib.Path)
+    compare.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    compare.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA_S)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        return run_and_report(args.profile, args.output, args.baseline, args.repeats, args.filter, args.threshold)
+    current, reference = _load(args.current), _load(args.baseline)
+    regressions = compare_results(current, reference, threshold=args.threshold, min_delta_s=args.min_delta)
+    print(format_comparison(current, reference, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
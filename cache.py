@@ -10,6 +10,8 @@ import json
 import pathlib
 from typing import Any, Dict, Optional
 
+import tracing
+
 # Directorio de caché
 CACHE_DIR = pathlib.Path.home() / ".tonefinish" / "cache"
 CACHE_SCHEMA_VERSION = 2
@@ -61,6 +63,7 @@ def _get_cache_path(file_hash: str) -> pathlib.Path:
     return CACHE_DIR / f"{file_hash}.json"
 
 
+@tracing.traced("analysis_cache_lookup", "cache", result_args=lambda result: {"hit": result is not None})
 def get_cached_analysis(file_path: pathlib.Path) -> Optional[Dict[str, Any]]:
     """
     Busca análisis en caché para un archivo.
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Literal
 
-from resource_monitor import GpuSnapshot, ResourceMonitor, ResourceSnapshot
+from resource_monitor import GpuSnapshot, ResourceMonitor, ResourceSnapshot, shared_resource_monitor
 
 
 class BackendKind(str, Enum):
@@ -62,22 +62,31 @@ class ComputeBackend:
     """
 
     def __init__(self, monitor: ResourceMonitor | None = None) -> None:
-        self.monitor = monitor or ResourceMonitor()
+        self.monitor = monitor or shared_resource_monitor()
         self._last_cpu_snapshot: ResourceSnapshot | None = None
         self._last_gpu_snapshot: GpuSnapshot | None = None
-        self.refresh()
+        # Sin foto al construir: el sondeo de GPU (nvidia-smi/lspci) se hace
+        # con la primera decisión, no al arrancar la aplicación.
+        self._refreshed = False
 
     def refresh(self) -> tuple[ResourceSnapshot, GpuSnapshot | None]:
         self._last_cpu_snapshot = self.monitor.snapshot()
         self._last_gpu_snapshot = self.monitor.gpu_snapshot()
+        self._refreshed = True
         return self._last_cpu_snapshot, self._last_gpu_snapshot
 
+    def _ensure_refreshed(self) -> None:
+        if not self._refreshed:
+            self.refresh()
+
     @property
     def cpu_snapshot(self) -> ResourceSnapshot | None:
+        self._ensure_refreshed()
         return self._last_cpu_snapshot
 
     @property
     def gpu_snapshot(self) -> GpuSnapshot | None:
+        self._ensure_refreshed()
         return self._last_gpu_snapshot
 
     def policy_for_stage(self, stage: str) -> StagePolicy:
@@ -96,8 +105,13 @@ class ComputeBackend:
         self,
         stage: str,
         policy: StagePolicy | None = None,
+        refresh: bool = True,
     ) -> BackendDecision:
-        cpu_snapshot, gpu_snapshot = self.refresh()
+        if refresh:
+            self.refresh()
+        else:
+            self._ensure_refreshed()
+        cpu_snapshot, gpu_snapshot = self._last_cpu_snapshot, self._last_gpu_snapshot
         normalized_stage = self.normalize_stage(stage)
         effective_policy = policy or self.policy_for_stage(normalized_stage)
 
@@ -175,12 +189,15 @@ class ComputeBackend:
         stages: list[str],
         policies: dict[str, StagePolicy] | None = None,
     ) -> list[BackendDecision]:
+        # Un solo refresh para todo el pipeline: las etapas se deciden con la
+        # misma foto de recursos.
+        self.refresh()
         decisions: list[BackendDecision] = []
         for stage in stages:
             policy = None
             if policies is not None:
                 policy = policies.get(self.normalize_stage(stage))
-            decisions.append(self.decide(stage, policy=policy))
+            decisions.append(self.decide(stage, policy=policy, refresh=False))
         return decisions
 
     def summarize_pipeline(
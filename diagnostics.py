@@ -13,11 +13,6 @@ import math
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
-try:
-    import numpy as np
-except ImportError:
-    np = None  # type: ignore
-
 from audio_tools import get_audio_info, run_ffmpeg
 from config import BAND_CONFIG, APP_NAME, APP_VERSION
 
@@ -26,8 +21,6 @@ def _is_finite(value: Optional[float]) -> bool:
     """Verifica si un valor es finito (no inf, no nan)."""
     if value is None:
         return False
-    if np is not None:
-        return bool(np.isfinite(value))
     return math.isfinite(value)
 
 
@@ -501,51 +494,47 @@ def analyze_audio_metrics(
             except json.JSONDecodeError:
                 pass
     
-    # === 3. Análisis RMS/Peak total con astats ===
-    report_progress(2, "Analizando RMS/Peak...")
+    # === 3. RMS/Peak total y por bandas con astats, en una sola pasada ===
+    # asplit reparte la señal entre el astats total y uno por banda; cada
+    # instancia se identifica en el log por su prefijo `Parsed_astats_N`.
     # Usamos reset=0 para obtener estadísticas globales al final (sección "Overall")
+    report_progress(2, "Analizando RMS/Peak total y por bandas...")
+    branch_labels = ["total"] + [f"b{idx}" for idx in range(len(BAND_CONFIG))]
+    filter_parts = ["[0:a]asplit=" + str(len(branch_labels)) + "".join(f"[{label}]" for label in branch_labels)]
+    filter_parts.append("[total]astats=metadata=1:reset=0,anullsink")
+    for idx, (_label, low_hz, high_hz, *_rest) in enumerate(BAND_CONFIG):
+        sink = "[analysis_out]" if idx == len(BAND_CONFIG) - 1 else ",anullsink"
+        filter_parts.append(f"[b{idx}]highpass=f={low_hz},lowpass=f={high_hz},astats=metadata=1:reset=0{sink}")
     cmd_stats = [
         "ffmpeg", "-hide_banner", "-nostdin",
         "-i", str(audio_path),
-        "-af", "astats=metadata=1:reset=0",
+        "-filter_complex", ";".join(filter_parts),
+        "-map", "[analysis_out]",
         "-f", "null", "-"
     ]
-    
+
     result = run_ffmpeg(cmd_stats, verbose=verbose)
     if result.returncode == 0:
-        output = result.stderr + result.stdout
-        
-        # Buscar la sección "Overall" que contiene los valores globales
-        overall_match = re.search(r"Overall[\s\S]*$", output, re.IGNORECASE)
-        if overall_match:
-            overall_section = overall_match.group(0)
-            
-            # RMS level (después de Overall)
-            rms_match = re.search(r"RMS level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
-            if rms_match:
-                metrics.rms_total = _safe_float(rms_match.group(1))
-            
-            # Peak level (después de Overall)
-            peak_match = re.search(r"Peak level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
-            if peak_match:
-                metrics.peak_total = _safe_float(peak_match.group(1))
-        else:
-            # Fallback: tomar los últimos valores reportados
-            rms_matches = re.findall(r"RMS level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
-            peak_matches = re.findall(r"Peak level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
-            if rms_matches:
-                metrics.rms_total = _safe_float(rms_matches[-1])
-            if peak_matches:
-                metrics.peak_total = _safe_float(peak_matches[-1])
-        
+        sections = _split_filter_logs(result.stderr + result.stdout, "astats")
+        if sections:
+            total = _parse_astats_levels(sections[0])
+            metrics.rms_total = total.get("rms", metrics.rms_total)
+            metrics.peak_total = total.get("peak", metrics.peak_total)
+            if "dc_offset" in total:
+                metrics.dc_offset = total["dc_offset"]
+
         # Crest Factor = Peak - RMS (ambos en dB, el crest factor es la diferencia)
         if metrics.peak_total > -70 and metrics.rms_total > -70:
             metrics.crest_factor = metrics.peak_total - metrics.rms_total
-        
-        # DC Offset (buscar en toda la salida, tomar el último valor global)
-        dc_matches = re.findall(r"DC offset:\s*(-?[\d.]+)", output, re.IGNORECASE)
-        if dc_matches:
-            metrics.dc_offset = float(dc_matches[-1])
+
+        for idx, (label, *_rest) in enumerate(BAND_CONFIG):
+            if idx + 1 >= len(sections):
+                break
+            levels = _parse_astats_levels(sections[idx + 1])
+            if "rms" in levels:
+                metrics.band_rms[label] = levels["rms"]
+            if "peak" in levels:
+                metrics.band_peak[label] = levels["peak"]
     
     # === 4. Correlación estéreo (solo para audio estéreo) ===
     if metrics.channels == 2:
@@ -559,7 +548,6 @@ def analyze_audio_metrics(
         # correlation = (M - S) / (M + S), 1.0 = mono, 0 = stereo amplio
         try:
             ms_data = result.stderr + result.stdout
-            import re
             m_level = 0.0
             s_level = 0.0
             m_match = re.search(r'M level[:\s]*([-\d.]+)', ms_data, re.IGNORECASE)
@@ -573,45 +561,6 @@ def analyze_audio_metrics(
         except Exception:
             metrics.stereo_correlation = 0.5
     
-    # === 5. Análisis por bandas ===
-    # Analizar cada banda por separado para obtener valores precisos
-    # Usamos reset=0 para obtener estadísticas globales
-    for idx, (label, low_hz, high_hz, _attack, _release, _width) in enumerate(BAND_CONFIG):
-        report_progress(3 + idx, f"Analizando banda {label}...")
-        band_filter = f"highpass=f={low_hz},lowpass=f={high_hz},astats=metadata=1:reset=0"
-        
-        cmd_band = [
-            "ffmpeg", "-hide_banner", "-nostdin",
-            "-i", str(audio_path),
-            "-af", band_filter,
-            "-f", "null", "-"
-        ]
-        
-        result = run_ffmpeg(cmd_band, verbose=verbose)
-        if result.returncode == 0:
-            output = result.stderr + result.stdout
-            
-            # Buscar la sección "Overall" para valores globales
-            overall_match = re.search(r"Overall[\s\S]*$", output, re.IGNORECASE)
-            if overall_match:
-                overall_section = overall_match.group(0)
-                
-                rms_match = re.search(r"RMS level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
-                if rms_match:
-                    metrics.band_rms[label] = _safe_float(rms_match.group(1))
-                
-                peak_match = re.search(r"Peak level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
-                if peak_match:
-                    metrics.band_peak[label] = _safe_float(peak_match.group(1))
-            else:
-                # Fallback: tomar los últimos valores
-                rms_matches = re.findall(r"RMS level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
-                peak_matches = re.findall(r"Peak level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
-                if rms_matches:
-                    metrics.band_rms[label] = _safe_float(rms_matches[-1])
-                if peak_matches:
-                    metrics.band_peak[label] = _safe_float(peak_matches[-1])
-    
     # === 9. Verificación con Essentia (si está disponible) ===
     if _check_essentia_available() and measure_true_peak_essentia and measure_loudness_essentia:
         report_progress(8, "Verificando con Essentia...")
@@ -632,6 +581,44 @@ def analyze_audio_metrics(
     return metrics
 
 
+def _split_filter_logs(output: str, filter_name: str) -> List[str]:
+    """Log de cada instancia `Parsed_<filtro>_N`, en el orden del grafo."""
+    pattern = re.compile(rf"^\[Parsed_{re.escape(filter_name)}_(\d+) @ [^\]]+\]\s?(.*)$")
+    by_instance: Dict[int, List[str]] = {}
+    for line in output.splitlines():
+        match = pattern.match(line)
+        if match:
+            by_instance.setdefault(int(match.group(1)), []).append(match.group(2))
+    return ["\n".join(by_instance[index]) for index in sorted(by_instance)]
+
+
+def _parse_astats_levels(output: str) -> Dict[str, float]:
+    """RMS, pico y DC offset globales (sección "Overall") de la salida de un astats."""
+    levels: Dict[str, float] = {}
+    overall_match = re.search(r"Overall[\s\S]*$", output, re.IGNORECASE)
+    if overall_match:
+        overall_section = overall_match.group(0)
+        rms_match = re.search(r"RMS level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
+        if rms_match:
+            levels["rms"] = _safe_float(rms_match.group(1))
+        peak_match = re.search(r"Peak level dB:\s*(-?[\d.]+|-inf)", overall_section, re.IGNORECASE)
+        if peak_match:
+            levels["peak"] = _safe_float(peak_match.group(1))
+    else:
+        # Fallback: tomar los últimos valores reportados
+        rms_matches = re.findall(r"RMS level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
+        peak_matches = re.findall(r"Peak level dB:\s*(-?[\d.]+|-inf)", output, re.IGNORECASE)
+        if rms_matches:
+            levels["rms"] = _safe_float(rms_matches[-1])
+        if peak_matches:
+            levels["peak"] = _safe_float(peak_matches[-1])
+    # DC offset: el último valor reportado es el global
+    dc_matches = re.findall(r"DC offset:\s*(-?[\d.]+)", output, re.IGNORECASE)
+    if dc_matches:
+        levels["dc_offset"] = float(dc_matches[-1])
+    return levels
+
+
 def _safe_float(value: Any, default: float = -70.0) -> float:
     """Convierte un valor a float de forma segura."""
     if value is None:
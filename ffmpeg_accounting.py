@@ -0,0 +1,300 @@
+"""
+Contabilidad de recursos por invocación de FFmpeg.
+
+`run_ffmpeg` sólo devolvía stdout/stderr: no se veía cuánta CPU, memoria o
+tiempo real cuesta cada grafo de filtros. Aquí cada proceso FFmpeg se espera
+con `os.wait4` (vía `AccountedPopen`) y se registra un `FfmpegUsage` con:
+
+- CPU de usuario/sistema y RSS máximo del hijo (`rusage`);
+- tiempo de pared, duración del audio y hash del grafo de filtros;
+- el sitio de llamada (`call_site`, p. ej. "analyze_audio" o
+  "normalize_audio") y los `function_id` del catálogo que componen el grafo.
+
+`summarize()` agrupa por sitio de llamada y filtros (o por `function_id`) y
+`format_report()` lo resume como "normalize_audio [afftdn]: 4.1× tiempo real
+CPU, 380 MB RSS". Los procesos del pool capturan sus registros con
+`capture()` y el padre los incorpora con `merge()`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Sequence
+
+from tracing import ffmpeg_filter_graphs, ffmpeg_filter_names
+
+DEFAULT_MAX_RECORDS = 5000
+NO_CALL_SITE = "otros"
+
+_CALL_SITE: contextvars.ContextVar[tuple[str, tuple[str, ...]] | None] = contextvars.ContextVar(
+    "tonefinish_ffmpeg_call_site", default=None
+)
+_STDERR_TIME = re.compile(r"time=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+@dataclass(frozen=True)
+class FfmpegUsage:
+    """Costo medido de un proceso FFmpeg."""
+
+    call_site: str
+    graph_hash: str
+    filters: tuple[str, ...]
+    wall_s: float
+    cpu_user_s: float
+    cpu_system_s: float
+    max_rss_mb: float
+    audio_duration_s: float | None = None
+    returncode: int = 0
+    function_ids: tuple[str, ...] = ()
+    finished_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def cpu_s(self) -> float:
+        return self.cpu_user_s + self.cpu_system_s
+
+    @property
+    def cpu_realtime_factor(self) -> float | None:
+        """Segundos de audio procesados por segundo de CPU."""
+        if not self.audio_duration_s or self.cpu_s <= 0:
+            return None
+        return self.audio_duration_s / self.cpu_s
+
+    @property
+    def wall_realtime_factor(self) -> float | None:
+        """Segundos de audio procesados por segundo de reloj."""
+        if not self.audio_duration_s or self.wall_s <= 0:
+            return None
+        return self.audio_duration_s / self.wall_s
+
+
+class AccountedPopen(subprocess.Popen):
+    """`Popen` que recoge el `rusage` del hijo al esperarlo (`os.wait4`, sólo POSIX)."""
+
+    rusage: Any = None
+
+    def _try_wait(self, wait_flags: int) -> tuple[int, int]:
+        if not hasattr(os, "wait4"):
+            return super()._try_wait(wait_flags)
+        try:
+            pid, status, usage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = usage
+        return pid, status
+
+
+class FfmpegAccountant:
+    """Registros recientes de uso (acotados) protegidos por lock."""
+
+    def __init__(self, max_records: int = DEFAULT_MAX_RECORDS) -> None:
+        self._lock = threading.Lock()
+        self._records: deque[FfmpegUsage] = deque(maxlen=max(1, int(max_records)))
+
+    def record(self, usage: FfmpegUsage) -> None:
+        with self._lock:
+            self._records.append(usage)
+
+    def merge(self, usages: Iterable[FfmpegUsage]) -> None:
+        with self._lock:
+            self._records.extend(usages)
+
+    def records(self, since: float | None = None) -> list[FfmpegUsage]:
+        """Registros terminados desde `since` (reloj `time.monotonic`), o todos."""
+        with self._lock:
+            records = list(self._records)
+        if since is None:
+            return records
+        return [usage for usage in records if usage.finished_at >= since]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+_ACCOUNTANT = FfmpegAccountant()
+
+
+def accountant() -> FfmpegAccountant:
+    return _ACCOUNTANT
+
+
+@contextlib.contextmanager
+def call_site(name: str, function_ids: Sequence[str] = ()) -> Iterator[None]:
+    """Atribuye los FFmpeg lanzados dentro del bloque a `name` (y a sus `function_id`)."""
+    token = _CALL_SITE.set((str(name), tuple(function_ids)))
+    try:
+        yield
+    finally:
+        _CALL_SITE.reset(token)
+
+
+@contextlib.contextmanager
+def capture() -> Iterator[list[FfmpegUsage]]:
+    """Registra en una lista aparte (proceso hijo del pool) en lugar del acumulador global."""
+    global _ACCOUNTANT
+    previous = _ACCOUNTANT
+    local = FfmpegAccountant()
+    collected: list[FfmpegUsage] = []
+    _ACCOUNTANT = local
+    try:
+        yield collected
+    finally:
+        _ACCOUNTANT = previous
+        collected.extend(local.records())
+
+
+def merge(usages: Iterable[FfmpegUsage]) -> None:
+    """Incorpora registros medidos en otro proceso."""
+    _ACCOUNTANT.merge(usages)
+
+
+def graph_hash(cmd: Sequence[str]) -> str:
+    graphs = ffmpeg_filter_graphs(list(cmd))
+    if not graphs:
+        return ""
+    return hashlib.sha1("\n".join(graphs).encode("utf-8")).hexdigest()[:12]
+
+
+def _parse_seconds(value: str) -> float | None:
+    try:
+        parts = [float(part) for part in str(value).split(":")]
+    except ValueError:
+        return None
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60.0 + part
+    return seconds if seconds > 0 else None
+
+
+def audio_duration_from_run(cmd: Sequence[str], stderr: str = "") -> float | None:
+    """Duración procesada: `-t` del comando o el último `time=` de las estadísticas de FFmpeg."""
+    args = list(cmd)
+    for flag, value in zip(args, args[1:]):
+        if flag == "-t":
+            duration = _parse_seconds(value)
+            if duration:
+                return duration
+    matches = _STDERR_TIME.findall(stderr or "")
+    if matches:
+        hours, minutes, seconds = matches[-1]
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        return duration if duration > 0 else None
+    return None
+
+
+def _max_rss_mb(max_rss: int) -> float:
+    # Linux reporta ru_maxrss en KiB; macOS en bytes.
+    return max_rss / (1024.0 * 1024.0) if sys.platform == "darwin" else max_rss / 1024.0
+
+
+def record_process(
+    cmd: Sequence[str],
+    process: subprocess.Popen,
+    wall_s: float,
+    stderr: str = "",
+    audio_duration_s: float | None = None,
+) -> FfmpegUsage | None:
+    """Registra el uso de un proceso ya esperado; None si no hay `rusage` (no POSIX)."""
+    usage = getattr(process, "rusage", None)
+    if usage is None:
+        return None
+    site, function_ids = _CALL_SITE.get() or (NO_CALL_SITE, ())
+    record = FfmpegUsage(
+        call_site=site,
+        graph_hash=graph_hash(cmd),
+        filters=tuple(ffmpeg_filter_names(list(cmd))),
+        wall_s=max(0.0, float(wall_s)),
+        cpu_user_s=float(usage.ru_utime),
+        cpu_system_s=float(usage.ru_stime),
+        max_rss_mb=_max_rss_mb(int(usage.ru_maxrss)),
+        audio_duration_s=audio_duration_s or audio_duration_from_run(cmd, stderr),
+        returncode=int(process.returncode if process.returncode is not None else 1),
+        function_ids=function_ids,
+    )
+    _ACCOUNTANT.record(record)
+    return record
+
+
+def summarize(records: Iterable[FfmpegUsage], by: str = "call_site") -> list[dict[str, Any]]:
+    """
+    Agrega registros por sitio de llamada + filtros (`by="call_site"`) o por
+    `function_id` (`by="function_id"`; cada proceso cuenta para todas las
+    funciones de su grafo). Ordenado por CPU total descendente.
+    """
+    groups: dict[str, list[FfmpegUsage]] = {}
+    for usage in records:
+        if by == "function_id":
+            keys = list(usage.function_ids) or [usage.call_site]
+        else:
+            filters = ",".join(usage.filters)
+            keys = [f"{usage.call_site} [{filters}]" if filters else usage.call_site]
+        for key in keys:
+            groups.setdefault(key, []).append(usage)
+    rows: list[dict[str, Any]] = []
+    for key, usages in groups.items():
+        cpu_s = sum(usage.cpu_s for usage in usages)
+        wall_s = sum(usage.wall_s for usage in usages)
+        timed = [usage for usage in usages if usage.audio_duration_s]
+        audio_s = sum(float(usage.audio_duration_s or 0.0) for usage in timed)
+        timed_cpu_s = sum(usage.cpu_s for usage in timed)
+        timed_wall_s = sum(usage.wall_s for usage in timed)
+        rows.append(
+            {
+                "key": key,
+                "count": len(usages),
+                "cpu_s": cpu_s,
+                "wall_s": wall_s,
+                "audio_s": audio_s,
+                "max_rss_mb": max(usage.max_rss_mb for usage in usages),
+                "cpu_realtime_factor": audio_s / timed_cpu_s if audio_s and timed_cpu_s > 0 else None,
+                "wall_realtime_factor": audio_s / timed_wall_s if audio_s and timed_wall_s > 0 else None,
+                "graph_hashes": sorted({usage.graph_hash for usage in usages if usage.graph_hash}),
+                "failures": sum(1 for usage in usages if usage.returncode != 0),
+            }
+        )
+    rows.sort(key=lambda row: -row["cpu_s"])
+    return rows
+
+
+def format_report(rows: Iterable[dict[str, Any]], limit: int | None = None) -> list[str]:
+    """Una línea legible por grupo de `summarize()`."""
+    lines: list[str] = []
+    for row in list(rows)[:limit]:
+        factor = row.get("cpu_realtime_factor")
+        speed = f"{factor:.1f}× tiempo real CPU" if factor else f"{row['cpu_s']:.1f} s CPU"
+        lines.append(
+            f"{row['key']}: {speed}, {row['max_rss_mb']:.0f} MB RSS "
+            f"({row['count']} proceso(s), {row['wall_s']:.1f} s de pared)"
+        )
+    return lines
+
+
+def write_usage_report(report_dir: os.PathLike[str] | str, records: Sequence[FfmpegUsage]) -> pathlib.Path:
+    """Escribe `batch_ffmpeg_usage_<fecha>.json` con ambos agrupamientos y los registros crudos."""
+    report_dir = pathlib.Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    path = report_dir / f"batch_ffmpeg_usage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    payload = {
+        "by_call_site": summarize(records),
+        "by_function_id": summarize(records, by="function_id"),
+        "records": [
+            {**asdict(usage), "cpu_s": usage.cpu_s, "cpu_realtime_factor": usage.cpu_realtime_factor}
+            for usage in records
+        ],
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,213 @@
+"""
+Presupuestos de invocaciones FFmpeg por API pública.
+
+Las regresiones de rendimiento de este proyecto casi siempre son una pasada
+FFmpeg extra sobre el archivo completo (pasó con `detect_peak_per_band`,
+`detect_stereo_characteristics` y el análisis de fades de `normalize_audio`).
+Medir tiempos es ruidoso; contar procesos no:
+
+- `count_ffmpeg_invocations()` intercepta la creación de procesos
+  (`subprocess.Popen`, que también cubre `subprocess.run` y `AccountedPopen`)
+  y atribuye cada comando a la función de los módulos vigilados que lo lanzó.
+- Cada comando se clasifica: `probe` (ffprobe), `full_decode` (decodifica una
+  entrada completa), `partial_decode` (entrada acotada con `-t`/`-to`/
+  `-frames`) u `other` (p. ej. `-version`).
+- `FFMPEG_BUDGETS` declara el máximo de decodificaciones completas y probes de
+  cada API; las variantes de una misma API van como `api[escenario]`.
+  `check_budget()` devuelve las violaciones y `test_ffmpeg_budgets` lo exige
+  para cada punto de entrada.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import pathlib
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Sequence
+
+WATCHED_MODULES = (
+    "audio_tools",
+    "audio_analysis",
+    "audio_processing",
+    "diagnostics",
+    "spectrum_analyzer",
+    "adaptive_master_renderer",
+    "analysis_mts",
+    "auto_master_intelligence",
+)
+# Funciones que sólo lanzan el proceso: la atribución sigue hacia quien las llamó.
+_TRANSPORT_FUNCTIONS = {
+    "audio_tools.run_ffmpeg",
+    "audio_tools.run_ffmpeg_with_progress",
+    "audio_tools._run_ffmpeg_with_progress",
+    "audio_tools._run_with_ffmpeg_retries",
+    "audio_tools._rerun_with_fallback_ffmpeg",
+}
+_INPUT_LIMIT_FLAGS = {"-t", "-to", "-frames", "-frames:a", "-aframes"}
+_VIRTUAL_INPUT_FORMATS = {"lavfi"}
+
+KIND_PROBE = "probe"
+KIND_FULL_DECODE = "full_decode"
+KIND_PARTIAL_DECODE = "partial_decode"
+KIND_OTHER = "other"
+
+
+@dataclass(frozen=True)
+class FfmpegInvocation:
+    """Un proceso lanzado desde un módulo vigilado."""
+
+    cmd: tuple[str, ...]
+    kind: str
+    site: str
+    stack: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class FfmpegBudget:
+    """Máximo de procesos que una API pública puede lanzar por llamada."""
+
+    full_decodes: int
+    probes: int = 0
+    partial_decodes: int | None = None
+
+
+@dataclass
+class InvocationLog:
+    invocations: list[FfmpegInvocation] = field(default_factory=list)
+
+    def of_kind(self, kind: str) -> list[FfmpegInvocation]:
+        return [item for item in self.invocations if item.kind == kind]
+
+    @property
+    def full_decodes(self) -> int:
+        return len(self.of_kind(KIND_FULL_DECODE))
+
+    @property
+    def probes(self) -> int:
+        return len(self.of_kind(KIND_PROBE))
+
+    @property
+    def partial_decodes(self) -> int:
+        return len(self.of_kind(KIND_PARTIAL_DECODE))
+
+    def describe(self) -> str:
+        return "\n".join(f"  {item.kind:<14} {item.site}: {' '.join(item.cmd)}" for item in self.invocations)
+
+
+# Presupuestos declarados. Subir un número exige justificar la pasada nueva;
+# bajarlo es la forma de fijar una optimización.
+FFMPEG_BUDGETS: dict[str, FfmpegBudget] = {
+    "audio_tools.get_audio_info": FfmpegBudget(full_decodes=0, probes=1),
+    "audio_analysis.analyze_audio": FfmpegBudget(full_decodes=1, probes=1),
+    "audio_analysis.analyze_eq_bands": FfmpegBudget(full_decodes=6),
+    "audio_analysis.analyze_voice_band": FfmpegBudget(full_decodes=1),
+    "audio_analysis.analyze_eq_and_voice": FfmpegBudget(full_decodes=1),
+    "audio_analysis.detect_clipping": FfmpegBudget(full_decodes=1),
+    "audio_analysis.detect_noise_floor": FfmpegBudget(full_decodes=4, probes=1),
+    "audio_analysis.detect_stereo_characteristics": FfmpegBudget(full_decodes=4),
+    "audio_analysis.detect_peak_per_band": FfmpegBudget(full_decodes=6),
+    "audio_analysis.analyze_silence_edges": FfmpegBudget(full_decodes=1, probes=1),
+    "audio_analysis.get_comprehensive_audio_analysis": FfmpegBudget(full_decodes=17, probes=1),
+    "diagnostics.analyze_audio_metrics": FfmpegBudget(full_decodes=2, probes=1),
+    "spectrum_analyzer.analyze_spectrum_fft": FfmpegBudget(full_decodes=0, probes=1, partial_decodes=1),
+    "spectrum_analyzer.analyze_dynamic_eq_evidence": FfmpegBudget(full_decodes=0, probes=1, partial_decodes=1),
+    "analysis_mts.build_mts_analysis": FfmpegBudget(full_decodes=0, probes=1, partial_decodes=1),
+    "auto_master_intelligence.analyze_audio_for_automaster": FfmpegBudget(full_decodes=13, probes=2, partial_decodes=2),
+    "auto_master_intelligence.analyze_audio_for_automaster[simple]": FfmpegBudget(
+        full_decodes=11, probes=1, partial_decodes=1
+    ),
+    # Render + (con cadena completa) medición y re-render de corrección.
+    "audio_processing.normalize_audio[plain]": FfmpegBudget(full_decodes=1, probes=1),
+    "audio_processing.normalize_audio[full_chain]": FfmpegBudget(full_decodes=3, probes=1),
+    # One-shot + respaldo multi-etapa (render, medición, calibración, medición).
+    "adaptive_master_renderer.render_adaptive_candidate": FfmpegBudget(full_decodes=5),
+}
+
+
+def _flag_value(cmd: Sequence[str], flag: str) -> str | None:
+    for current, value in zip(cmd, cmd[1:]):
+        if current == flag:
+            return value
+    return None
+
+
+def classify(cmd: Sequence[str]) -> str:
+    """Tipo de invocación según el comando (ver docstring del módulo)."""
+    args = [str(part) for part in cmd]
+    if not args:
+        return KIND_OTHER
+    program = pathlib.Path(args[0]).name.lower()
+    if "ffprobe" in program:
+        return KIND_PROBE
+    inputs = [index for index, part in enumerate(args[:-1]) if part == "-i"]
+    if not inputs:
+        return KIND_OTHER
+    for index in inputs:
+        # Las opciones de entrada (`-f lavfi`, `-t`) preceden a su `-i`.
+        start = max([0, *[other + 2 for other in inputs if other < index]])
+        options = args[start:index]
+        if _flag_value(options, "-f") in _VIRTUAL_INPUT_FORMATS:
+            continue
+        if any(flag in options for flag in _INPUT_LIMIT_FLAGS):
+            continue
+        output_options = args[inputs[-1] + 2:]
+        if any(flag in output_options for flag in _INPUT_LIMIT_FLAGS):
+            return KIND_PARTIAL_DECODE
+        return KIND_FULL_DECODE
+    return KIND_PARTIAL_DECODE if any(flag in args for flag in _INPUT_LIMIT_FLAGS) else KIND_OTHER
+
+
+def _call_stack(modules: Sequence[str]) -> tuple[str, ...]:
+    """Funciones de los módulos vigilados en la pila actual, de la más interna a la externa."""
+    names: list[str] = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module in modules:
+            names.append(f"{module}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    return tuple(names)
+
+
+@contextlib.contextmanager
+def count_ffmpeg_invocations(modules: Sequence[str] = WATCHED_MODULES) -> Iterator[InvocationLog]:
+    """
+    Registra (sin alterar su ejecución) cada proceso lanzado desde `modules`
+    mientras dura el bloque. No ve procesos lanzados en hijos del pool.
+    """
+    log = InvocationLog()
+    lock = threading.Lock()
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self: subprocess.Popen, args: Any, *rest: Any, **kwargs: Any) -> None:
+        stack = _call_stack(modules)
+        if stack:
+            cmd = tuple(str(part) for part in (args if isinstance(args, (list, tuple)) else [args]))
+            site = next((name for name in stack if name not in _TRANSPORT_FUNCTIONS), stack[0])
+            with lock:
+                log.invocations.append(FfmpegInvocation(cmd, classify(cmd), site, stack))
+        original_init(self, args, *rest, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init  # type: ignore[method-assign]
+    try:
+        yield log
+    finally:
+        subprocess.Popen.__init__ = original_init  # type: ignore[method-assign]
+
+
+def check_budget(api: str, log: InvocationLog) -> list[str]:
+    """Violaciones del presupuesto declarado para `api` (lista vacía si se cumple)."""
+    budget = FFMPEG_BUDGETS[api]
+    problems: list[str] = []
+    if log.full_decodes > budget.full_decodes:
+        problems.append(f"{api}: {log.full_decodes} decodificaciones completas (presupuesto {budget.full_decodes})")
+    if log.probes > budget.probes:
+        problems.append(f"{api}: {log.probes} ffprobe (presupuesto {budget.probes})")
+    if budget.partial_decodes is not None and log.partial_decodes > budget.partial_decodes:
+        problems.append(
+            f"{api}: {log.partial_decodes} decodificaciones parciales (presupuesto {budget.partial_decodes})"
+        )
+    return problems
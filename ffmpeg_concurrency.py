@@ -0,0 +1,248 @@
+"""
+Control adaptativo de cuántos procesos FFmpeg corren a la vez.
+
+Reemplaza al `BoundedSemaphore` fijo de `audio_tools`. El límite sigue un
+esquema AIMD con los datos de `ResourceMonitor`, muestreados como mucho cada
+`interval` segundos:
+
+- Sobrecarga (CPU sobre `cpu_high`, RAM usada sobre `memory_high` o RAM libre
+  bajo `min_free_ram_gb`): el límite se multiplica por `decrease_factor`.
+  Así una máquina compartida con otros servicios se autorregula.
+- Holgura (CPU bajo `cpu_low` y llamadas esperando turno): +1, pero sólo
+  después de `increase_after` muestras seguidas con holgura y fuera del
+  enfriamiento que sigue a cada bajada. Entre `cpu_low` y `cpu_high` el límite
+  se mantiene (histéresis). Así un equipo de 32 núcleos ocioso llega a usarse.
+- Si una subida no mejora el throughput (trabajos terminados por segundo), se
+  deshace y no se vuelve a subir durante `plateau_hold` segundos.
+
+El límite nunca baja de `min_limit` ni supera `max_limit`. `metrics()` expone
+el estado y los contadores de ajustes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+DEFAULT_INTERVAL_S = 2.0
+DEFAULT_PLATEAU_HOLD_S = 30.0
+
+
+def _default_sampler() -> Any:
+    from resource_monitor import shared_resource_monitor  # import local: resource_monitor no depende de audio_tools
+
+    monitor = shared_resource_monitor()
+    # Promedio de las muestras recientes del hilo de fondo: un pico aislado
+    # no debe recortar el límite.
+    return lambda: monitor.smoothed(3 * DEFAULT_INTERVAL_S)
+
+
+class FfmpegConcurrencyController:
+    """Límite redimensionable de procesos FFmpeg simultáneos (AIMD con histéresis)."""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        sampler: Callable[[], Any] | None = None,
+        adaptive: bool = True,
+        interval: float = DEFAULT_INTERVAL_S,
+        cpu_high: float = 90.0,
+        cpu_low: float = 70.0,
+        memory_high: float = 90.0,
+        min_free_ram_gb: float = 1.0,
+        decrease_factor: float = 0.7,
+        increase_after: int = 2,
+        cooldown: float | None = None,
+        plateau_hold: float = DEFAULT_PLATEAU_HOLD_S,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit if max_limit is not None else initial))
+        self._limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+        self.adaptive = adaptive
+        self.interval = max(0.0, float(interval))
+        self.cpu_high = float(cpu_high)
+        self.cpu_low = float(cpu_low)
+        self.memory_high = float(memory_high)
+        self.min_free_ram_gb = float(min_free_ram_gb)
+        self.decrease_factor = min(0.95, max(0.1, float(decrease_factor)))
+        self.increase_after = max(1, int(increase_after))
+        self.cooldown = 3 * self.interval if cooldown is None else max(0.0, float(cooldown))
+        self.plateau_hold = max(0.0, float(plateau_hold))
+        self._clock = clock
+        self._sampler = sampler
+        self._cond = threading.Condition()
+        self._sampling = False
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._window_completed = 0
+        self._window_start = clock()
+        self._last_adjust = clock()
+        self._last_decrease = float("-inf")
+        self._room_streak = 0
+        self._probe: tuple[int, float] | None = None
+        self._plateau_until = float("-inf")
+        self._last_sample: dict[str, float | None] = {}
+        self._last_throughput: float | None = None
+        self._stats = {"increases": 0, "decreases": 0, "reverts": 0, "samples": 0}
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(math.floor(self._limit)))
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.limit:
+                    # Timeout: aun con todos los slots ocupados, el límite se
+                    # reevalúa (p. ej. si otro servicio liberó la CPU).
+                    self._cond.wait(timeout=self.interval or None)
+                    self._cond.release()
+                    try:
+                        self._maybe_adjust()
+                    finally:
+                        self._cond.acquire()
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+        self._maybe_adjust()
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._completed += 1
+            self._window_completed += 1
+            self._cond.notify_all()
+        self._maybe_adjust()
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def reset(self, limit: int, max_limit: int | None = None) -> None:
+        """Fija el límite actual (y opcionalmente el techo), p. ej. desde `ResourceGovernor.apply`."""
+        with self._cond:
+            if max_limit is not None:
+                self.max_limit = max(self.min_limit, int(max_limit))
+            self._limit = float(min(self.max_limit, max(self.min_limit, int(limit))))
+            self._room_streak = 0
+            self._probe = None
+            self._cond.notify_all()
+
+    def set_thresholds(self, cpu_high: float, memory_high: float, min_free_ram_gb: float, band: float = 15.0) -> None:
+        """Umbrales de carga (p. ej. los del perfil de `ResourceGovernor`); `band` es la histéresis de CPU."""
+        with self._cond:
+            self.cpu_high = float(cpu_high)
+            self.cpu_low = max(0.0, self.cpu_high - max(0.0, float(band)))
+            self.memory_high = float(memory_high)
+            self.min_free_ram_gb = float(min_free_ram_gb)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "adaptive": self.adaptive,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "completed": self._completed,
+                "throughput_per_s": self._last_throughput,
+                "last_sample": dict(self._last_sample),
+                **self._stats,
+            }
+
+    def observe(self, cpu_percent: float | None, memory_percent: float | None, memory_available_gb: float | None) -> int:
+        """Aplica un paso de control con una muestra de recursos; devuelve el límite resultante."""
+        with self._cond:
+            now = self._clock()
+            elapsed = max(1e-6, now - self._window_start)
+            throughput = self._window_completed / elapsed if self._window_completed else None
+            self._window_start = now
+            self._window_completed = 0
+            self._last_adjust = now
+            self._stats["samples"] += 1
+            self._last_sample = {
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory_percent,
+                "memory_available_gb": memory_available_gb,
+            }
+            if throughput is not None:
+                self._last_throughput = throughput
+
+            overloaded = (
+                (cpu_percent is not None and cpu_percent > self.cpu_high)
+                or (memory_percent is not None and memory_percent > self.memory_high)
+                or (memory_available_gb is not None and memory_available_gb < self.min_free_ram_gb)
+            )
+            if overloaded:
+                self._room_streak = 0
+                self._probe = None
+                if self.limit > self.min_limit:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+                return self.limit
+
+            if self._probe is not None and throughput is not None:
+                previous_limit, previous_throughput = self._probe
+                self._probe = None
+                if throughput <= previous_throughput:
+                    # Más procesos sin más trabajo terminado: la subida no sirvió.
+                    self._limit = float(previous_limit)
+                    self._plateau_until = now + self.plateau_hold
+                    self._stats["reverts"] += 1
+                    self._cond.notify_all()
+                    return self.limit
+
+            demand = self._waiting > 0 or self._in_flight >= self.limit
+            room = cpu_percent is not None and cpu_percent < self.cpu_low and demand
+            self._room_streak = self._room_streak + 1 if room else 0
+            if (
+                self._room_streak >= self.increase_after
+                and self.limit < self.max_limit
+                and now - self._last_decrease >= self.cooldown
+                and now >= self._plateau_until
+            ):
+                if throughput is not None:
+                    self._probe = (self.limit, throughput)
+                self._limit = float(self.limit + 1)
+                self._room_streak = 0
+                self._stats["increases"] += 1
+                self._cond.notify_all()
+            return self.limit
+
+    def _maybe_adjust(self) -> None:
+        if not self.adaptive:
+            return
+        with self._cond:
+            if self._sampling or self._clock() - self._last_adjust < self.interval:
+                return
+            self._sampling = True
+        try:
+            if self._sampler is None:
+                self._sampler = _default_sampler()
+            snapshot = self._sampler()
+            self.observe(
+                getattr(snapshot, "cpu_percent", None),
+                getattr(snapshot, "memory_percent", None),
+                getattr(snapshot, "memory_available_gb", None),
+            )
+        except Exception:
+            # Sin muestra no se ajusta: el límite actual sigue vigente.
+            with self._cond:
+                self._last_adjust = self._clock()
+        finally:
+            with self._cond:
+                self._sampling = False
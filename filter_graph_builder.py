@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import re
+
+_LABEL_RE = re.compile(r"\[([^\[\]]+)\]")
+
 
 class FilterGraphBuilder:
     @staticmethod
@@ -21,3 +25,15 @@ class FilterGraphBuilder:
         if not tail_filters:
             return FilterGraphBuilder.preprocess_to_output(filter_chain, filter_output)
         return f"{filter_chain};[{filter_output}]" + ",".join(tail_filters) + "[out]"
+
+    @staticmethod
+    def namespaced(filter_chain: str, filter_output: str, input_label: str, prefix: str) -> tuple[str, str]:
+        """
+        Prefija los labels internos de un grafo compilado (salvo su entrada) para
+        poder repetirlo en varias ramas del mismo `filter_complex` sin colisiones.
+        """
+        def rename(match: re.Match) -> str:
+            label = match.group(1)
+            return match.group(0) if label == input_label else f"[{prefix}{label}]"
+
+        return _LABEL_RE.sub(rename, filter_chain), f"{prefix}{filter_output}"
@@ -0,0 +1,396 @@
+"""
+Daemon de ingesta: vigila carpetas y masteriza lo que va llegando.
+
+Arrancar un lote por cada tanda de archivos paga otra vez los imports, el
+sondeo de recursos y el calentamiento de los procesos de análisis. El daemon
+vive todo el día con esos costos ya pagados:
+
+- `StatSnapshotWatcher` compara snapshots de `os.stat` (tamaño, mtime) en cada
+  sondeo: funciona en cualquier sistema de archivos, también en montajes de red
+  donde inotify no avisa. Un archivo se encola recién cuando su tamaño y mtime
+  no cambian durante `stable_polls` sondeos y `settle_s` segundos, así no se
+  toma una copia a medio escribir.
+- `IngestDaemon` agrupa los archivos listos en lotes de hasta `batch_size` y
+  los procesa con `BatchEngine` sobre un `BatchProcessPool` compartido y
+  calentado al arrancar. Salidas y artefactos (`log/`) quedan como en un lote
+  normal.
+- El ledger (`log/ingest_ledger.json` en la carpeta de salida) recuerda qué
+  versión de cada archivo se procesó: reiniciar el daemon no repite trabajo,
+  pero un archivo reemplazado se vuelve a procesar.
+- `stats()` expone profundidad de cola y throughput; también se escribe en
+  `log/ingest_stats.json` en cada sondeo.
+
+    python main.py watch /ingest/entrada --output-dir /ingest/salida --preset preset.json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Sequence
+
+from batch_engine import engine_from_settings, _batch_cpu_budget
+from config import INPUT_FORMATS
+from process_pool import BatchProcessPool, process_pool_workers
+
+DEFAULT_POLL_INTERVAL_S = 2.0
+DEFAULT_SETTLE_S = 5.0
+DEFAULT_STABLE_POLLS = 2
+DEFAULT_BATCH_SIZE = 8
+# Ventana para medir el throughput reciente (archivos por hora).
+THROUGHPUT_WINDOW_S = 3600.0
+
+FileSignature = tuple[int, int]  # (tamaño, mtime_ns)
+
+
+def _write_json_atomic(path: pathlib.Path, payload: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Nombre propio por escritura: el sondeo y el consumidor publican las
+    # estadísticas desde hilos distintos.
+    staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    staging.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(staging, path)
+
+
+@dataclass
+class _Candidate:
+    signature: FileSignature
+    changed_at: float
+    stable_polls: int = 0
+
+
+class StatSnapshotWatcher:
+    """Detecta archivos nuevos o reemplazados por diferencia de snapshots `stat`."""
+
+    def __init__(
+        self,
+        roots: Sequence[str | os.PathLike[str]],
+        extensions: Iterable[str] = INPUT_FORMATS,
+        recursive: bool = False,
+        settle_s: float = DEFAULT_SETTLE_S,
+        stable_polls: int = DEFAULT_STABLE_POLLS,
+        exclude: Sequence[str | os.PathLike[str]] = (),
+        processed: Dict[str, FileSignature] | None = None,
+    ) -> None:
+        self.roots = [pathlib.Path(root) for root in roots]
+        self.extensions = {ext.lower() for ext in extensions}
+        self.recursive = recursive
+        self.settle_s = max(0.0, float(settle_s))
+        self.stable_polls = max(1, int(stable_polls))
+        self.exclude = [pathlib.Path(path).resolve() for path in exclude]
+        # Versión ya entregada de cada archivo (sembrada desde el ledger).
+        self.emitted: Dict[str, FileSignature] = dict(processed or {})
+        self._candidates: Dict[str, _Candidate] = {}
+
+    def _excluded(self, path: pathlib.Path) -> bool:
+        return any(path == excluded or excluded in path.parents for excluded in self.exclude)
+
+    def snapshot(self) -> Dict[str, FileSignature]:
+        found: Dict[str, FileSignature] = {}
+        for root in self.roots:
+            walker = os.walk(root) if self.recursive else [(str(root), [], os.listdir(root) if root.is_dir() else [])]
+            for directory, subdirs, names in walker:
+                base = pathlib.Path(directory).resolve()
+                if self._excluded(base):
+                    subdirs[:] = []
+                    continue
+                for name in names:
+                    if name.startswith(".") or pathlib.Path(name).suffix.lower() not in self.extensions:
+                        continue
+                    try:
+                        stat = os.stat(base / name)
+                    except OSError:
+                        continue  # borrado o renombrado entre listdir y stat
+                    if stat.st_size > 0:
+                        found[str(base / name)] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def poll(self, now: float | None = None) -> list[pathlib.Path]:
+        """Archivos que se estabilizaron desde el sondeo anterior (cada versión una vez)."""
+        now = time.monotonic() if now is None else now
+        current = self.snapshot()
+        ready: list[pathlib.Path] = []
+        for path, signature in sorted(current.items()):
+            if self.emitted.get(path) == signature:
+                continue
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate.signature != signature:
+                self._candidates[path] = _Candidate(signature, now)
+                continue
+            candidate.stable_polls += 1
+            if candidate.stable_polls >= self.stable_polls and now - candidate.changed_at >= self.settle_s:
+                ready.append(pathlib.Path(path))
+                self.emitted[path] = signature
+                del self._candidates[path]
+        for gone in set(self._candidates) - set(current):
+            del self._candidates[gone]
+        for gone in set(self.emitted) - set(current):
+            # Si vuelve a aparecer (misma ruta, copia nueva) se procesa otra vez.
+            del self.emitted[gone]
+        return ready
+
+    @property
+    def pending(self) -> int:
+        """Archivos vistos que todavía se están copiando o estabilizando."""
+        return len(self._candidates)
+
+
+class IngestDaemon:
+    """Vigila `watch_dirs` y procesa lo que llega con un motor y pool de larga vida."""
+
+    def __init__(
+        self,
+        watch_dirs: Sequence[str | os.PathLike[str]],
+        output_dir: str | os.PathLike[str],
+        settings: Dict[str, Any] | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_S,
+        settle_s: float = DEFAULT_SETTLE_S,
+        stable_polls: int = DEFAULT_STABLE_POLLS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        recursive: bool = False,
+        pool_workers: int | None = None,
+        log: Callable[[str], None] | None = None,
+    ) -> None:
+        self.output_dir = pathlib.Path(output_dir)
+        self.settings = {**(settings or {}), "output_dir": str(self.output_dir)}
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.batch_size = max(1, int(batch_size))
+        self.log = log or (lambda _message: None)
+        self.ledger_path = self.output_dir / "log" / "ingest_ledger.json"
+        self.stats_path = self.output_dir / "log" / "ingest_stats.json"
+        self.ledger: Dict[str, Dict[str, Any]] = self._load_ledger()
+        self.watcher = StatSnapshotWatcher(
+            watch_dirs,
+            recursive=recursive,
+            settle_s=settle_s,
+            stable_polls=stable_polls,
+            exclude=[self.output_dir],
+            # Sólo lo terminado: un archivo fallido se reintenta al reiniciar.
+            processed={
+                path: (int(entry["size"]), int(entry["mtime_ns"]))
+                for path, entry in self.ledger.items() if entry.get("status") == "done"
+            },
+        )
+        workers = pool_workers if pool_workers is not None else _batch_cpu_budget().max_parallel_analysis
+        self.pool = BatchProcessPool(process_pool_workers(workers))
+        self._queue: "queue.Queue[tuple[pathlib.Path, FileSignature, float]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._completions: deque[float] = deque()
+        self._counters: Dict[str, Any] = {
+            "discovered": 0,
+            "processed": 0,
+            "failed": 0,
+            "batches": 0,
+            "in_flight": 0,
+            "busy_s": 0.0,
+            "latency_s_total": 0.0,
+        }
+        # Encolados y todavía no terminados (cola + lote en curso).
+        self._outstanding = 0
+        self._started_at = time.time()
+
+    # ── Estado ──
+
+    def _load_ledger(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.ledger_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de cola y throughput (total y de la última hora)."""
+        now = time.time()
+        with self._lock:
+            counters = dict(self._counters)
+            while self._completions and now - self._completions[0] > THROUGHPUT_WINDOW_S:
+                self._completions.popleft()
+            recent = len(self._completions)
+        uptime = max(1e-9, now - self._started_at)
+        done = counters["processed"] + counters["failed"]
+        return {
+            "updated_at": now,
+            "uptime_s": round(uptime, 1),
+            "queue_depth": self._queue.qsize(),
+            "settling": self.watcher.pending,
+            "in_flight": counters["in_flight"],
+            "discovered": counters["discovered"],
+            "processed": counters["processed"],
+            "failed": counters["failed"],
+            "batches": counters["batches"],
+            "files_per_hour": round(counters["processed"] * 3600.0 / uptime, 2),
+            "files_last_hour": recent,
+            "busy_ratio": round(counters["busy_s"] / uptime, 3),
+            "mean_latency_s": round(counters["latency_s_total"] / done, 2) if done else None,
+        }
+
+    def _record(self, path: pathlib.Path, signature: FileSignature, status: str, detail: Any = None) -> None:
+        entry: Dict[str, Any] = {
+            "size": signature[0],
+            "mtime_ns": signature[1],
+            "status": status,
+            "finished_at": time.time(),
+        }
+        if detail is not None:
+            entry["error"] = detail
+        self.ledger[str(path)] = entry
+
+    # ── Bucle ──
+
+    def poll_once(self) -> int:
+        """Un sondeo: encola lo que se estabilizó y publica las estadísticas."""
+        ready = self.watcher.poll()
+        now = time.monotonic()
+        if ready:
+            with self._lock:
+                self._counters["discovered"] += len(ready)
+                self._outstanding += len(ready)
+        for path in ready:
+            self._queue.put((path, self.watcher.emitted[str(path)], now))
+        if ready:
+            self.log(f"Ingesta: {len(ready)} archivo(s) nuevo(s); en cola {self._queue.qsize()}.")
+        _write_json_atomic(self.stats_path, self.stats())
+        return len(ready)
+
+    def _next_batch(self, timeout: float) -> list[tuple[pathlib.Path, FileSignature, float]]:
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_engine(self, files: list[pathlib.Path]) -> tuple[Dict[str, Dict[str, Any]], str | None]:
+        """Corre el motor sobre `files`; resultados por ruta resuelta y error del lote."""
+        outcome: Dict[str, Any] = {"results": [], "error": None}
+        engine = engine_from_settings(self.settings, files, process_pool=self.pool)
+        engine.progress.connect(lambda message, current, total: self.log(f"[{current}/{total}] {message}"))
+        engine.finished.connect(lambda _message, results: outcome.update(results=list(results or [])))
+        engine.error.connect(lambda message: outcome.update(error=message))
+        try:
+            engine.run()
+        except Exception as exc:
+            outcome["error"] = str(exc) or exc.__class__.__name__
+        # Por ruta resuelta: en modo recursivo dos carpetas pueden traer el
+        # mismo nombre de archivo.
+        by_source = {str(item.get("source")): item for item in outcome["results"] if isinstance(item, dict)}
+        return by_source, outcome["error"]
+
+    def process_batch(self, batch: list[tuple[pathlib.Path, FileSignature, float]]) -> None:
+        files = [path for path, _signature, _queued in batch]
+        with self._lock:
+            self._counters["in_flight"] = len(files)
+        started = time.monotonic()
+        by_source, batch_error = self._run_engine(files)
+        finished_at = {key: time.monotonic() for key in by_source}
+        errors: Dict[str, str | None] = {}
+        missing = [path for path in files if str(path.resolve()) not in by_source]
+        if batch_error and len(files) > 1 and missing:
+            # El motor aborta el lote entero con el primer archivo que falla:
+            # los que quedaron sin resultado (sin intentar o ya renderizados)
+            # se reintentan de a uno para no culpar a los sanos.
+            self.log(f"Ingesta: lote con error ({batch_error}); reintentando {len(missing)} archivo(s) de a uno.")
+            for path in missing:
+                single, error = self._run_engine([path])
+                by_source.update(single)
+                finished_at.update({key: time.monotonic() for key in single})
+                errors[str(path.resolve())] = error
+        else:
+            errors = {str(path.resolve()): batch_error for path in missing}
+        finished = time.monotonic()
+
+        processed = failed = 0
+        latency = 0.0
+        for path, signature, queued_at in batch:
+            key = str(path.resolve())
+            if key in by_source:
+                self._record(path, signature, "done")
+                processed += 1
+            else:
+                self._record(path, signature, "failed", errors.get(key) or "sin resultado")
+                failed += 1
+            latency += finished_at.get(key, finished) - queued_at
+        _write_json_atomic(self.ledger_path, self.ledger)
+        with self._lock:
+            self._counters["in_flight"] = 0
+            self._outstanding -= len(batch)
+            self._counters["batches"] += 1
+            self._counters["processed"] += processed
+            self._counters["failed"] += failed
+            self._counters["busy_s"] += finished - started
+            self._counters["latency_s_total"] += latency
+            now = time.time()
+            self._completions.extend([now] * processed)
+        if failed:
+            self.log(f"Ingesta: {failed} archivo(s) marcados como fallidos.")
+
+    def _consume(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch(self.poll_interval)
+            if not batch:
+                continue
+            try:
+                self.process_batch(batch)
+            except Exception as exc:
+                # Un lote roto (disco lleno, ledger sin permisos...) no debe
+                # dejar al daemon sondeando sin nadie que consuma la cola.
+                self.log(f"Ingesta: error inesperado en el consumidor: {exc}\n{traceback.format_exc()}")
+                with self._lock:
+                    self._counters["in_flight"] = 0
+                    self._outstanding = max(0, self._outstanding - len(batch))
+            try:
+                _write_json_atomic(self.stats_path, self.stats())
+            except OSError as exc:
+                self.log(f"Ingesta: no se pudieron escribir las estadísticas: {exc}")
+
+    def run(self, stop_event: threading.Event | None = None, exit_when_idle: bool = False) -> Dict[str, Any]:
+        """
+        Sondea hasta `stop_event` (o, con `exit_when_idle`, hasta que no quede
+        nada por estabilizar ni procesar). Devuelve las estadísticas finales.
+        """
+        stop_event = stop_event or threading.Event()
+        self._stop.clear()
+        workers = self.pool.warm()
+        self.log(f"Ingesta: {len(workers)} proceso(s) de análisis listos; vigilando {len(self.watcher.roots)} carpeta(s).")
+        consumer = threading.Thread(target=self._consume, name="tonefinish-ingest", daemon=True)
+        consumer.start()
+        try:
+            while not stop_event.is_set():
+                self.poll_once()
+                if exit_when_idle and self._idle():
+                    break
+                stop_event.wait(self.poll_interval)
+        finally:
+            self.stop()
+            consumer.join()
+            self.pool.close(wait=True)
+        final = self.stats()
+        _write_json_atomic(self.stats_path, final)
+        return final
+
+    def _idle(self) -> bool:
+        with self._lock:
+            outstanding = self._outstanding
+        return not outstanding and not self.watcher.pending
+
+    def stop(self) -> None:
+        """
+        Detiene el consumidor al terminar el lote en curso. Lo que quedó en
+        cola no está en el ledger: se vuelve a detectar al reiniciar.
+        """
+        self._stop.set()
+        if not self._queue.empty():
+            self.log(f"Ingesta: deteniendo; {self._queue.qsize()} archivo(s) en cola se retoman al reiniciar.")
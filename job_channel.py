@@ -0,0 +1,236 @@
+"""
+Canal push de eventos entre el runner de lote y `CliBatchWorker`.
+
+El worker de la UI abre un socket UNIX en escucha y pasa su ruta en el payload
+(`progress_socket`). El runner se conecta y envía, además de escribirlos en el
+log de eventos, los mismos eventos JSON de estado (una línea por evento). La UI
+espera con `select` en lugar de releer el estado cada 0.5 s. El canal es
+bidireccional: la UI manda `{"command": "cancel"}` y el runner cancela en el
+acto, sin esperar al próximo sondeo del marcador `.cancel`.
+
+Si el canal no existe (sin `AF_UNIX`, `TONEFINISH_PROGRESS_CHANNEL=0`, runner
+en otra máquina) o se corta, la UI vuelve a sondear el archivo de estado.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import select
+import shutil
+import socket
+import tempfile
+import threading
+from typing import Any, Callable
+
+CHANNEL_FALLBACK_POLL_S = 10.0
+
+
+def progress_channel_enabled() -> bool:
+    """`TONEFINISH_PROGRESS_CHANNEL=0` fuerza el sondeo del archivo de estado."""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    raw = os.getenv("TONEFINISH_PROGRESS_CHANNEL", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _decode_lines(buffer: bytes) -> tuple[list[dict[str, Any]], bytes]:
+    complete = buffer.rfind(b"\n") + 1
+    messages: list[dict[str, Any]] = []
+    for raw in buffer[:complete].splitlines():
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(message, dict):
+            messages.append(message)
+    return messages, buffer[complete:]
+
+
+class ProgressChannel:
+    """Lado UI: socket en escucha para un único runner."""
+
+    def __init__(self) -> None:
+        self._dir = tempfile.mkdtemp(prefix="tonefinish-channel-")
+        self.path = pathlib.Path(self._dir) / "progress.sock"
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(str(self.path))
+        self._listener.listen(1)
+        self._listener.setblocking(False)
+        self._conn: socket.socket | None = None
+        self._buffer = b""
+        self._send_lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        self.peer_closed = False
+        self._closed = False
+
+    @classmethod
+    def open(cls) -> "ProgressChannel | None":
+        if not progress_channel_enabled():
+            return None
+        try:
+            return cls()
+        except OSError:
+            return None
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def wait(self, timeout: float) -> list[dict[str, Any]]:
+        """Espera hasta `timeout` s por eventos del runner (o por `wake()`)."""
+        if self.peer_closed:
+            return []
+        source = self._conn if self._conn is not None else self._listener
+        ready, _, _ = select.select([source, self._wake_r], [], [], max(0.0, timeout))
+        if self._wake_r in ready:
+            try:
+                os.read(self._wake_r, 4096)
+            except OSError:
+                pass
+        if source not in ready:
+            return []
+        if source is self._listener:
+            try:
+                conn, _addr = self._listener.accept()
+            except OSError:
+                return []
+            conn.setblocking(False)
+            self._conn = conn
+            return []
+        try:
+            data = source.recv(65536)
+        except BlockingIOError:
+            return []
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect()
+            return []
+        messages, self._buffer = _decode_lines(self._buffer + data)
+        return messages
+
+    def send(self, message: dict[str, Any]) -> bool:
+        """Envía un comando al runner; False si no hay conexión."""
+        with self._send_lock:
+            conn = self._conn
+            if conn is None:
+                return False
+            try:
+                conn.setblocking(True)
+                conn.sendall(_encode(message))
+                return True
+            except OSError:
+                return False
+            finally:
+                try:
+                    conn.setblocking(False)
+                except OSError:
+                    pass
+
+    def wake(self) -> None:
+        """Despierta un `wait()` en curso desde otro hilo."""
+        if self._closed:
+            return
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._disconnect()
+        for closer in (self._listener.close, lambda: os.close(self._wake_r), lambda: os.close(self._wake_w)):
+            try:
+                closer()
+            except OSError:
+                pass
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self.peer_closed = True
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+class ProgressChannelClient:
+    """Lado runner: envía eventos y recibe comandos de la UI."""
+
+    def __init__(self, sock: socket.socket, on_message: Callable[[dict[str, Any]], None] | None = None) -> None:
+        self._sock = sock
+        self._lock = threading.Lock()
+        self._broken = False
+        self._on_message = on_message
+        self._reader = threading.Thread(target=self._read_loop, name="tonefinish-channel-reader", daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def connect(
+        cls,
+        path: str | os.PathLike[str],
+        on_message: Callable[[dict[str, Any]], None] | None = None,
+        timeout: float = 2.0,
+    ) -> "ProgressChannelClient | None":
+        """Conecta con la UI; None si el canal no está disponible (se sigue sin él)."""
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.settimeout(None)
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock, on_message)
+
+    def send(self, event: dict[str, Any]) -> None:
+        """Envío best effort: si la UI se fue, el runner sigue con el log en disco."""
+        if self._broken:
+            return
+        try:
+            line = _encode(event)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            try:
+                self._sock.sendall(line)
+            except OSError:
+                self._broken = True
+
+    def close(self) -> None:
+        self._broken = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def _read_loop(self) -> None:
+        buffer = b""
+        while True:
+            try:
+                data = self._sock.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            messages, buffer = _decode_lines(buffer + data)
+            for message in messages:
+                if self._on_message is not None:
+                    try:
+                        self._on_message(message)
+                    except Exception:
+                        pass
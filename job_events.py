@@ -0,0 +1,204 @@
+"""
+Estado de trabajos de lote como log de eventos append-only + snapshot.
+
+El runner recibía un tick de progreso por archivo y otro de FFmpeg cada 0.5 s,
+y en cada uno reescribía el JSON de estado completo (con `results`). Ahora
+cada actualización se agrega como una línea JSONL (`<job>.status.events.jsonl`)
+con sólo los campos que cambian, y el snapshot `<job>.status.json` se compacta
+cada `snapshot_interval` segundos (y siempre en estados terminales) guardando
+el offset en bytes del log hasta el que llega.
+
+Lectores:
+- `read_job_status()` reconstruye el estado: snapshot + eventos posteriores.
+- `read_job_events()` devuelve sólo lo agregado desde un offset, para seguir
+  el trabajo de forma incremental sin releer el estado completo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import time
+import uuid
+from typing import Any, Callable
+
+DEFAULT_SNAPSHOT_INTERVAL_S = 2.0
+TERMINAL_STATES = frozenset({"done", "error", "cancelled"})
+
+
+def events_path_for(status_path: str | os.PathLike[str]) -> pathlib.Path:
+    """`<job>.status.json` -> `<job>.status.events.jsonl`."""
+    path = pathlib.Path(status_path)
+    return path.with_name(f"{path.stem}.events.jsonl")
+
+
+def _write_snapshot(path: pathlib.Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class JobStatusWriter:
+    """Escribe el estado del trabajo como eventos + snapshot periódico."""
+
+    def __init__(
+        self,
+        status_path: str | os.PathLike[str],
+        state: dict[str, Any],
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL_S,
+        sink: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        self.status_path = pathlib.Path(status_path)
+        self.sink = sink
+        self.events_path = events_path_for(self.status_path)
+        self.snapshot_interval = max(0.0, float(snapshot_interval))
+        self.state: dict[str, Any] = {}
+        self.status_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.events_path, "ab")
+        self._offset = self._fh.tell()
+        self._last_snapshot = 0.0
+        # Primer evento = estado completo: un lector que empieza en este
+        # offset no necesita nada anterior.
+        self.update(_force_snapshot=True, **state)
+
+    def __enter__(self) -> "JobStatusWriter":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    def update(self, _force_snapshot: bool = False, **fields: Any) -> None:
+        """Agrega un evento con los campos que cambian."""
+        line = (json.dumps(fields, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self._fh.write(line)
+        self._fh.flush()
+        self._offset += len(line)
+        self.state.update(fields)
+        if self.sink is not None:
+            # El log en disco ya tiene el evento: el canal push es un atajo.
+            try:
+                self.sink(fields)
+            except Exception:
+                pass
+        now = time.monotonic()
+        if (
+            _force_snapshot
+            or self.state.get("state") in TERMINAL_STATES
+            or now - self._last_snapshot >= self.snapshot_interval
+        ):
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Compacta el estado actual en el snapshot con su offset de log."""
+        _write_snapshot(self.status_path, {**self.state, "log_offset": self._offset})
+        self._last_snapshot = time.monotonic()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.snapshot()
+            self._fh.close()
+
+
+def bind_engine_status(engine: Any, status: JobStatusWriter, cancel_path: pathlib.Path) -> None:
+    """
+    Conecta los hooks de `BatchEngine` (progreso, FFmpeg, fin, error) al log de
+    estado; con `cancel_path` presente un error se registra como cancelación.
+    """
+
+    def on_progress(message: str, current: int, total: int) -> None:
+        total_safe = max(1, int(total or 1))
+        progress = max(0.0, min(100.0, (float(current) / total_safe) * 100.0))
+        status.update(
+            state="running",
+            progress=progress,
+            message=message,
+            current=int(current),
+            total=int(total),
+            updated_at=time.time(),
+        )
+
+    def on_processing_progress(percent: float, time_str: str) -> None:
+        status.update(
+            processing_percent=float(percent),
+            processing_time=time_str,
+            updated_at=time.time(),
+        )
+
+    def on_finished(message: str, results: object) -> None:
+        status.update(
+            state="done",
+            progress=100.0,
+            message="Completado",
+            result_message=message,
+            results=results,
+            updated_at=time.time(),
+        )
+
+    def on_error(message: str) -> None:
+        status.update(
+            state="cancelled" if cancel_path.exists() else "error",
+            error=message,
+            message=message,
+            updated_at=time.time(),
+        )
+
+    engine.progress.connect(on_progress)
+    engine.processing_progress.connect(on_processing_progress)
+    engine.finished.connect(on_finished)
+    engine.error.connect(on_error)
+
+
+def read_job_events(status_path: str | os.PathLike[str], offset: int = 0) -> tuple[list[dict[str, Any]], int]:
+    """Eventos agregados desde `offset` y el offset siguiente (sólo líneas completas)."""
+    try:
+        with open(events_path_for(status_path), "rb") as fh:
+            fh.seek(max(0, int(offset)))
+            chunk = fh.read()
+    except FileNotFoundError:
+        return [], max(0, int(offset))
+    complete = chunk.rfind(b"\n") + 1
+    events: list[dict[str, Any]] = []
+    for raw in chunk[:complete].splitlines():
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+    return events, max(0, int(offset)) + complete
+
+
+def read_job_status(status_path: str | os.PathLike[str]) -> dict[str, Any]:
+    """Estado completo: snapshot + eventos posteriores; `log_offset` indica hasta dónde llega."""
+    state = json.loads(pathlib.Path(status_path).read_text(encoding="utf-8"))
+    if not isinstance(state, dict):
+        raise ValueError(f"Snapshot de estado inválido: {status_path}")
+    events, offset = read_job_events(status_path, int(state.pop("log_offset", 0) or 0))
+    for event in events:
+        state.update(event)
+    state["log_offset"] = offset
+    return state
+
+
+class JobStatusTail:
+    """Sigue un trabajo local: la primera lectura es completa, las siguientes sólo el delta."""
+
+    def __init__(self, status_path: str | os.PathLike[str]) -> None:
+        self.status_path = pathlib.Path(status_path)
+        self.state: dict[str, Any] | None = None
+
+    def poll(self) -> dict[str, Any]:
+        if self.state is None:
+            self.state = read_job_status(self.status_path)
+            return self.state
+        events, offset = read_job_events(self.status_path, int(self.state.get("log_offset", 0)))
+        for event in events:
+            self.state.update(event)
+        self.state["log_offset"] = offset
+        return self.state
@@ -0,0 +1,511 @@
+"""
+Servidor local de trabajos de lote (`main.py serve`).
+
+`spasm_batch_start` lanza un proceso runner por trabajo: cada uno vuelve a
+pagar imports, sondeo de recursos y arranque de su pool de análisis. El
+servidor queda en segundo plano con un `BatchProcessPool` calentado al
+arrancar y atiende, por un socket UNIX local (permisos 0600), el mismo
+protocolo JSONL que el CLI SpASM, una solicitud por línea:
+
+    -> {"method": "batch_start", "args": [payload]}
+    <- {"ok": true, "result": {"job_id": "job_..."}}
+
+Métodos:
+- `batch_start(payload)`: payload con el esquema de `spasm_batch_start`; la
+  clave opcional `priority` (entero, mayor primero, 0 por defecto) ordena la
+  cola y a igual prioridad se respeta el orden de llegada.
+- `batch_status(job_id, offset=None)`: estado completo, o con `offset` sólo
+  `{"events": [...], "log_offset": n}` (mismo contrato que el runner).
+- `batch_cancel(job_id)`: quita el trabajo de la cola o cancela el que corre.
+- `batch_events(job_id, offset=0)`: stream; una línea por tanda de eventos
+  hasta el estado terminal (`"final": true`).
+- `server_status()`: profundidad de cola, trabajo en curso y procesos del pool.
+
+Se procesa un trabajo por vez: el motor ya reparte cada lote entre los
+procesos del pool, y cancelar corta los FFmpeg de todo el proceso. El estado
+de cada trabajo se escribe con `JobStatusWriter` en
+`<state_dir>/<job_id>.status.json` y, si el payload trae `progress_socket`,
+los eventos se empujan también por ese canal (como hace el runner).
+
+Con `TONEFINISH_JOB_SERVER=<socket>` (o `1` para la ruta por defecto),
+`logic_backend.spasm_batch_start/status/cancel` usan el servidor en lugar de
+lanzar el runner del CLI.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import os
+import pathlib
+import re
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from job_channel import CHANNEL_FALLBACK_POLL_S, ProgressChannelClient
+from job_events import (
+    TERMINAL_STATES,
+    JobStatusWriter,
+    bind_engine_status,
+    read_job_events,
+    read_job_status,
+)
+from process_pool import BatchProcessPool, process_pool_workers
+
+DEFAULT_SOCKET_PATH = pathlib.Path.home() / ".tonefinish" / "job_server.sock"
+DEFAULT_STATE_DIR = pathlib.Path.home() / ".tonefinish" / "job_server"
+DEFAULT_CLIENT_TIMEOUT_S = 30.0
+# Sin eventos nuevos, el stream manda una tanda vacía cada tanto: así se
+# detecta un cliente que se fue sin cerrar la conexión.
+STREAM_HEARTBEAT_S = CHANNEL_FALLBACK_POLL_S
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def job_server_address() -> pathlib.Path | None:
+    """`TONEFINISH_JOB_SERVER`: ruta del socket, `1` para la ruta por defecto; vacío = sin servidor."""
+    raw = os.getenv("TONEFINISH_JOB_SERVER", "").strip()
+    if raw.lower() in {"", "0", "false", "no", "off"}:
+        return None
+    if raw.lower() in {"1", "true", "yes", "on"}:
+        return DEFAULT_SOCKET_PATH
+    return pathlib.Path(raw).expanduser()
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+@dataclass
+class _Job:
+    job_id: str
+    payload: dict[str, Any]
+    priority: int
+    status_path: pathlib.Path
+    writer: JobStatusWriter | None = None
+    channel: ProgressChannelClient | None = None
+    engine: Any = None
+    cancelled: bool = False
+    finished: bool = False
+    # Se incrementa con cada evento; los streams esperan a que cambie.
+    version: int = 0
+
+    @property
+    def cancel_path(self) -> pathlib.Path:
+        return self.status_path.with_suffix(".cancel")
+
+
+class JobServer:
+    """Cola de trabajos con prioridad atendida por un pool de análisis de larga vida."""
+
+    def __init__(
+        self,
+        socket_path: str | os.PathLike[str] | None = None,
+        state_dir: str | os.PathLike[str] | None = None,
+        workers: int | None = None,
+    ) -> None:
+        self.socket_path = pathlib.Path(socket_path or DEFAULT_SOCKET_PATH)
+        self.state_dir = pathlib.Path(state_dir or DEFAULT_STATE_DIR)
+        self.workers = workers
+        self.pool: BatchProcessPool | None = None
+        self.worker_pids: list[int] = []
+        self.current_job_id: str | None = None
+        self.completed = 0
+        self._jobs: dict[str, _Job] = {}
+        self._queue: list[tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._server: _UnixServer | None = None
+        self._threads: list[threading.Thread] = []
+        self._started_at = time.time()
+
+    # ── Ciclo de vida ──
+
+    def start(self) -> None:
+        """Calienta el pool, abre el socket y arranca el hilo que consume la cola."""
+        from batch_engine import _batch_cpu_budget
+
+        _claim_socket_path(self.socket_path)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        workers = self.workers if self.workers is not None else _batch_cpu_budget().max_parallel_analysis
+        self.pool = BatchProcessPool(process_pool_workers(workers))
+        self.worker_pids = self.pool.warm()
+        self._server = _UnixServer(str(self.socket_path), _RequestHandler)
+        self._server.job_server = self
+        os.chmod(self.socket_path, 0o600)
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name="tonefinish-job-server", daemon=True),
+            threading.Thread(target=self._work, name="tonefinish-job-worker", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def serve_forever(self, stop_event: threading.Event | None = None) -> None:
+        """`start()` y atiende hasta `stop_event`; al salir cierra todo (`close()`)."""
+        self.start()
+        try:
+            (stop_event or self._stop).wait()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Cancela el trabajo en curso y los encolados, cierra el socket y el pool."""
+        self._stop.set()
+        with self._cond:
+            pending = [self._jobs[job_id] for _priority, _seq, job_id in self._queue]
+            self._queue.clear()
+            for job in pending:
+                job.cancelled = True
+            running = self._jobs.get(self.current_job_id or "")
+            self._cond.notify_all()
+        for job in pending:
+            self._cancel_queued(job, "Servidor de trabajos detenido.")
+        if running is not None:
+            self.cancel(running.job_id)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.pool is not None:
+            self.pool.close(wait=True)
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    # ── API ──
+
+    def dispatch(self, method: str, args: list[Any], kwargs: dict[str, Any]) -> Any:
+        handlers: dict[str, Callable[..., Any]] = {
+            "batch_start": self.submit,
+            "batch_status": self.status,
+            "batch_cancel": self.cancel,
+            "server_status": self.server_status,
+        }
+        handler = handlers.get(method)
+        if handler is None:
+            raise ValueError(f"Método no soportado por el servidor de trabajos: {method}")
+        return handler(*args, **kwargs)
+
+    def submit(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Valida el payload, lo encola por prioridad y devuelve `{"job_id": ...}`."""
+        from batch_engine import resolve_batch_settings
+
+        if not isinstance(payload, dict):
+            raise ValueError("batch_start requiere un payload (objeto JSON).")
+        try:
+            priority = int(payload.get("priority") or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Prioridad inválida: {payload.get('priority')!r}") from None
+        # Una opción desconocida se rechaza al encolar, no minutos después.
+        resolve_batch_settings(payload)
+        if self._stop.is_set():
+            raise RuntimeError("Servidor de trabajos detenido.")
+
+        job_id = f"job_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        job = _Job(job_id, dict(payload), priority, self.state_dir / f"{job_id}.status.json")
+        if payload.get("progress_socket"):
+            job.channel = ProgressChannelClient.connect(
+                payload["progress_socket"],
+                on_message=lambda message: self.cancel(job_id) if message.get("command") == "cancel" else None,
+            )
+        queued_at = time.time()
+        job.writer = JobStatusWriter(
+            job.status_path,
+            {
+                "job_id": job_id,
+                "state": "queued",
+                "progress": 0.0,
+                "message": "En cola",
+                "current": 0,
+                "total": len(payload.get("files") or []),
+                "priority": priority,
+                "queued_at": queued_at,
+                "started_at": None,
+                "queue_wait_ms": None,
+                "updated_at": queued_at,
+                "result_message": None,
+                "results": None,
+                "error": None,
+            },
+            sink=lambda fields: self._publish(job, fields),
+        )
+        with self._cond:
+            self._jobs[job_id] = job
+            heapq.heappush(self._queue, (-priority, next(self._sequence), job_id))
+            self._cond.notify_all()
+        return {"job_id": job_id}
+
+    def status(self, job_id: str, offset: int | None = None) -> dict[str, Any]:
+        status_path = self._status_path(job_id)
+        if offset is not None:
+            events, next_offset = read_job_events(status_path, int(offset))
+            return {"events": events, "log_offset": next_offset}
+        status = read_job_status(status_path)
+        now = time.time()
+        updated_at = status.get("updated_at")
+        status["status_age_ms"] = (
+            max(0, int((now - float(updated_at)) * 1000)) if isinstance(updated_at, (int, float)) else None
+        )
+        with self._cond:
+            ranked = [queued_id for _priority, _seq, queued_id in sorted(self._queue)]
+        if job_id in ranked:
+            status["queue_position"] = ranked.index(job_id) + 1
+        return status
+
+    def cancel(self, job_id: str) -> bool:
+        """True si el trabajo estaba en cola o corriendo."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished or job.cancelled:
+                return False
+            job.cancelled = True
+            job.cancel_path.touch()
+            queued = job_id != self.current_job_id
+            engine = job.engine
+            if queued:
+                self._queue = [entry for entry in self._queue if entry[2] != job_id]
+                heapq.heapify(self._queue)
+        if queued:
+            self._cancel_queued(job, "Proceso cancelado por el usuario.")
+        elif engine is not None:
+            engine.cancel()
+        # Si el motor todavía no existe, lo corta el marcador `cancel_path`.
+        return True
+
+    def server_status(self) -> dict[str, Any]:
+        with self._cond:
+            queue_depth = len(self._queue)
+            current = self.current_job_id
+            jobs = len(self._jobs)
+            completed = self.completed
+        return {
+            "socket": str(self.socket_path),
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self._started_at, 1),
+            "queue_depth": queue_depth,
+            "running": current,
+            "jobs": jobs,
+            "completed": completed,
+            "pool_workers": self.worker_pids,
+            "pool_metrics": dict(self.pool.metrics) if self.pool is not None else {},
+        }
+
+    def stream_events(self, job_id: str, offset: int, send: Callable[[dict[str, Any]], None]) -> None:
+        """Envía eventos desde `offset` a medida que llegan, hasta el estado terminal."""
+        status_path = self._status_path(job_id)
+        offset = max(0, int(offset))
+        job = self._jobs.get(job_id)
+        while True:
+            with self._cond:
+                version = job.version if job is not None else 0
+                # Trabajo de una sesión anterior del servidor: ya no cambia.
+                final = job is None or job.finished or self._stop.is_set()
+            events, offset = read_job_events(status_path, offset)
+            send({"events": events, "log_offset": offset, "final": final})
+            if final:
+                return
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: job.version != version or job.finished or self._stop.is_set(),
+                    timeout=STREAM_HEARTBEAT_S,
+                )
+
+    # ── Internos ──
+
+    def _status_path(self, job_id: str) -> pathlib.Path:
+        job_id = str(job_id)
+        path = self.state_dir / f"{job_id}.status.json"
+        if not _JOB_ID_RE.match(job_id) or not path.exists():
+            raise ValueError(f"job no encontrado: {job_id}")
+        return path
+
+    def _publish(self, job: _Job, fields: dict[str, Any]) -> None:
+        if job.channel is not None:
+            job.channel.send(fields)
+        with self._cond:
+            job.version += 1
+            self._cond.notify_all()
+
+    def _cancel_queued(self, job: _Job, message: str) -> None:
+        assert job.writer is not None
+        job.writer.update(state="cancelled", message=message, error=message, updated_at=time.time())
+        self._finish(job)
+
+    def _finish(self, job: _Job) -> None:
+        assert job.writer is not None
+        if job.writer.state.get("state") not in TERMINAL_STATES:
+            job.writer.update(state="error", error="El motor terminó sin resultado.", updated_at=time.time())
+        job.writer.close()
+        if job.channel is not None:
+            job.channel.close()
+        with self._cond:
+            job.finished = True
+            job.engine = None
+            # El estado terminal ya está en disco y `status()` lo lee de ahí:
+            # retener el trabajo sólo acumularía payloads en un servidor de larga vida.
+            self._jobs.pop(job.job_id, None)
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stop.is_set())
+                if self._stop.is_set():
+                    return
+                _priority, _seq, job_id = heapq.heappop(self._queue)
+                job = self._jobs[job_id]
+                self.current_job_id = job_id
+            try:
+                self._run_job(job)
+            finally:
+                with self._cond:
+                    self.current_job_id = None
+                    self.completed += 1
+
+    def _run_job(self, job: _Job) -> None:
+        from batch_engine import engine_from_settings
+
+        assert job.writer is not None
+        payload = job.payload
+        started_at = time.time()
+        queued_at = job.writer.state.get("queued_at")
+        job.writer.update(
+            state="running",
+            message="Iniciando...",
+            started_at=started_at,
+            queue_wait_ms=max(0, int((started_at - float(queued_at)) * 1000)) if queued_at else None,
+            updated_at=started_at,
+        )
+        try:
+            engine = engine_from_settings(
+                payload,
+                [pathlib.Path(path) for path in payload.get("files") or []],
+                pathlib.Path(payload["checkpoint_path"]) if payload.get("checkpoint_path") else None,
+                job.cancel_path,
+                process_pool=self.pool,
+            )
+            bind_engine_status(engine, job.writer, job.cancel_path)
+            with self._cond:
+                job.engine = engine
+            engine.run()
+        except Exception as exc:
+            message = str(exc) or exc.__class__.__name__
+            job.writer.update(
+                state="cancelled" if job.cancel_path.exists() else "error",
+                error=message,
+                message=message,
+                updated_at=time.time(),
+            )
+        finally:
+            self._finish(job)
+
+
+def _claim_socket_path(path: pathlib.Path) -> None:
+    """Borra un socket huérfano; falla si otro servidor ya escucha en `path`."""
+    if path.exists() or path.is_symlink():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()
+        else:
+            raise RuntimeError(f"Ya hay un servidor de trabajos escuchando en {path}")
+        finally:
+            probe.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    block_on_close = False
+    job_server: JobServer
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _UnixServer
+
+    def handle(self) -> None:
+        job_server = self.server.job_server
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                self._send({"ok": False, "error": "Solicitud inválida: se esperaba un objeto JSON por línea."})
+                continue
+            method = str(request.get("method") or "")
+            args = list(request.get("args") or [])
+            kwargs = dict(request.get("kwargs") or {})
+            try:
+                if method == "batch_events":
+                    job_server.stream_events(*args, **kwargs, send=lambda result: self._send({"ok": True, "result": result}))
+                    continue
+                result = job_server.dispatch(method, args, kwargs)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as exc:
+                self._send({"ok": False, "error": str(exc) or exc.__class__.__name__})
+                continue
+            self._send({"ok": True, "result": result})
+
+    def _send(self, message: dict[str, Any]) -> None:
+        self.wfile.write(_encode(message))
+        self.wfile.flush()
+
+
+class JobServerClient:
+    """Cliente del servidor: una conexión por llamada."""
+
+    def __init__(self, socket_path: str | os.PathLike[str] | None = None, timeout: float = DEFAULT_CLIENT_TIMEOUT_S) -> None:
+        self.socket_path = pathlib.Path(socket_path or DEFAULT_SOCKET_PATH)
+        self.timeout = timeout
+
+    def _connect(self, timeout: float | None) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(str(self.socket_path))
+        except OSError as exc:
+            sock.close()
+            raise RuntimeError(f"Servidor de trabajos no disponible en {self.socket_path}: {exc}") from exc
+        sock.settimeout(timeout)
+        return sock
+
+    def _replies(self, method: str, args: tuple[Any, ...], timeout: float | None) -> Iterator[Any]:
+        with self._connect(timeout) as sock:
+            sock.sendall(_encode({"method": method, "args": list(args)}))
+            with sock.makefile("rb") as reader:
+                for raw in reader:
+                    reply = json.loads(raw)
+                    if not reply.get("ok", False):
+                        raise RuntimeError(str(reply.get("error", "Error no especificado del servidor de trabajos")))
+                    yield reply.get("result")
+
+    def call(self, method: str, *args: Any) -> Any:
+        replies = self._replies(method, args, self.timeout)
+        try:
+            return next(replies)
+        except StopIteration:
+            raise RuntimeError(f"El servidor de trabajos cerró la conexión sin responder '{method}'.") from None
+        finally:
+            replies.close()
+
+    def events(self, job_id: str, offset: int = 0) -> Iterator[dict[str, Any]]:
+        """Eventos del trabajo a medida que llegan; termina en el estado terminal."""
+        for batch in self._replies("batch_events", (job_id, offset), None):
+            yield from batch.get("events") or []
+            if batch.get("final"):
+                return
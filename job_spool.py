@@ -0,0 +1,440 @@
+"""
+Cola de trabajos en un directorio compartido (spool) para repartir lotes.
+
+`spasm_batch_job_runner.py` procesa un payload completo en un solo proceso.
+Con varias máquinas de render montando el mismo volumen (NFS) conviene que el
+lote se parta en unidades por archivo y que cualquier número de runners
+(locales o remotos) las vayan tomando:
+
+    <spool>/jobs/<job_id>/job.json          payload + metadatos del trabajo
+    <spool>/jobs/<job_id>/pending/NNNNNN.json   archivos sin tomar
+    <spool>/jobs/<job_id>/leased/NNNNNN.<runner>.lease   en proceso
+    <spool>/jobs/<job_id>/done/NNNNNN.json      resultado por archivo
+    <spool>/jobs/<job_id>/cancel                 marcador de cancelación
+
+Tomar un archivo es un `rename` de `pending/` a `leased/`: atómico también en
+NFS, así que sólo un runner gana. El runner renueva su lease (mtime) mientras
+trabaja; si deja de hacerlo durante `lease_ttl` segundos (máquina caída,
+proceso muerto) otro runner devuelve el archivo a `pending/` y lo reintenta,
+hasta `max_attempts`. `JobSpool.status()` agrega todo en el mismo esquema de
+estado que escribe el runner de un solo proceso.
+
+El TTL debe ser bastante mayor que la deriva de reloj entre máquinas.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import pathlib
+import re
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable
+
+DEFAULT_LEASE_TTL_S = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL_S = 2.0
+
+_RUNNER_ID_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def default_spool_lease_ttl() -> float:
+    """`TONEFINISH_SPOOL_LEASE_TTL` fija los segundos sin heartbeat antes de reasignar."""
+    raw = os.getenv("TONEFINISH_SPOOL_LEASE_TTL", "").strip()
+    try:
+        return max(5.0, float(raw)) if raw else DEFAULT_LEASE_TTL_S
+    except ValueError:
+        return DEFAULT_LEASE_TTL_S
+
+
+def default_runner_id() -> str:
+    return sanitize_runner_id(f"{socket.gethostname()}-{os.getpid()}")
+
+
+def sanitize_runner_id(runner_id: str) -> str:
+    cleaned = _RUNNER_ID_RE.sub("-", str(runner_id)).strip("-")
+    return cleaned or uuid.uuid4().hex[:8]
+
+
+def _write_json_atomic(path: pathlib.Path, payload: dict[str, Any]) -> None:
+    # Nombre temporal único: varios hosts pueden escribir en el mismo directorio.
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: pathlib.Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _item_name(index: int) -> str:
+    return f"{index:06d}"
+
+
+def _touched_at(stat: os.stat_result) -> float:
+    # `rename` actualiza ctime y el heartbeat mtime: el más reciente de ambos
+    # es el último signo de vida del lease.
+    return max(stat.st_mtime, stat.st_ctime)
+
+
+@dataclass
+class SpoolLease:
+    """Archivo tomado por un runner; renovarlo con `heartbeat()` mientras se procesa."""
+
+    spool: "JobSpool"
+    job_id: str
+    index: int
+    file: str
+    attempts: int
+    runner_id: str
+    path: pathlib.Path
+    payload: dict[str, Any]
+    claimed_at: float
+    lost: bool = False
+
+    def heartbeat(self) -> bool:
+        """Renueva el lease; devuelve False si otro runner ya lo reasignó."""
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            self.lost = True
+        return not self.lost
+
+    def cancel_requested(self) -> bool:
+        return self.spool.is_cancelled(self.job_id)
+
+    @property
+    def cancel_path(self) -> pathlib.Path:
+        return self.spool.job_dir(self.job_id) / "cancel"
+
+    def complete(self, results: list[dict[str, Any]] | None = None, error: str | None = None) -> bool:
+        """Publica el resultado del archivo y libera el lease."""
+        entry = {
+            "index": self.index,
+            "file": self.file,
+            "state": "error" if error else "done",
+            "runner": self.runner_id,
+            "attempts": self.attempts + 1,
+            "started_at": self.claimed_at,
+            "finished_at": time.time(),
+            "results": list(results or []),
+            "error": error,
+        }
+        # Confirmar primero que el lease sigue siendo nuestro: si venció y otro
+        # runner lo reasignó, su resultado no debe pisarse con el nuestro.
+        staging = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.complete")
+        try:
+            os.rename(self.path, staging)
+        except FileNotFoundError:
+            self.lost = True
+            return False
+        _write_json_atomic(self.spool.job_dir(self.job_id) / "done" / f"{_item_name(self.index)}.json", entry)
+        staging.unlink(missing_ok=True)
+        return True
+
+    def release(self) -> None:
+        """Devuelve el archivo a `pending/` sin consumir un intento (cancelación)."""
+        try:
+            os.rename(self.path, self.spool.job_dir(self.job_id) / "pending" / f"{_item_name(self.index)}.json")
+        except FileNotFoundError:
+            self.lost = True
+
+
+class JobSpool:
+    """Directorio de trabajos compartido entre runners."""
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = pathlib.Path(root)
+        self.jobs_dir = self.root / "jobs"
+
+    def job_dir(self, job_id: str) -> pathlib.Path:
+        return self.jobs_dir / job_id
+
+    def submit(
+        self,
+        payload: dict[str, Any],
+        job_id: str | None = None,
+        lease_ttl: float | None = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> str:
+        """Parte el payload en un archivo de trabajo por entrada de `files`."""
+        job_id = job_id or f"job_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        files = [str(path) for path in payload.get("files") or []]
+        job_dir = self.job_dir(job_id)
+        for name in ("pending", "leased", "done"):
+            (job_dir / name).mkdir(parents=True, exist_ok=True)
+        for index, file in enumerate(files):
+            _write_json_atomic(job_dir / "pending" / f"{_item_name(index)}.json", {"index": index, "file": file, "attempts": 0})
+        # job.json se escribe al final: los runners ignoran trabajos a medio crear.
+        _write_json_atomic(job_dir / "job.json", {
+            "job_id": job_id,
+            "queued_at": time.time(),
+            "total": len(files),
+            "lease_ttl": float(lease_ttl if lease_ttl is not None else default_spool_lease_ttl()),
+            "max_attempts": max(1, int(max_attempts)),
+            "payload": payload,
+        })
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        job_dir = self.job_dir(job_id)
+        if not job_dir.is_dir():
+            return False
+        (job_dir / "cancel").touch()
+        return True
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return (self.job_dir(job_id) / "cancel").exists()
+
+    def job_ids(self) -> list[str]:
+        """Trabajos completos, del más antiguo al más nuevo."""
+        jobs: list[tuple[float, str]] = []
+        try:
+            entries = list(self.jobs_dir.iterdir())
+        except FileNotFoundError:
+            return []
+        for entry in entries:
+            meta = _read_json(entry / "job.json")
+            if meta is not None:
+                jobs.append((float(meta.get("queued_at") or 0.0), entry.name))
+        return [job_id for _queued, job_id in sorted(jobs)]
+
+    def claim(self, runner_id: str) -> SpoolLease | None:
+        """Toma el próximo archivo pendiente de cualquier trabajo, o None si no hay."""
+        runner_id = sanitize_runner_id(runner_id)
+        for job_id in self.job_ids():
+            if self.is_cancelled(job_id):
+                continue
+            meta = _read_json(self.job_dir(job_id) / "job.json") or {}
+            self.reclaim_expired(job_id, meta)
+            lease = self._claim_from(job_id, meta, runner_id)
+            if lease is not None:
+                return lease
+        return None
+
+    def reclaim_expired(self, job_id: str, meta: dict[str, Any] | None = None) -> int:
+        """Devuelve a `pending/` los leases sin heartbeat; agota intentos como error."""
+        meta = meta if meta is not None else (_read_json(self.job_dir(job_id) / "job.json") or {})
+        ttl = float(meta.get("lease_ttl") or DEFAULT_LEASE_TTL_S)
+        max_attempts = int(meta.get("max_attempts") or DEFAULT_MAX_ATTEMPTS)
+        job_dir = self.job_dir(job_id)
+        now = time.time()
+        reclaimed = 0
+        for lease_path in sorted((job_dir / "leased").glob("*.lease")):
+            try:
+                if now - _touched_at(lease_path.stat()) < ttl:
+                    continue
+                # Renombrar primero a un nombre propio: si dos runners ven el
+                # mismo lease vencido, sólo uno lo recupera.
+                staging = lease_path.with_name(f".{lease_path.name}.{uuid.uuid4().hex}.reclaim")
+                os.rename(lease_path, staging)
+            except FileNotFoundError:
+                continue
+            item = _read_json(staging) or {}
+            index = int(item.get("index", lease_path.name.split(".", 1)[0]))
+            attempts = int(item.get("attempts", 0)) + 1
+            if attempts >= max_attempts:
+                _write_json_atomic(job_dir / "done" / f"{_item_name(index)}.json", {
+                    "index": index,
+                    "file": item.get("file"),
+                    "state": "error",
+                    "runner": lease_path.name.split(".")[1] if lease_path.name.count(".") >= 2 else None,
+                    "attempts": attempts,
+                    "started_at": None,
+                    "finished_at": now,
+                    "results": [],
+                    "error": f"lease vencido {attempts} veces (runner sin heartbeat)",
+                })
+                staging.unlink(missing_ok=True)
+            else:
+                item.update({"index": index, "attempts": attempts})
+                _write_json_atomic(staging, item)
+                os.rename(staging, job_dir / "pending" / f"{_item_name(index)}.json")
+            reclaimed += 1
+        return reclaimed
+
+    def _claim_from(self, job_id: str, meta: dict[str, Any], runner_id: str) -> SpoolLease | None:
+        job_dir = self.job_dir(job_id)
+        for pending in sorted((job_dir / "pending").glob("*.json")):
+            lease_path = job_dir / "leased" / f"{pending.stem}.{runner_id}.lease"
+            try:
+                os.rename(pending, lease_path)
+            except FileNotFoundError:
+                continue  # otro runner lo tomó primero
+            os.utime(lease_path)
+            (job_dir / "started").touch(exist_ok=True)
+            item = _read_json(lease_path) or {}
+            return SpoolLease(
+                spool=self,
+                job_id=job_id,
+                index=int(item.get("index", int(pending.stem))),
+                file=str(item.get("file", "")),
+                attempts=int(item.get("attempts", 0)),
+                runner_id=runner_id,
+                path=lease_path,
+                payload=dict(meta.get("payload") or {}),
+                claimed_at=time.time(),
+            )
+        return None
+
+    def status(self, job_id: str) -> dict[str, Any] | None:
+        """Estado agregado del trabajo con el esquema del runner de un solo proceso."""
+        job_dir = self.job_dir(job_id)
+        meta = _read_json(job_dir / "job.json")
+        if meta is None:
+            return None
+        total = int(meta.get("total") or 0)
+        done = [entry for entry in (_read_json(path) for path in sorted((job_dir / "done").glob("*.json"))) if entry]
+        leases = sorted((job_dir / "leased").glob("*.lease"))
+        runners = sorted({path.name.split(".")[1] for path in leases if path.name.count(".") >= 2})
+        pending = len(list((job_dir / "pending").glob("*.json")))
+        finished = len(done)
+        errors = [entry for entry in done if entry.get("state") == "error"]
+        cancelled = self.is_cancelled(job_id)
+        queued_at = meta.get("queued_at")
+        started_marker = job_dir / "started"
+        started_at = started_marker.stat().st_mtime if started_marker.exists() else None
+        updated_at = max(
+            [float(queued_at or 0.0), started_at or 0.0]
+            + [float(entry.get("finished_at") or 0.0) for entry in done]
+            + [_touched_at(path.stat()) for path in leases if path.exists()]
+        )
+
+        if finished >= total:
+            state = "error" if errors else "done"
+        elif cancelled:
+            state = "running" if leases else "cancelled"
+        elif leases or finished:
+            state = "running"
+        else:
+            state = "queued"
+
+        status: dict[str, Any] = {
+            "job_id": job_id,
+            "state": state,
+            "progress": (100.0 * finished / total) if total else 100.0,
+            "message": "En cola",
+            "current": finished,
+            "total": total,
+            "queued_at": queued_at,
+            "started_at": started_at,
+            "queue_wait_ms": (
+                max(0, int((started_at - float(queued_at)) * 1000))
+                if started_at is not None and isinstance(queued_at, (int, float))
+                else None
+            ),
+            "updated_at": updated_at,
+            "result_message": None,
+            "results": None,
+            "error": None,
+            "runners": runners,
+            "items": {"pending": pending, "leased": len(leases), "done": finished - len(errors), "error": len(errors)},
+        }
+        if errors:
+            status["error"] = "; ".join(
+                f"{pathlib.Path(str(entry.get('file') or '')).name}: {entry.get('error')}" for entry in errors
+            )
+        if state in {"done", "error"}:
+            status["message"] = "Completado" if state == "done" else "Completado con errores"
+            status["results"] = [result for entry in done for result in entry.get("results") or []]
+            status["result_message"] = f"Lote completado: {finished - len(errors)} archivos."
+        elif state == "cancelled":
+            status["message"] = "Proceso cancelado por el usuario."
+            status["error"] = status["error"] or status["message"]
+        elif state == "running":
+            status["message"] = (
+                "Cancelando..." if cancelled else f"Procesando {finished}/{total} ({len(runners)} runner(s) activos)"
+            )
+        return status
+
+
+def run_spool_runner(
+    spool: JobSpool,
+    handler: Callable[[SpoolLease], list[dict[str, Any]] | None],
+    runner_id: str | None = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL_S,
+    exit_when_idle: bool = False,
+    stop_event: threading.Event | None = None,
+) -> int:
+    """
+    Bucle de un runner: toma archivos, los procesa con `handler(lease)` y
+    publica el resultado. Devuelve cuántos resultados publicó.
+    """
+    runner_id = sanitize_runner_id(runner_id or default_runner_id())
+    stop_event = stop_event or threading.Event()
+    processed = 0
+    while not stop_event.is_set():
+        lease = spool.claim(runner_id)
+        if lease is None:
+            if exit_when_idle:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        meta = _read_json(spool.job_dir(lease.job_id) / "job.json") or {}
+        interval = max(0.5, float(meta.get("lease_ttl") or DEFAULT_LEASE_TTL_S) / 4.0)
+        beating = threading.Event()
+
+        def beat(current: SpoolLease = lease) -> None:
+            while not beating.wait(interval):
+                if not current.heartbeat():
+                    return
+
+        heartbeat = threading.Thread(target=beat, name="tonefinish-spool-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            results = handler(lease)
+            error = None
+        except Exception as exc:
+            results, error = None, str(exc) or exc.__class__.__name__
+        finally:
+            beating.set()
+            heartbeat.join()
+
+        if error is not None and lease.cancel_requested():
+            lease.release()
+            continue
+        # Un lease perdido (vencido y reasignado) no cuenta: su resultado no se publicó.
+        if lease.complete(results, error=error):
+            processed += 1
+    return processed
+
+
+def _resolve_handler(target: str) -> Callable[[SpoolLease], Any]:
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Handler inválido: {target!r} (se espera modulo:funcion)")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Runner de la cola de trabajos compartida.")
+    parser.add_argument("spool_dir")
+    parser.add_argument("--handler", required=True, help="modulo:funcion que procesa un SpoolLease")
+    parser.add_argument("--runner-id", default=None)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL_S)
+    parser.add_argument("--exit-when-idle", action="store_true")
+    args = parser.parse_args(argv)
+    processed = run_spool_runner(
+        JobSpool(args.spool_dir),
+        _resolve_handler(args.handler),
+        runner_id=args.runner_id,
+        poll_interval=args.poll_interval,
+        exit_when_idle=args.exit_when_idle,
+    )
+    print(json.dumps({"runner": args.runner_id or default_runner_id(), "processed": processed}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Carga diferida de dependencias pesadas.
+
+Importar `ui_app` arrastraba NumPy, cupy, pedalboard, essentia y matplotlib
+aunque la sesión nunca llegara a usarlos (cupy, por ejemplo, inicializa CUDA
+al importarse). Los módulos que los usan declaran:
+
+    np = lazy_module("numpy", globals(), "np")
+    NUMPY_AVAILABLE = module_available("numpy")
+
+`module_available()` sólo busca el paquete (`importlib.util.find_spec`, sin
+ejecutarlo) y el proxy importa de verdad en el primer acceso a un atributo;
+en ese momento reemplaza su propio nombre en el módulo dueño, así que las
+llamadas siguientes no pasan por el proxy.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, MutableMapping
+
+
+@lru_cache(maxsize=None)
+def module_available(name: str) -> bool:
+    """True si el paquete está instalado (no lo importa)."""
+    try:
+        return importlib.util.find_spec(name.split(".", 1)[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Proxy que importa `name` en el primer acceso a un atributo."""
+
+    def __init__(
+        self,
+        name: str,
+        owner_globals: MutableMapping[str, Any] | None = None,
+        alias: str | None = None,
+    ) -> None:
+        self._lazy_name = name
+        self._lazy_owner = owner_globals
+        self._lazy_alias = alias
+        self._lazy_module: ModuleType | None = None
+        self._lazy_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_module is not None
+
+    def load(self) -> ModuleType:
+        module = self._lazy_module
+        if module is not None:
+            return module
+        with self._lazy_lock:
+            if self._lazy_module is None:
+                self._lazy_module = importlib.import_module(self._lazy_name)
+                owner, alias = self._lazy_owner, self._lazy_alias
+                if owner is not None and alias and owner.get(alias) is self:
+                    owner[alias] = self._lazy_module
+            return self._lazy_module
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute.startswith("_lazy_"):
+            raise AttributeError(attribute)
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "cargado" if self.is_loaded else "diferido"
+        return f"<LazyModule {self._lazy_name} ({state})>"
+
+
+def lazy_module(
+    name: str,
+    owner_globals: MutableMapping[str, Any] | None = None,
+    alias: str | None = None,
+) -> LazyModule:
+    """Proxy diferido de `name`; con `owner_globals`/`alias` se reemplaza al cargarse."""
+    return LazyModule(name, owner_globals, alias)
+
+
+def optional_import(name: str) -> ModuleType | None:
+    """Importa `name` ahora; None si falta o falla al inicializarse (p. ej. cupy sin CUDA)."""
+    try:
+        return importlib.import_module(name)
+    except Exception:
+        return None
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import atexit
 import os
 import pathlib
+import shlex
 import signal
 import subprocess
 import json
-from typing import Any
+import threading
+from typing import Any, NamedTuple, Sequence
 
 from audio_analysis import (
     analyze_audio as _py_analyze_audio,
@@ -22,6 +25,8 @@ from audio_tools import (
     ensure_ffmpeg_available as _py_ensure_ffmpeg_available,
     extract_loudnorm_stats as _py_extract_loudnorm_stats,
     get_audio_info as _py_get_audio_info,
+    get_ffmpeg_concurrency_metrics as _py_get_ffmpeg_concurrency_metrics,
+    get_ffmpeg_usage_report as _py_get_ffmpeg_usage_report,
     get_processing_limits as _py_get_processing_limits,
 )
 from audio_processing import (
@@ -38,7 +43,15 @@ from auto_master_intelligence import (
     update_saturation_budgets_for_batch as _py_update_saturation_budgets_for_batch,
 )
 
+from job_server import JobServerClient, job_server_address
+from spasm_worker_pool import SpasmWorkerError, SpasmWorkerPool, spasm_pool_size
+import ffmpeg_accounting
+import tracing
+
 _active_spasm_proc: subprocess.Popen[str] | None = None
+_spasm_pool: SpasmWorkerPool | None = None
+_spasm_pool_lock = threading.Lock()
+_spasm_cancel_generation = 0
 
 
 def _kill_proc_tree(pid: int) -> None:
@@ -60,13 +73,15 @@ def _kill_proc_tree(pid: int) -> None:
 
 def cancel_active_spasm_call() -> bool:
     """Cancela la llamada SpASM en curso. Retorna True si había algo que cancelar."""
-    global _active_spasm_proc
+    global _active_spasm_proc, _spasm_cancel_generation
+    _spasm_cancel_generation += 1
+    cancelled = _spasm_pool is not None and _spasm_pool.cancel_inflight()
     proc = _active_spasm_proc
     if proc is not None and proc.poll() is None:
         _kill_proc_tree(proc.pid)
         _active_spasm_proc = None
         return True
-    return False
+    return cancelled
 
 
 def _audio_engine_mode() -> str:
@@ -97,6 +112,37 @@ def _spasm_cli() -> str:
     return os.getenv("FINISHER_SPASM_CLI", str(default_cli))
 
 
+def _spasm_worker_command() -> list[str]:
+    raw = os.getenv("FINISHER_SPASM_WORKER_CMD", "").strip()
+    return shlex.split(raw) if raw else [_spasm_cli(), "serve", "--jsonl"]
+
+
+def _spasm_worker_pool() -> SpasmWorkerPool | None:
+    """Pool de workers `serve --jsonl`; se recrea si cambia el comando o el tamaño."""
+    global _spasm_pool
+    size = spasm_pool_size()
+    command = _spasm_worker_command() if size > 0 else []
+    with _spasm_pool_lock:
+        pool = _spasm_pool
+        if pool is not None and (pool.command != command or pool.size != size):
+            pool.close()
+            pool = _spasm_pool = None
+        if pool is None and size > 0:
+            pool = _spasm_pool = SpasmWorkerPool(command, size=size)
+        return pool
+
+
+def _close_spasm_worker_pool() -> None:
+    global _spasm_pool
+    with _spasm_pool_lock:
+        pool, _spasm_pool = _spasm_pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(_close_spasm_worker_pool)
+
+
 def _spasm_fallback_python_enabled() -> bool:
     if _audio_engine_mode() == "hybrid":
         return True
@@ -158,9 +204,42 @@ def _call_spasm(method: str, *args: Any, **kwargs: Any) -> Any:
         "args": [_to_wire(v) for v in args],
         "kwargs": {k: _to_wire(v) for k, v in kwargs.items()},
     }
-    cmd = [_spasm_cli(), "call", "--json"]
     timeout_s = float(os.getenv("FINISHER_SPASM_TIMEOUT_SEC", "600").strip() or "600")
 
+    # Worker persistente: evita arrancar CLI + runtime en cada llamada. Si el
+    # pool está lleno, deshabilitado o el worker murió sin responder, se sigue
+    # con un proceso por llamada.
+    pool = _spasm_worker_pool()
+    if pool is not None:
+        generation = _spasm_cancel_generation
+        try:
+            reply = pool.call(req["method"], req["args"], req["kwargs"], timeout_s)
+        except TimeoutError as exc:
+            raise RuntimeError(f"Timeout del CLI SpASM ({timeout_s}s) para '{method}'.") from exc
+        except SpasmWorkerError:
+            if generation != _spasm_cancel_generation:
+                raise RuntimeError(f"Cancelado por el usuario: '{method}'.")
+            reply = None
+        if reply is not None:
+            return _spasm_reply_result(reply)
+
+    return _call_spasm_oneshot(req, timeout_s)
+
+
+def _spasm_reply_result(payload: Any) -> Any:
+    if not isinstance(payload, dict):
+        raise RuntimeError("Respuesta del CLI SpASM inválida: se esperaba objeto JSON.")
+    if not payload.get("ok", False):
+        raise RuntimeError(str(payload.get("error", "Error no especificado del CLI SpASM")))
+
+    return _from_wire(payload.get("result"))
+
+
+def _call_spasm_oneshot(req: dict[str, Any], timeout_s: float) -> Any:
+    global _active_spasm_proc
+    method = req["method"]
+    cmd = [_spasm_cli(), "call", "--json"]
+
     proc = subprocess.Popen(
         cmd,
         stdin=subprocess.PIPE,
@@ -207,15 +286,15 @@ def _call_spasm(method: str, *args: Any, **kwargs: Any) -> Any:
     except json.JSONDecodeError as exc:
         raise RuntimeError(f"Respuesta JSON inválida del CLI SpASM: {exc}") from exc
 
-    if not isinstance(payload, dict):
-        raise RuntimeError("Respuesta del CLI SpASM inválida: se esperaba objeto JSON.")
-    if not payload.get("ok", False):
-        raise RuntimeError(str(payload.get("error", "Error no especificado del CLI SpASM")))
-
-    return _from_wire(payload.get("result"))
+    return _spasm_reply_result(payload)
 
 
 def _dispatch(method: str, py_impl: Any, *args: Any, **kwargs: Any) -> Any:
+    with tracing.span(method, "backend"), ffmpeg_accounting.call_site(method):
+        return _dispatch_engine(method, py_impl, *args, **kwargs)
+
+
+def _dispatch_engine(method: str, py_impl: Any, *args: Any, **kwargs: Any) -> Any:
     if _backend_mode() == "spasm":
         # Mantener UX de progreso en GUI: los callbacks Python (por ejemplo
         # progress_callback en normalize_audio / batch automaster) no se
@@ -225,23 +304,29 @@ def _dispatch(method: str, py_impl: Any, *args: Any, **kwargs: Any) -> Any:
         try:
             return _call_spasm(method, *args, **kwargs)
         except Exception as exc:
-            # En modo híbrido priorizamos continuidad operativa: si falla
-            # normalize_audio en SpASM, degradamos a implementación Python.
-            if _audio_engine_mode() == "hybrid" and method == "normalize_audio":
+            if _spasm_error_falls_back(method, exc):
                 return py_impl(*args, **kwargs)
-            if _spasm_fallback_python_enabled():
-                msg = str(exc).lower()
-                if (
-                    "no implementado" in msg
-                    or "not_supported" in msg
-                    or "method_not_supported" in msg
-                    or "no soporta callbacks python" in msg
-                ):
-                    return py_impl(*args, **kwargs)
             raise
     return py_impl(*args, **kwargs)
 
 
+def _spasm_error_falls_back(method: str, exc: Exception) -> bool:
+    # En modo híbrido priorizamos continuidad operativa: si falla
+    # normalize_audio en SpASM, degradamos a implementación Python.
+    if _audio_engine_mode() == "hybrid" and method == "normalize_audio":
+        return True
+    if _spasm_fallback_python_enabled():
+        msg = str(exc).lower()
+        if (
+            "no implementado" in msg
+            or "not_supported" in msg
+            or "method_not_supported" in msg
+            or "no soporta callbacks python" in msg
+        ):
+            return True
+    return False
+
+
 def analyze_audio(*args: Any, **kwargs: Any) -> Any:
     return _dispatch("analyze_audio", _py_analyze_audio, *args, **kwargs)
 
@@ -319,16 +404,31 @@ def update_saturation_budgets_for_batch(*args: Any, **kwargs: Any) -> Any:
     )
 
 
+def _call_batch(method: str, *args: Any) -> Any:
+    # Con `TONEFINISH_JOB_SERVER` el lote va al servidor local (`main.py
+    # serve`, pool ya caliente) en lugar de lanzar un runner por trabajo.
+    address = job_server_address()
+    if address is not None:
+        return JobServerClient(address).call(method, *args)
+    return _call_spasm(method, *args)
+
+
 def spasm_batch_start(payload: dict[str, Any]) -> dict[str, Any]:
-    return _call_spasm("batch_start", payload)
+    return _call_batch("batch_start", payload)
 
 
-def spasm_batch_status(job_id: str) -> dict[str, Any]:
-    return _call_spasm("batch_status", job_id)
+def spasm_batch_status(job_id: str, offset: int | None = None) -> dict[str, Any]:
+    """
+    Estado del trabajo. Con `offset` (el `log_offset` de una lectura previa)
+    devuelve sólo `{"events": [...], "log_offset": n}` con lo agregado desde ahí.
+    """
+    if offset is None:
+        return _call_batch("batch_status", job_id)
+    return _call_batch("batch_status", job_id, int(offset))
 
 
 def spasm_batch_cancel(job_id: str) -> bool:
-    return bool(_call_spasm("batch_cancel", job_id))
+    return bool(_call_batch("batch_cancel", job_id))
 
 
 def get_runtime_resource_info() -> dict[str, Any]:
@@ -342,9 +442,9 @@ def get_runtime_resource_info() -> dict[str, Any]:
         except Exception:
             pass
 
-    from resource_monitor import ResourceMonitor  # import local para evitar ciclos
+    from resource_monitor import shared_resource_monitor  # import local para evitar ciclos
 
-    monitor = ResourceMonitor()
+    monitor = shared_resource_monitor()
     snapshot = monitor.snapshot()
     gpu_snapshot = monitor.gpu_snapshot()
     gpu_info: dict[str, Any] = {"available": gpu_snapshot is not None}
@@ -382,6 +482,8 @@ def get_runtime_resource_info() -> dict[str, Any]:
             "memory_percent": snapshot.memory_percent,
             "memory_available_gb": snapshot.memory_available_gb,
             "ffmpeg_processes": snapshot.ffmpeg_processes,
+            "ffmpeg_concurrency": _py_get_ffmpeg_concurrency_metrics(),
+            "ffmpeg_usage": _py_get_ffmpeg_usage_report()[:5],
         },
         "gpu": gpu_info,
         "engine": engine_diag,
@@ -450,3 +552,106 @@ def fix_audio_tools(target: str = "audio_tools.py", dry_run: bool = False) -> di
     from fix_audio_tools import apply_fixes
 
     return apply_fixes(pathlib.Path(target), dry_run=dry_run)
+
+
+class CallResult(NamedTuple):
+    """Resultado de un ítem de `call_many`: `value` o `error`, nunca ambos."""
+
+    value: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+# Métodos admitidos por `call_many`: se resuelven por nombre contra el wrapper
+# público homónimo y su implementación Python (`_py_<método>`). Los de
+# `_SPASM_TOLERANT_METHODS` replican a sus wrappers, que ante cualquier fallo
+# SpASM degradan a Python.
+_CALL_MANY_METHODS = frozenset(
+    {
+        "analyze_audio",
+        "analyze_audio_with_filter",
+        "analyze_eq_bands",
+        "analyze_eq_and_voice",
+        "analyze_voice_band",
+        "evaluate_mix",
+        "format_analysis_summary",
+        "resolve_repair_levels",
+        "analyze_audio_for_automaster",
+        "ensure_ffmpeg_available",
+        "get_audio_info",
+    }
+)
+_SPASM_TOLERANT_METHODS = frozenset({"ensure_ffmpeg_available", "get_audio_info"})
+
+
+def _call_local(method: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> CallResult:
+    try:
+        return CallResult(globals()[method](*args, **kwargs))
+    except Exception as exc:
+        return CallResult(error=exc)
+
+
+def _call_many_reply(method: str, args: tuple[Any, ...], kwargs: dict[str, Any], reply: Any) -> CallResult:
+    try:
+        value = _spasm_reply_result(reply)
+        if method == "get_audio_info" and not isinstance(value, dict):
+            raise RuntimeError("Respuesta inválida de get_audio_info vía CLI.")
+        return CallResult(value)
+    except Exception as exc:
+        if method not in _SPASM_TOLERANT_METHODS and not _spasm_error_falls_back(method, exc):
+            return CallResult(error=exc)
+    try:
+        return CallResult(globals()[f"_py_{method}"](*args, **kwargs))
+    except Exception as exc:
+        return CallResult(error=exc)
+
+
+def call_many(calls: Sequence[tuple[str, Sequence[Any], dict[str, Any]]]) -> list[CallResult]:
+    """
+    Ejecuta varias llamadas del backend con un único viaje al CLI SpASM.
+
+    `calls` es una lista de `(method, args, kwargs)`. Devuelve un `CallResult`
+    por ítem, en el mismo orden; el error de un ítem no afecta al resto. Los
+    ítems con callbacks Python se ejecutan localmente, igual que en `_dispatch`.
+    Si el CLI no soporta `call_many`, cada ítem se resuelve por separado.
+    """
+    items: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+    for method, args, kwargs in calls:
+        if method not in _CALL_MANY_METHODS:
+            raise ValueError(f"Método no admitido por call_many: {method}")
+        items.append((method, tuple(args), dict(kwargs or {})))
+
+    results: list[CallResult | None] = [None] * len(items)
+    remote: list[int] = []
+    if _backend_mode() == "spasm":
+        remote = [
+            index
+            for index, (_method, args, kwargs) in enumerate(items)
+            if not any(callable(v) for v in list(args) + list(kwargs.values()))
+        ]
+    if remote:
+        envelope = [
+            {"method": items[index][0], "args": list(items[index][1]), "kwargs": items[index][2]}
+            for index in remote
+        ]
+        try:
+            with tracing.span("call_many", "backend", methods=[items[index][0] for index in remote]):
+                replies = _call_spasm("call_many", envelope)
+        except Exception:
+            replies = None
+        if isinstance(replies, list) and len(replies) == len(remote):
+            for index, reply in zip(remote, replies):
+                results[index] = _call_many_reply(*items[index], reply)
+
+    return [
+        result if result is not None else _call_local(*items[index])
+        for index, result in enumerate(results)
+    ]
@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-"""Entry point para lanzar la interfaz gráfica o benchmarks puntuales."""
+"""
+Entry point para lanzar la interfaz gráfica, benchmarks puntuales, un lote
+sin interfaz (`main.py batch <carpeta|manifiesto> --preset ...`), el daemon
+de ingesta (`main.py watch <carpetas...> --output-dir ...`) o el servidor
+local de trabajos (`main.py serve`).
+"""
 
 import argparse
 import pathlib
@@ -45,6 +50,168 @@ def _run_spectrum_benchmark(path: pathlib.Path, duration: float, runs: int) -> i
     return 0
 
 
+def _run_batch(argv: list[str]) -> int:
+    """Lote headless: usa `BatchEngine` directamente, sin importar Qt ni la UI."""
+    import json
+
+    from batch_engine import collect_batch_inputs, engine_from_settings, load_batch_preset
+
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Procesa un lote sin interfaz gráfica.")
+    parser.add_argument("source", help="Carpeta con audio o manifiesto (.json o lista de rutas).")
+    parser.add_argument(
+        "--preset",
+        help="Preset JSON con opciones de lote, o nombre de un preset de loudness (p. ej. 'Spotify (-14 LUFS / -1.0 dBTP)').",
+    )
+    parser.add_argument("--output-dir", metavar="PATH", help="Carpeta de salida (por defecto, junto a cada fuente).")
+    parser.add_argument("--recursive", action="store_true", help="Incluye subcarpetas al leer una carpeta.")
+    parser.add_argument("--overwrite", action="store_true", help="Sobrescribe salidas existentes.")
+    parser.add_argument("--checkpoint", metavar="PATH", help="Checkpoint para reanudar el lote.")
+    parser.add_argument("--results", metavar="PATH", help="Guarda los resultados por archivo en JSON.")
+    parser.add_argument("--dry-run", action="store_true", help="Lista archivos y opciones sin procesar.")
+    args = parser.parse_args(argv)
+
+    try:
+        files, manifest_options = collect_batch_inputs(args.source, recursive=args.recursive)
+        settings = {**load_batch_preset(args.preset), **manifest_options}
+        if args.output_dir:
+            settings["output_dir"] = args.output_dir
+        if args.overwrite:
+            settings["overwrite"] = True
+        engine = engine_from_settings(
+            settings, files, pathlib.Path(args.checkpoint) if args.checkpoint else None
+        )
+    except (ValueError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+    if not files:
+        print(f"Error: no hay archivos de audio en {args.source}", file=sys.stderr)
+        return 2
+    if args.dry_run:
+        for path in files:
+            print(path)
+        print(f"{len(files)} archivo(s); destino: {engine.output_dir or 'junto a cada fuente'}")
+        return 0
+
+    outcome: dict = {"results": None, "error": None}
+    engine.progress.connect(lambda message, current, total: print(f"[{current}/{total}] {message}", file=sys.stderr))
+    engine.finished.connect(lambda message, results: (outcome.update(results=results), print(message)))
+    engine.error.connect(lambda message: outcome.update(error=message))
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        engine.cancel()
+        print("Lote cancelado.", file=sys.stderr)
+        return 130
+    if outcome["error"]:
+        print(f"Error: {outcome['error']}", file=sys.stderr)
+        return 1
+    if args.results:
+        pathlib.Path(args.results).write_text(
+            json.dumps(outcome["results"], ensure_ascii=False, indent=2, default=str) + "\n", encoding="utf-8"
+        )
+    return 0
+
+
+def _run_watch(argv: list[str]) -> int:
+    """Daemon de ingesta: vigila carpetas y procesa los archivos que terminan de copiarse."""
+    import signal
+    import threading
+
+    from batch_engine import load_batch_preset
+    from ingest_daemon import (
+        DEFAULT_BATCH_SIZE,
+        DEFAULT_POLL_INTERVAL_S,
+        DEFAULT_SETTLE_S,
+        IngestDaemon,
+    )
+
+    parser = argparse.ArgumentParser(prog="main.py watch", description="Vigila carpetas y masteriza lo que llega.")
+    parser.add_argument("watch_dirs", nargs="+", help="Carpetas a vigilar.")
+    parser.add_argument("--output-dir", metavar="PATH", required=True, help="Carpeta de salida (se excluye del sondeo).")
+    parser.add_argument("--preset", help="Preset JSON con opciones de lote, o nombre de un preset de loudness.")
+    parser.add_argument("--recursive", action="store_true", help="Incluye subcarpetas.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL_S, help="Segundos entre sondeos.")
+    parser.add_argument(
+        "--settle", type=float, default=DEFAULT_SETTLE_S,
+        help="Segundos sin cambios de tamaño/mtime antes de tomar un archivo.",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Máximo de archivos por lote.")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Sale cuando no queda nada por procesar.")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.watch_dirs if not pathlib.Path(path).is_dir()]
+    if missing:
+        print(f"Error: no es una carpeta: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    try:
+        settings = load_batch_preset(args.preset)
+        daemon = IngestDaemon(
+            args.watch_dirs,
+            args.output_dir,
+            settings,
+            poll_interval=args.poll_interval,
+            settle_s=args.settle,
+            batch_size=args.batch_size,
+            recursive=args.recursive,
+            log=lambda message: print(message, file=sys.stderr),
+        )
+    except (ValueError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.set())
+    try:
+        stats = daemon.run(stop, exit_when_idle=args.exit_when_idle)
+    except KeyboardInterrupt:
+        stop.set()
+        return 130
+    print(
+        f"Ingesta detenida: {stats['processed']} procesados, {stats['failed']} fallidos, "
+        f"{stats['files_per_hour']} archivos/h."
+    )
+    return 1 if stats["failed"] else 0
+
+
+def _run_serve(argv: list[str]) -> int:
+    """Servidor local de trabajos: recibe payloads de `spasm_batch_start` por socket UNIX."""
+    import signal
+    import threading
+
+    from job_server import DEFAULT_SOCKET_PATH, DEFAULT_STATE_DIR, JobServer, job_server_address
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Servidor local de trabajos de lote.")
+    parser.add_argument(
+        "--socket", metavar="PATH", default=str(job_server_address() or DEFAULT_SOCKET_PATH),
+        help="Socket UNIX donde escuchar (por defecto TONEFINISH_JOB_SERVER o ~/.tonefinish/job_server.sock).",
+    )
+    parser.add_argument("--state-dir", metavar="PATH", default=str(DEFAULT_STATE_DIR), help="Estado y eventos por trabajo.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de análisis del pool (por defecto, según recursos).")
+    args = parser.parse_args(argv)
+
+    server = JobServer(args.socket, args.state_dir, workers=args.workers)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.set())
+    signal.signal(signal.SIGINT, lambda _signum, _frame: stop.set())
+    try:
+        server.start()
+    except (RuntimeError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        server.close()
+        return 2
+    print(
+        f"Servidor de trabajos escuchando en {server.socket_path} "
+        f"({len(server.worker_pids)} proceso(s) de análisis listos).",
+        flush=True,
+    )
+    try:
+        stop.wait()
+    finally:
+        server.close()
+    print("Servidor de trabajos detenido.")
+    return 0
+
+
 def main() -> int:
     repro = check_runtime_reproducibility()
     if repro.warnings:
@@ -52,6 +219,13 @@ def main() -> int:
         for item in repro.warnings:
             print(f"- {item}", file=sys.stderr)
 
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        return _run_batch(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        return _run_watch(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return _run_serve(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Finisher audio mastering")
     parser.add_argument(
         "--benchmark-spectrum",
@@ -70,8 +244,38 @@ def main() -> int:
         default=3,
         help="Cantidad de corridas por backend para el benchmark espectral.",
     )
+    parser.add_argument(
+        "--benchmark-suite",
+        action="store_true",
+        help="Ejecuta la suite de benchmarks sobre un corpus sintético determinista.",
+    )
+    parser.add_argument(
+        "--benchmark-profile",
+        choices=("quick", "full"),
+        default="quick",
+        help="Perfil de la suite: duraciones, sample rates y repeticiones.",
+    )
+    parser.add_argument(
+        "--benchmark-output",
+        metavar="PATH",
+        help="Guarda los resultados de la suite en JSON.",
+    )
+    parser.add_argument(
+        "--benchmark-baseline",
+        metavar="PATH",
+        help="Compara la suite con una línea base JSON; termina con 1 si hay regresiones.",
+    )
     args = parser.parse_args()
 
+    if args.benchmark_suite:
+        from benchmark_suite import run_and_report
+
+        return run_and_report(
+            args.benchmark_profile,
+            pathlib.Path(args.benchmark_output) if args.benchmark_output else None,
+            pathlib.Path(args.benchmark_baseline) if args.benchmark_baseline else None,
+        )
+
     if args.benchmark_spectrum:
         return _run_spectrum_benchmark(
             pathlib.Path(args.benchmark_spectrum),
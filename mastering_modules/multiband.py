@@ -13,6 +13,7 @@ from config import (
     DEFAULT_BAND_RANGE_DB,
     DEFAULT_MAX_ADJUST_DB,
 )
+from processes.crossover import build_crossover_tree, crossover_frequencies
 
 MIN_ALIMITER_ATTACK_MS = 1.0
 MIN_ALIMITER_RELEASE_MS = 10.0
@@ -71,8 +72,7 @@ def build_multiband_filter(
     split_labels = [f"b{i}" for i in range(len(BAND_CONFIG))]
     band_outputs = [f"c{i}" for i in range(len(BAND_CONFIG))]
 
-    split = f"[{input_label}]asplit={len(BAND_CONFIG)}" + "".join(f"[{label}]" for label in split_labels)
-    parts = [split]
+    parts = [build_crossover_tree(input_label, split_labels, crossover_frequencies(BAND_CONFIG))]
     sat_filter = resolve_saturation_type(saturation_type)
     mb_thresholds = multiband_limiter_thresholds or MULTIBAND_LIMITER_DEFAULTS.copy()
     # Auto-calcular compresión por banda si no se pasó explícitamente
@@ -129,7 +129,8 @@ def build_multiband_filter(
     )
 
     for idx, (label, low_hz, high_hz, attack_s, release_s, width) in enumerate(BAND_CONFIG):
-        band_chain = f"[{split_labels[idx]}]highpass=f={low_hz},lowpass=f={high_hz}"
+        # La banda sale del árbol Linkwitz-Riley compartido (un solo filtrado).
+        band_chain = f"[{split_labels[idx]}]anull"
 
         # === REPARACIÓN POR BANDA (v2.0.0: denoise/declip/declick por frecuencia) ===
         if band_repair and label in band_repair:
@@ -125,6 +125,22 @@ py_files=(
   bandcamp_bok.py
   ia_mastering.py
   output_naming.py
+  render_cache.py
+  batch_pipeline.py
+  process_pool.py
+  job_spool.py
+  job_events.py
+  job_channel.py
+  spasm_worker_pool.py
+  ffmpeg_concurrency.py
+  tracing.py
+  ffmpeg_accounting.py
+  benchmark_suite.py
+  ffmpeg_budget.py
+  lazy_imports.py
+  batch_engine.py
+  ingest_daemon.py
+  job_server.py
 )
 
 for file in "${py_files[@]}"; do
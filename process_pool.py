@@ -0,0 +1,262 @@
+"""
+Pool de procesos para las unidades por archivo del lote.
+
+El lote corre en un solo proceso Python, así que el GIL serializa el trabajo
+puro Python (parseo de logs, decisiones, MTS) y un crash nativo en el análisis
+de un archivo tumba todo el `BatchWorker`. Este pool ejecuta esas unidades en
+procesos aparte:
+
+- los trabajos son descriptores picklables (`ProcessJob`: "modulo:funcion" +
+  argumentos), así el proceso hijo sólo importa lo que el trabajo necesita;
+- cada proceso se calienta una vez (NumPy y módulos de análisis) y puede tener
+  un tope de memoria virtual (`RLIMIT_AS`);
+- si un proceso muere (segfault, OOM killer) el pool se recrea y el trabajo se
+  reintenta; los demás archivos del lote no se ven afectados;
+- el hijo captura el uso de recursos de sus FFmpeg (`ffmpeg_accounting`) y,
+  con trazas activas (`tracing`), sus spans; el padre los incorpora a los
+  registros del lote.
+
+Con `workers=0` los trabajos corren en el hilo que los pide (diagnóstico).
+"""
+
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, NamedTuple, Sequence
+
+import ffmpeg_accounting
+import tracing
+
+DEFAULT_MEMORY_CAP_MB = 4096
+DEFAULT_RETRIES = 1
+WARMUP_MODULES = ("numpy", "audio_analysis", "analysis_mts")
+
+
+@dataclass(frozen=True)
+class ProcessJob:
+    """Trabajo picklable: `target` es "modulo:funcion" importable en el hijo."""
+
+    target: str
+    args: tuple = ()
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    label: str = ""
+
+    def resolve(self) -> Callable[..., Any]:
+        module_name, _, attribute = self.target.partition(":")
+        if not module_name or not attribute:
+            raise ValueError(f"Destino de trabajo inválido: {self.target!r}")
+        return getattr(importlib.import_module(module_name), attribute)
+
+    def run(self) -> Any:
+        return self.resolve()(*self.args, **self.kwargs)
+
+
+class _JobOutcome(NamedTuple):
+    result: Any
+    trace_events: list[dict[str, Any]]
+    ffmpeg_usage: list[ffmpeg_accounting.FfmpegUsage]
+
+
+def _run_job(job: ProcessJob, trace: bool = False) -> _JobOutcome:
+    """Ejecuta el trabajo en el hijo y devuelve también lo medido allí (FFmpeg y spans)."""
+    events: list[dict[str, Any]] = []
+    with ffmpeg_accounting.capture() as usage:
+        if not trace:
+            result = job.run()
+        else:
+            with tracing.capture() as events, tracing.file_scope(job.label or None):
+                with tracing.span(job.target.partition(":")[2], "process_job"):
+                    result = job.run()
+    return _JobOutcome(result, events, usage)
+
+
+def _warm_up(memory_cap_mb: int, modules: Sequence[str]) -> None:
+    """Inicializador del proceso hijo: tope de memoria e imports pesados una sola vez."""
+    if memory_cap_mb > 0:
+        try:
+            import resource
+
+            limit = int(memory_cap_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def process_pool_workers(default: int) -> int:
+    """`TONEFINISH_PROCESS_POOL_WORKERS` fija los procesos; `0` ejecuta en el hilo actual."""
+    raw = os.getenv("TONEFINISH_PROCESS_POOL_WORKERS", "").strip()
+    try:
+        return max(0, min(32, int(raw))) if raw else max(0, int(default))
+    except ValueError:
+        return max(0, int(default))
+
+
+def process_pool_memory_cap_mb() -> int:
+    """`TONEFINISH_PROCESS_POOL_MEM_MB` fija el tope por proceso; `0` lo desactiva."""
+    raw = os.getenv("TONEFINISH_PROCESS_POOL_MEM_MB", "").strip()
+    try:
+        return max(0, int(raw)) if raw else DEFAULT_MEMORY_CAP_MB
+    except ValueError:
+        return DEFAULT_MEMORY_CAP_MB
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    # `fork` no es seguro con hilos de Qt/executors vivos; forkserver arranca
+    # los hijos desde un proceso limpio y reutiliza sus imports.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class BatchProcessPool:
+    """Ejecuta `ProcessJob` en procesos aislados con reintento ante crashes."""
+
+    def __init__(
+        self,
+        workers: int,
+        memory_cap_mb: int | None = None,
+        retries: int = DEFAULT_RETRIES,
+        warmup_modules: Sequence[str] = WARMUP_MODULES,
+    ) -> None:
+        self.workers = max(0, int(workers))
+        self.memory_cap_mb = process_pool_memory_cap_mb() if memory_cap_mb is None else max(0, int(memory_cap_mb))
+        self.retries = max(0, int(retries))
+        self.warmup_modules = tuple(warmup_modules)
+        self.metrics = {"submitted": 0, "crashes": 0, "retried": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._generation = 0
+        self._closed = False
+
+    def __enter__(self) -> "BatchProcessPool":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def submit(self, job: ProcessJob) -> Future:
+        """Encola el trabajo; el future resuelve con su resultado o su excepción."""
+        outer: Future = Future()
+        with self._lock:
+            self.metrics["submitted"] += 1
+        if self.workers == 0:
+            outer.set_running_or_notify_cancel()
+            try:
+                with tracing.file_scope(job.label or None), tracing.span(job.target.partition(":")[2], "process_job"):
+                    result = job.run()
+                outer.set_result(result)
+            except BaseException as exc:
+                outer.set_exception(exc)
+            return outer
+        self._dispatch(job, outer, self.retries)
+        return outer
+
+    def run(self, job: ProcessJob) -> Any:
+        """Ejecuta el trabajo y espera su resultado (para etapas que ya corren en hilos)."""
+        return self.submit(job).result()
+
+    def warm(self) -> list[int]:
+        """
+        Arranca (y calienta) todos los procesos ahora en lugar de en el primer
+        trabajo; para pools de larga vida. Devuelve los PID que respondieron.
+        """
+        futures = [self.submit(ProcessJob("os:getpid", label="warmup")) for _ in range(self.workers)]
+        with self._lock:
+            self.metrics["submitted"] -= len(futures)
+        return sorted({future.result() for future in futures})
+
+    def close(self, wait: bool = False) -> None:
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _current_executor(self) -> tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Pool de procesos cerrado.")
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_mp_context(),
+                    initializer=_warm_up,
+                    initargs=(self.memory_cap_mb, self.warmup_modules),
+                )
+                self._generation += 1
+            return self._executor, self._generation
+
+    def _discard_executor(self, generation: int) -> None:
+        """Descarta el executor roto (una sola vez aunque fallen varios trabajos)."""
+        with self._lock:
+            if self._executor is None or generation != self._generation:
+                return
+            broken, self._executor = self._executor, None
+            self.metrics["crashes"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self, job: ProcessJob, outer: Future, retries_left: int) -> None:
+        try:
+            executor, generation = self._current_executor()
+            inner = executor.submit(_run_job, job, tracing.active_tracer() is not None)
+        except BrokenProcessPool:
+            self._discard_executor(self._generation)
+            self._retry_or_fail(job, outer, retries_left, None)
+            return
+        except RuntimeError as exc:
+            if outer.set_running_or_notify_cancel():
+                outer.set_exception(exc)
+            return
+
+        def done(future: Future) -> None:
+            if future.cancelled():
+                outer.cancel()
+                return
+            exc = future.exception()
+            if isinstance(exc, BrokenProcessPool):
+                # El callback corre en el hilo de gestión del executor roto (que
+                # aún tiene tomado su lock de cierre): reintentar fuera de él.
+                threading.Thread(
+                    target=self._recover,
+                    args=(job, outer, retries_left, exc, generation),
+                    name="tonefinish-pool-recover",
+                    daemon=True,
+                ).start()
+                return
+            if not outer.set_running_or_notify_cancel():
+                return
+            if exc is not None:
+                outer.set_exception(exc)
+            else:
+                outcome = future.result()
+                ffmpeg_accounting.merge(outcome.ffmpeg_usage)
+                tracing.merge(outcome.trace_events)
+                outer.set_result(outcome.result)
+
+        inner.add_done_callback(done)
+
+    def _recover(self, job: ProcessJob, outer: Future, retries_left: int, exc: BaseException, generation: int) -> None:
+        self._discard_executor(generation)
+        self._retry_or_fail(job, outer, retries_left, exc)
+
+    def _retry_or_fail(self, job: ProcessJob, outer: Future, retries_left: int, exc: BaseException | None) -> None:
+        if retries_left > 0 and not self._closed:
+            with self._lock:
+                self.metrics["retried"] += 1
+            self._dispatch(job, outer, retries_left - 1)
+            return
+        with self._lock:
+            self.metrics["failed"] += 1
+        if outer.set_running_or_notify_cancel():
+            name = job.label or job.target
+            outer.set_exception(RuntimeError(f"El proceso de trabajo terminó de forma abrupta ({name}): {exc}"))
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+import hashlib
+import json
 import math
 import re
 
@@ -328,11 +330,20 @@ class AudioFunctionRegistry:
     def __init__(self, aliases: Optional[Mapping[str, str]] = None) -> None:
         self._specs: Dict[str, AudioFunctionSpec] = {}
         self._aliases = dict(aliases or {})
+        self._fingerprint: Optional[str] = None
 
     def register(self, spec: AudioFunctionSpec) -> None:
         if spec.function_id in self._specs:
             raise ContractError(f"function_id duplicado: {spec.function_id}")
         self._specs[spec.function_id] = spec
+        self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        """Hash estable del catálogo (specs y alias); cambia al registrar funciones."""
+        if self._fingerprint is None:
+            payload = json.dumps(self.to_dict(), sort_keys=True, default=str)
+            self._fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return self._fingerprint
 
     def register_many(self, specs: Iterable[AudioFunctionSpec]) -> None:
         for spec in specs:
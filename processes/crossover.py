@@ -0,0 +1,81 @@
+"""
+Árbol de crossover Linkwitz-Riley compartido por los procesos multibanda.
+
+Un único `acrossover` (LR de 24 dB/oct con compensación de fase interna)
+reemplaza el banco paralelo `asplit` + highpass/lowpass por banda: la señal
+completa se filtra una sola vez por región multibanda y la suma de las bandas
+sin procesar es plana en magnitud (el banco paralelo dejaba valles de hasta
+~11 dB entre 250 y 500 Hz). Las bandas contiguas que ninguna acción procesa
+se agrupan en un solo tramo: cada corte omitido ahorra un par LR completo.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+CROSSOVER_ORDER = "4th"
+# Margen bajo Nyquist: `acrossover` rechaza cortes en o sobre fs/2.
+NYQUIST_MARGIN = 0.499
+
+
+def crossover_frequencies(band_config: Iterable[Sequence]) -> list[float]:
+    """Frecuencias de corte entre bandas contiguas (`high_hz` de cada banda salvo la última)."""
+    frequencies: list[float] = []
+    for band in list(band_config)[:-1]:
+        frequency = float(band[2])
+        if frequencies and frequency <= frequencies[-1]:
+            raise ValueError(f"Cortes de crossover no crecientes: {frequency:g} Hz")
+        frequencies.append(frequency)
+    return frequencies
+
+
+def band_segments(touched: Iterable[int], band_count: int) -> list[tuple[int, ...]]:
+    """
+    Agrupa las bandas en tramos: cada banda procesada queda sola y las bandas
+    contiguas sin procesar comparten tramo (sólo se corta en bordes necesarios).
+    """
+    touched = set(touched)
+    segments: list[list[int]] = []
+    for index in range(band_count):
+        if segments and index not in touched and segments[-1][-1] not in touched:
+            segments[-1].append(index)
+        else:
+            segments.append([index])
+    return [tuple(segment) for segment in segments]
+
+
+def build_crossover_tree(
+    input_label: str,
+    band_labels: Sequence[str],
+    frequencies: Sequence[float],
+    sample_rate: int | None = None,
+) -> str:
+    """
+    Construye el árbol de crossover que reparte `input_label` en `band_labels`.
+
+    `frequencies` trae un corte por cada par de bandas contiguas. Los cortes en
+    o sobre Nyquist se descartan y las bandas por encima reciben silencio, de
+    modo que la topología (y las etiquetas) no dependen de la frecuencia de muestreo.
+    """
+    count = len(band_labels)
+    if count < 2 or len(frequencies) != count - 1:
+        raise ValueError("El crossover necesita un corte por cada par de bandas contiguas")
+    limit = float(sample_rate) * NYQUIST_MARGIN if sample_rate else None
+    active = [frequency for frequency in frequencies if limit is None or frequency < limit]
+    produced = list(band_labels[: len(active) + 1])
+    parts: list[str] = []
+    if active:
+        split = " ".join(f"{frequency:g}" for frequency in active)
+        outputs = "".join(f"[{label}]" for label in produced)
+        parts.append(f"[{input_label}]acrossover=split='{split}':order={CROSSOVER_ORDER}{outputs}")
+    else:
+        parts.append(f"[{input_label}]anull[{produced[0]}]")
+    missing = list(band_labels[len(produced):])
+    if missing:
+        top = produced[-1]
+        source = f"{top}_xo"
+        parts[-1] = parts[-1][: -len(f"[{top}]")] + f"[{source}]"
+        silent = [f"{label}_xo" for label in missing]
+        parts.append(f"[{source}]asplit={len(missing) + 1}[{top}]" + "".join(f"[{label}]" for label in silent))
+        parts.extend(f"[{src}]volume=0[{label}]" for src, label in zip(silent, missing))
+    return ";".join(parts)
@@ -0,0 +1,329 @@
+"""Pasada de optimización sobre el grafo compilado por el orquestador.
+
+Trabaja sobre el texto `filter_complex` ya compilado (no sobre las acciones), de
+modo que cualquier plugin se beneficia sin cambios y la auditoría de acciones
+aplicadas no se altera. Las reescrituras son:
+
+- quitar filtros neutros (`anull`, `volume` unitario, EQ/shelf con `g=0`, `asplit` de una salida);
+- quitar pares de biquads contiguos idénticos con ganancias opuestas (se cancelan);
+  dos etapas con ganancias que no se anulan NO se fusionan: en peaking/shelf la
+  cascada no equivale a una etapa con la suma de ganancias;
+- colapsar `aformat` consecutivos idénticos;
+- fusionar segmentos lineales `[a]f[b];[b]g[c]` cuando la cadena conjunta se simplifica;
+- deduplicar ramas idénticas que cuelgan del mismo `asplit` (se calculan una vez).
+
+Si el grafo no tiene la forma esperada (etiquetas ausentes o repetidas) se
+devuelve intacto: la optimización nunca es requisito para renderizar.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+
+
+_LABEL_RE = re.compile(r"\[([^\[\]]+)\]")
+_BIQUADS = {"equalizer", "lowshelf", "highshelf", "bass", "treble"}
+_GAIN_KEYS = ("g", "gain")
+
+
+def optimizer_enabled() -> bool:
+    """`TONEFINISH_GRAPH_OPTIMIZER=0` desactiva la pasada (diagnóstico A/B)."""
+    return os.getenv("TONEFINISH_GRAPH_OPTIMIZER", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+@dataclass
+class _Segment:
+    inputs: list[str]
+    filters: list[str]
+    outputs: list[str]
+
+    def render(self) -> str:
+        return (
+            "".join(f"[{label}]" for label in self.inputs)
+            + ",".join(self.filters)
+            + "".join(f"[{label}]" for label in self.outputs)
+        )
+
+
+@dataclass
+class GraphOptimizationReport:
+    removed_filters: int = 0
+    merged_biquads: int = 0
+    collapsed_formats: int = 0
+    fused_segments: int = 0
+    deduped_branches: int = 0
+    changed: bool = False
+    notes: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "removed_filters": self.removed_filters,
+            "merged_biquads": self.merged_biquads,
+            "collapsed_formats": self.collapsed_formats,
+            "fused_segments": self.fused_segments,
+            "deduped_branches": self.deduped_branches,
+            "changed": self.changed,
+        }
+
+
+def _split_top_level(text: str, separator: str) -> list[str]:
+    """Divide respetando comillas simples y escapes con barra invertida."""
+    parts: list[str] = []
+    current: list[str] = []
+    quoted = False
+    escaped = False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == "\\":
+            current.append(char)
+            escaped = True
+            continue
+        if char == "'":
+            quoted = not quoted
+        if char == separator and not quoted:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _parse_segment(text: str) -> _Segment | None:
+    text = text.strip()
+    inputs: list[str] = []
+    while text.startswith("["):
+        match = _LABEL_RE.match(text)
+        if match is None:
+            return None
+        inputs.append(match.group(1))
+        text = text[match.end():]
+    outputs: list[str] = []
+    while text.endswith("]"):
+        start = text.rfind("[")
+        if start < 0:
+            return None
+        outputs.insert(0, text[start + 1:-1])
+        text = text[:start]
+    filters = [item.strip() for item in _split_top_level(text, ",") if item.strip()]
+    if not inputs or not outputs:
+        return None
+    return _Segment(inputs, filters, outputs)
+
+
+def _filter_args(expr: str) -> tuple[str, list[str]]:
+    name, _, args = expr.partition("=")
+    return name.strip(), [item for item in _split_top_level(args, ":") if item] if args else []
+
+
+def _as_float(raw: str) -> float | None:
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def _biquad_gain(expr: str) -> tuple[tuple, float] | None:
+    """Identidad (tipo + parámetros salvo ganancia) y ganancia de un biquad simple."""
+    name, args = _filter_args(expr)
+    if name not in _BIQUADS:
+        return None
+    gain = None
+    rest = []
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            return None
+        if key in _GAIN_KEYS:
+            gain = _as_float(value)
+            if gain is None:
+                return None
+        else:
+            rest.append((key, value))
+    if gain is None:
+        return None
+    return (name, tuple(rest)), gain
+
+
+def _is_noop_filter(expr: str) -> bool:
+    name, args = _filter_args(expr)
+    if name == "anull":
+        return True
+    if name == "volume" and len(args) == 1:
+        raw = args[0].split("=", 1)[1] if args[0].startswith("volume=") else args[0]
+        if raw.lower().endswith("db"):
+            value = _as_float(raw[:-2])
+            return value is not None and value == 0.0
+        value = _as_float(raw)
+        return value is not None and value == 1.0
+    biquad = _biquad_gain(expr)
+    return biquad is not None and biquad[1] == 0.0
+
+
+def _simplify_filters(filters: list[str], report: GraphOptimizationReport) -> list[str]:
+    result: list[str] = []
+    for expr in filters:
+        if _is_noop_filter(expr):
+            report.removed_filters += 1
+            continue
+        if result and expr.startswith("aformat=") and result[-1] == expr:
+            report.collapsed_formats += 1
+            continue
+        if result:
+            previous = _biquad_gain(result[-1])
+            current = _biquad_gain(expr)
+            # H(f, Q, g) · H(f, Q, -g) = 1: el par se anula sin error audible.
+            if previous and current and previous[0] == current[0] and previous[1] == -current[1]:
+                report.merged_biquads += 1
+                report.removed_filters += 1
+                result.pop()
+                continue
+        result.append(expr)
+    return result
+
+
+def _is_single_split(segment: _Segment) -> bool:
+    if len(segment.filters) != 1 or len(segment.inputs) != 1 or len(segment.outputs) != 1:
+        return False
+    name, _ = _filter_args(segment.filters[0])
+    return name == "asplit"
+
+
+def optimize_filter_graph(
+    filter_chain: str,
+    output_label: str,
+) -> tuple[str, str, GraphOptimizationReport]:
+    """Optimiza un grafo compilado conservando su etiqueta de salida."""
+    report = GraphOptimizationReport()
+    if not filter_chain:
+        return filter_chain, output_label, report
+    segments: list[_Segment] = []
+    for text in _split_top_level(filter_chain, ";"):
+        if not text.strip():
+            continue
+        segment = _parse_segment(text)
+        if segment is None:
+            report.notes.append("segmento sin etiquetas; grafo sin optimizar")
+            return filter_chain, output_label, report
+        segments.append(segment)
+    produced = [label for segment in segments for label in segment.outputs]
+    consumed = [label for segment in segments for label in segment.inputs]
+    if len(produced) != len(set(produced)) or len(consumed) != len(set(consumed)):
+        report.notes.append("etiquetas repetidas; grafo sin optimizar")
+        return filter_chain, output_label, report
+
+    for segment in segments:
+        if len(segment.inputs) == 1 and len(segment.outputs) == 1:
+            segment.filters = _simplify_filters(segment.filters, report)
+            if _is_single_split(segment):
+                segment.filters = []
+                report.removed_filters += 1
+
+    changed = True
+    while changed:
+        changed = (
+            _splice_identities(segments, output_label, report)
+            or _fuse_linear(segments, report)
+            or _dedupe_branches(segments, report)
+        )
+
+    optimized = ";".join(segment.render() for segment in segments)
+    report.changed = optimized != filter_chain
+    return optimized, output_label, report
+
+
+def _producer(segments: list[_Segment], label: str) -> _Segment | None:
+    return next((segment for segment in segments if label in segment.outputs), None)
+
+
+def _consumer(segments: list[_Segment], label: str) -> _Segment | None:
+    return next((segment for segment in segments if label in segment.inputs), None)
+
+
+def _splice_identities(segments: list[_Segment], output_label: str,
+                       report: GraphOptimizationReport) -> bool:
+    for segment in segments:
+        if segment.filters or len(segment.inputs) != 1 or len(segment.outputs) != 1:
+            continue
+        source, target = segment.inputs[0], segment.outputs[0]
+        consumer = _consumer(segments, target)
+        producer = _producer(segments, source)
+        if consumer is not None:
+            consumer.inputs[consumer.inputs.index(target)] = source
+        elif producer is not None:
+            # La salida del grafo conserva su nombre: se renombra el productor.
+            producer.outputs[producer.outputs.index(source)] = target
+        else:
+            # Entrada externa mapeada directo a la salida: se necesita un filtro.
+            segment.filters = ["anull"]
+            continue
+        segments.remove(segment)
+        return True
+    return False
+
+
+def _fuse_linear(segments: list[_Segment], report: GraphOptimizationReport) -> bool:
+    for segment in segments:
+        if len(segment.outputs) != 1 or not segment.filters:
+            continue
+        consumer = _consumer(segments, segment.outputs[0])
+        if consumer is None or len(consumer.inputs) != 1 or not consumer.filters:
+            continue
+        # Sólo se fusiona si la cadena conjunta se simplifica: así se conservan
+        # las etiquetas por plugin que usan los logs y la auditoría.
+        probe = GraphOptimizationReport()
+        fused = _simplify_filters(segment.filters + consumer.filters, probe)
+        if len(fused) >= len(segment.filters) + len(consumer.filters):
+            continue
+        report.removed_filters += probe.removed_filters
+        report.merged_biquads += probe.merged_biquads
+        report.collapsed_formats += probe.collapsed_formats
+        segment.filters = fused
+        segment.outputs = consumer.outputs
+        segments.remove(consumer)
+        report.fused_segments += 1
+        return True
+    return False
+
+
+def _dedupe_branches(segments: list[_Segment], report: GraphOptimizationReport) -> bool:
+    for split in segments:
+        if len(split.inputs) != 1 or len(split.filters) != 1:
+            continue
+        name, _ = _filter_args(split.filters[0])
+        if name != "asplit" or len(split.outputs) < 2:
+            continue
+        seen: dict[tuple[str, ...], _Segment] = {}
+        for label in list(split.outputs):
+            branch = _consumer(segments, label)
+            if branch is None or len(branch.inputs) != 1 or len(branch.outputs) != 1 or not branch.filters:
+                continue
+            signature = tuple(branch.filters)
+            kept = seen.get(signature)
+            if kept is None:
+                seen[signature] = branch
+                continue
+            # La rama repetida se reemplaza por una copia de la salida de la primera.
+            kept_output = kept.outputs[0]
+            tee = _consumer(segments, kept_output)
+            if kept_output.startswith("opt_dedup_") and tee is not None and tee.inputs == [kept_output]:
+                tee.outputs.append(branch.outputs[0])
+                tee.filters = [f"asplit={len(tee.outputs)}"]
+            else:
+                fanout = f"opt_dedup_{kept_output}"
+                kept.outputs = [fanout]
+                segments.insert(
+                    segments.index(kept) + 1,
+                    _Segment([fanout], ["asplit=2"], [kept_output, branch.outputs[0]]),
+                )
+            split.outputs.remove(label)
+            split.filters = [f"asplit={len(split.outputs)}"] if len(split.outputs) > 1 else []
+            segments.remove(branch)
+            report.deduped_branches += 1
+            return True
+    return False
@@ -8,10 +8,10 @@ Procesamiento multibanda con:
 - Saturación por banda
 """
 
-import math
 from typing import Any, Dict, List, Tuple
 
 from processes.base import BaseProcess, ProcessCategory
+from processes.crossover import band_segments, build_crossover_tree, crossover_frequencies
 
 
 # Configuración de bandas por defecto
@@ -36,6 +36,20 @@ DEFAULT_MAX_SATURATION_DRIVE_DB = {
 }
 
 
+def auto_band_gain_compensation_db(
+    band_adjust_db: Dict[str, float] | None,
+    band_config: List[Tuple],
+    max_adjust_db: float,
+) -> float | None:
+    """Ganancia que neutraliza el ajuste promedio de las bandas; None si no hace falta."""
+    if not band_adjust_db:
+        return None
+    adjusts = [float(band_adjust_db.get(entry[0], 0.0)) for entry in band_config]
+    limit = abs(float(max_adjust_db))
+    compensation = max(-limit, min(limit, -sum(adjusts) / len(adjusts)))
+    return compensation if abs(compensation) > 0.01 else None
+
+
 class MultibandProcess(BaseProcess):
     """
     Procesador multibanda con EQ dinámico, stereo y saturación.
@@ -177,18 +191,13 @@ class MultibandProcess(BaseProcess):
         split_labels = [f"b{i}" for i in range(len(band_config))]
         band_outputs = [f"c{i}" for i in range(len(band_config))]
         
-        split = f"[{input_label}]asplit={len(band_config)}" + "".join(f"[{label}]" for label in split_labels)
-        parts = [split]
+        parts = [build_crossover_tree(input_label, split_labels, crossover_frequencies(band_config))]
         
         sat_filter = self._resolve_saturation_type(saturation_type)
         
         for idx, (label, low_hz, high_hz, attack_s, release_s, width) in enumerate(band_config):
-            # Usar filtros Butterworth de 2º orden (12dB/oct) aplicados 2 veces
-            # para simular Linkwitz-Riley de 24dB/oct (mejor suma de fase)
-            # Esto reduce cancelaciones entre bandas adyacentes
-            hp_filter = f"highpass=f={low_hz}:poles=2,highpass=f={low_hz}:poles=2"
-            lp_filter = f"lowpass=f={high_hz}:poles=2,lowpass=f={high_hz}:poles=2"
-            band_chain = f"[{split_labels[idx]}]{hp_filter},{lp_filter}"
+            # La banda ya sale separada del árbol Linkwitz-Riley compartido.
+            band_chain = f"[{split_labels[idx]}]anull"
             
             # Dynamic EQ
             if dynamic_eq:
@@ -259,7 +268,7 @@ class MultibandProcess(BaseProcess):
                     parts.append(f"[msjoin{idx}]pan=stereo|c0=c0+c1|c1=c0-c1[{ms_out}]")
                     
                     # Continuar con el resto del procesamiento desde ms_out
-                    band_chain = f"[{ms_out}]"
+                    band_chain = f"[{ms_out}]anull"
                 else:
                     # Mix es 0, no hacer nada
                     pass
@@ -309,28 +318,21 @@ class MultibandProcess(BaseProcess):
             
             parts.append(f"{band_chain}[{out_label}]")
         
-        # Mix de todas las bandas
+        # Mix de todas las bandas: el árbol LR suma plano, no requiere compensación
         mix_label = "mb"
-        # IMPORTANTE: amix con normalize=0 suma las señales sin normalizar
-        # Esto es correcto para crossover, pero necesitamos compensar
-        # porque los filtros HP/LP tienen solapamiento y pérdida
         mix_chain = (
             "".join(f"[{label}]" for label in band_outputs)
             + f"amix=inputs={len(band_config)}:normalize=0[{mix_label}]"
         )
         parts.append(mix_chain)
-        
-        # Compensación de ganancia para restaurar nivel original
-        # Los filtros HP/LP causan ~3-6dB de pérdida por solapamiento imperfecto
         output_label = mix_label
-        compensation_db = 4.5  # Compensación aumentada de 3.0 a 4.5 dB
-        
-        if auto_band_gain:
-            # Con auto_band_gain, aplicar compensación reducida pero no cero
-            # para restaurar pérdidas de crossover
-            compensation_db = 2.0
-        
-        if compensation_db > 0.1:
+
+        # Auto-gain: sólo los ajustes por banda mueven el nivel de la suma;
+        # se compensa su promedio (acotado a ±max_adjust_db) para no acumular.
+        compensation_db = auto_band_gain_compensation_db(
+            band_adjust_db if auto_band_gain else None, band_config, max_adjust_db
+        )
+        if compensation_db is not None:
             gain_label = "mbg"
             parts.append(f"[{mix_label}]volume={compensation_db:.2f}dB[{gain_label}]")
             output_label = gain_label
@@ -341,29 +343,27 @@ class MultibandProcess(BaseProcess):
         return self.build_functions([action], input_label, context, labels)
 
     def build_functions(self, actions, input_label, context, labels):
-        """Compila todas las acciones multibanda consecutivas con un solo crossover."""
+        """Compila todas las acciones multibanda consecutivas con un solo árbol de crossover."""
         validated = [self.validate_action(action) for action in actions]
-        by_target = {band: [] for band in ("sub_bass", "bass", "low_mid", "mid", "high_mid", "air")}
+        band_ids = ("sub_bass", "bass", "low_mid", "mid", "high_mid", "air")
+        by_target = {band: [] for band in band_ids}
         for action in validated:
             by_target[action.target].append(action)
 
         fid = "audio.multiband.chain"
-        split_labels = [labels.new(fid, f"split_{idx}") for idx in range(6)]
-        band_outputs = [labels.new(fid, f"band_{idx}") for idx in range(6)]
-        parts = [f"[{input_label}]asplit=6" + "".join(f"[{label}]" for label in split_labels)]
-        band_ids = ("sub_bass", "bass", "low_mid", "mid", "high_mid", "air")
-
-        for idx, band_id in enumerate(band_ids):
-            _legacy, low_hz, high_hz, _attack, _release, _width = DEFAULT_BAND_CONFIG[idx]
-            crossover = []
-            if idx > 0:
-                crossover.extend((f"highpass=f={low_hz}:poles=2", f"highpass=f={low_hz}:poles=2"))
-            if idx < len(DEFAULT_BAND_CONFIG) - 1:
-                high_hz = min(high_hz, context.sample_rate * 0.499)
-                crossover.extend((f"lowpass=f={high_hz:.2f}:poles=2", f"lowpass=f={high_hz:.2f}:poles=2"))
-            current = labels.new(fid, f"stage_{idx}")
-            parts.append(f"[{split_labels[idx]}]" + ",".join(crossover or ["anull"]) + f"[{current}]")
+        cuts = crossover_frequencies(DEFAULT_BAND_CONFIG)
+        segments = band_segments(
+            (idx for idx, band_id in enumerate(band_ids) if by_target[band_id]), len(band_ids)
+        )
+        stages = [labels.new(fid, f"stage_{idx}") for idx in range(len(segments))]
+        band_outputs = [labels.new(fid, f"band_{idx}") for idx in range(len(segments))]
+        parts = [build_crossover_tree(
+            input_label, stages, [cuts[segment[-1]] for segment in segments[:-1]], context.sample_rate
+        )]
 
+        for idx, segment in enumerate(segments):
+            current = stages[idx]
+            band_id = band_ids[segment[0]]
             for action in by_target[band_id]:
                 p = action.params
                 next_label = labels.new(action.function_id, band_id)
@@ -415,5 +415,8 @@ class MultibandProcess(BaseProcess):
             parts.append(f"[{current}]anull[{band_outputs[idx]}]")
 
         output = labels.new(fid)
-        parts.append("".join(f"[{label}]" for label in band_outputs) + f"amix=inputs=6:normalize=0[{output}]")
+        parts.append(
+            "".join(f"[{label}]" for label in band_outputs)
+            + f"amix=inputs={len(band_outputs)}:normalize=0[{output}]"
+        )
         return ";".join(parts), output
@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, Mapping, Sequence
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Iterable, Mapping, Sequence
 
 from processes import registry as process_registry
 from processes.catalog import function_registry
@@ -11,6 +16,7 @@ from processes.contracts import AudioFunctionAction, AudioProcessContext, Filter
 from processes.budgets import (
     DEFAULT_BUDGET_POLICY, HEADROOM_GOVERNOR_ID, estimate_effective_band_boosts,
 )
+from processes.graph_optimizer import optimize_filter_graph, optimizer_enabled
 
 
 @dataclass(frozen=True)
@@ -20,17 +26,130 @@ class CompiledAudioGraph:
     applied_actions: tuple[AudioFunctionAction, ...]
 
 
+DEFAULT_COMPILE_CACHE_SIZE = 256
+
+
+def _compile_cache_size() -> int:
+    """`TONEFINISH_COMPILE_CACHE_SIZE=0` desactiva la memoización de grafos."""
+    raw = os.getenv("TONEFINISH_COMPILE_CACHE_SIZE", "").strip()
+    try:
+        return max(0, int(raw)) if raw else DEFAULT_COMPILE_CACHE_SIZE
+    except ValueError:
+        return DEFAULT_COMPILE_CACHE_SIZE
+
+
+def _canonical(value: Any) -> Any:
+    """Forma JSON determinista; TypeError si el valor no tiene una forma estable."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, Mapping):
+        return {str(key): _canonical(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if is_dataclass(value) and not isinstance(value, type):
+        return {"__dataclass__": type(value).__name__, **_canonical(asdict(value))}
+    if hasattr(value, "tolist"):
+        return _canonical(value.tolist())
+    raise TypeError(f"Valor sin forma canónica: {type(value).__name__}")
+
+
 class AudioProcessOrchestrator:
     """Valida acciones, localiza su plugin y compila un único grafo secuencial."""
 
     def __init__(self) -> None:
         self._plugins = {plugin.plugin_id: plugin for plugin in process_registry}
+        self._plugin_fingerprint = hashlib.sha256(json.dumps(sorted(
+            f"{plugin_id}={type(plugin).__module__}.{type(plugin).__qualname__}"
+            for plugin_id, plugin in self._plugins.items()
+        )).encode("utf-8")).hexdigest()
+        self._compiled: OrderedDict[str, CompiledAudioGraph] = OrderedDict()
+        self.cache_metrics = {"hits": 0, "misses": 0, "bypassed": 0}
+        # Los hilos del preview y del lote comparten el orquestador: el LRU y
+        # sus métricas sólo se tocan con este lock tomado.
+        self._cache_lock = threading.Lock()
+
+    def _cache_key(
+        self,
+        actions: Sequence[AudioFunctionAction],
+        context: AudioProcessContext,
+        input_label: str,
+        optimize: bool,
+    ) -> str | None:
+        """
+        Clave canónica de una compilación. `audio_id` no participa: ningún
+        plugin lo usa, así el mismo plan sobre otra pista reutiliza el grafo.
+        """
+        try:
+            payload = json.dumps({
+                "actions": [_canonical(action.to_dict()) for action in actions],
+                "context": _canonical({
+                    "sample_rate": context.sample_rate, "channels": context.channels,
+                    "duration": context.duration, "analysis": context.analysis,
+                }),
+                "input_label": input_label,
+                "optimize": optimize,
+                "catalog": function_registry.fingerprint(),
+                "plugins": self._plugin_fingerprint,
+            }, sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cache_info(self) -> dict[str, int]:
+        """Métricas de la memoización de `compile` (aciertos, fallos, entradas)."""
+        with self._cache_lock:
+            return {**self.cache_metrics, "entries": len(self._compiled), "max_entries": _compile_cache_size()}
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._compiled.clear()
+            self.cache_metrics.update(hits=0, misses=0, bypassed=0)
 
     def compile(
         self,
         actions: Iterable[AudioFunctionAction],
         context: AudioProcessContext,
         input_label: str = "0:a",
+        optimize: bool | None = None,
+    ) -> CompiledAudioGraph:
+        """
+        Compila el plan a un grafo FFmpeg. Los grafos se memoizan por hash
+        canónico del plan, del contexto relevante, de la etiqueta de entrada y
+        del catálogo: el resultado es inmutable y se comparte entre llamadas.
+        """
+        actions = tuple(actions)
+        optimize = optimizer_enabled() if optimize is None else bool(optimize)
+        max_entries = _compile_cache_size()
+        key = self._cache_key(actions, context, input_label, optimize) if max_entries else None
+        with self._cache_lock:
+            if key is None:
+                self.cache_metrics["bypassed"] += 1
+            else:
+                cached = self._compiled.get(key)
+                if cached is not None:
+                    self._compiled.move_to_end(key)
+                    self.cache_metrics["hits"] += 1
+                    return cached
+                self.cache_metrics["misses"] += 1
+        # La compilación corre fuera del lock: dos hilos que fallan a la vez
+        # compilan el mismo grafo puro y el último en guardarlo gana.
+        graph = self._compile(actions, context, input_label, optimize)
+        if key is None:
+            return graph
+        with self._cache_lock:
+            self._compiled[key] = graph
+            while len(self._compiled) > max_entries:
+                self._compiled.popitem(last=False)
+        return graph
+
+    def _compile(
+        self,
+        actions: Sequence[AudioFunctionAction],
+        context: AudioProcessContext,
+        input_label: str,
+        optimize: bool,
     ) -> CompiledAudioGraph:
         validated = function_registry.validate_plan(actions)
         headroom = estimate_effective_band_boosts(validated)
@@ -62,12 +181,15 @@ class AudioProcessOrchestrator:
             batch = [action]
             if hasattr(plugin, "build_functions"):
                 cursor = index + 1
+                # Las acciones desactivadas no compilan nada: no cortan la región,
+                # así una cadena multibanda comparte un único árbol de crossover.
                 while cursor < len(validated):
                     candidate = validated[cursor]
                     candidate_spec = function_registry.get(candidate.function_id)
-                    if not candidate.enabled or candidate_spec.plugin_id != spec.plugin_id:
+                    if candidate_spec.plugin_id != spec.plugin_id:
                         break
-                    batch.append(candidate)
+                    if candidate.enabled:
+                        batch.append(candidate)
                     cursor += 1
                 chain, output = plugin.build_functions(batch, current, context, labels)
                 index = cursor
@@ -79,7 +201,10 @@ class AudioProcessOrchestrator:
             parts.append(chain)
             current = output
             applied.extend(batch)
-        return CompiledAudioGraph(";".join(parts), current, tuple(applied))
+        chain = ";".join(parts)
+        if optimize:
+            chain, current, _report = optimize_filter_graph(chain, current)
+        return CompiledAudioGraph(chain, current, tuple(applied))
 
 
 orchestrator = AudioProcessOrchestrator()
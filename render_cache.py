@@ -0,0 +1,266 @@
+"""
+Caché de renders FFmpeg.
+
+Reutiliza salidas ya renderizadas cuando coinciden el contenido de la fuente,
+el grafo de filtros, los argumentos de códec/metadata y la versión de FFmpeg.
+Cada entrada guarda el archivo renderizado junto con el log de FFmpeg (que
+contiene las mediciones loudnorm usadas por la validación) y las estadísticas
+extraídas, de modo que un acierto devuelve exactamente lo mismo que el render.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence
+
+import tracing
+from processes.audit import fingerprint_audio_source
+
+# Directorio de caché de renders
+RENDER_CACHE_DIR = pathlib.Path.home() / ".tonefinish" / "render_cache"
+RENDER_CACHE_SCHEMA_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Flags que no cambian el contenido del render y no deben partir la clave.
+_NEUTRAL_FLAGS = {"-y", "-n", "-nostdin", "-hide_banner", "-nostats"}
+
+
+def render_cache_enabled() -> bool:
+    """`TONEFINISH_RENDER_CACHE=0` desactiva la caché sin tocar el resto del flujo."""
+    raw = os.getenv("TONEFINISH_RENDER_CACHE", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _max_bytes() -> int:
+    raw = os.getenv("TONEFINISH_RENDER_CACHE_MAX_MB", "").strip()
+    try:
+        return max(0, int(float(raw) * 1024 * 1024)) if raw else DEFAULT_MAX_BYTES
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def _use_hardlinks() -> bool:
+    """
+    Los hardlinks sólo se usan si se piden explícitamente: un `ffmpeg -y` o un
+    copy posterior sobre la salida escribiría dentro del inode compartido.
+    """
+    return os.getenv("TONEFINISH_RENDER_CACHE_HARDLINK", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg_identity() -> str:
+    """Versión de FFmpeg/libavfilter; se resuelve una sola vez por proceso."""
+    try:
+        from runtime_reproducibility import _get_ffmpeg_versions
+        versions = _get_ffmpeg_versions()
+    except Exception:
+        versions = {}
+    return f"{versions.get('version', 'unknown')}/{versions.get('libavfilter', 'unknown')}"
+
+
+def graph_hash(filter_chain: str) -> str:
+    """Hash canónico de un `filter_chain` (ignora espacios sobrantes entre etapas)."""
+    canonical = ";".join(part.strip() for part in str(filter_chain).split(";") if part.strip())
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def build_render_key(
+    cmd: Sequence[str],
+    input_path: pathlib.Path,
+    output_path: pathlib.Path,
+    filter_chain: str = "",
+) -> Optional[Dict[str, str]]:
+    """
+    Construye la clave de un render a partir del comando FFmpeg final.
+
+    Las rutas de entrada/salida se sustituyen por marcadores: la identidad de
+    la fuente la da su huella de contenido, no su nombre. Retorna None si la
+    fuente no se puede leer (en ese caso no se cachea).
+    """
+    try:
+        source_fingerprint = fingerprint_audio_source(input_path)
+    except OSError:
+        return None
+    args = list(cmd[1:])
+    canonical_args = []
+    for arg in args:
+        if arg in _NEUTRAL_FLAGS:
+            continue
+        if arg == str(input_path):
+            canonical_args.append("<input>")
+        elif arg == str(output_path):
+            canonical_args.append("<output>")
+        else:
+            canonical_args.append(arg)
+    payload = {
+        "schema_version": RENDER_CACHE_SCHEMA_VERSION,
+        "source": source_fingerprint,
+        "graph": graph_hash(filter_chain) if filter_chain else "",
+        "args": canonical_args,
+        "suffix": output_path.suffix.lower(),
+        "ffmpeg": _ffmpeg_identity(),
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return {"digest": digest, "source": source_fingerprint, "graph": payload["graph"], "ffmpeg": payload["ffmpeg"]}
+
+
+def _entry_dir(digest: str) -> pathlib.Path:
+    return RENDER_CACHE_DIR / digest[:2] / digest
+
+
+def _materialize(cached: pathlib.Path, output_path: pathlib.Path) -> None:
+    """Copia (o enlaza) la salida cacheada con reemplazo atómico en el destino."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    sibling = output_path.with_name(f".{output_path.name}.render-cache-{uuid.uuid4().hex}")
+    try:
+        if _use_hardlinks():
+            try:
+                os.link(cached, sibling)
+            except OSError:
+                shutil.copy2(cached, sibling)
+        else:
+            shutil.copy2(cached, sibling)
+        os.replace(sibling, output_path)
+    finally:
+        if sibling.exists():
+            sibling.unlink()
+
+
+@tracing.traced("render_cache_lookup", "cache", result_args=lambda result: {"hit": result is not None})
+def lookup_render(key: Optional[Dict[str, str]], output_path: pathlib.Path | None = None) -> Optional[Dict[str, Any]]:
+    """
+    Busca un render en caché y, si existe, lo materializa en `output_path`.
+
+    Retorna los metadatos de la entrada (`stderr`, `stats`, ...) o None.
+    Entradas incompletas o modificadas fuera de la caché se descartan.
+    """
+    if not key or not render_cache_enabled():
+        return None
+    entry = _entry_dir(key["digest"])
+    meta_path = entry / "meta.json"
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("schema_version") != RENDER_CACHE_SCHEMA_VERSION:
+            return None
+        if output_path is not None:
+            cached = entry / str(meta.get("output_name", ""))
+            stat = cached.stat()
+            if stat.st_size != meta.get("output_size") or stat.st_mtime_ns != meta.get("output_mtime_ns"):
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+            _materialize(cached, output_path)
+        os.utime(meta_path)
+        return meta
+    except (OSError, json.JSONDecodeError, ValueError):
+        return None
+
+
+def store_render(
+    key: Optional[Dict[str, str]],
+    output_path: pathlib.Path | None,
+    stderr: str = "",
+    stats: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Guarda un render terminado. Con `output_path=None` sólo guarda mediciones
+    (útil para pasadas de análisis cuyo audio temporal no se necesita).
+
+    Retorna True si se guardó correctamente, False en caso de error.
+    """
+    if not key or not render_cache_enabled():
+        return False
+    entry = _entry_dir(key["digest"])
+    staging = entry.with_name(f".{entry.name}.{uuid.uuid4().hex}")
+    try:
+        staging.mkdir(parents=True)
+        if stats is None and stderr:
+            try:
+                from audio_tools import extract_loudnorm_stats
+                stats = extract_loudnorm_stats(stderr)
+            except Exception:
+                stats = None
+        meta: Dict[str, Any] = {
+            "schema_version": RENDER_CACHE_SCHEMA_VERSION,
+            "source_fingerprint": key.get("source"),
+            "graph_hash": key.get("graph"),
+            "ffmpeg": key.get("ffmpeg"),
+            "created_at": time.time(),
+            "stderr": stderr,
+            "stats": stats or {},
+        }
+        if output_path is not None:
+            cached = staging / f"output{output_path.suffix.lower()}"
+            shutil.copy2(output_path, cached)
+            stat = cached.stat()
+            meta.update({
+                "output_name": cached.name,
+                "output_size": stat.st_size,
+                "output_mtime_ns": stat.st_mtime_ns,
+            })
+        with open(staging / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    except (OSError, TypeError, ValueError):
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+    evict_render_cache()
+    return True
+
+
+def _entries() -> list[tuple[float, int, pathlib.Path]]:
+    entries = []
+    if not RENDER_CACHE_DIR.exists():
+        return entries
+    for meta_path in RENDER_CACHE_DIR.glob("*/*/meta.json"):
+        entry = meta_path.parent
+        try:
+            size = sum(item.stat().st_size for item in entry.iterdir())
+            entries.append((meta_path.stat().st_mtime, size, entry))
+        except OSError:
+            continue
+    return entries
+
+
+def evict_render_cache(max_bytes: int | None = None) -> int:
+    """
+    Elimina las entradas usadas hace más tiempo hasta respetar el tope de tamaño.
+
+    Retorna el número de entradas eliminadas.
+    """
+    limit = _max_bytes() if max_bytes is None else max(0, int(max_bytes))
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, entry in entries:
+        if total <= limit:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_render_cache() -> int:
+    """
+    Limpia toda la caché de renders.
+
+    Retorna el número de entradas eliminadas.
+    """
+    return evict_render_cache(max_bytes=0)
+
+
+def get_render_cache_size() -> tuple[int, int]:
+    """
+    Obtiene estadísticas de la caché de renders.
+
+    Retorna: (número de entradas, tamaño total en bytes)
+    """
+    entries = _entries()
+    return len(entries), sum(size for _, size, _ in entries)
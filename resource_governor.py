@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from audio_tools import set_processing_limits
-from resource_monitor import GpuSnapshot, ResourceMonitor, ResourceProfile, ResourceSnapshot
+from audio_tools import set_ffmpeg_load_thresholds, set_processing_limits
+from resource_monitor import GpuSnapshot, ResourceMonitor, ResourceProfile, ResourceSnapshot, shared_resource_monitor
 
 
 @dataclass(frozen=True)
@@ -69,7 +69,7 @@ class ResourceGovernor:
     """
 
     def __init__(self, monitor: ResourceMonitor | None = None) -> None:
-        self.monitor = monitor or ResourceMonitor()
+        self.monitor = monitor or shared_resource_monitor()
 
     def build(self, profile_override: str | None = None) -> ProcessingBudget:
         snapshot = self.monitor.snapshot()
@@ -104,6 +104,11 @@ class ResourceGovernor:
             max_ffmpeg_processes=budget.cpu.max_ffmpeg_processes,
             ffmpeg_threads_per_process=budget.cpu.ffmpeg_threads_per_process,
         )
+        set_ffmpeg_load_thresholds(
+            budget.cpu.cpu_soft_limit,
+            budget.cpu.memory_soft_limit,
+            budget.cpu.min_free_ram_gb,
+        )
         return budget
 
     def _build_gpu_budget(
@@ -5,9 +5,15 @@ import os
 import pathlib
 import subprocess
 import shutil
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
 from typing import Optional
 
+DEFAULT_SAMPLE_PERIOD_S = 2.0
+DEFAULT_HISTORY_SIZE = 150
+
 
 @dataclass(frozen=True)
 class ResourceProfile:
@@ -35,6 +41,7 @@ class ResourceSnapshot:
     memory_available_gb: float | None
     ffmpeg_processes: int | None
     cpu_count: int
+    taken_at: float = 0.0
 
     def format_summary(self) -> str:
         parts: list[str] = [f"CPU {self.cpu_count} cores"]
@@ -73,9 +80,31 @@ class GpuSnapshot:
         return " | ".join(parts)
 
 
+# La GPU se sondea una vez por sesión: nvidia-smi, sysfs DRM y lspci cuestan
+# procesos y lecturas que no cambian entre etapas de un mismo análisis.
+_GPU_PROBE_LOCK = threading.Lock()
+_GPU_PROBE: list[GpuSnapshot | None] = []
+
+
 class ResourceMonitor:
-    def __init__(self) -> None:
+    """
+    Muestras de CPU/RAM/FFmpeg y detección de GPU.
+
+    Con `ttl > 0`, `snapshot()` devuelve la última muestra mientras tenga menos
+    de `ttl` segundos. `start_sampling()` mantiene esa muestra al día desde un
+    hilo de fondo, así quienes deciden por etapa no pagan el muestreo. Las
+    últimas muestras quedan en un buffer circular (`history()`) para decisiones
+    por tendencia (`smoothed()`, `trend()`).
+    """
+
+    def __init__(self, ttl: float = 0.0, history_size: int = DEFAULT_HISTORY_SIZE) -> None:
         self._psutil = self._load_psutil()
+        self.ttl = max(0.0, float(ttl))
+        self.period = 0.0
+        self._history: deque[ResourceSnapshot] = deque(maxlen=max(1, int(history_size)))
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+        self._stop = threading.Event()
 
     @staticmethod
     def _load_psutil():
@@ -87,6 +116,97 @@ class ResourceMonitor:
             return None
 
     def snapshot(self) -> ResourceSnapshot:
+        """Última muestra si sigue vigente (`ttl`); si no, una nueva."""
+        if self.ttl > 0:
+            latest = self.latest()
+            if latest is not None and time.monotonic() - latest.taken_at < self.ttl:
+                return latest
+        return self.sample()
+
+    def sample(self) -> ResourceSnapshot:
+        """Toma una muestra nueva y la agrega al historial."""
+        snapshot = replace(self._read_snapshot(), taken_at=time.monotonic())
+        with self._lock:
+            self._history.append(snapshot)
+        return snapshot
+
+    def latest(self) -> ResourceSnapshot | None:
+        with self._lock:
+            return self._history[-1] if self._history else None
+
+    def history(self, window_s: float | None = None) -> list[ResourceSnapshot]:
+        """Muestras recientes (las de los últimos `window_s` segundos si se indica)."""
+        with self._lock:
+            samples = list(self._history)
+        if window_s is None:
+            return samples
+        cutoff = time.monotonic() - max(0.0, float(window_s))
+        return [sample for sample in samples if sample.taken_at >= cutoff]
+
+    def smoothed(self, window_s: float = 10.0) -> ResourceSnapshot:
+        """Promedio de CPU/RAM de la ventana: evita reaccionar a un pico aislado."""
+        latest = self.snapshot()
+        samples = self.history(window_s) or [latest]
+
+        def mean(field: str) -> float | None:
+            values = [getattr(sample, field) for sample in samples if getattr(sample, field) is not None]
+            return sum(values) / len(values) if values else None
+
+        return replace(
+            latest,
+            cpu_percent=mean("cpu_percent"),
+            memory_percent=mean("memory_percent"),
+            memory_available_gb=mean("memory_available_gb"),
+        )
+
+    def trend(self, field: str = "cpu_percent", window_s: float = 30.0) -> float | None:
+        """Pendiente (unidades por segundo) de `field` en la ventana; None sin datos suficientes."""
+        points = [
+            (sample.taken_at, float(getattr(sample, field)))
+            for sample in self.history(window_s)
+            if getattr(sample, field) is not None
+        ]
+        if len(points) < 2:
+            return None
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_v = sum(v for _, v in points) / len(points)
+        var_t = sum((t - mean_t) ** 2 for t, _ in points)
+        if var_t <= 0:
+            return None
+        return sum((t - mean_t) * (v - mean_v) for t, v in points) / var_t
+
+    def start_sampling(self, period: float = DEFAULT_SAMPLE_PERIOD_S) -> None:
+        """Muestrea cada `period` segundos en un hilo daemon (idempotente)."""
+        with self._lock:
+            if self._sampler is not None and self._sampler.is_alive():
+                return
+            self.period = max(0.05, float(period))
+            if self.ttl <= 0:
+                self.ttl = self.period
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="tonefinish-resource-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop_sampling(self) -> None:
+        self._stop.set()
+        sampler = self._sampler
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join(timeout=2.0)
+        self._sampler = None
+
+    @property
+    def sampling(self) -> bool:
+        return self._sampler is not None and self._sampler.is_alive()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            self._stop.wait(self.period)
+
+    def _read_snapshot(self) -> ResourceSnapshot:
         cpu_count = max(1, os.cpu_count() or 1)
         cpu_percent: float | None = None
         memory_percent: float | None = None
@@ -133,6 +253,19 @@ class ResourceMonitor:
         )
 
     def gpu_snapshot(self) -> GpuSnapshot | None:
+        """GPU detectada en la sesión (se sondea una sola vez; ver `refresh_gpu()`)."""
+        with _GPU_PROBE_LOCK:
+            if not _GPU_PROBE:
+                _GPU_PROBE.append(self._probe_gpu())
+            return _GPU_PROBE[0]
+
+    def refresh_gpu(self) -> GpuSnapshot | None:
+        """Vuelve a sondear la GPU (p. ej. tras conectar un dispositivo)."""
+        with _GPU_PROBE_LOCK:
+            _GPU_PROBE[:] = [self._probe_gpu()]
+            return _GPU_PROBE[0]
+
+    def _probe_gpu(self) -> GpuSnapshot | None:
         """Detecta una GPU disponible usando utilidades del sistema cuando existen."""
         snapshot = self._gpu_snapshot_nvidia_smi()
         if snapshot is not None:
@@ -372,3 +505,29 @@ class ResourceMonitor:
             device_count=len(lines),
             name=lines[0],
         )
+
+
+_SHARED_MONITOR: ResourceMonitor | None = None
+_SHARED_MONITOR_LOCK = threading.Lock()
+
+
+def resource_sample_period() -> float:
+    """`TONEFINISH_RESOURCE_SAMPLE_SEC` fija el período del muestreo de fondo; `0` lo desactiva."""
+    raw = os.getenv("TONEFINISH_RESOURCE_SAMPLE_SEC", "").strip()
+    try:
+        return max(0.0, float(raw)) if raw else DEFAULT_SAMPLE_PERIOD_S
+    except ValueError:
+        return DEFAULT_SAMPLE_PERIOD_S
+
+
+def shared_resource_monitor() -> ResourceMonitor:
+    """Monitor único del proceso, con muestreo de fondo y snapshots cacheados."""
+    global _SHARED_MONITOR
+    with _SHARED_MONITOR_LOCK:
+        if _SHARED_MONITOR is None:
+            period = resource_sample_period()
+            monitor = ResourceMonitor(ttl=period)
+            if period > 0:
+                monitor.start_sampling(period)
+            _SHARED_MONITOR = monitor
+        return _SHARED_MONITOR
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import pathlib
 import re
+import shutil
 import subprocess
 from audio_tools import _FFMPEG_BIN
 import sys
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import Dict, List
 
+# `ffmpeg -version` y recorrer todos los paquetes instalados cuestan cientos de
+# ms en cada arranque; el resultado sólo cambia si cambia el lock, el binario
+# de FFmpeg o el entorno de Python, así que se guarda con esa huella.
+RUNTIME_CHECK_CACHE_PATH = pathlib.Path.home() / ".tonefinish" / "runtime_check.json"
+_REPORT_MEMO: Dict[str, "RuntimeCheckReport"] = {}
+
 
 @dataclass
 class RuntimeCheckReport:
@@ -17,6 +26,68 @@ class RuntimeCheckReport:
     info: List[str]
 
 
+def _file_stamp(path: str | os.PathLike[str] | None) -> List[object]:
+    if not path:
+        return [None]
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [str(path), None]
+    return [str(path), stat.st_mtime_ns, stat.st_size]
+
+
+def _environment_fingerprint(lock_path: pathlib.Path) -> str:
+    """Huella de lo que determina el reporte: lock, binario FFmpeg y entorno Python."""
+    try:
+        lock_digest = hashlib.sha256(lock_path.read_bytes()).hexdigest()
+    except OSError:
+        lock_digest = None
+    ffmpeg_path = shutil.which(_FFMPEG_BIN)
+    ffmpeg_path = os.path.realpath(ffmpeg_path) if ffmpeg_path else _FFMPEG_BIN
+    # Instalar o actualizar un paquete agrega/renombra su `*.dist-info`, lo que
+    # cambia el mtime del directorio de site-packages.
+    package_dirs = [
+        _file_stamp(entry)
+        for entry in sys.path
+        if entry and os.path.basename(entry) in {"site-packages", "dist-packages"}
+    ]
+    payload = {
+        "lock": [str(lock_path), lock_digest],
+        "ffmpeg": _file_stamp(ffmpeg_path),
+        "python": [sys.executable, sys.version],
+        "packages": package_dirs,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_cached_report(fingerprint: str) -> RuntimeCheckReport | None:
+    try:
+        payload = json.loads(RUNTIME_CHECK_CACHE_PATH.read_text(encoding="utf-8"))
+        if payload.get("fingerprint") != fingerprint:
+            return None
+        report = payload["report"]
+        return RuntimeCheckReport(
+            ok=bool(report["ok"]),
+            warnings=[str(item) for item in report["warnings"]],
+            info=[str(item) for item in report["info"]],
+        )
+    except Exception:
+        return None
+
+
+def _store_cached_report(fingerprint: str, report: RuntimeCheckReport) -> None:
+    try:
+        RUNTIME_CHECK_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        staging = RUNTIME_CHECK_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        staging.write_text(
+            json.dumps({"fingerprint": fingerprint, "report": asdict(report)}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(staging, RUNTIME_CHECK_CACHE_PATH)
+    except OSError:
+        pass
+
+
 def _read_lock(lock_path: pathlib.Path) -> Dict[str, object]:
     try:
         return json.loads(lock_path.read_text(encoding="utf-8"))
@@ -71,8 +142,27 @@ def _get_installed_packages() -> Dict[str, str]:
 
 def check_runtime_reproducibility(
     lock_path: pathlib.Path | None = None,
+    use_cache: bool = True,
 ) -> RuntimeCheckReport:
+    """
+    Compara FFmpeg y los paquetes instalados con `runtime_lock.json`.
+
+    Con `use_cache` el reporte se reutiliza (en memoria y en
+    `RUNTIME_CHECK_CACHE_PATH`) mientras no cambie la huella del entorno.
+    """
     lock_path = lock_path or (pathlib.Path(__file__).resolve().parent / "runtime_lock.json")
+    if not use_cache:
+        return _check_runtime_reproducibility(lock_path)
+    fingerprint = _environment_fingerprint(lock_path)
+    report = _REPORT_MEMO.get(fingerprint) or _load_cached_report(fingerprint)
+    if report is None:
+        report = _check_runtime_reproducibility(lock_path)
+        _store_cached_report(fingerprint, report)
+    _REPORT_MEMO[fingerprint] = report
+    return report
+
+
+def _check_runtime_reproducibility(lock_path: pathlib.Path) -> RuntimeCheckReport:
     lock = _read_lock(lock_path)
     warnings: List[str] = []
     info: List[str] = []
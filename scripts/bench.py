@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""Suite de benchmarks sobre corpus sintético: `run` y `compare` (ver `benchmark_suite`)."""
+import pathlib, sys
+ROOT=pathlib.Path(__file__).resolve().parents[1]; sys.path.insert(0,str(ROOT))
+from benchmark_suite import main
+
+if __name__=="__main__":
+    sys.exit(main())
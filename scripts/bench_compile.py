@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""Mide el costo de `orchestrator.compile` en frío y con la memoización activa."""
+import argparse, pathlib, sys
+ROOT=pathlib.Path(__file__).resolve().parents[1]; sys.path.insert(0,str(ROOT))
+from benchmark_suite import measure_compile as measure
+
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser()
+    parser.add_argument("--repeats",type=int,default=200)
+    args=parser.parse_args()
+    result=measure(args.repeats)
+    print(" ".join(f"{key}={value:.3f}" if isinstance(value,float) else f"{key}={value}" for key,value in result.items()))
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import functools
 import json
 import os
 import pathlib
@@ -12,19 +14,65 @@ ROOT = pathlib.Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from ui.workers import BatchWorker  # noqa: E402
-
-
-def _write_status(path: pathlib.Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+from job_channel import ProgressChannelClient  # noqa: E402
+from job_events import JobStatusWriter, bind_engine_status  # noqa: E402
+from job_spool import JobSpool, SpoolLease, run_spool_runner  # noqa: E402
+from batch_engine import _batch_cpu_budget, engine_from_settings  # noqa: E402
+from process_pool import BatchProcessPool, process_pool_workers  # noqa: E402
+
+
+def process_spool_item(lease: SpoolLease, process_pool: BatchProcessPool | None = None) -> list[dict[str, Any]]:
+    """
+    Procesa un archivo tomado del spool con las opciones del payload del
+    trabajo. Sin reportes de lote: por archivo serían uno por ítem y varios
+    runners los pisarían en el mismo `log/`.
+    """
+    worker = engine_from_settings(
+        lease.payload, [pathlib.Path(lease.file)], None, lease.cancel_path,
+        process_pool=process_pool, batch_reports=False,
+    )
+    outcome: dict[str, Any] = {"results": [], "error": None}
+    worker.finished.connect(lambda _message, results: outcome.update(results=list(results or [])))
+    worker.error.connect(lambda message: outcome.update(error=message))
+    worker.run()
+    if outcome["error"]:
+        raise RuntimeError(outcome["error"])
+    return outcome["results"]
+
+
+def run_spool(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="spasm_batch_job_runner.py --spool")
+    parser.add_argument("spool_dir")
+    parser.add_argument("--runner-id", default=None)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--exit-when-idle", action="store_true")
+    args = parser.parse_args(argv)
+    # Un pool calentado por runner: los imports de análisis se pagan una vez,
+    # no en cada archivo tomado del spool.
+    pool = BatchProcessPool(process_pool_workers(_batch_cpu_budget().max_parallel_analysis))
+    pool.warm()
+    try:
+        run_spool_runner(
+            JobSpool(args.spool_dir),
+            functools.partial(process_spool_item, process_pool=pool),
+            runner_id=args.runner_id,
+            poll_interval=args.poll_interval,
+            exit_when_idle=args.exit_when_idle,
+        )
+    finally:
+        pool.close(wait=True)
+    return 0
 
 
 def main() -> int:
+    if len(sys.argv) >= 2 and sys.argv[1] == "--spool":
+        return run_spool(sys.argv[2:])
     if len(sys.argv) != 4:
-        print("usage: spasm_batch_job_runner.py <job_id> <payload.json> <status.json>", file=sys.stderr)
+        print(
+            "usage: spasm_batch_job_runner.py <job_id> <payload.json> <status.json>\n"
+            "       spasm_batch_job_runner.py --spool <spool_dir> [--runner-id ID] [--exit-when-idle]",
+            file=sys.stderr,
+        )
         return 2
 
     job_id = sys.argv[1]
@@ -35,85 +83,8 @@ def main() -> int:
     payload = json.loads(payload_path.read_text(encoding="utf-8"))
 
     files = [pathlib.Path(p) for p in payload["files"]]
-    output_dir = pathlib.Path(payload["output_dir"]) if payload.get("output_dir") else None
     checkpoint_path = pathlib.Path(payload["checkpoint_path"]) if payload.get("checkpoint_path") else None
-
-    worker = BatchWorker(
-        files=files,
-        output_dir=output_dir,
-        suffix=payload["suffix"],
-        target_lufs=float(payload["target_lufs"]),
-        true_peak=float(payload["true_peak"]),
-        overwrite=bool(payload["overwrite"]),
-        verbose=bool(payload["verbose"]),
-        dynamic_eq=bool(payload["dynamic_eq"]),
-        master_limiter_enabled=bool(payload["master_limiter_enabled"]),
-        master_limiter_mode=str(payload["master_limiter_mode"]),
-        master_limiter_ceiling_db=float(payload["master_limiter_ceiling_db"]),
-        master_limiter_release_ms=float(payload["master_limiter_release_ms"]),
-        master_limiter_lookahead_ms=float(payload["master_limiter_lookahead_ms"]),
-        output_sr=payload.get("output_sr"),
-        output_bit_depth=payload.get("output_bit_depth"),
-        output_format=payload.get("output_format"),
-        stereo_width=bool(payload["stereo_width"]),
-        loudness_preset=str(payload["loudness_preset"]),
-        output_preset=str(payload["output_preset"]),
-        deesser=bool(payload["deesser"]),
-        deesser_freq_hz=float(payload["deesser_freq_hz"]),
-        deesser_intensity=float(payload["deesser_intensity"]),
-        tone_low_db=float(payload["tone_low_db"]),
-        sub_bass_db=float(payload["sub_bass_db"]),
-        tone_mid_db=float(payload["tone_mid_db"]),
-        tone_high_db=float(payload["tone_high_db"]),
-        tone_tilt_db=float(payload["tone_tilt_db"]),
-        band_adjust_db=dict(payload["band_adjust_db"]),
-        band_widths=dict(payload["band_widths"]),
-        auto_band_gain=bool(payload["auto_band_gain"]),
-        saturation_enabled=bool(payload["saturation_enabled"]),
-        saturation_per_band=bool(payload["saturation_per_band"]),
-        saturation_type=str(payload["saturation_type"]),
-        saturation_drive_db=float(payload["saturation_drive_db"]),
-        saturation_mix=float(payload["saturation_mix"]),
-        saturation_band_drive_db=dict(payload["saturation_band_drive_db"]),
-        saturation_band_mix=dict(payload["saturation_band_mix"]),
-        process_order=list(payload["process_order"]),
-        stereo_dynamic=bool(payload["stereo_dynamic"]),
-        stereo_dynamic_band_mix=list(payload["stereo_dynamic_band_mix"]),
-        stereo_dynamic_threshold_db=float(payload["stereo_dynamic_threshold_db"]),
-        stereo_dynamic_ratio=float(payload["stereo_dynamic_ratio"]),
-        stereo_dynamic_attack_ms=float(payload["stereo_dynamic_attack_ms"]),
-        stereo_dynamic_release_ms=float(payload["stereo_dynamic_release_ms"]),
-        stereo_dynamic_mix=float(payload["stereo_dynamic_mix"]),
-        glue_enabled=bool(payload["glue_enabled"]),
-        glue_threshold_db=float(payload["glue_threshold_db"]),
-        glue_ratio=float(payload["glue_ratio"]),
-        glue_attack_ms=float(payload["glue_attack_ms"]),
-        glue_release_ms=float(payload["glue_release_ms"]),
-        glue_makeup_db=float(payload["glue_makeup_db"]),
-        limiter_ceiling_db=float(payload["limiter_ceiling_db"]),
-        limiter_release_ms=float(payload["limiter_release_ms"]),
-        metadata=dict(payload["metadata"]),
-        fade_in=float(payload["fade_in"]),
-        fade_out=float(payload["fade_out"]),
-        fade_overrides=dict(payload.get("fade_overrides") or {}),
-        transparent_mode=bool(payload["transparent_mode"]),
-        headroom_db=float(payload["headroom_db"]),
-        noise_reduction_level=str(payload["noise_reduction_level"]),
-        declip_level=str(payload["declip_level"]),
-        declick_level=str(payload["declick_level"]),
-        pink_noise_level=str(payload["pink_noise_level"]),
-        repair_enabled=bool(payload["repair_enabled"]),
-        mix_enabled=bool(payload["mix_enabled"]),
-        master_enabled=bool(payload["master_enabled"]),
-        autogain_enabled=bool(payload["autogain_enabled"]),
-        autogain_maxgain=payload.get("autogain_maxgain"),
-        multiband_limiter_enabled=bool(payload["multiband_limiter_enabled"]),
-        multiband_limiter_thresholds=dict(payload.get("multiband_limiter_thresholds") or {}),
-        mts_enabled=bool(payload.get("mts_enabled", True)),
-        checkpoint_path=checkpoint_path,
-        resume_completed_files=set(),
-        cancel_token_path=cancel_path,
-    )
+    worker = engine_from_settings(payload, files, checkpoint_path, cancel_path)
 
     queued_at: float | None = None
     try:
@@ -148,68 +119,32 @@ def main() -> int:
         "results": None,
         "error": None,
     }
-    _write_status(status_path, state)
-
-    def on_progress(message: str, current: int, total: int) -> None:
-        total_safe = max(1, int(total or 1))
-        progress = max(0.0, min(100.0, (float(current) / total_safe) * 100.0))
-        state.update(
-            {
-                "state": "running",
-                "progress": progress,
-                "message": message,
-                "current": int(current),
-                "total": int(total),
-                "updated_at": time.time(),
-            }
-        )
-        _write_status(status_path, state)
-
-    def on_processing_progress(percent: float, time_str: str) -> None:
-        state.update(
-            {
-                "processing_percent": float(percent),
-                "processing_time": time_str,
-                "updated_at": time.time(),
-            }
-        )
-        _write_status(status_path, state)
-
-    def on_finished(message: str, results: object) -> None:
-        state.update(
-            {
-                "state": "done",
-                "progress": 100.0,
-                "message": "Completado",
-                "result_message": message,
-                "results": results,
-                "updated_at": time.time(),
-            }
-        )
-        _write_status(status_path, state)
-
-    def on_error(message: str) -> None:
-        final_state = "cancelled" if cancel_path.exists() else "error"
-        state.update(
-            {
-                "state": final_state,
-                "error": message,
-                "message": message,
-                "updated_at": time.time(),
-            }
-        )
-        _write_status(status_path, state)
+    def on_channel_message(message: dict[str, Any]) -> None:
+        if message.get("command") == "cancel":
+            cancel_path.touch()
+            worker.cancel()
+
+    channel = (
+        ProgressChannelClient.connect(payload["progress_socket"], on_message=on_channel_message)
+        if payload.get("progress_socket")
+        else None
+    )
+    # Cada tick agrega una línea al log de eventos (y la empuja por el canal
+    # si la UI escucha); el snapshot completo (con `results`) sólo se
+    # reescribe cada pocos segundos y al terminar.
+    status = JobStatusWriter(status_path, state, sink=channel.send if channel is not None else None)
 
-    worker.progress.connect(on_progress)
-    worker.processing_progress.connect(on_processing_progress)
-    worker.finished.connect(on_finished)
-    worker.error.connect(on_error)
+    bind_engine_status(worker, status, cancel_path)
 
     try:
         worker.run()
     except Exception as exc:
-        on_error(str(exc))
+        worker.error.emit(str(exc))
         return 1
+    finally:
+        status.close()
+        if channel is not None:
+            channel.close()
     return 0
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Worker `serve --jsonl` mínimo para pruebas del pool SpASM (sin runtime SpASM).
+
+Métodos: `health`, `sleep` (args[0] segundos), `crash` (termina el proceso sin
+responder), `fail` (o `kwargs["fail"]`) responde error y `call_many` atiende
+un sobre de llamadas; cualquier otro devuelve método, args, kwargs y pid.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+
+def _reply(request: dict) -> dict:
+    method = request.get("method")
+    kwargs = request.get("kwargs") or {}
+    if method == "fail" or kwargs.get("fail"):
+        return {"ok": False, "error": "fallo simulado"}
+    if method == "health":
+        return {"ok": True, "result": {"status": "ok"}}
+    return {
+        "ok": True,
+        "result": {"method": method, "args": request.get("args") or [], "kwargs": kwargs, "pid": os.getpid()},
+    }
+
+
+def main() -> int:
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        method = request.get("method")
+        args = request.get("args") or []
+        if method == "crash":
+            os._exit(3)
+        if method == "sleep":
+            time.sleep(float(args[0]) if args else 1.0)
+        if method == "call_many":
+            reply = {"ok": True, "result": [_reply(call) for call in (args[0] if args else [])]}
+        else:
+            reply = _reply(request)
+        sys.stdout.write(json.dumps({"id": request.get("id"), "reply": reply}) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
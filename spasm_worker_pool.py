@@ -0,0 +1,260 @@
+"""
+Pool de workers SpASM persistentes (JSON por líneas sobre stdin/stdout).
+
+`logic_backend._call_spasm` lanzaba un `finisher_spasm_cli call --json` por
+llamada: para métodos baratos (`extract_loudnorm_stats`, `get_audio_info`) el
+arranque dominaba el costo. Cada worker del pool es un proceso
+`finisher_spasm_cli serve --jsonl` de larga vida:
+
+    -> {"id": 7, "method": "...", "args": [...], "kwargs": {...}}
+    <- {"id": 7, "reply": {"ok": true, "result": ...}}
+
+Un worker atiende una llamada a la vez. Las respuestas se emparejan por id.
+Cada llamada tiene timeout: si vence, el worker se mata y se reemplaza. Si un
+worker estuvo ocioso más de `health_interval`, se verifica con `health` antes
+de reutilizarlo, y los que murieron se relanzan solos. Si todos los workers
+están ocupados la llamada no espera: el caller cae al modo de un proceso por
+llamada.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Sequence
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_HEALTH_INTERVAL_S = 60.0
+HEALTH_TIMEOUT_S = 10.0
+
+
+class SpasmWorkerError(RuntimeError):
+    """El worker murió o no respondió; la llamada no tiene respuesta válida."""
+
+
+class SpasmWorker:
+    """Proceso `serve --jsonl` con un hilo lector que resuelve respuestas por id."""
+
+    def __init__(self, command: Sequence[str], env: dict[str, str] | None = None) -> None:
+        self.command = list(command)
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            env=env,
+        )
+        self.last_used = time.monotonic()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._dead = False
+        self.killed = False
+        self.replies = 0
+        self._reader = threading.Thread(target=self._read_loop, name="tonefinish-spasm-worker", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return not self._dead and self.proc.poll() is None
+
+    def call(self, method: str, args: list[Any], kwargs: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """Envía la llamada y espera su respuesta (`{"ok": ..., ...}`)."""
+        request_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            if not self.alive:
+                raise SpasmWorkerError("worker SpASM no disponible")
+            self._pending[request_id] = future
+        line = json.dumps({"id": request_id, "method": method, "args": args, "kwargs": kwargs}, ensure_ascii=False)
+        try:
+            assert self.proc.stdin is not None
+            self.proc.stdin.write(line + "\n")
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as exc:
+            self._fail_pending(SpasmWorkerError(f"worker SpASM cerró stdin: {exc}"))
+            raise SpasmWorkerError(f"worker SpASM cerró stdin: {exc}") from exc
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as exc:
+            self.kill()
+            raise TimeoutError(f"Timeout del worker SpASM ({timeout}s) para '{method}'.") from exc
+        finally:
+            self.last_used = time.monotonic()
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
+
+    def kill(self) -> None:
+        self._dead = True
+        self.killed = True
+        try:
+            self.proc.kill()
+        except OSError:
+            pass
+        self._fail_pending(SpasmWorkerError("worker SpASM terminado"))
+
+    def close(self) -> None:
+        self._dead = True
+        self.killed = True
+        try:
+            if self.proc.stdin is not None:
+                self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        self._fail_pending(SpasmWorkerError("worker SpASM cerrado"))
+
+    def _read_loop(self) -> None:
+        assert self.proc.stdout is not None
+        for raw in self.proc.stdout:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(message, dict):
+                continue
+            with self._lock:
+                future = self._pending.get(message.get("id"))
+            self.replies += 1
+            if future is not None and not future.done():
+                reply = message.get("reply")
+                if isinstance(reply, dict):
+                    future.set_result(reply)
+                else:
+                    future.set_exception(SpasmWorkerError("respuesta inválida del worker SpASM"))
+        self._dead = True
+        self._fail_pending(SpasmWorkerError("el worker SpASM terminó sin responder"))
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            if not future.done():
+                future.set_exception(exc)
+
+
+class SpasmWorkerPool:
+    """Hasta `size` workers persistentes; `call()` devuelve None si están todos ocupados."""
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        size: int = DEFAULT_POOL_SIZE,
+        health_interval: float = DEFAULT_HEALTH_INTERVAL_S,
+        env: dict[str, str] | None = None,
+    ) -> None:
+        self.command = list(command)
+        self.size = max(1, int(size))
+        self.health_interval = float(health_interval)
+        self.env = env
+        self.metrics = {"calls": 0, "spawned": 0, "respawned": 0, "overflow": 0}
+        # Un worker que termina solo sin haber respondido nunca indica un CLI
+        # sin `serve --jsonl` (o sin runtime): se deja de usar el pool.
+        self.unavailable = False
+        self._idle: queue.SimpleQueue[SpasmWorker] = queue.SimpleQueue()
+        self._workers: list[SpasmWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def call(self, method: str, args: list[Any], kwargs: dict[str, Any], timeout: float) -> dict[str, Any] | None:
+        worker = self._checkout()
+        if worker is None:
+            with self._lock:
+                self.metrics["overflow"] += 1
+            return None
+        try:
+            reply = worker.call(method, args, kwargs, timeout)
+            with self._lock:
+                self.metrics["calls"] += 1
+            return reply
+        finally:
+            self._checkin(worker)
+
+    def cancel_inflight(self) -> bool:
+        """Mata los workers con una llamada en curso (se relanzan en el próximo uso)."""
+        with self._lock:
+            busy = [worker for worker in self._workers if worker.busy]
+        for worker in busy:
+            worker.kill()
+        return bool(busy)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+    def _spawn(self) -> SpasmWorker:
+        worker = SpasmWorker(self.command, env=self.env)
+        with self._lock:
+            self._workers.append(worker)
+            self.metrics["spawned"] += 1
+        return worker
+
+    def _discard(self, worker: SpasmWorker) -> None:
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self.metrics["respawned"] += 1
+
+    def _checkout(self) -> SpasmWorker | None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not worker.alive:
+                self._discard(worker)
+                continue
+            if time.monotonic() - worker.last_used >= self.health_interval and not self._healthy(worker):
+                self._discard(worker)
+                continue
+            return worker
+        with self._lock:
+            if self._closed or self.unavailable or len(self._workers) >= self.size:
+                return None
+        return self._spawn()
+
+    def _checkin(self, worker: SpasmWorker) -> None:
+        if self._closed:
+            worker.close()
+        elif not worker.alive:
+            # Timeout, crash o cancelación: el reemplazo se lanza en el próximo uso.
+            if worker.replies == 0 and not worker.killed:
+                self.unavailable = True
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+
+    @staticmethod
+    def _healthy(worker: SpasmWorker) -> bool:
+        try:
+            return bool(worker.call("health", [], {}, HEALTH_TIMEOUT_S).get("ok"))
+        except (SpasmWorkerError, TimeoutError):
+            return False
+
+
+def spasm_pool_size() -> int:
+    """`FINISHER_SPASM_POOL_SIZE` fija los workers persistentes; `0` vuelve a un proceso por llamada."""
+    raw = os.getenv("FINISHER_SPASM_POOL_SIZE", "").strip()
+    try:
+        return max(0, min(16, int(raw))) if raw else DEFAULT_POOL_SIZE
+    except ValueError:
+        return DEFAULT_POOL_SIZE
@@ -13,14 +13,19 @@ import pathlib
 import time
 from typing import Dict, List, Tuple, Optional, Any
 
-import numpy as np
+from lazy_imports import lazy_module, module_available, optional_import
 
-try:
-    import cupy as cp  # type: ignore
-    CUPY_AVAILABLE = True
-except Exception:
-    cp = None  # type: ignore
-    CUPY_AVAILABLE = False
+np = lazy_module("numpy", globals(), "np")
+
+# cupy inicializa CUDA al importarse (segundos): se intenta recién cuando una
+# etapa pide GPU, una sola vez por proceso.
+_CUPY_MODULE: list[Any] = []
+
+
+def _cupy() -> Any | None:
+    if not _CUPY_MODULE:
+        _CUPY_MODULE.append(optional_import("cupy") if module_available("cupy") else None)
+    return _CUPY_MODULE[0]
 
 
 def _normalize_backend(backend: str | None) -> str:
@@ -33,14 +38,14 @@ def _normalize_backend(backend: str | None) -> str:
 
 
 def _gpu_backend_available() -> bool:
-    return CUPY_AVAILABLE
+    return _cupy() is not None
 
 
 def _hardware_gpu_available() -> bool:
     try:
-        from resource_monitor import ResourceMonitor
+        from resource_monitor import shared_resource_monitor
 
-        return ResourceMonitor().has_gpu()
+        return shared_resource_monitor().has_gpu()
     except Exception:
         return False
 
@@ -125,7 +130,8 @@ def _compute_spectrum_gpu(
     audio_data: np.ndarray,
     sample_rate: int,
 ) -> tuple[np.ndarray, np.ndarray, list[tuple[float, float]], float, float, float]:
-    if not CUPY_AVAILABLE or cp is None:
+    cp = _cupy()
+    if cp is None:
         return _compute_spectrum_cpu(audio_data, sample_rate)
 
     gpu_audio = cp.asarray(audio_data)
@@ -1,5 +1,6 @@
 import json, os, pathlib, shutil, subprocess, tempfile, unittest
-from adaptive_master_renderer import build_adaptive_filter, publish_adaptive_candidate, render_adaptive_candidate
+from adaptive_master_renderer import (build_adaptive_filter, discard_adaptive_candidate, predict_automation_delta_db,
+    publish_adaptive_candidate, render_adaptive_candidate)
 from alternative_tools import analyze_loudness_ffmpeg
 import analysis_mts
 from analysis_mts import write_mts_artifacts
@@ -16,6 +17,41 @@ class AdaptiveRendererTests(unittest.TestCase):
         self.assertIn("g=0.25",graph); self.assertIn("g=-0.3",graph)
         self.assertTrue(all(item["smoothing_ms"]==180.0 for item in executed))
 
+    def test_predicted_delta_follows_band_energy_and_section_coverage(self):
+        bass_only={"t":0.0,"rms_db":-20.0,"bands":{"bass_60_250_hz":-10.0,"air_6k_16k_hz":-120.0}}
+        mts={"source":{"window_seconds":1.0},"timeline":[dict(bass_only,t=float(t)) for t in range(4)]}
+        full={"section_decisions":[{"start_s":0.0,"end_s":4.0,"actions":{"eq_db":{"bass_db":0.8}},"guards":{"smoothing_ms":150}}]}
+        half={"section_decisions":[{"start_s":0.0,"end_s":2.0,"actions":{"eq_db":{"bass_db":0.8}},"guards":{"smoothing_ms":150}}]}
+        air={"section_decisions":[{"start_s":0.0,"end_s":4.0,"actions":{"eq_db":{"air_db":-0.8}},"guards":{"smoothing_ms":150}}]}
+        self.assertAlmostEqual(predict_automation_delta_db(full,mts),0.8,places=2)
+        self.assertLess(predict_automation_delta_db(half,mts),0.5)
+        self.assertAlmostEqual(predict_automation_delta_db(air,mts),0.0,places=3)
+        self.assertIsNone(predict_automation_delta_db(full,{"timeline":[]}))
+
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_one_shot_verifies_in_same_pass_and_falls_back_when_prediction_misses(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"master.wav"
+            result=subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i",
+                "aevalsrc=0.05*sin(2*PI*120*t)+0.03*sin(2*PI*3800*t)|0.04*sin(2*PI*120*t):s=48000:d=1",
+                str(source)],capture_output=True,text=True)
+            self.assertEqual(result.returncode,0,result.stderr)
+            before=analyze_loudness_ffmpeg(str(source)); self.assertIsNotNone(before)
+            mts={"timeline":[{"t":0.0,"rms_db":-28.0,"bands":{"bass_60_250_hz":-20.0,"high_mid_2k_6k_hz":-24.0}}]}
+            report=render_adaptive_candidate(source,DECISIONS,before.input_i,-1.0,mts_data=mts,
+                                             source_stats={"input_i":before.input_i},tolerance_lu=1.0)
+            self.assertEqual(report["status"],"candidate_ready",report)
+            self.assertEqual(report["calibration_mode"],"one_shot")
+            self.assertLessEqual(abs(report["post_stats"]["input_i"]-before.input_i),1.0)
+            self.assertFalse((pathlib.Path(report["temporary_dir"])/"automation.wav").exists())
+            discard_adaptive_candidate(report)
+            wrong=render_adaptive_candidate(source,DECISIONS,before.input_i,-1.0,mts_data=mts,
+                                            source_stats={"input_i":before.input_i+2.5},tolerance_lu=0.3)
+            self.assertEqual(wrong["status"],"candidate_ready",wrong)
+            self.assertEqual(wrong["calibration_mode"],"two_pass")
+            self.assertGreater(wrong["one_shot_miss_lu"],0.3)
+            discard_adaptive_candidate(wrong)
+
     @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
     def test_candidate_is_rendered_measured_and_published_transactionally(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -7,7 +7,7 @@ from types import SimpleNamespace
 from auto_master_intelligence import _build_adjustments_from_ia
 from ia_mastering import build_analysis_prompt, load_past_strategies, validate_mastering_strategy
 from processes.contracts import ContractError, infer_action_operation
-from ui.workers import _verify_worker_ai_source
+from batch_engine import _verify_worker_ai_source
 from processes.audit import (
     build_execution_audit, catalog_fingerprint, effective_execution_actions,
     fingerprint_audio_source, verify_audio_source,
@@ -3,7 +3,7 @@ import unittest
 from auto_master_intelligence import (
     AudioCharacteristics, DEFAULT_AI_FALLBACK_PRESET, adapt_preset_to_audio,
 )
-from ui.workers import _needs_severe_recalibration
+from batch_engine import _needs_severe_recalibration
 
 
 BANDS = {
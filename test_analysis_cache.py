@@ -1,7 +1,7 @@
 import json, pathlib, tempfile, unittest
 from unittest.mock import patch
 import cache
-from ui.workers import _analyze_single_file_for_batch
+from batch_engine import _analyze_single_file_for_batch
 
 class AnalysisCacheTests(unittest.TestCase):
     def test_legacy_and_all_floor_band_cache_is_rejected(self):
@@ -26,8 +26,8 @@ class AnalysisCacheTests(unittest.TestCase):
         bands={f"band{i}":-20.0-i for i in range(6)}
         with tempfile.TemporaryDirectory() as tmp:
             audio=pathlib.Path(tmp)/"song.wav"; audio.write_bytes(b"audio")
-            with patch("ui.workers.get_cached_analysis",return_value={"band_stats":bands,"voice_rms":-24.0}), \
-                 patch("ui.workers.analyze_audio",return_value=({"input_i":-14.0},"")):
+            with patch("batch_engine.get_cached_analysis",return_value={"band_stats":bands,"voice_rms":-24.0}), \
+                 patch("batch_engine.analyze_audio",return_value=({"input_i":-14.0},"")):
                 result=_analyze_single_file_for_batch(audio,-15.5,-2.2,4.0,True)
         self.assertEqual(result.raw_stats["input_i"],-14.0)
         self.assertEqual(result.band_stats,bands)
@@ -0,0 +1,97 @@
+import math, pathlib, shutil, struct, subprocess, tempfile, unittest
+from audio_preview import AudioPreview, PreviewEngine, build_preview_plan, compile_preview_graphs, split_preview_actions
+from processes.contracts import AudioFunctionAction, AudioProcessContext
+
+PRE="[0:a]equalizer=f=1000:t=q:w=1:g=-1[out]"
+
+class PreviewEngineTests(unittest.TestCase):
+    def test_only_trailing_cheap_stages_are_tail(self):
+        actions=[AudioFunctionAction("audio.autogain.output_gain",params={"gain_db":-1.0}),
+                 AudioFunctionAction("audio.tone_eq.band",target="mid",params={"frequency_hz":1000.0,"gain_db":-1.0,"q":1.0,"filter_type":"peaking"}),
+                 AudioFunctionAction("audio.autogain.output_gain",params={"gain_db":1.0}),
+                 AudioFunctionAction("audio.limiter.true_peak",params={"ceiling_db":-1.0})]
+        pre,tail=split_preview_actions(actions)
+        self.assertEqual(len(pre),2); self.assertEqual([a.function_id for a in tail],["audio.autogain.output_gain","audio.limiter.true_peak"])
+        pre_chain,_,tail_chain,tail_label=compile_preview_graphs(actions,AudioProcessContext("track",44100,2))
+        self.assertIn("equalizer",pre_chain); self.assertNotIn("equalizer",tail_chain)
+        self.assertTrue(tail_chain.startswith("[0:a]")); self.assertIn(tail_label,tail_chain)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_source_and_renders_are_cached_and_tail_changes_rerender_only_tail(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"song.wav"
+            subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i","sine=f=440:d=2:sample_rate=48000",str(source)],check=True)
+            engine=PreviewEngine()
+            first=engine.render(source,PRE,tail_complex="[0:a]volume=-2dB[out]",duration=1.0,start_time=0.5)
+            self.assertEqual(len(first),44100*2*4)
+            again=engine.render(source,PRE,tail_complex="[0:a]volume=-2dB[out]",duration=1.0,start_time=0.5)
+            self.assertEqual(first,again)
+            engine.render(source,PRE,tail_complex="[0:a]volume=-4dB[out]",duration=1.0,start_time=0.5)
+            self.assertEqual(engine.metrics["source_misses"],1)
+            self.assertEqual(engine.metrics["full_renders"],1)
+            self.assertEqual(engine.metrics["render_hits"],1)
+            self.assertEqual(engine.metrics["tail_only_renders"],1)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_stream_pipes_wav_to_player_and_fills_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"song.wav"; sink=pathlib.Path(tmp)/"played.wav"
+            subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i","sine=f=440:d=1",str(source)],check=True)
+            engine=PreviewEngine()
+            player,thread=engine.stream(source,PRE,duration=0.5,start_time=0.0,players=[("sh","-c",f"cat > '{sink}'")])
+            thread.join(20); self.assertEqual(player.wait(20),0)
+            data=sink.read_bytes()
+            self.assertEqual(data[:4],b"RIFF"); self.assertEqual(len(data)-44,int(44100*0.5)*2*4)
+            engine.render(source,PRE,duration=0.5,start_time=0.0)
+            self.assertEqual(engine.metrics["render_hits"],1)
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_ui_plan_streams_through_the_cache_and_limiter_changes_rerender_only_tail(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"song.wav"; sink=pathlib.Path(tmp)/"played.wav"
+            subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i","sine=f=440:d=1",str(source)],check=True)
+            preview=AudioPreview(PreviewEngine()); player=[("sh","-c",f"cat > '{sink}'")]
+            settings={"tone_low_db":1.5,"deesser":True,"true_peak":-1.0,"limiter_ceiling_db":-1.0,"dynamic_eq":True}
+            actions,context=build_preview_plan(settings)
+            self.assertEqual(actions[-1].function_id,"audio.limiter.true_peak")
+            self.assertNotIn("audio.multiband.compressor",[a.function_id for a in actions])
+            self.assertTrue(preview.stream_plan(source,actions,context,duration=0.5,start_time=0.0,players=player))
+            preview._stream_thread.join(20); preview.player_process.wait(20)
+            actions,context=build_preview_plan({**settings,"limiter_ceiling_db":-3.0})
+            self.assertTrue(preview.stream_plan(source,actions,context,duration=0.5,start_time=0.0,players=player))
+            preview._stream_thread.join(20); preview.player_process.wait(20)
+            self.assertEqual((preview.engine.metrics["full_renders"],preview.engine.metrics["tail_only_renders"]),(1,1))
+            self.assertEqual(len(sink.read_bytes())-44,int(44100*0.5)*2*4)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_processed_preview_stays_near_the_source_level(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"song.wav"
+            subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i","anoisesrc=color=pink:seed=3:amplitude=0.3:d=2",str(source)],check=True)
+            engine=PreviewEngine()
+            settings={"tone_low_db":1.5,"deesser":True,"true_peak":-1.0,"limiter_ceiling_db":-1.0,"headroom_db":-17.0,"autogain_enabled":True}
+            actions,context=build_preview_plan(settings)
+            self.assertFalse([a.function_id for a in actions if a.function_id.startswith("audio.autogain.")])
+            pre,pre_label,tail,tail_label=compile_preview_graphs(actions,context)
+            _key,dry=engine.source_excerpt(source,duration=1.5,start_time=0.0)
+            wet=engine.render(source,pre,pre_label,tail,tail_label,duration=1.5,start_time=0.0)
+            def rms_db(pcm):
+                samples=struct.unpack(f"<{len(pcm)//4}f",pcm)
+                return 10*math.log10(sum(x*x for x in samples)/len(samples))
+            self.assertAlmostEqual(rms_db(wet),rms_db(dry),delta=3.0)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"),"FFmpeg requerido")
+    def test_stream_reports_missing_player_and_render_failures(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source=pathlib.Path(tmp)/"song.wav"
+            subprocess.run(["ffmpeg","-y","-v","error","-f","lavfi","-i","sine=f=440:d=1",str(source)],check=True)
+            preview=AudioPreview(PreviewEngine())
+            self.assertFalse(preview.stream(source,duration=0.5,players=[("no-existe-este-reproductor",)]))
+            self.assertIn("reproductor",preview.last_error)
+            self.assertFalse(preview.stream(source,"[0:a]filtro_inexistente[out]",duration=0.5,start_time=0.0,players=[("sh","-c","cat > /dev/null")]))
+            self.assertTrue(preview.last_error)
+            self.assertFalse(preview.is_playing())
+            boost=[AudioFunctionAction("audio.multiband.eq",target="mid",params={"gain_db":6.0})]
+            self.assertFalse(preview.stream_plan(source,boost,AudioProcessContext("preview",44100,2)))
+            self.assertTrue(preview.last_error)
+
+if __name__=="__main__": unittest.main()
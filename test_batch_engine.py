@@ -0,0 +1,120 @@
+"""Motor de lote sin Qt: eventos, opciones planas, entradas y `main.py batch`."""
+
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from batch_engine import (
+    DEFAULT_BATCH_SETTINGS,
+    EventHook,
+    collect_batch_inputs,
+    engine_from_settings,
+    load_batch_preset,
+    resolve_batch_settings,
+)
+from benchmark_suite import NUMPY_AVAILABLE, REPO_ROOT, synthesize, write_wav
+
+
+class BatchEngineTests(unittest.TestCase):
+    def test_headless_modules_do_not_import_qt_or_the_ui(self):
+        probe = (
+            "import runpy, sys; import batch_engine; "
+            "runpy.run_path('scripts/spasm_batch_job_runner.py', run_name='runner'); "
+            "print(sorted({name.split('.')[0] for name in sys.modules} & {'ui', 'ui_app', 'PySide6', 'pyqtgraph'}))"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", probe], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(completed.stdout.strip(), "[]")
+
+    def test_engine_publishes_through_event_hooks(self):
+        hook = EventHook()
+        seen = []
+        hook.connect(lambda *args: seen.append(args))
+        hook.emit("hola", 1, 2)
+        self.assertEqual(seen, [("hola", 1, 2)])
+
+        engine = engine_from_settings({}, [])
+        errors = []
+        engine.error.connect(errors.append)
+        engine.run()
+        self.assertEqual(errors, ["No se encontraron archivos seleccionados para procesar."])
+
+    def test_qt_worker_is_a_thin_adapter_over_the_engine(self):
+        from ui.workers import BatchWorker
+
+        worker = BatchWorker(files=[pathlib.Path("a.wav")], checkpoint_path=None, **resolve_batch_settings())
+        self.assertEqual(worker.files, [pathlib.Path("a.wav")])
+        worker._auto_process_order = ["eq", "limiter"]
+        self.assertEqual(worker.engine._auto_process_order, ["eq", "limiter"])
+
+    def test_settings_are_layered_and_validated(self):
+        settings = resolve_batch_settings(
+            {"target_lufs": "-16", "deesser": 1, "output_dir": "/tmp/out"},
+            {"limiter_ceiling_db": None, "files": ["ignorado.wav"], "output_sr": "48000"},
+        )
+        self.assertEqual(settings["target_lufs"], -16.0)
+        self.assertIs(settings["deesser"], True)
+        self.assertEqual(settings["output_dir"], pathlib.Path("/tmp/out"))
+        self.assertIsNone(settings["limiter_ceiling_db"])
+        self.assertEqual(settings["output_sr"], 48000)
+        self.assertEqual(settings["true_peak"], DEFAULT_BATCH_SETTINGS["true_peak"])
+        with self.assertRaisesRegex(ValueError, "desconocida: targt_lufs"):
+            resolve_batch_settings({"targt_lufs": -14.0})
+
+        self.assertEqual(
+            load_batch_preset("Apple Music (-16 LUFS / -1.0 dBTP)"),
+            {"loudness_preset": "Apple Music (-16 LUFS / -1.0 dBTP)", "target_lufs": -16.0, "true_peak": -1.0},
+        )
+        with self.assertRaisesRegex(ValueError, "Preset no encontrado"):
+            load_batch_preset("no-existe.json")
+
+    def test_inputs_come_from_a_folder_or_a_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = pathlib.Path(tmp)
+            (root / "sub").mkdir()
+            for name in ("b.wav", "a.flac", "notas.txt", "sub/c.wav"):
+                (root / name).write_bytes(b"")
+            files, options = collect_batch_inputs(root)
+            self.assertEqual([path.name for path in files], ["a.flac", "b.wav"])
+            self.assertEqual(options, {})
+            self.assertEqual(len(collect_batch_inputs(root, recursive=True)[0]), 3)
+
+            manifest = root / "job.json"
+            manifest.write_text(json.dumps({"files": ["sub/c.wav"], "target_lufs": -16.0}), encoding="utf-8")
+            files, options = collect_batch_inputs(manifest)
+            self.assertEqual(files, [root / "sub" / "c.wav"])
+            self.assertEqual(options, {"target_lufs": -16.0})
+
+            listing = root / "lista.txt"
+            listing.write_text("# tracks\nb.wav\n\n/abs/x.wav\n", encoding="utf-8")
+            self.assertEqual(collect_batch_inputs(listing)[0], [root / "b.wav", pathlib.Path("/abs/x.wav")])
+
+    @unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "FFmpeg requerido")
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy requerido para sintetizar audio")
+    def test_main_batch_masters_a_folder_with_a_preset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = pathlib.Path(tmp)
+            write_wav(root / "drums.wav", synthesize("drums", 2.0, 44100), 44100)
+            preset = root / "preset.json"
+            preset.write_text(json.dumps({"target_lufs": -16.0, "mts_enabled": False}), encoding="utf-8")
+            env = {**os.environ, "FINISHER_AUDIO_ENGINE": "python", "TONEFINISH_RENDER_CACHE": "0"}
+            completed = subprocess.run(
+                [sys.executable, "main.py", "batch", str(root), "--preset", str(preset),
+                 "--output-dir", str(root / "out"), "--results", str(root / "results.json")],
+                cwd=REPO_ROOT, capture_output=True, text=True, env=env, check=False,
+            )
+            self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+            self.assertIn("Lote completado: 1 archivos.", completed.stdout)
+            self.assertTrue((root / "out" / "O-M-A - drums.wav").exists())
+            (result,) = json.loads((root / "results.json").read_text(encoding="utf-8"))
+            self.assertEqual(result["file"], "drums.wav")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Pruebas del scheduler por etapas del lote."""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from batch_pipeline import PipelineStage, StagedPipeline, pipeline_depth
+
+
+class StagedPipelineTests(unittest.TestCase):
+    def test_results_arrive_in_order_even_when_later_items_finish_first(self):
+        def analysis(item, _previous):
+            time.sleep(0.02 * (5 - item))
+            return item * 10
+
+        def strategy(item, previous):
+            return previous["analysis"] + 1
+
+        pipeline = StagedPipeline(range(5), [
+            PipelineStage("analysis", analysis, 3), PipelineStage("strategy", strategy, 2),
+        ], depth=4)
+        seen = [(staged.index, staged.result("strategy")) for staged in pipeline]
+        self.assertEqual(seen, [(index, index * 10 + 1) for index in range(5)])
+
+    def test_next_items_are_prepared_while_the_current_one_is_consumed(self):
+        started = []
+        lock = threading.Lock()
+
+        def analysis(item, _previous):
+            with lock:
+                started.append(item)
+            return item
+
+        pipeline = StagedPipeline(range(6), [PipelineStage("analysis", analysis, 2)], depth=2)
+        for staged in pipeline:
+            staged.result("analysis")
+            if staged.index == 0:
+                # Mientras se "renderiza" el primero, se adelantan exactamente dos.
+                deadline = time.monotonic() + 2.0
+                while len(started) < 3 and time.monotonic() < deadline:
+                    time.sleep(0.005)
+                time.sleep(0.05)
+                self.assertEqual(sorted(started), [0, 1, 2])
+
+    def test_stage_errors_surface_when_the_item_is_consumed(self):
+        calls = []
+
+        def analysis(item, _previous):
+            if item == 1:
+                raise RuntimeError("falla análisis")
+            return item
+
+        def strategy(item, previous):
+            calls.append(item)
+            return previous["analysis"]
+
+        with StagedPipeline(range(3), [
+            PipelineStage("analysis", analysis), PipelineStage("strategy", strategy),
+        ], depth=2) as pipeline:
+            outcomes = []
+            for staged in pipeline:
+                try:
+                    outcomes.append(staged.result("strategy"))
+                except RuntimeError as exc:
+                    outcomes.append(str(exc))
+        self.assertEqual(outcomes, [0, "falla análisis", 2])
+        self.assertNotIn(1, calls)
+
+    def test_depth_zero_runs_each_item_only_when_consumed(self):
+        started = []
+        pipeline = StagedPipeline(range(3), [PipelineStage("analysis", lambda item, _p: started.append(item))], depth=0)
+        for staged in pipeline:
+            self.assertEqual(started, list(range(staged.index + 1)))
+        with patch.dict("os.environ", {"TONEFINISH_BATCH_PIPELINE_DEPTH": "0"}):
+            self.assertEqual(pipeline_depth(), 0)
+
+    def test_closing_early_cancels_pending_work(self):
+        started = []
+        pipeline = StagedPipeline(range(20), [PipelineStage("analysis", lambda item, _p: started.append(item))], depth=2)
+        for staged in pipeline:
+            staged.result("analysis")
+            break
+        pipeline.close()
+        time.sleep(0.05)
+        self.assertLessEqual(len(started), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
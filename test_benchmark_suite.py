@@ -0,0 +1,78 @@
+"""Pruebas de la suite de benchmarks: corpus sintético, corridas y comparación con línea base."""
+
+import contextlib
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+import benchmark_suite
+
+
+def result(**medians):
+    return {
+        "corpus": [],
+        "machine": {"cpu_count": 8},
+        "results": {
+            case: {"ok": False, "error": "RuntimeError: x"} if median is None else {"ok": True, "median_s": median}
+            for case, median in medians.items()
+        },
+    }
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_corpus_is_deterministic_and_covers_the_signal_shapes(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            tracks = benchmark_suite.build_corpus(pathlib.Path(first), (1.0,), (44100, 48000))
+            again = benchmark_suite.build_corpus(pathlib.Path(second), (1.0,), (44100, 48000))
+            self.assertEqual([t.sha256 for t in tracks], [t.sha256 for t in again])
+            self.assertEqual(len(tracks), 2 * len(benchmark_suite.SIGNALS))
+            by_name = {track.name: track for track in tracks}
+            with wave.open(str(by_name["mono_1s_44k"].path), "rb") as handle:
+                self.assertEqual((handle.getnchannels(), handle.getframerate(), handle.getnframes()), (1, 44100, 44100))
+            self.assertEqual(by_name["drums_1s_48k"].channels, 2)
+
+        silent = benchmark_suite.synthesize("silent_intro", 8.0, 8000)
+        self.assertFalse(np.any(silent[: 2 * 8000]))
+        self.assertTrue(np.any(silent[2 * 8000:]))
+        clipped = benchmark_suite.synthesize("clipped", 2.0, 8000)
+        self.assertGreater(np.mean(np.abs(clipped) >= 0.99), 0.05)
+        with self.assertRaises(ValueError):
+            benchmark_suite.synthesize("violin", 1.0, 8000)
+
+    def test_run_records_timings_and_machine_info(self):
+        payload = benchmark_suite.run_suite("quick", only="orchestrator.compile")
+        self.assertEqual(list(payload["results"]), ["orchestrator.compile"])
+        case = payload["results"]["orchestrator.compile"]
+        self.assertTrue(case["ok"], case)
+        self.assertGreater(case["median_s"], 0.0)
+        self.assertEqual(case["ffmpeg_processes"], 0)
+        self.assertEqual(len(payload["corpus"]), len(benchmark_suite.SIGNALS))
+        self.assertIn("cpu_count", payload["machine"])
+        self.assertEqual(payload["seed"], benchmark_suite.BENCH_SEED)
+
+    def test_compare_flags_slowdowns_and_new_failures(self):
+        baseline = result(a=1.0, b=1.0, c=0.001, d=1.0, nuevo=None)
+        current = result(a=1.3, b=1.1, c=0.004, d=None, nuevo=None, extra=9.0)
+        regressions = benchmark_suite.compare_results(current, baseline, threshold=0.15)
+        self.assertEqual([(item["case"], item["reason"]) for item in regressions], [("a", "slower"), ("d", "error")])
+        self.assertAlmostEqual(regressions[0]["ratio"], 1.3)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            current_path, baseline_path = pathlib.Path(tmp) / "actual.json", pathlib.Path(tmp) / "base.json"
+            current_path.write_text(json.dumps(current), encoding="utf-8")
+            baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(benchmark_suite.main(["compare", str(current_path), str(baseline_path)]), 1)
+                self.assertEqual(benchmark_suite.main(["compare", str(baseline_path), str(baseline_path)]), 0)
+        self.assertIn("REGRESIÓN a: 1.000 s -> 1.300 s (1.30×)", output.getvalue())
+        self.assertIn("Sin regresiones.", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Pruebas de `logic_backend.call_many` (varias llamadas en un único request)."""
+
+import os
+import pathlib
+import sys
+import unittest
+from unittest.mock import patch
+
+import logic_backend
+from logic_backend import call_many
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+ECHO_WORKER = " ".join([sys.executable, str(ROOT / "scripts" / "spasm_echo_worker.py")])
+
+
+class CallManyTests(unittest.TestCase):
+    def tearDown(self):
+        logic_backend._close_spasm_worker_pool()
+
+    def test_one_envelope_with_per_item_errors(self):
+        env = {"FINISHER_AUDIO_ENGINE": "spasm", "FINISHER_SPASM_WORKER_CMD": ECHO_WORKER, "FINISHER_SPASM_POOL_SIZE": "1"}
+        with patch.dict(os.environ, env), patch.object(logic_backend, "_call_spasm", wraps=logic_backend._call_spasm) as rpc:
+            audio, voice, broken = call_many(
+                [
+                    ("analyze_audio", (pathlib.Path("a.wav"), -14.0, -1.0), {"verbose": False}),
+                    ("analyze_eq_and_voice", (pathlib.Path("a.wav"),), {"band_range_db": 4.0}),
+                    ("evaluate_mix", (), {"fail": True}),
+                ]
+            )
+
+        self.assertEqual(rpc.call_count, 1)
+        self.assertEqual(audio.value["method"], "analyze_audio")
+        self.assertEqual(audio.value["args"], [pathlib.Path("a.wav"), -14.0, -1.0])
+        self.assertEqual(voice.unwrap()["kwargs"], {"band_range_db": 4.0})
+        self.assertFalse(broken.ok)
+        with self.assertRaisesRegex(RuntimeError, "fallo simulado"):
+            broken.unwrap()
+
+    def test_tolerant_methods_and_callbacks_run_in_python(self):
+        env = {"FINISHER_AUDIO_ENGINE": "spasm", "FINISHER_SPASM_WORKER_CMD": ECHO_WORKER, "FINISHER_SPASM_POOL_SIZE": "1"}
+        with patch.dict(os.environ, env), \
+             patch.object(logic_backend, "_py_get_audio_info", return_value={"sample_rate": 48000}), \
+             patch.object(logic_backend, "_py_evaluate_mix", return_value="local") as local_mix:
+            info, mix = call_many(
+                [
+                    ("get_audio_info", ("a.wav",), {"fail": True}),
+                    ("evaluate_mix", (), {"progress_callback": print}),
+                ]
+            )
+        self.assertEqual(info.unwrap(), {"sample_rate": 48000})
+        self.assertEqual(mix.unwrap(), "local")
+        local_mix.assert_called_once_with(progress_callback=print)
+
+    def test_cli_without_call_many_resolves_items_one_by_one(self):
+        env = {"FINISHER_AUDIO_ENGINE": "python"}
+        with patch.dict(os.environ, env), \
+             patch.object(logic_backend, "_py_analyze_audio", return_value=({"input_i": -14.0}, "")), \
+             patch.object(logic_backend, "_py_ensure_ffmpeg_available", side_effect=RuntimeError("ffmpeg no encontrado")):
+            check, audio = call_many([("ensure_ffmpeg_available", (), {}), ("analyze_audio", ("a.wav", -14.0, -1.0), {})])
+        self.assertIsInstance(check.error, RuntimeError)
+        self.assertEqual(audio.unwrap(), ({"input_i": -14.0}, ""))
+
+        with patch.dict(os.environ, {"FINISHER_AUDIO_ENGINE": "spasm"}), \
+             patch.object(logic_backend, "_call_spasm", side_effect=RuntimeError("método no implementado aún en SpASM CLI")) as rpc, \
+             patch.object(logic_backend, "_spasm_fallback_python_enabled", return_value=True), \
+             patch.object(logic_backend, "_py_resolve_repair_levels", return_value={"hum": 1}):
+            (levels,) = call_many([("resolve_repair_levels", ("auto",), {})])
+        self.assertEqual(levels.unwrap(), {"hum": 1})
+        self.assertEqual([call.args[0] for call in rpc.call_args_list], ["call_many", "resolve_repair_levels"])
+
+        with self.assertRaises(ValueError):
+            call_many([("fix_audio_tools", (), {})])
+
+
+if __name__ == "__main__":
+    unittest.main()
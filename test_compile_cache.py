@@ -0,0 +1,82 @@
+"""Pruebas de la memoización de `orchestrator.compile`."""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from benchmark_suite import large_action_plan as large_plan
+from processes.catalog import FUNCTION_SPECS
+from processes.contracts import AudioFunctionAction, AudioFunctionRegistry, AudioProcessContext
+from processes.orchestrator import AudioProcessOrchestrator
+
+
+PLAN = [
+    AudioFunctionAction("audio.multiband.eq", target="mid", params={"gain_db": -1.0}),
+    AudioFunctionAction("audio.autogain.final_peak", params={"ceiling_db": -3.0}),
+]
+
+
+class CompileCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.orchestrator = AudioProcessOrchestrator()
+
+    def test_same_plan_and_context_reuse_the_frozen_graph_across_tracks(self):
+        first = self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 48000, 2))
+        again = self.orchestrator.compile(list(PLAN), AudioProcessContext("b.wav", 48000, 2))
+        self.assertIs(first, again)
+        self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 44100, 2))
+        self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 48000, 2), input_label="pre")
+        self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 48000, 2), optimize=False)
+        self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 48000, 2, analysis={"true_peak": -1.0}))
+        info = self.orchestrator.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["entries"]), (1, 5, 5))
+
+    def test_uncanonical_analysis_bypasses_and_errors_are_not_cached(self):
+        context = AudioProcessContext("a.wav", 48000, 2, analysis={"handle": object()})
+        self.assertTrue(self.orchestrator.compile(PLAN, context).filter_chain)
+        boost = [AudioFunctionAction("audio.multiband.eq", target="mid", params={"gain_db": 6.0})]
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.orchestrator.compile(boost, AudioProcessContext("a.wav", 48000, 2))
+        info = self.orchestrator.cache_info()
+        self.assertEqual((info["bypassed"], info["misses"], info["entries"]), (1, 2, 0))
+
+    def test_size_limit_and_disable_switch(self):
+        with patch.dict("os.environ", {"TONEFINISH_COMPILE_CACHE_SIZE": "1"}):
+            for rate in (44100, 48000, 44100):
+                self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", rate, 2))
+            self.assertEqual(self.orchestrator.cache_info()["misses"], 3)
+        with patch.dict("os.environ", {"TONEFINISH_COMPILE_CACHE_SIZE": "0"}):
+            self.orchestrator.compile(PLAN, AudioProcessContext("a.wav", 48000, 2))
+            self.assertEqual(self.orchestrator.cache_info()["bypassed"], 1)
+
+    def test_catalog_fingerprint_changes_when_functions_are_registered(self):
+        registry = AudioFunctionRegistry()
+        registry.register_many(FUNCTION_SPECS[:-1])
+        before = registry.fingerprint()
+        self.assertEqual(before, registry.fingerprint())
+        registry.register(FUNCTION_SPECS[-1])
+        self.assertNotEqual(before, registry.fingerprint())
+
+    def test_large_plan_compiles_once_and_is_reused_across_tracks(self):
+        actions = large_plan()
+        self.assertGreaterEqual(len(actions), 30)
+        for index in range(20):
+            graph = self.orchestrator.compile(actions, AudioProcessContext("a.wav", 48000, 2, duration=float(index + 1)))
+        for _ in range(20):
+            self.assertIs(self.orchestrator.compile(actions, AudioProcessContext("b.wav", 48000, 2, duration=20.0)), graph)
+        info = self.orchestrator.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (20, 20))
+
+    def test_concurrent_compiles_keep_the_cache_consistent(self):
+        contexts = [AudioProcessContext(f"{index}.wav", 44100 + (index % 4), 2) for index in range(64)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            graphs = list(executor.map(lambda context: self.orchestrator.compile(PLAN, context), contexts))
+        self.assertEqual(len(graphs), 64)
+        info = self.orchestrator.cache_info()
+        self.assertEqual(info["hits"] + info["misses"], 64)
+        self.assertEqual(info["entries"], 4)
+        self.assertGreaterEqual(info["misses"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Pruebas de la contabilidad de recursos por invocación de FFmpeg."""
+
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import audio_tools
+import ffmpeg_accounting
+from ffmpeg_accounting import FfmpegUsage
+from process_pool import BatchProcessPool, ProcessJob
+
+# Proceso de prueba con la forma de un FFmpeg: consume CPU, reserva memoria y
+# deja en stderr la línea de estadísticas `time=` que FFmpeg imprime al terminar.
+BUSY_SCRIPT = (
+    "import sys; buffer = bytearray(48 * 1024 * 1024); total = sum(range(3_000_000)); "
+    "sys.stderr.write('size=N/A time=00:00:12.50 bitrate=N/A speed=20x')"
+)
+
+
+def busy_cmd(*extra):
+    return [sys.executable, "-c", BUSY_SCRIPT, "-af", "highpass=f=30,afftdn=nf=-25", *extra]
+
+
+def usage(call_site, cpu_s, audio_s, rss, function_ids=(), filters=("afftdn",)):
+    return FfmpegUsage(
+        call_site=call_site,
+        graph_hash="abc",
+        filters=filters,
+        wall_s=cpu_s / 2,
+        cpu_user_s=cpu_s,
+        cpu_system_s=0.0,
+        max_rss_mb=rss,
+        audio_duration_s=audio_s,
+        function_ids=tuple(function_ids),
+    )
+
+
+@patch.dict(os.environ, {"TONEFINISH_RENDER_CACHE": "0"})
+class FfmpegAccountingTests(unittest.TestCase):
+    def setUp(self):
+        ffmpeg_accounting.accountant().reset()
+
+    def test_run_ffmpeg_records_rusage_per_call_site(self):
+        with patch.object(audio_tools, "_FFMPEG_BIN", sys.executable), \
+             ffmpeg_accounting.call_site("normalize_audio", function_ids=["audio.repair.denoise"]):
+            result = audio_tools.run_ffmpeg(busy_cmd(), optimize=False)
+        self.assertEqual(result.returncode, 0)
+        (record,) = ffmpeg_accounting.accountant().records()
+        self.assertEqual(record.call_site, "normalize_audio")
+        self.assertEqual(record.function_ids, ("audio.repair.denoise",))
+        self.assertEqual(record.filters, ("highpass", "afftdn"))
+        self.assertEqual(len(record.graph_hash), 12)
+        self.assertEqual(record.audio_duration_s, 12.5)
+        self.assertGreater(record.cpu_s, 0.0)
+        self.assertGreater(record.max_rss_mb, 40.0)
+        self.assertGreaterEqual(record.wall_s, record.cpu_s * 0.5)
+
+    def test_duration_prefers_the_explicit_limit(self):
+        self.assertEqual(ffmpeg_accounting.audio_duration_from_run(["ffmpeg", "-t", "00:01:30", "-i", "a.wav"]), 90.0)
+        self.assertIsNone(ffmpeg_accounting.audio_duration_from_run(["ffmpeg", "-i", "a.wav"], "sin estadísticas"))
+
+    def test_pool_children_report_their_ffmpeg_usage(self):
+        with BatchProcessPool(1, memory_cap_mb=0, warmup_modules=()) as pool:
+            result = pool.run(ProcessJob("audio_tools:run_ffmpeg", (busy_cmd(),), {"optimize": False}))
+        self.assertEqual(result.returncode, 0)
+        (record,) = ffmpeg_accounting.accountant().records()
+        self.assertEqual(record.call_site, ffmpeg_accounting.NO_CALL_SITE)
+        self.assertGreater(record.cpu_s, 0.0)
+
+    def test_summary_groups_by_call_site_or_function_id(self):
+        records = [
+            usage("normalize_audio", 2.0, 8.0, 300.0, ["audio.repair.denoise", "audio.limiter.true_peak"]),
+            usage("normalize_audio", 3.0, 12.0, 380.0, ["audio.repair.denoise"]),
+            usage("analyze_audio", 0.5, 20.0, 60.0, filters=("loudnorm",)),
+        ]
+        by_site = ffmpeg_accounting.summarize(records)
+        self.assertEqual([row["key"] for row in by_site], ["normalize_audio [afftdn]", "analyze_audio [loudnorm]"])
+        self.assertEqual(by_site[0]["count"], 2)
+        self.assertAlmostEqual(by_site[0]["cpu_realtime_factor"], 4.0)
+        self.assertEqual(by_site[0]["max_rss_mb"], 380.0)
+        self.assertEqual(
+            ffmpeg_accounting.format_report(by_site, limit=1),
+            ["normalize_audio [afftdn]: 4.0× tiempo real CPU, 380 MB RSS (2 proceso(s), 2.5 s de pared)"],
+        )
+
+        by_function = {row["key"]: row for row in ffmpeg_accounting.summarize(records, by="function_id")}
+        self.assertEqual(by_function["audio.repair.denoise"]["count"], 2)
+        self.assertEqual(by_function["audio.limiter.true_peak"]["cpu_s"], 2.0)
+        self.assertIn("analyze_audio", by_function)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = ffmpeg_accounting.write_usage_report(pathlib.Path(tmp) / "log", records)
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        self.assertTrue(path.name.startswith("batch_ffmpeg_usage_"))
+        self.assertEqual(len(payload["records"]), 3)
+        self.assertEqual(payload["by_function_id"][0]["key"], "audio.repair.denoise")
+
+
+if __name__ == "__main__":
+    unittest.main()
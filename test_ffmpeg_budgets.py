@@ -0,0 +1,135 @@
+"""Presupuestos de invocaciones FFmpeg: una pasada completa extra falla sin depender de tiempos."""
+
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import adaptive_master_renderer
+import analysis_mts
+import audio_analysis
+import audio_processing
+import audio_tools
+import auto_master_intelligence
+import diagnostics
+import spectrum_analyzer
+from benchmark_suite import NORMALIZE_PLANS, NUMPY_AVAILABLE, synthesize, write_wav
+from ffmpeg_budget import (
+    FFMPEG_BUDGETS,
+    WATCHED_MODULES,
+    FfmpegBudget,
+    check_budget,
+    classify,
+    count_ffmpeg_invocations,
+)
+from master_decision_engine import build_master_decisions
+
+
+class FfmpegBudgetHarnessTests(unittest.TestCase):
+    def test_classifies_probes_full_and_bounded_decodes(self):
+        self.assertEqual(classify(["ffprobe", "-of", "json", "a.wav"]), "probe")
+        self.assertEqual(classify(["ffmpeg", "-i", "a.wav", "-af", "volumedetect", "-f", "null", "-"]), "full_decode")
+        self.assertEqual(classify(["ffmpeg", "-ss", "0", "-t", "10", "-i", "a.wav", "-f", "f32le", "-"]), "partial_decode")
+        self.assertEqual(classify(["ffmpeg", "-i", "a.wav", "-t", "7", "-f", "f32le", "-"]), "partial_decode")
+        self.assertEqual(classify(["ffmpeg", "-f", "lavfi", "-i", "anullsrc", "-t", "1", "o.wav"]), "partial_decode")
+        self.assertEqual(classify(["ffmpeg", "-version"]), "other")
+
+    def test_an_extra_full_pass_breaks_the_declared_budget(self):
+        decode = [sys.executable, "-c", "pass", "-i", "a.wav", "-f", "null", "-"]
+
+        def analysis_with_one_pass():
+            audio_tools.run_ffmpeg(decode, optimize=False)
+
+        def analysis_with_an_extra_pass():
+            audio_tools.run_ffmpeg(decode, optimize=False)
+            audio_tools.run_ffmpeg(decode, optimize=False)
+
+        with patch.dict(FFMPEG_BUDGETS, {"demo.analysis": FfmpegBudget(full_decodes=1)}):
+            with count_ffmpeg_invocations() as log:
+                analysis_with_one_pass()
+            self.assertEqual(check_budget("demo.analysis", log), [])
+            with count_ffmpeg_invocations((*WATCHED_MODULES, __name__)) as log:
+                analysis_with_an_extra_pass()
+            self.assertEqual(
+                check_budget("demo.analysis", log),
+                ["demo.analysis: 2 decodificaciones completas (presupuesto 1)"],
+            )
+        self.assertEqual(log.invocations[0].site, f"{__name__}.analysis_with_an_extra_pass")
+
+
+@unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "FFmpeg requerido")
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy requerido para sintetizar audio")
+class FfmpegBudgetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dir = pathlib.Path(cls.tmp.name)
+        cls.source = cls.dir / "drums.wav"
+        write_wav(cls.source, synthesize("drums", 4.0, 48000), 48000)
+        cls.stats, _ = audio_analysis.analyze_audio(cls.source, -14.0, -1.0, False)
+        cls.band_stats, _suggestions, _voice = audio_analysis.analyze_eq_and_voice(cls.source, False, 6.0)
+        cls.mts = analysis_mts.build_mts_analysis(input_path=cls.source)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def normalize(self, **plan):
+        return audio_processing.normalize_audio(
+            self.source, self.dir / "out.wav", self.stats, -14.0, -1.0, True, False,
+            band_stats=self.band_stats, **plan,
+        )
+
+    def adaptive_render(self):
+        decisions = build_master_decisions(mts_data=self.mts)
+        report = adaptive_master_renderer.render_adaptive_candidate(
+            self.source, decisions, -14.0, -1.0, mts_data=self.mts, source_stats=self.stats,
+        )
+        adaptive_master_renderer.discard_adaptive_candidate(report)
+
+    def test_every_entry_point_stays_within_its_budget(self):
+        source = self.source
+        calls = {
+            "audio_tools.get_audio_info": lambda: audio_tools.get_audio_info(str(source)),
+            "audio_analysis.analyze_audio": lambda: audio_analysis.analyze_audio(source, -14.0, -1.0, False),
+            "audio_analysis.analyze_eq_bands": lambda: audio_analysis.analyze_eq_bands(source, False, 6.0),
+            "audio_analysis.analyze_voice_band": lambda: audio_analysis.analyze_voice_band(source, False),
+            "audio_analysis.analyze_eq_and_voice": lambda: audio_analysis.analyze_eq_and_voice(source, False, 6.0),
+            "audio_analysis.detect_clipping": lambda: audio_analysis.detect_clipping(source),
+            "audio_analysis.detect_noise_floor": lambda: audio_analysis.detect_noise_floor(source),
+            "audio_analysis.detect_stereo_characteristics": lambda: audio_analysis.detect_stereo_characteristics(source),
+            "audio_analysis.detect_peak_per_band": lambda: audio_analysis.detect_peak_per_band(source),
+            "audio_analysis.analyze_silence_edges": lambda: audio_analysis.analyze_silence_edges(source),
+            "audio_analysis.get_comprehensive_audio_analysis":
+                lambda: audio_analysis.get_comprehensive_audio_analysis(source),
+            "diagnostics.analyze_audio_metrics": lambda: diagnostics.analyze_audio_metrics(source),
+            "spectrum_analyzer.analyze_spectrum_fft": lambda: spectrum_analyzer.analyze_spectrum_fft(source),
+            "spectrum_analyzer.analyze_dynamic_eq_evidence":
+                lambda: spectrum_analyzer.analyze_dynamic_eq_evidence(source),
+            "analysis_mts.build_mts_analysis": lambda: analysis_mts.build_mts_analysis(input_path=source),
+            "auto_master_intelligence.analyze_audio_for_automaster":
+                lambda: auto_master_intelligence.analyze_audio_for_automaster(source),
+            "auto_master_intelligence.analyze_audio_for_automaster[simple]":
+                lambda: auto_master_intelligence.analyze_audio_for_automaster(
+                    source, use_spectrum=False, full_analysis=False
+                ),
+            "audio_processing.normalize_audio[plain]": lambda: self.normalize(),
+            "audio_processing.normalize_audio[full_chain]": lambda: self.normalize(**NORMALIZE_PLANS["full_chain"]),
+            "adaptive_master_renderer.render_adaptive_candidate": self.adaptive_render,
+        }
+        self.assertEqual(sorted(calls), sorted(FFMPEG_BUDGETS))
+
+        with patch.dict(os.environ, {"TONEFINISH_RENDER_CACHE": "0"}):
+            for api, call in calls.items():
+                with self.subTest(api=api):
+                    audio_tools.clear_audio_info_cache()
+                    with count_ffmpeg_invocations() as log:
+                        call()
+                    self.assertEqual(check_budget(api, log), [], "\n" + log.describe())
+
+
+if __name__ == "__main__":
+    unittest.main()
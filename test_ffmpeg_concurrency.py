@@ -0,0 +1,148 @@
+"""Pruebas del control adaptativo de procesos FFmpeg simultáneos."""
+
+import threading
+import time
+import unittest
+
+import audio_tools
+from ffmpeg_concurrency import FfmpegConcurrencyController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds=2.0):
+        self.now += seconds
+
+
+class FfmpegConcurrencyControllerTests(unittest.TestCase):
+    def make(self, **kwargs):
+        self.clock = FakeClock()
+        options = {"initial": 4, "max_limit": 32, "adaptive": False, "clock": self.clock, "interval": 2.0}
+        options.update(kwargs)
+        return FfmpegConcurrencyController(**options)
+
+    def saturate(self, controller):
+        while controller.metrics()["in_flight"] < controller.limit:
+            controller.acquire()
+
+    def test_overload_shrinks_multiplicatively_down_to_the_floor(self):
+        controller = self.make(initial=10)
+        self.assertEqual(controller.observe(95.0, 40.0, 20.0), 7)
+        self.assertEqual(controller.observe(50.0, 40.0, 0.5), 4)
+        for _ in range(10):
+            controller.observe(99.0, 99.0, 0.1)
+        self.assertEqual(controller.limit, 1)
+        metrics = controller.metrics()
+        self.assertEqual((metrics["limit"], metrics["decreases"]), (1, 5))
+        self.assertEqual(metrics["last_sample"]["memory_available_gb"], 0.1)
+
+    def test_idle_box_grows_with_hysteresis_and_cooldown(self):
+        controller = self.make(initial=2)
+        self.saturate(controller)
+
+        # Holgura sostenida y demanda: +1 cada dos muestras.
+        controller.observe(20.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+        controller.observe(20.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 3)
+
+        # Banda de histéresis (entre cpu_low y cpu_high): se mantiene.
+        self.saturate(controller)
+        for _ in range(4):
+            controller.observe(80.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 3)
+
+        # Tras una bajada, el enfriamiento bloquea subidas inmediatas.
+        self.clock.tick()
+        controller.observe(95.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+        controller.observe(20.0, 30.0, 50.0)
+        controller.observe(20.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+        self.clock.tick(10.0)
+        controller.observe(20.0, 30.0, 50.0)
+        controller.observe(20.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 3)
+
+    def test_no_growth_without_demand_and_revert_without_throughput_gain(self):
+        controller = self.make(initial=2, increase_after=1)
+        controller.observe(10.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+
+        self.saturate(controller)
+        controller.release()
+        controller.acquire()
+        self.clock.tick(1.0)
+        controller.observe(10.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 3)
+
+        # Con 3 procesos se termina lo mismo que con 2: la subida se deshace.
+        controller.acquire()
+        controller.release()
+        controller.acquire()
+        self.clock.tick(1.0)
+        controller.observe(10.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.metrics()["reverts"], 1)
+        controller.observe(10.0, 30.0, 50.0)
+        self.assertEqual(controller.limit, 2)
+
+    def test_acquire_blocks_at_the_limit_until_it_is_raised(self):
+        controller = FfmpegConcurrencyController(initial=1, max_limit=4, adaptive=False, interval=0.05)
+        controller.acquire()
+        entered = threading.Event()
+
+        def second():
+            with controller.slot():
+                entered.set()
+
+        worker = threading.Thread(target=second)
+        worker.start()
+        self.assertFalse(entered.wait(0.2))
+        self.assertEqual(controller.metrics()["waiting"], 1)
+        controller.reset(2)
+        self.assertTrue(entered.wait(2.0))
+        worker.join(2.0)
+        controller.release()
+        self.assertEqual(controller.metrics()["in_flight"], 0)
+
+    def test_sampler_drives_the_limit_from_acquire_and_release(self):
+        samples = []
+
+        class Snapshot:
+            cpu_percent = 97.0
+            memory_percent = 40.0
+            memory_available_gb = 12.0
+
+        def sampler():
+            samples.append(time.monotonic())
+            return Snapshot()
+
+        controller = FfmpegConcurrencyController(initial=4, max_limit=8, sampler=sampler, interval=0.0)
+        with controller.slot():
+            pass
+        self.assertTrue(samples)
+        self.assertLess(controller.limit, 4)
+
+
+class AudioToolsLimiterTests(unittest.TestCase):
+    def test_processing_limits_reset_the_adaptive_limit(self):
+        before = audio_tools.get_processing_limits()
+        try:
+            limits = audio_tools.set_processing_limits(max_ffmpeg_processes=1)
+            self.assertEqual(limits["max_ffmpeg_processes"], 1)
+            self.assertEqual(audio_tools.get_ffmpeg_concurrency_metrics()["limit"], 1)
+        finally:
+            audio_tools.set_processing_limits(
+                max_ffmpeg_processes=before["max_ffmpeg_processes"],
+                ffmpeg_threads_per_process=before["ffmpeg_threads_per_process"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""Pruebas de la pasada de optimización del grafo compilado."""
+
+import array
+import shutil
+import subprocess
+import unittest
+
+from processes.contracts import AudioFunctionAction, AudioProcessContext
+from processes.graph_optimizer import optimize_filter_graph
+from processes.orchestrator import migrate_legacy_preprocess_config, orchestrator
+
+
+BANDS = {
+    "Subbass (20-60 Hz)": -24.0, "Bass (60-250 Hz)": -18.0,
+    "Low-Mid (250-500 Hz)": -20.0, "Mid (500-2k Hz)": -18.0,
+    "High-Mid (2k-6k Hz)": -22.0, "Air (6k-16k Hz)": -26.0,
+}
+SOURCE = "anoisesrc=color=pink:seed=7:amplitude=0.2:r=48000:d=1.5,aformat=channel_layouts=stereo"
+
+
+def _render(chain: str, output: str) -> array.array:
+    result = subprocess.run([
+        "ffmpeg", "-v", "error", "-f", "lavfi", "-i", SOURCE,
+        "-filter_complex", chain, "-map", f"[{output}]", "-f", "f32le", "-",
+    ], capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr.decode("utf-8", "replace"))
+    samples = array.array("f")
+    samples.frombytes(result.stdout)
+    return samples
+
+
+class GraphOptimizerTests(unittest.TestCase):
+    def test_neutral_filters_and_identity_segments_are_removed_keeping_output_label(self):
+        chain = (
+            "[0:a]volume=0.00dB,equalizer=f=1000.00:width_type=q:width=0.707:g=0.00[a];"
+            "[a]alimiter=limit=0.9[b];[b]anull[c]"
+        )
+        optimized, output, report = optimize_filter_graph(chain, "c")
+        self.assertEqual(output, "c")
+        self.assertEqual(optimized, "[0:a]alimiter=limit=0.9[c]")
+        self.assertEqual(report.removed_filters, 3)
+
+    def test_external_input_straight_to_output_keeps_one_anull(self):
+        optimized, output, _ = optimize_filter_graph("[0:a]volume=1[out]", "out")
+        self.assertEqual((optimized, output), ("[0:a]anull[out]", "out"))
+
+    def test_only_inverse_biquads_cancel_and_formats_collapse(self):
+        chain = (
+            "[0:a]equalizer=f=1000:width_type=q:width=1:g=-6.00[a];"
+            "[a]equalizer=f=1000:width_type=q:width=1:g=6,aformat=sample_fmts=fltp,"
+            "aformat=sample_fmts=fltp,equalizer=f=2000:width_type=q:width=1:g=1[b]"
+        )
+        optimized, _, report = optimize_filter_graph(chain, "b")
+        self.assertNotIn("f=1000", optimized)
+        self.assertIn("equalizer=f=2000", optimized)
+        self.assertEqual(optimized.count("aformat"), 1)
+        self.assertEqual((report.merged_biquads, report.collapsed_formats, report.fused_segments), (1, 1, 1))
+
+        # Una cascada que no se anula no equivale a una etapa con la suma de ganancias.
+        for kind in ("equalizer=f=1000:width_type=q:width=1", "lowshelf=f=120:width_type=q:width=0.707"):
+            with self.subTest(kind=kind):
+                chain = f"[0:a]{kind}:g=6,{kind}:g=6[a];[a]{kind}:g=-1[b];[b]{kind}:g=0.5[out]"
+                optimized, _, report = optimize_filter_graph(chain, "out")
+                self.assertEqual(optimized, chain)
+                self.assertEqual(report.merged_biquads, 0)
+
+    def test_identical_split_branches_are_computed_once(self):
+        chain = (
+            "[0:a]asplit=3[x][y][z];[x]lowpass=f=200[lx];[y]lowpass=f=200[ly];[z]highpass=f=200[hz];"
+            "[lx][ly][hz]amix=inputs=3:normalize=0[out]"
+        )
+        optimized, _, report = optimize_filter_graph(chain, "out")
+        self.assertEqual(report.deduped_branches, 1)
+        self.assertEqual(optimized.count("lowpass"), 1)
+        self.assertIn("asplit=2", optimized)
+
+    def test_unlabelled_or_repeated_labels_are_left_untouched(self):
+        for chain in ("volume=0dB", "[0:a]anull[a];[0:a]anull[b]"):
+            self.assertEqual(optimize_filter_graph(chain, "a")[0], chain)
+
+    def test_compile_keeps_plugin_labels_and_applied_actions(self):
+        actions = [
+            AudioFunctionAction("audio.tone_eq.band", target="mid", params={
+                "frequency_hz": 1000.0, "gain_db": 0.0, "q": 1.0, "filter_type": "peaking",
+            }),
+            AudioFunctionAction("audio.autogain.final_peak", params={"ceiling_db": -3.0}),
+        ]
+        context = AudioProcessContext("track", 48000, 2)
+        graph = orchestrator.compile(actions, context)
+        raw = orchestrator.compile(actions, context, optimize=False)
+        self.assertEqual(graph.applied_actions, raw.applied_actions)
+        self.assertEqual(graph.output_label, raw.output_label)
+        self.assertNotIn("g=0.00", graph.filter_chain)
+        self.assertIn("g=0.00", raw.filter_chain)
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "FFmpeg requerido")
+class GraphOptimizerEquivalenceTests(unittest.TestCase):
+    def assert_equivalent(self, chain, output, tolerance=0.0):
+        optimized, optimized_output, report = optimize_filter_graph(chain, output)
+        self.assertTrue(report.changed)
+        reference = _render(chain, output)
+        candidate = _render(optimized, optimized_output)
+        self.assertEqual(len(reference), len(candidate))
+        worst = max(abs(a - b) for a, b in zip(reference, candidate))
+        self.assertLessEqual(worst, tolerance, optimized)
+
+    def test_structural_rewrites_are_bit_exact(self):
+        self.assert_equivalent(
+            "[0:a]anull[a];[a]asplit=3[x][y][z];[x]lowpass=f=200[lx];[y]lowpass=f=200[ly];"
+            "[z]highpass=f=200,aformat=sample_fmts=flt,aformat=sample_fmts=flt[hz];"
+            "[lx][ly][hz]amix=inputs=3:normalize=0[m];[m]anull[out]", "out")
+
+    def test_neutral_gain_removal_is_near_equivalent(self):
+        # Quitar `volume` cambia la negociación de formato (flt/dbl): error < -100 dBFS.
+        self.assert_equivalent(
+            "[0:a]volume=0.00dB[a];[a]lowpass=f=200,equalizer=f=900:width_type=q:width=1:g=0[out]",
+            "out", tolerance=1e-5)
+
+    def test_full_legacy_plan_is_bit_exact(self):
+        actions = migrate_legacy_preprocess_config(
+            band_stats=BANDS, dynamic_eq=True, deesser=True, tone_mid_db=-1.0,
+            tone_low_db=0.5, saturation_enabled=True, saturation_drive_db=2.0,
+            saturation_mix=0.25, glue_enabled=True, autogain_enabled=True,
+            band_adjust_db={"Mid (500-2k Hz)": 0.0},
+        )
+        raw = orchestrator.compile(actions, AudioProcessContext("track", 48000, 2), optimize=False)
+        self.assert_equivalent(raw.filter_chain, raw.output_label)
+
+    def test_cancelled_biquads_are_near_equivalent_at_realistic_gains(self):
+        for gain in (6.0, 12.0):
+            with self.subTest(gain=gain):
+                self.assert_equivalent(
+                    f"[0:a]equalizer=f=1000:width_type=q:width=0.707:g={-gain:.2f}[a];"
+                    f"[a]equalizer=f=1000:width_type=q:width=0.707:g={gain:.2f},"
+                    f"lowshelf=f=120:width_type=q:width=0.707:g={gain:.2f},"
+                    f"lowshelf=f=120:width_type=q:width=0.707:g={-gain:.2f}[b];"
+                    "[b]alimiter=limit=0.9[out]", "out", tolerance=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
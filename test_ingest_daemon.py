@@ -0,0 +1,234 @@
+"""Daemon de ingesta: sondeo por snapshots, debounce de copias parciales, ledger y contadores."""
+
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from benchmark_suite import NUMPY_AVAILABLE, REPO_ROOT, synthesize, write_wav
+from ingest_daemon import IngestDaemon, StatSnapshotWatcher
+
+
+class StatSnapshotWatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = pathlib.Path(self.tmp.name).resolve()
+
+    def test_a_file_is_emitted_once_its_size_stops_changing(self):
+        watcher = StatSnapshotWatcher([self.root], settle_s=1.0, stable_polls=2)
+        track = self.root / "track.wav"
+        track.write_bytes(b"a" * 10)
+        (self.root / "notas.txt").write_bytes(b"x")
+        (self.root / ".parcial.wav").write_bytes(b"x")
+
+        self.assertEqual(watcher.poll(now=0.0), [])
+        self.assertEqual(watcher.poll(now=0.5), [])
+        with track.open("ab") as handle:  # la copia sigue creciendo: reinicia la espera
+            handle.write(b"b" * 10)
+        self.assertEqual(watcher.poll(now=1.0), [])
+        self.assertEqual(watcher.pending, 1)
+        self.assertEqual(watcher.poll(now=1.5), [])
+        self.assertEqual(watcher.poll(now=2.0), [track])
+        self.assertEqual(watcher.poll(now=9.0), [])
+        self.assertEqual(watcher.pending, 0)
+
+        os.utime(track, ns=(0, 12345))  # reemplazado por otra versión
+        for now in (10.0, 10.5, 11.0):
+            ready = watcher.poll(now=now)
+        self.assertEqual(ready, [track])
+
+    def test_output_folder_and_processed_versions_are_skipped(self):
+        done = self.root / "hecho.wav"
+        done.write_bytes(b"a" * 4)
+        (self.root / "out").mkdir()
+        (self.root / "out" / "O-M-A - hecho.wav").write_bytes(b"a" * 4)
+        stat = done.stat()
+        watcher = StatSnapshotWatcher(
+            [self.root], recursive=True, settle_s=0.0, stable_polls=1, exclude=[self.root / "out"],
+            processed={str(done.resolve()): (stat.st_size, stat.st_mtime_ns)},
+        )
+        self.assertEqual(watcher.snapshot(), {str(done.resolve()): (stat.st_size, stat.st_mtime_ns)})
+        watcher.poll(now=0.0)
+        self.assertEqual(watcher.poll(now=1.0), [])
+
+
+class IngestDaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.inbox = pathlib.Path(self.tmp.name) / "entrada"
+        self.output = pathlib.Path(self.tmp.name) / "salida"
+        self.inbox.mkdir()
+
+    def daemon(self):
+        return IngestDaemon([self.inbox], self.output, settle_s=0.0, stable_polls=1, batch_size=2, pool_workers=1)
+
+    def test_batches_update_the_ledger_and_counters(self):
+        for name in ("a.wav", "b.wav", "c.wav"):
+            (self.inbox / name).write_bytes(b"a" * 8)
+        daemon = self.daemon()
+        batches = []
+
+        def fake_run(engine):
+            batches.append([path.name for path in engine.files])
+            results = [{"file": path.name, "source": str(path.resolve())} for path in engine.files if path.name != "c.wav"]
+            engine.finished.emit("ok", results)
+
+        with patch("batch_engine.BatchEngine.run", fake_run):
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), 3)
+            self.assertEqual(daemon.stats()["queue_depth"], 3)
+            while not daemon._queue.empty():
+                daemon.process_batch(daemon._next_batch(0.0))
+        daemon.pool.close(wait=True)
+
+        self.assertEqual(batches, [["a.wav", "b.wav"], ["c.wav"]])
+        stats = daemon.stats()
+        self.assertEqual(
+            {key: stats[key] for key in ("discovered", "processed", "failed", "batches", "queue_depth", "in_flight")},
+            {"discovered": 3, "processed": 2, "failed": 1, "batches": 2, "queue_depth": 0, "in_flight": 0},
+        )
+        ledger = json.loads(daemon.ledger_path.read_text(encoding="utf-8"))
+        self.assertEqual(
+            {pathlib.Path(path).name: entry["status"] for path, entry in ledger.items()},
+            {"a.wav": "done", "b.wav": "done", "c.wav": "failed"},
+        )
+        self.assertTrue(daemon.stats_path.exists())
+
+        restarted = self.daemon()  # reinicio: sólo se reintenta el fallido
+        restarted.poll_once()
+        self.assertEqual(restarted.poll_once(), 1)
+        self.assertEqual(restarted._queue.get_nowait()[0].name, "c.wav")
+        restarted.pool.close(wait=True)
+
+    def test_a_corrupt_file_does_not_fail_the_rest_of_its_batch(self):
+        for name in ("a.wav", "roto.wav", "c.wav"):
+            (self.inbox / name).write_bytes(b"a" * 8)
+        daemon = IngestDaemon([self.inbox], self.output, settle_s=0.0, stable_polls=1, batch_size=3, pool_workers=1)
+        runs = []
+
+        def fake_run(engine):
+            # Como BatchEngine: el primer archivo que falla aborta el lote sin `finished`.
+            runs.append([path.name for path in engine.files])
+            results = []
+            for path in engine.files:
+                if path.name == "roto.wav":
+                    engine.error.emit(f"Error procesando {path.name}: moov atom not found")
+                    return
+                results.append({"file": path.name, "source": str(path.resolve())})
+            engine.finished.emit("ok", results)
+
+        with patch("batch_engine.BatchEngine.run", fake_run):
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), 3)
+            daemon.process_batch(daemon._next_batch(0.0))
+        daemon.pool.close(wait=True)
+
+        self.assertEqual(runs, [["a.wav", "c.wav", "roto.wav"], ["a.wav"], ["c.wav"], ["roto.wav"]])
+        ledger = json.loads(daemon.ledger_path.read_text(encoding="utf-8"))
+        by_name = {pathlib.Path(path).name: entry for path, entry in ledger.items()}
+        self.assertEqual({name: entry["status"] for name, entry in by_name.items()},
+                         {"a.wav": "done", "c.wav": "done", "roto.wav": "failed"})
+        self.assertIn("moov atom", by_name["roto.wav"]["error"])
+        self.assertEqual((daemon.stats()["processed"], daemon.stats()["failed"]), (2, 1))
+
+    def test_same_named_files_in_subfolders_are_matched_by_path(self):
+        for folder in ("x", "y"):
+            (self.inbox / folder).mkdir()
+            (self.inbox / folder / "take.wav").write_bytes(b"a" * 8)
+        messages = []
+        daemon = IngestDaemon(
+            [self.inbox], self.output, settle_s=0.0, stable_polls=1, recursive=True, pool_workers=1,
+            log=messages.append,
+        )
+
+        def fake_run(engine):
+            done = [path for path in engine.files if path.parent.name == "x"]
+            engine.finished.emit("ok", [{"file": path.name, "source": str(path.resolve())} for path in done])
+
+        with patch("batch_engine.BatchEngine.run", fake_run):
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), 2)
+            daemon.process_batch(daemon._next_batch(0.0))
+        daemon.pool.close(wait=True)
+
+        self.assertEqual([message for message in messages if "nuevo(s)" in message], [
+            "Ingesta: 2 archivo(s) nuevo(s); en cola 2.",
+        ])
+        ledger = json.loads(daemon.ledger_path.read_text(encoding="utf-8"))
+        self.assertEqual(
+            {pathlib.Path(path).parent.name: entry["status"] for path, entry in ledger.items()},
+            {"x": "done", "y": "failed"},
+        )
+
+    def test_consumer_survives_a_failing_batch(self):
+        for name in ("a.wav", "b.wav"):
+            (self.inbox / name).write_bytes(b"a" * 8)
+        messages = []
+        daemon = IngestDaemon(
+            [self.inbox], self.output, settle_s=0.0, stable_polls=1, batch_size=1, pool_workers=1,
+            poll_interval=0.05, log=messages.append,
+        )
+        self.addCleanup(daemon.pool.close, True)
+        handled = []
+
+        def flaky(batch):
+            handled.append(batch[0][0].name)
+            if len(handled) == 1:
+                raise OSError("disco lleno")
+            with daemon._lock:
+                daemon._outstanding -= len(batch)
+
+        daemon.poll_once()
+        daemon.poll_once()
+        with patch.object(daemon, "process_batch", side_effect=flaky):
+            consumer = threading.Thread(target=daemon._consume)
+            consumer.start()
+            deadline = time.monotonic() + 5.0
+            while not daemon._idle() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            daemon.stop()
+            consumer.join(5.0)
+
+        self.assertEqual(handled, ["a.wav", "b.wav"])
+        self.assertTrue(daemon._idle())
+        self.assertTrue(any("disco lleno" in message for message in messages))
+
+        # Sondeo y consumidor publican a la vez: cada escritura usa su propio temporal.
+        threads = [threading.Thread(target=daemon.poll_once) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(json.loads(daemon.stats_path.read_text(encoding="utf-8"))["failed"], 0)
+        self.assertEqual(list(daemon.stats_path.parent.glob("*.tmp")), [])
+
+    @unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "FFmpeg requerido")
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy requerido para sintetizar audio")
+    def test_main_watch_masters_new_files_with_warm_workers(self):
+        write_wav(self.inbox / "drums.wav", synthesize("drums", 2.0, 44100), 44100)
+        preset = self.inbox.parent / "preset.json"
+        preset.write_text(json.dumps({"target_lufs": -16.0, "mts_enabled": False}), encoding="utf-8")
+        env = {**os.environ, "FINISHER_AUDIO_ENGINE": "python", "TONEFINISH_RENDER_CACHE": "0"}
+        completed = subprocess.run(
+            [sys.executable, "main.py", "watch", str(self.inbox), "--output-dir", str(self.output),
+             "--preset", str(preset), "--poll-interval", "0.2", "--settle", "0.2", "--exit-when-idle"],
+            cwd=REPO_ROOT, capture_output=True, text=True, env=env, timeout=600, check=False,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+        self.assertIn("proceso(s) de análisis listos", completed.stderr)
+        self.assertTrue((self.output / "O-M-A - drums.wav").exists())
+        stats = json.loads((self.output / "log" / "ingest_stats.json").read_text(encoding="utf-8"))
+        self.assertEqual((stats["processed"], stats["failed"], stats["queue_depth"]), (1, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
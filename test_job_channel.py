@@ -0,0 +1,109 @@
+"""Pruebas del canal push de eventos entre el runner de lote y la UI."""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from job_channel import ProgressChannel, ProgressChannelClient, progress_channel_enabled
+from ui.workers import CliBatchWorker
+
+
+@unittest.skipUnless(progress_channel_enabled(), "AF_UNIX requerido")
+class ProgressChannelTests(unittest.TestCase):
+    def test_events_and_commands_flow_both_ways(self):
+        channel = ProgressChannel.open()
+        self.addCleanup(channel.close)
+        commands = []
+        client = ProgressChannelClient.connect(channel.path, on_message=commands.append)
+        self.assertEqual(channel.wait(1.0), [])  # accept
+        self.assertTrue(channel.connected)
+
+        client.send({"current": 1, "message": "a.wav"})
+        client.send({"processing_percent": 12.5})
+        received = []
+        deadline = time.monotonic() + 2.0
+        while len(received) < 2 and time.monotonic() < deadline:
+            received.extend(channel.wait(0.5))
+        self.assertEqual(received, [{"current": 1, "message": "a.wav"}, {"processing_percent": 12.5}])
+
+        self.assertTrue(channel.send({"command": "cancel"}))
+        deadline = time.monotonic() + 2.0
+        while not commands and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(commands, [{"command": "cancel"}])
+
+        client.close()
+        channel.wait(1.0)
+        self.assertTrue(channel.peer_closed)
+
+    def test_wake_interrupts_a_long_wait(self):
+        channel = ProgressChannel.open()
+        self.addCleanup(channel.close)
+        threading.Timer(0.1, channel.wake).start()
+        started = time.monotonic()
+        channel.wait(30.0)
+        self.assertLess(time.monotonic() - started, 5.0)
+
+
+@unittest.skipUnless(progress_channel_enabled(), "AF_UNIX requerido")
+class CliBatchWorkerChannelTests(unittest.TestCase):
+    def _worker(self):
+        worker = CliBatchWorker({"files": ["a.wav", "b.wav"]}, poll_interval_sec=0.2)
+        worker.finished, worker.error, worker.progress, worker.processing_progress = Mock(), Mock(), Mock(), Mock()
+        return worker
+
+    def test_pushed_events_replace_status_polling(self):
+        def fake_runner(payload, commands):
+            client = ProgressChannelClient.connect(payload["progress_socket"], on_message=commands.append)
+            for current in (1, 2):
+                time.sleep(0.05)
+                client.send({"state": "running", "current": current, "total": 2, "message": f"{current}/2"})
+            client.send({"state": "done", "result_message": "Lote completado: 2 archivos.", "results": ["a", "b"]})
+            client.close()
+
+        def fake_start(payload):
+            threading.Thread(target=fake_runner, args=(payload, []), daemon=True).start()
+            return {"job_id": "job_1"}
+
+        status = Mock(return_value={"job_id": "job_1", "state": "queued", "total": 2, "log_offset": 0})
+        worker = self._worker()
+        with patch("ui.workers.spasm_batch_start", side_effect=fake_start), patch("ui.workers.spasm_batch_status", status):
+            worker.run()
+        worker.finished.emit.assert_called_once_with("Lote completado: 2 archivos.", ["a", "b"])
+        self.assertLessEqual(status.call_count, 2)
+
+    def test_cancel_reaches_the_runner_immediately(self):
+        commands = []
+        connected = threading.Event()
+
+        def fake_runner(payload):
+            client = ProgressChannelClient.connect(payload["progress_socket"], on_message=commands.append)
+            client.send({"state": "running", "current": 0, "total": 2})
+            connected.set()
+
+        def fake_start(payload):
+            threading.Thread(target=fake_runner, args=(payload,), daemon=True).start()
+            return {"job_id": "job_1"}
+
+        worker = self._worker()
+        with patch("ui.workers.spasm_batch_start", side_effect=fake_start), \
+                patch("ui.workers.spasm_batch_status", return_value={"state": "running", "log_offset": 0}), \
+                patch("ui.workers.spasm_batch_cancel") as cancel_cli:
+            runner = threading.Thread(target=worker.run)
+            runner.start()
+            self.assertTrue(connected.wait(2.0))
+            time.sleep(0.2)
+            started = time.monotonic()
+            worker.cancel()
+            runner.join(5.0)
+            elapsed = time.monotonic() - started
+        self.assertFalse(runner.is_alive())
+        self.assertLess(elapsed, 1.0)
+        self.assertIn({"command": "cancel"}, commands)
+        cancel_cli.assert_called()
+        worker.error.emit.assert_called_with("Proceso cancelado por el usuario.")
+
+
+if __name__ == "__main__":
+    unittest.main()
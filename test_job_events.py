@@ -0,0 +1,83 @@
+"""Pruebas del log de eventos y snapshots del estado de trabajos de lote."""
+
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from job_events import JobStatusTail, JobStatusWriter, events_path_for, read_job_events, read_job_status
+from ui.workers import CliBatchWorker
+
+
+class JobEventLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.status_path = pathlib.Path(self.tmp.name) / "job_1.status.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ticks_append_events_and_the_snapshot_is_throttled(self):
+        writer = JobStatusWriter(self.status_path, {"job_id": "job_1", "state": "running", "results": None},
+                                 snapshot_interval=3600)
+        for tick in range(200):
+            writer.update(processing_percent=tick / 2.0, processing_time=f"00:00:{tick % 60:02d}")
+        snapshot = json.loads(self.status_path.read_text(encoding="utf-8"))
+        self.assertNotIn("processing_percent", snapshot)
+        self.assertEqual(len(events_path_for(self.status_path).read_bytes().splitlines()), 201)
+
+        status = read_job_status(self.status_path)
+        self.assertEqual(status["processing_percent"], 99.5)
+        self.assertEqual(status["log_offset"], writer.offset)
+
+        writer.update(state="done", results=[{"output": "a.wav"}])
+        snapshot = json.loads(self.status_path.read_text(encoding="utf-8"))
+        self.assertEqual((snapshot["state"], snapshot["log_offset"]), ("done", writer.offset))
+        writer.close()
+
+    def test_readers_tail_from_an_offset_and_skip_partial_lines(self):
+        writer = JobStatusWriter(self.status_path, {"job_id": "job_1", "state": "running"}, snapshot_interval=3600)
+        tail = JobStatusTail(self.status_path)
+        self.assertEqual(tail.poll()["state"], "running")
+        offset = tail.state["log_offset"]
+
+        writer.update(current=1, message="uno")
+        with open(events_path_for(self.status_path), "ab") as fh:
+            fh.write(b'{"current": 2')  # escritura a medio camino
+        events, next_offset = read_job_events(self.status_path, offset)
+        self.assertEqual(events, [{"current": 1, "message": "uno"}])
+        self.assertEqual(tail.poll()["current"], 1)
+        self.assertEqual(tail.state["log_offset"], next_offset)
+        writer.close()
+
+
+class CliBatchWorkerTailTests(unittest.TestCase):
+    def test_worker_polls_deltas_after_the_first_full_status(self):
+        responses = [
+            {"job_id": "job_1", "state": "running", "message": "Iniciando...", "current": 0, "total": 2, "log_offset": 10},
+            {"events": [{"current": 1, "message": "a.wav"}, {"processing_percent": 50.0}], "log_offset": 40},
+            {"events": [{"state": "done", "result_message": "Lote completado: 2 archivos.", "results": [1, 2]}],
+             "log_offset": 90},
+        ]
+        calls = []
+
+        def fake_status(job_id, offset=None):
+            calls.append(offset)
+            return responses[len(calls) - 1]
+
+        worker = CliBatchWorker({"files": ["a.wav", "b.wav"]}, poll_interval_sec=0.2)
+        worker.finished, worker.error, worker.progress, worker.processing_progress = Mock(), Mock(), Mock(), Mock()
+        with patch("ui.workers.spasm_batch_start", return_value={"job_id": "job_1"}), \
+                patch("ui.workers.spasm_batch_status", side_effect=fake_status), \
+                patch("ui.workers.time.sleep"):
+            worker.run()
+        self.assertEqual(calls, [None, 10, 40])
+        worker.error.emit.assert_not_called()
+        worker.finished.emit.assert_called_once_with("Lote completado: 2 archivos.", [1, 2])
+        worker.processing_progress.emit.assert_called_once_with(50.0, "")
+        self.assertEqual(worker.progress.emit.call_args_list[-1].args, ("a.wav", 1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
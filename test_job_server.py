@@ -0,0 +1,124 @@
+"""Servidor local de trabajos: cola con prioridad, estado/eventos, cancelación y ruteo desde logic_backend."""
+
+import os
+import pathlib
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import logic_backend
+from benchmark_suite import NUMPY_AVAILABLE, synthesize, write_wav
+from job_server import JobServer, JobServerClient
+
+
+class JobServerTests(unittest.TestCase):
+    def setUp(self):
+        # Ruta corta: los sockets UNIX tienen un límite de ~100 bytes.
+        self.dir = pathlib.Path(tempfile.mkdtemp(prefix="tf-js-"))
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.socket = self.dir / "jobs.sock"
+        self.server = JobServer(self.socket, self.dir / "state", workers=0)
+        self.addCleanup(self.server.close)
+        self.client = JobServerClient(self.socket, timeout=5.0)
+        self.ran = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+        def fake_run(engine):
+            self.gate.wait(5.0)
+            names = [path.name for path in engine.files]
+            self.ran.append(names)
+            engine.progress.emit("Analizando...", 1, len(names))
+            engine.finished.emit(f"Lote completado: {len(names)} archivos.", [{"file": name} for name in names])
+
+        patcher = patch("batch_engine.BatchEngine.run", fake_run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_done(self, job_id):
+        return [event.get("state") for event in self.client.events(job_id) if "state" in event][-1]
+
+    def test_queue_runs_by_priority_and_cancels_queued_jobs(self):
+        low = self.server.submit({"files": ["low.wav"]})["job_id"]
+        high = self.server.submit({"files": ["high.wav"], "priority": 5})["job_id"]
+        dropped = self.server.submit({"files": ["dropped.wav"], "priority": 9})["job_id"]
+        same = self.server.submit({"files": ["same.wav"]})["job_id"]
+        with self.assertRaisesRegex(ValueError, "desconocida: targt_lufs"):
+            self.server.submit({"files": ["x.wav"], "targt_lufs": -14})
+
+        self.assertTrue(self.server.cancel(dropped))
+
+        self.server.start()
+        self.assertEqual(stat.S_IMODE(self.socket.stat().st_mode), 0o600)
+        self.assertFalse(self.client.call("batch_cancel", dropped))
+        for job_id in (low, high, same):
+            self.assertEqual(self.wait_done(job_id), "done")
+
+        self.assertEqual(self.ran, [["high.wav"], ["low.wav"], ["same.wav"]])
+        status = self.client.call("batch_status", high)
+        self.assertEqual((status["state"], status["results"]), ("done", [{"file": "high.wav"}]))
+        self.assertEqual(self.client.call("batch_status", dropped)["state"], "cancelled")
+        delta = self.client.call("batch_status", high, status["log_offset"])
+        self.assertEqual(delta, {"events": [], "log_offset": status["log_offset"]})
+        self.assertEqual(self.client.call("server_status")["completed"], 3)
+        self.assertEqual(self.client.call("server_status")["jobs"], 0)
+        # Sin el trabajo en memoria, el stream sale del estado terminal en disco.
+        self.assertEqual(self.wait_done(high), "done")
+        with self.assertRaisesRegex(RuntimeError, "job no encontrado"):
+            self.client.call("batch_status", "../etc/passwd")
+
+        with self.assertRaisesRegex(RuntimeError, "Ya hay un servidor"):
+            JobServer(self.socket, self.dir / "otro", workers=0).start()
+
+    def test_logic_backend_targets_the_server(self):
+        self.server.start()
+        self.gate.clear()
+        with patch.dict(os.environ, {"TONEFINISH_JOB_SERVER": str(self.socket)}), \
+             patch.object(logic_backend, "_call_spasm", side_effect=AssertionError("no debe lanzar el runner")):
+            running = logic_backend.spasm_batch_start({"files": [pathlib.Path("a.wav")]})["job_id"]
+            deadline = time.monotonic() + 5.0
+            while self.client.call("server_status")["running"] != running and time.monotonic() < deadline:
+                time.sleep(0.01)
+            queued = logic_backend.spasm_batch_start({"files": ["b.wav"]})["job_id"]
+            self.assertEqual(logic_backend.spasm_batch_status(queued)["queue_position"], 1)
+            self.assertTrue(logic_backend.spasm_batch_cancel(queued))
+            self.gate.set()
+            self.assertEqual(self.wait_done(running), "done")
+            first = logic_backend.spasm_batch_status(running, 0)
+        self.assertEqual(first["events"][0]["state"], "queued")
+        self.assertEqual(first["events"][-1]["state"], "done")
+        self.assertEqual(self.ran, [["a.wav"]])
+
+
+@unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "FFmpeg requerido")
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy requerido para sintetizar audio")
+class JobServerEndToEndTests(unittest.TestCase):
+    def test_server_masters_a_job_with_its_warm_pool(self):
+        tmp = pathlib.Path(tempfile.mkdtemp(prefix="tf-js-"))
+        self.addCleanup(shutil.rmtree, tmp, True)
+        write_wav(tmp / "drums.wav", synthesize("drums", 2.0, 44100), 44100)
+        server = JobServer(tmp / "jobs.sock", tmp / "state", workers=1)
+        with patch.dict(os.environ, {"FINISHER_AUDIO_ENGINE": "python", "TONEFINISH_RENDER_CACHE": "0"}):
+            server.start()
+            try:
+                self.assertEqual(len(server.worker_pids), 1)
+                client = JobServerClient(server.socket_path)
+                job_id = client.call("batch_start", {
+                    "files": [str(tmp / "drums.wav")], "output_dir": str(tmp / "out"),
+                    "target_lufs": -16.0, "mts_enabled": False,
+                })["job_id"]
+                events = list(client.events(job_id))
+            finally:
+                server.close()
+        self.assertEqual(events[-1]["state"], "done", events[-1])
+        self.assertTrue(any(event.get("state") == "running" for event in events))
+        self.assertTrue((tmp / "out" / "O-M-A - drums.wav").exists())
+        self.assertFalse(server.socket_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
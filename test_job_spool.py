@@ -0,0 +1,144 @@
+"""Pruebas de la cola de trabajos compartida (spool) con leases por archivo."""
+
+import json
+import os
+import pathlib
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from benchmark_suite import NUMPY_AVAILABLE, synthesize, write_wav
+from job_spool import JobSpool, run_spool_runner
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+
+
+def record_item(lease):
+    time.sleep(0.15)
+    return [{"file": lease.file, "runner": lease.runner_id, "pid": os.getpid()}]
+
+
+class JobSpoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spool = JobSpool(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_several_runner_processes_share_one_job(self):
+        files = [f"/audio/track_{index:02d}.wav" for index in range(12)]
+        job_id = self.spool.submit({"files": files, "target_lufs": -14.0})
+        self.assertEqual(self.spool.status(job_id)["state"], "queued")
+
+        runners = [
+            subprocess.Popen(
+                [sys.executable, "-m", "job_spool", self.tmp.name, "--handler", "test_job_spool:record_item",
+                 "--runner-id", f"host{index}", "--exit-when-idle"],
+                cwd=ROOT, stdout=subprocess.PIPE, text=True,
+            )
+            for index in range(3)
+        ]
+        processed = [json.loads(runner.communicate(timeout=60)[0])["processed"] for runner in runners]
+
+        status = self.spool.status(job_id)
+        self.assertEqual(sum(processed), len(files))
+        self.assertEqual((status["state"], status["progress"], status["current"]), ("done", 100.0, 12))
+        self.assertEqual([result["file"] for result in status["results"]], files)
+        self.assertGreater(len({result["runner"] for result in status["results"]}), 1)
+        self.assertEqual(status["result_message"], "Lote completado: 12 archivos.")
+
+    def test_expired_leases_are_retried_then_reported(self):
+        job_id = self.spool.submit({"files": ["a.wav"]}, lease_ttl=0.2, max_attempts=2)
+        stale = self.spool.claim("host-a")
+        self.assertEqual(self.spool.status(job_id)["runners"], ["host-a"])
+        self.assertIsNone(self.spool.claim("host-b"))
+
+        time.sleep(0.3)
+        retried = self.spool.claim("host-b")
+        self.assertEqual((retried.index, retried.attempts), (0, 1))
+        self.assertFalse(stale.heartbeat())
+
+        time.sleep(0.3)
+        self.assertIsNone(self.spool.claim("host-c"))
+        status = self.spool.status(job_id)
+        self.assertEqual(status["state"], "error")
+        self.assertIn("lease vencido", status["error"])
+
+    def test_a_reassigned_lease_cannot_publish_its_result(self):
+        job_id = self.spool.submit({"files": ["a.wav"]}, lease_ttl=0.2)
+        stale = self.spool.claim("host-a")
+        time.sleep(0.3)
+        retried = self.spool.claim("host-b")
+
+        self.assertFalse(stale.complete([{"file": "a.wav", "runner": "host-a"}]))
+        self.assertTrue(stale.lost)
+        self.assertEqual(list((self.spool.job_dir(job_id) / "done").glob("*.json")), [])
+
+        self.assertTrue(retried.complete([{"file": "a.wav", "runner": "host-b"}]))
+        status = self.spool.status(job_id)
+        self.assertEqual((status["state"], status["results"]), ("done", [{"file": "a.wav", "runner": "host-b"}]))
+        self.assertEqual(status["runners"], [])
+
+    def test_runner_does_not_count_items_whose_lease_was_lost(self):
+        self.spool.submit({"files": ["a.wav", "b.wav"]})
+
+        def handler(lease):
+            if lease.index == 0:
+                lease.path.unlink()  # como si otro runner lo hubiera reasignado
+            return [{"file": lease.file}]
+
+        self.assertEqual(run_spool_runner(self.spool, handler, runner_id="local", exit_when_idle=True), 1)
+
+    @unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "FFmpeg requerido")
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy requerido para sintetizar audio")
+    def test_spool_runner_shares_one_pool_and_skips_batch_reports(self):
+        output = pathlib.Path(self.tmp.name) / "out"
+        sources = []
+        for name in ("a", "b"):
+            path = pathlib.Path(self.tmp.name) / f"{name}.wav"
+            write_wav(path, synthesize("drums", 1.0, 44100), 44100)
+            sources.append(str(path))
+        job_id = self.spool.submit({
+            "files": sources, "output_dir": str(output), "target_lufs": -16.0, "mts_enabled": False,
+        })
+        runner = runpy.run_path(str(ROOT / "scripts" / "spasm_batch_job_runner.py"), run_name="runner")
+        env = {"FINISHER_AUDIO_ENGINE": "python", "TONEFINISH_RENDER_CACHE": "0", "TONEFINISH_PROCESS_POOL_WORKERS": "0"}
+        with patch.dict(os.environ, env), \
+             patch("batch_engine.BatchProcessPool", side_effect=AssertionError("pool por archivo")):
+            self.assertEqual(runner["run_spool"]([self.tmp.name, "--runner-id", "solo", "--exit-when-idle"]), 0)
+
+        status = self.spool.status(job_id)
+        self.assertEqual((status["state"], status["current"]), ("done", 2), status.get("error"))
+        self.assertTrue((output / "O-M-A - a.wav").exists())
+        reports = [path.name for path in (output / "log").glob("batch_*")]
+        self.assertEqual(reports, [])
+
+    def test_handler_errors_and_cancellation(self):
+        job_id = self.spool.submit({"files": ["a.wav", "b.wav"]})
+
+        def handler(lease):
+            if lease.index == 1:
+                raise RuntimeError("ffmpeg falló")
+            return [{"file": lease.file}]
+
+        self.assertEqual(run_spool_runner(self.spool, handler, runner_id="local", exit_when_idle=True), 2)
+        status = self.spool.status(job_id)
+        self.assertEqual((status["state"], status["items"]["error"]), ("error", 1))
+        self.assertEqual(status["error"], "b.wav: ffmpeg falló")
+        self.assertEqual(status["results"], [{"file": "a.wav"}])
+
+        cancelled = self.spool.submit({"files": ["c.wav"]})
+        self.assertTrue(self.spool.cancel(cancelled))
+        self.assertIsNone(self.spool.claim("local"))
+        self.assertEqual(self.spool.status(cancelled)["state"], "cancelled")
+
+
+if __name__ == "__main__":
+    unittest.main()
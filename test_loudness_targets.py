@@ -0,0 +1,96 @@
+"""Pruebas del render multi-objetivo de loudness con preproceso compartido."""
+
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import audio_processing
+from alternative_tools import analyze_loudness_ffmpeg
+from batch_engine import _resolve_batch_loudness_targets, engine_from_settings
+
+
+STATS = {"input_i": -20.0, "input_tp": -6.0, "input_lra": 3.0, "input_thresh": -30.0, "target_offset": 0.0}
+
+
+class LoudnessTargetNamingTests(unittest.TestCase):
+    def test_targets_are_named_after_the_master_output(self):
+        resolved = _resolve_batch_loudness_targets(
+            [{"target_lufs": -16.0}, {"target_lufs": -9, "true_peak": -0.5, "suffix": " - Club"}],
+            output_path=pathlib.Path("out/A - B.wav"),
+            temp_dir=pathlib.Path("tmp"),
+        )
+        self.assertEqual([final.name for _target, final in resolved], ["A - B (-16 LUFS).wav", "A - B - Club.wav"])
+        self.assertEqual(resolved[1][0], {"path": str(pathlib.Path("tmp/A - B - Club.wav")), "target_lufs": -9.0, "true_peak": -0.5})
+        with self.assertRaises(ValueError):
+            _resolve_batch_loudness_targets(
+                [{"target_lufs": -14}, {"target_lufs": -14}], output_path=pathlib.Path("A.wav"), temp_dir=pathlib.Path("t"),
+            )
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "FFmpeg requerido")
+class SharedPreprocessRenderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tmp.name)
+        self.source = self.root / "source.wav"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-f", "lavfi",
+            "-i", "anoisesrc=color=pink:seed=9:amplitude=0.1:r=48000:d=3,aformat=channel_layouts=stereo",
+            str(self.source),
+        ], check=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch.dict("os.environ", {"TONEFINISH_RENDER_CACHE": "0"})
+    def test_preprocess_runs_once_and_every_target_gets_its_audit(self):
+        targets = [
+            {"path": str(self.root / f"master_{abs(lufs)}.wav"), "target_lufs": lufs}
+            for lufs in (-14.0, -16.0, -11.0)
+        ]
+        with patch("audio_processing.get_audio_info", return_value={"sample_rate": 48000, "channels": 2, "duration": 3.0}), \
+                patch("audio_processing.run_ffmpeg", wraps=audio_processing.run_ffmpeg) as run:
+            results = audio_processing.render_loudness_targets(
+                self.source, targets, STATS, overwrite=True, max_workers=3,
+                tone_low_db=1.5, master_limiter_enabled=True, output_bit_depth="24", output_format="wav",
+            )
+        graphs = [call.args[0][call.args[0].index("-filter_complex") + 1] for call in run.call_args_list
+                  if "-filter_complex" in call.args[0]]
+        self.assertEqual(sum("lowshelf" in graph or "bass=" in graph for graph in graphs), 1)
+        self.assertEqual(sum("loudnorm" in graph for graph in graphs), 3)
+        self.assertEqual([item["target_lufs"] for item in results], [-14.0, -16.0, -11.0])
+        for item in results:
+            measured = analyze_loudness_ffmpeg(str(item["path"]))
+            self.assertAlmostEqual(measured.input_i, item["target_lufs"], delta=1.0)
+            audit = item["execution_audit"]
+            self.assertEqual(audit["checks"]["loudness"]["target_lufs"], item["target_lufs"])
+            self.assertIn(audit["status"], {"passed", "warning"})
+
+    @patch.dict("os.environ", {"FINISHER_AUDIO_ENGINE": "python", "TONEFINISH_RENDER_CACHE": "0"})
+    def test_batch_master_shares_the_preprocess_with_its_targets(self):
+        engine = engine_from_settings({
+            "output_dir": str(self.root / "out"), "target_lufs": -14.0, "mts_enabled": False,
+            "loudness_targets": [{"target_lufs": -16.0}],
+        }, [self.source])
+        outcome = {}
+        engine.finished.connect(lambda _message, results: outcome.update(results=results))
+        engine.error.connect(lambda message: outcome.update(error=message))
+        with patch("batch_engine.normalize_audio", side_effect=AssertionError("el master no debe preprocesar aparte")), \
+                patch("audio_processing.normalize_audio", wraps=audio_processing.normalize_audio) as render:
+            engine.run()
+        self.assertNotIn("error", outcome)
+        outputs = [pathlib.Path(call.args[1]).name for call in render.call_args_list]
+        self.assertEqual(outputs.count("preprocess.wav"), 1)
+        self.assertEqual(len(outputs), 3)
+        (result,) = outcome["results"]
+        self.assertEqual([item["file"] for item in result["loudness_targets"]], ["O-M-A - source (-16 LUFS).wav"])
+        for name, lufs in (("O-M-A - source.wav", -14.0), ("O-M-A - source (-16 LUFS).wav", -16.0)):
+            measured = analyze_loudness_ffmpeg(str(self.root / "out" / name))
+            self.assertAlmostEqual(measured.input_i, lufs, delta=1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Pruebas del árbol de crossover compartido por las regiones multibanda."""
+
+import array
+import math
+import shutil
+import subprocess
+import unittest
+
+from processes.contracts import AudioFunctionAction, AudioProcessContext
+from processes.crossover import band_segments, build_crossover_tree, crossover_frequencies
+from processes.multiband import DEFAULT_BAND_CONFIG, MultibandProcess
+from processes.orchestrator import orchestrator
+
+
+def _region(enabled_mid=True):
+    return [
+        AudioFunctionAction("audio.multiband.eq", target="bass", params={"gain_db": -1.0}),
+        AudioFunctionAction("audio.multiband.eq", target="mid", params={"gain_db": 0.5}, enabled=enabled_mid),
+        AudioFunctionAction("audio.multiband.saturation", target="low_mid", params={"drive_db": 1.0, "mix": 0.2, "type": "Tape"}),
+        AudioFunctionAction("audio.multiband.limiter", target="air", params={"ceiling_db": -3.0, "release_ms": 50.0}),
+        AudioFunctionAction("audio.multiband.stereo_width", target="high_mid", params={"width": 1.1}),
+    ]
+
+
+def _rms_db(source: str, chain: str, output: str, sample_rate: int = 48000) -> float:
+    result = subprocess.run([
+        "ffmpeg", "-v", "error", "-f", "lavfi", "-i", source,
+        "-filter_complex", chain, "-map", f"[{output}]", "-ar", str(sample_rate), "-f", "f32le", "-",
+    ], capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr.decode("utf-8", "replace"))
+    samples = array.array("f")
+    samples.frombytes(result.stdout)
+    tail = samples[len(samples) // 2:]
+    return 10 * math.log10(sum(value * value for value in tail) / len(tail))
+
+
+class CrossoverTreeTests(unittest.TestCase):
+    def test_contiguous_band_plugins_share_one_tree_and_one_recombine(self):
+        graph = orchestrator.compile(_region(enabled_mid=False), AudioProcessContext("track", 48000, 2))
+        self.assertEqual(graph.filter_chain.count("acrossover="), 1)
+        self.assertEqual(graph.filter_chain.count("amix=inputs=6"), 1)
+        self.assertNotIn("highpass", graph.filter_chain)
+        self.assertNotIn("lowpass", graph.filter_chain)
+        self.assertEqual(len(graph.applied_actions), 4)
+
+    def test_untouched_neighbour_bands_share_one_segment(self):
+        self.assertEqual(band_segments({3}, 6), [(0, 1, 2), (3,), (4, 5)])
+        self.assertEqual(band_segments({0, 5}, 6), [(0,), (1, 2, 3, 4), (5,)])
+        graph = orchestrator.compile(
+            [AudioFunctionAction("audio.multiband.eq", target="mid", params={"gain_db": -1.0})],
+            AudioProcessContext("track", 48000, 2),
+        )
+        self.assertIn("acrossover=split='500 2000'", graph.filter_chain)
+        self.assertIn("amix=inputs=3", graph.filter_chain)
+
+    def test_auto_band_gain_offsets_the_mean_band_adjust(self):
+        legacy = MultibandProcess()
+        adjust = {"Bass (60-250 Hz)": 3.0, "Mid (500-2k Hz)": 3.0}
+        chain, output = legacy.build_filter("0:a", band_adjust_db=adjust, auto_band_gain=True)
+        self.assertEqual(output, "mbg")
+        self.assertIn("[mb]volume=-1.00dB[mbg]", chain)
+        chain, output = legacy.build_filter("0:a", band_adjust_db={"Air (6k-16k Hz)": 60.0}, auto_band_gain=True)
+        self.assertIn("volume=-4.00dB[mbg]", chain)  # acotado a max_adjust_db
+        self.assertEqual(legacy.build_filter("0:a", band_adjust_db=adjust)[1], "mb")
+        self.assertEqual(legacy.build_filter("0:a", auto_band_gain=True)[1], "mb")
+
+    def test_cuts_above_nyquist_become_silent_bands(self):
+        cuts = crossover_frequencies(DEFAULT_BAND_CONFIG)
+        self.assertEqual(cuts, [60.0, 250.0, 500.0, 2000.0, 6000.0])
+        chain = build_crossover_tree("in", [f"b{i}" for i in range(6)], cuts, sample_rate=8000)
+        self.assertIn("split='60 250 500 2000'", chain)
+        self.assertIn("volume=0[b5]", chain)
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "FFmpeg requerido")
+class CrossoverTreeRenderTests(unittest.TestCase):
+    def test_unprocessed_bands_sum_flat_at_every_crossover(self):
+        tree = build_crossover_tree("0:a", [f"b{i}" for i in range(6)], crossover_frequencies(DEFAULT_BAND_CONFIG))
+        chain = f"{tree};[b0][b1][b2][b3][b4][b5]amix=inputs=6:normalize=0[out]"
+        for frequency in (60, 250, 375, 500, 2000, 6000):
+            with self.subTest(frequency=frequency):
+                source = f"sine=f={frequency}:r=48000:d=1,aformat=channel_layouts=stereo"
+                reference = _rms_db(source, "[0:a]anull[out]", "out")
+                self.assertAlmostEqual(_rms_db(source, chain, "out"), reference, delta=0.05)
+
+    def test_region_and_legacy_builders_execute_at_low_and_high_rates(self):
+        for sample_rate in (8000, 48000):
+            with self.subTest(sample_rate=sample_rate):
+                source = f"anoisesrc=color=pink:seed=3:amplitude=0.2:r={sample_rate}:d=0.5,aformat=channel_layouts=stereo"
+                graph = orchestrator.compile(_region(), AudioProcessContext("track", sample_rate, 2))
+                self.assertTrue(math.isfinite(_rms_db(source, graph.filter_chain, graph.output_label, sample_rate)))
+        legacy = MultibandProcess()
+        chain, output = legacy.build_filter("0:a", band_adjust_db={"Mid (500-2k Hz)": -1.0})
+        self.assertEqual(chain.count("acrossover="), 1)
+        source = "anoisesrc=color=pink:seed=3:amplitude=0.2:r=48000:d=0.5,aformat=channel_layouts=stereo"
+        self.assertTrue(math.isfinite(_rms_db(source, chain, output)))
+
+
+if __name__ == "__main__":
+    unittest.main()
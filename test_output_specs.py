@@ -0,0 +1,123 @@
+"""Pruebas de entregables multi-formato desde un único render."""
+
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+import wave
+from unittest.mock import patch
+
+import audio_processing
+from audio_tools import extract_loudnorm_stats
+from filter_graph_builder import FilterGraphBuilder
+from batch_engine import _resolve_batch_deliverables
+
+
+STATS = {"input_i": -20.0, "input_tp": -6.0, "input_lra": 3.0, "input_thresh": -30.0, "target_offset": 0.0}
+METER = '{{\n "input_i" : "{i}",\n "input_tp" : "{tp}",\n "input_lra" : "2.00",\n "input_thresh" : "-24.00",\n "target_offset" : "0.00"\n}}\n'
+
+
+def _flac_format(path: pathlib.Path) -> tuple[int, int]:
+    """Sample rate y bits por muestra desde el bloque STREAMINFO."""
+    data = path.read_bytes()[:22]
+    sample_rate = (data[18] << 12) | (data[19] << 4) | (data[20] >> 4)
+    bits = (((data[20] & 1) << 4) | (data[21] >> 4)) + 1
+    return sample_rate, bits
+
+
+class DeliverableParsingTests(unittest.TestCase):
+    def test_meter_blocks_leave_the_master_block_last(self):
+        master = "[Parsed_loudnorm_0 @ 0x1]\n" + METER.format(i="-14.50", tp="-1.50")
+        stderr = (
+            master
+            + "[loudnorm@tf_deliverable_1 @ 0x2] \n" + METER.format(i="-14.20", tp="-1.30")
+            + "[loudnorm@tf_deliverable_0 @ 0x3] \n" + METER.format(i="-14.10", tp="-1.20")
+        )
+        deliverables = [{"path": pathlib.Path("a.flac")}, {"path": pathlib.Path("b (x).mp3")}]
+        log = audio_processing._split_deliverable_meters(stderr, deliverables)
+        self.assertEqual(extract_loudnorm_stats(log)["input_i"], -14.5)
+        self.assertEqual(audio_processing.parse_deliverable_stats(log), {
+            "a.flac": {"output_i": -14.1, "output_tp": -1.2, "output_lra": 2.0},
+            "b (x).mp3": {"output_i": -14.2, "output_tp": -1.3, "output_lra": 2.0},
+        })
+        self.assertLess(log.index("Entregable 0"), log.index("Entregable 1"))
+
+    def test_ffmpeg_6_meter_prefix_and_stray_blocks_are_split_out(self):
+        master = "[Parsed_loudnorm_0 @ 0x1]\n" + METER.format(i="-14.50", tp="-1.50")
+        stderr = (
+            "[tf_deliverable_0 @ 0x55d1c0] \n" + METER.format(i="-14.10", tp="-1.20")
+            + "[tf_deliverable_3 @ 0x55d1c8] \n" + METER.format(i="-30.00", tp="-9.00")
+            + master
+            + "[tf_deliverable_1 @ 0x55d1d0] \n" + METER.format(i="-14.20", tp="-1.30")
+        )
+        deliverables = [{"path": pathlib.Path("a.flac")}, {"path": pathlib.Path("b.mp3")}]
+        log = audio_processing._split_deliverable_meters(stderr, deliverables)
+        self.assertNotIn("tf_deliverable", log)
+        self.assertEqual(extract_loudnorm_stats(log)["input_i"], -14.5)
+        self.assertEqual(audio_processing.parse_deliverable_stats(log), {
+            "a.flac": {"output_i": -14.1, "output_tp": -1.2, "output_lra": 2.0},
+            "b.mp3": {"output_i": -14.2, "output_tp": -1.3, "output_lra": 2.0},
+        })
+
+    def test_namespaced_graph_keeps_its_input_label(self):
+        chain, output = FilterGraphBuilder.namespaced("[x]alimiter[lim_1];[lim_1]anull[lim_2]", "lim_2", "x", "d0_")
+        self.assertEqual((chain, output), ("[x]alimiter[d0_lim_1];[d0_lim_1]anull[d0_lim_2]", "d0_lim_2"))
+
+    @patch.dict("os.environ", {"FINISHER_AUDIO_ENGINE": "python"})
+    def test_batch_deliverables_follow_the_master_name(self):
+        resolved = _resolve_batch_deliverables(
+            [{"format": "flac", "sample_rate": 44100}, {"format": "wav", "suffix": " (44k)"}],
+            output_path=pathlib.Path("out/A - B.wav"),
+            temp_dir=pathlib.Path("tmp"),
+        )
+        self.assertEqual([final.name for _spec, final in resolved], ["A - B.flac", "A - B (44k).wav"])
+        self.assertEqual(resolved[0][0]["path"], str(pathlib.Path("tmp/A - B.flac")))
+        with self.assertRaises(ValueError):
+            _resolve_batch_deliverables([{"format": "wav"}], output_path=pathlib.Path("A.wav"), temp_dir=pathlib.Path("t"))
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "FFmpeg requerido")
+@patch.dict(os.environ, {"TONEFINISH_RENDER_CACHE": "0"})
+class SingleRenderDeliverableTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tmp.name)
+        self.source = self.root / "source.wav"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-f", "lavfi",
+            "-i", "anoisesrc=color=pink:seed=5:amplitude=0.1:r=48000:d=2,aformat=channel_layouts=stereo",
+            str(self.source),
+        ], check=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_wav_flac_and_mp3_come_from_one_ffmpeg_run_with_their_own_stats(self):
+        specs = [
+            {"path": str(self.root / "master.flac"), "sample_rate": 44100, "bit_depth": "16"},
+            {"path": str(self.root / "master"), "format": "mp3", "sample_rate": 44100},
+        ]
+        with patch("audio_processing.get_audio_info", return_value={"sample_rate": 48000, "channels": 2, "duration": 2.0}), \
+                patch("audio_processing.run_ffmpeg", wraps=audio_processing.run_ffmpeg) as run:
+            log = audio_processing.normalize_audio(
+                self.source, self.root / "master.wav", STATS, -14.0, -1.0, True, False,
+                master_limiter_enabled=True, output_sr=48000, output_bit_depth="24",
+                output_format="wav", output_specs=specs,
+            )
+        self.assertEqual(run.call_count, 1)
+        with wave.open(str(self.root / "master.wav")) as primary:
+            self.assertEqual((primary.getframerate(), primary.getsampwidth()), (48000, 3))
+        self.assertEqual(_flac_format(self.root / "master.flac"), (44100, 16))
+        self.assertGreater((self.root / "master.mp3").stat().st_size, 0)
+        self.assertIn("Output Integrated", log)
+        measured = audio_processing.parse_deliverable_stats(log)
+        self.assertEqual(set(measured), {str(self.root / "master.flac"), str(self.root / "master.mp3")})
+        for stats in measured.values():
+            self.assertAlmostEqual(stats["output_i"], -14.0, delta=1.0)
+            self.assertLessEqual(stats["output_tp"], -0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
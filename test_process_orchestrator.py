@@ -1,9 +1,11 @@
 """Pruebas del orquestador único y la migración de configuración histórica."""
 
+import os
 import pathlib
 import subprocess
 import tempfile
 import unittest
+from unittest.mock import patch
 
 from audio_processing import build_preprocess_chain, normalize_audio
 from processes.contracts import AudioFunctionAction, AudioProcessContext
@@ -53,7 +55,8 @@ class AudioProcessOrchestratorTests(unittest.TestCase):
             AudioFunctionAction("audio.multiband.stereo_width", target="air", params={"width": 1.2}),
         ]
         graph = orchestrator.compile(actions, AudioProcessContext("track", 48000, 2))
-        self.assertEqual(graph.filter_chain.count("asplit=6"), 1)
+        self.assertEqual(graph.filter_chain.count("acrossover="), 1)
+        self.assertNotIn("highpass", graph.filter_chain)
         self.assertEqual(len(graph.applied_actions), 3)
         self.assertEqual(
             [action.operation for action in graph.applied_actions],
@@ -122,6 +125,7 @@ class AudioProcessOrchestratorTests(unittest.TestCase):
             ], capture_output=True, text=True, timeout=20)
             self.assertEqual(render.returncode, 0, render.stderr)
 
+    @patch.dict(os.environ, {"TONEFINISH_RENDER_CACHE": "0"})
     def test_normalize_audio_uses_plugins_for_preprocess_and_master(self):
         with tempfile.TemporaryDirectory() as tmp:
             input_path = pathlib.Path(tmp) / "input.wav"
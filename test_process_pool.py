@@ -0,0 +1,86 @@
+"""Pruebas del pool de procesos para unidades por archivo del lote."""
+
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from process_pool import BatchProcessPool, ProcessJob, process_pool_workers
+
+
+def crash_once(marker: str) -> str:
+    path = pathlib.Path(marker)
+    if not path.exists():
+        path.write_text("crashed")
+        os._exit(3)
+    return "ok"
+
+
+def always_crash() -> None:
+    os._exit(4)
+
+
+def allocate(megabytes: int) -> int:
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def numpy_loaded() -> bool:
+    return "numpy" in sys.modules
+
+
+class ProcessPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = BatchProcessPool(workers=2, memory_cap_mb=0, warmup_modules=("json",))
+
+    def tearDown(self):
+        self.pool.close(wait=True)
+
+    def test_jobs_are_picklable_and_run_in_other_processes(self):
+        job = ProcessJob("os:getpid", label="pid")
+        self.assertEqual(pickle.loads(pickle.dumps(job)), job)
+        self.assertNotEqual(self.pool.run(job), os.getpid())
+        futures = [self.pool.submit(ProcessJob("math:hypot", (index, 0))) for index in range(6)]
+        self.assertEqual([future.result() for future in futures], [float(index) for index in range(6)])
+
+    def test_crashed_worker_is_replaced_and_the_job_retried(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            marker = str(pathlib.Path(tmp) / "marker")
+            self.assertEqual(self.pool.run(ProcessJob("test_process_pool:crash_once", (marker,))), "ok")
+        self.assertEqual((self.pool.metrics["crashes"], self.pool.metrics["retried"]), (1, 1))
+        with self.assertRaises(RuntimeError):
+            self.pool.run(ProcessJob("test_process_pool:always_crash", label="crash"))
+        self.assertEqual(self.pool.run(ProcessJob("math:sqrt", (16,))), 4.0)
+
+    def test_errors_inside_jobs_are_raised_without_retry(self):
+        with self.assertRaises(ValueError):
+            self.pool.run(ProcessJob("math:sqrt", (-1,)))
+        self.assertEqual(self.pool.metrics["retried"], 0)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "RLIMIT_AS requerido")
+    def test_memory_cap_turns_runaway_jobs_into_memory_errors(self):
+        with BatchProcessPool(workers=1, memory_cap_mb=512, warmup_modules=()) as capped:
+            with self.assertRaises(MemoryError):
+                capped.run(ProcessJob("test_process_pool:allocate", (2048,)))
+            self.assertEqual(capped.run(ProcessJob("test_process_pool:allocate", (16,))), 16 * 1024 * 1024)
+
+    def test_warm_up_imports_numpy_once_per_worker(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("NumPy no instalado")
+        with BatchProcessPool(workers=1, memory_cap_mb=0, warmup_modules=("numpy",)) as warm:
+            self.assertTrue(warm.run(ProcessJob("test_process_pool:numpy_loaded")))
+
+    def test_zero_workers_runs_inline(self):
+        inline = BatchProcessPool(workers=0)
+        self.assertEqual(inline.run(ProcessJob("os:getpid")), os.getpid())
+        with patch.dict("os.environ", {"TONEFINISH_PROCESS_POOL_WORKERS": "0"}):
+            self.assertEqual(process_pool_workers(3), 0)
+        self.assertEqual(process_pool_workers(3), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
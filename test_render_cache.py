@@ -0,0 +1,59 @@
+import pathlib, tempfile, unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import audio_processing, render_cache
+
+LOG='[Parsed_loudnorm_0]\n{\n "input_i" : "-14.02",\n "input_tp" : "-1.30",\n "input_lra" : "5.00",\n "input_thresh" : "-24.00",\n "target_offset" : "0.02"\n}\n'
+
+class RenderCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp=tempfile.TemporaryDirectory(); self.root=pathlib.Path(self.tmp.name); self.calls=[]
+        self.patches=[patch.object(render_cache,"RENDER_CACHE_DIR",self.root/"render_cache"),
+                      patch.object(render_cache,"_ffmpeg_identity",lambda:"7.0/10.0.0"),
+                      patch("audio_processing.get_audio_info",return_value={"sample_rate":48000,"channels":2}),
+                      patch("audio_processing.run_ffmpeg",side_effect=self.fake_run)]
+        for item in self.patches: item.start()
+
+    def tearDown(self):
+        for item in reversed(self.patches): item.stop()
+        self.tmp.cleanup()
+
+    def fake_run(self, cmd, verbose=False):
+        self.calls.append(cmd); pathlib.Path(cmd[-1]).write_bytes(b"rendered:"+cmd[cmd.index("-filter_complex")+1].encode())
+        return SimpleNamespace(returncode=0,stdout="",stderr=LOG)
+
+    def render(self, source, output, gain_db=1.0):
+        return audio_processing.apply_output_gain(source,output,gain_db=gain_db,true_peak=-1.0,overwrite=True)
+
+    def test_hit_reuses_output_log_and_stats_for_same_content_at_other_path(self):
+        first=self.root/"a.wav"; second=self.root/"b.wav"; first.write_bytes(b"same"); second.write_bytes(b"same")
+        log=self.render(first,self.root/"out1.wav")
+        cached=self.render(second,self.root/"out2.wav")
+        self.assertEqual(len(self.calls),1); self.assertEqual(cached,log)
+        self.assertEqual((self.root/"out1.wav").read_bytes(),(self.root/"out2.wav").read_bytes())
+        cmd=self.calls[0]; key=render_cache.build_render_key(cmd,first,self.root/"out1.wav",cmd[cmd.index("-filter_complex")+1])
+        self.assertEqual(render_cache.lookup_render(key)["stats"]["input_i"],-14.02)
+
+    def test_graph_or_source_change_misses(self):
+        source=self.root/"a.wav"; source.write_bytes(b"v1")
+        self.render(source,self.root/"out.wav",1.0); self.render(source,self.root/"out.wav",2.0)
+        source.write_bytes(b"v2"); self.render(source,self.root/"out.wav",2.0)
+        self.assertEqual(len(self.calls),3)
+
+    def test_tampered_entry_is_dropped_and_size_cap_evicts_lru(self):
+        source=self.root/"a.wav"; source.write_bytes(b"x")
+        self.render(source,self.root/"out.wav",1.0)
+        entry=next((self.root/"render_cache").glob("*/*/output.wav")); entry.write_bytes(b"corrupt")
+        self.render(source,self.root/"out.wav",1.0); self.assertEqual(len(self.calls),2)
+        self.render(source,self.root/"out.wav",-1.0)
+        self.assertEqual(render_cache.get_render_cache_size()[0],2)
+        self.assertEqual(render_cache.evict_render_cache(max_bytes=1),2)
+        self.assertEqual(render_cache.get_render_cache_size(),(0,0))
+
+    def test_cache_can_be_disabled(self):
+        source=self.root/"a.wav"; source.write_bytes(b"x")
+        with patch.dict("os.environ",{"TONEFINISH_RENDER_CACHE":"0"}):
+            self.render(source,self.root/"out.wav"); self.render(source,self.root/"out.wav")
+        self.assertEqual(len(self.calls),2)
+
+if __name__=="__main__": unittest.main()
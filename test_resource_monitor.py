@@ -0,0 +1,96 @@
+"""Pruebas del muestreo de fondo, caché TTL e historial de `ResourceMonitor`."""
+
+import time
+import unittest
+from unittest.mock import patch
+
+import resource_monitor
+from compute_backend import ComputeBackend
+from resource_monitor import GpuSnapshot, ResourceMonitor, ResourceSnapshot
+
+
+def fake_snapshot(cpu=50.0, memory=40.0):
+    return ResourceSnapshot(
+        cpu_percent=cpu,
+        memory_percent=memory,
+        memory_available_gb=8.0,
+        ffmpeg_processes=0,
+        cpu_count=8,
+    )
+
+
+class ResourceMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self._gpu_probe = list(resource_monitor._GPU_PROBE)
+        resource_monitor._GPU_PROBE.clear()
+
+    def tearDown(self):
+        resource_monitor._GPU_PROBE[:] = self._gpu_probe
+
+    def test_snapshots_are_cached_for_the_ttl(self):
+        cached = ResourceMonitor(ttl=60.0)
+        fresh = ResourceMonitor()
+        with patch.object(ResourceMonitor, "_read_snapshot", return_value=fake_snapshot()) as read:
+            first = cached.snapshot()
+            self.assertIs(cached.snapshot(), first)
+            self.assertEqual(read.call_count, 1)
+            fresh.snapshot()
+            fresh.snapshot()
+            self.assertEqual(read.call_count, 3)
+        self.assertGreater(first.taken_at, 0.0)
+
+    def test_background_sampler_fills_the_ring_buffer(self):
+        monitor = ResourceMonitor(history_size=5)
+        with patch.object(ResourceMonitor, "_read_snapshot", return_value=fake_snapshot()):
+            monitor.start_sampling(0.05)
+            try:
+                deadline = time.monotonic() + 5.0
+                while len(monitor.history()) < 5 and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                self.assertTrue(monitor.sampling)
+            finally:
+                monitor.stop_sampling()
+        self.assertFalse(monitor.sampling)
+        self.assertEqual(len(monitor.history()), 5)
+        self.assertEqual(monitor.ttl, 0.05)
+
+    def test_smoothed_and_trend_use_recent_samples(self):
+        monitor = ResourceMonitor(ttl=60.0)
+        now = time.monotonic()
+        for offset, cpu in enumerate([20.0, 40.0, 60.0, 80.0]):
+            monitor._history.append(ResourceSnapshot(cpu, 50.0, 8.0, 0, 8, taken_at=now - 3 + offset))
+        self.assertEqual(monitor.smoothed(window_s=30.0).cpu_percent, 50.0)
+        self.assertAlmostEqual(monitor.trend("cpu_percent", window_s=30.0), 20.0)
+        self.assertIsNone(monitor.trend("ffmpeg_processes", window_s=0.5))
+
+    def test_gpu_is_probed_once_per_session(self):
+        gpu = GpuSnapshot(backend="nvidia-smi", device_count=1, memory_free_mb=8000.0, utilization_percent=5.0)
+        with patch.object(ResourceMonitor, "_probe_gpu", return_value=gpu) as probe:
+            self.assertIs(ResourceMonitor().gpu_snapshot(), gpu)
+            self.assertTrue(ResourceMonitor().has_gpu())
+            self.assertEqual(probe.call_count, 1)
+            ResourceMonitor().refresh_gpu()
+            self.assertEqual(probe.call_count, 2)
+
+    def test_decide_many_refreshes_once_per_pipeline(self):
+        monitor = ResourceMonitor()
+        stages = ["analysis.loudness", "analysis.spectrum", "analysis.features", "analysis.deep", "output.report"]
+        with patch.object(ResourceMonitor, "_read_snapshot", return_value=fake_snapshot()) as read, \
+             patch.object(ResourceMonitor, "_probe_gpu", return_value=None) as probe:
+            backend = ComputeBackend(monitor)
+            decisions = backend.decide_many(stages)
+        self.assertEqual([decision.backend for decision in decisions], ["cpu"] * 5)
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(probe.call_count, 1)
+
+    def test_compute_backend_does_not_probe_on_construction(self):
+        with patch.object(ResourceMonitor, "_read_snapshot", return_value=fake_snapshot()) as read, \
+             patch.object(ResourceMonitor, "_probe_gpu", return_value=None) as probe:
+            backend = ComputeBackend(ResourceMonitor())
+            self.assertEqual((read.call_count, probe.call_count), (0, 0))
+            self.assertIsNotNone(backend.cpu_snapshot)
+        self.assertEqual(read.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
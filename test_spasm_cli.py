@@ -42,6 +42,7 @@ class SpasmCliTests(unittest.TestCase):
             }
             env = os.environ.copy()
             env["FINISHER_FFMPEG_BIN"] = shutil.which("ffmpeg-spasm") or "ffmpeg-spasm"
+            env["TONEFINISH_RENDER_CACHE"] = "0"
             env["FINISHER_SPASM_BIN"] = str(ROOT.parents[1] / "SpASM" / "spasm")
             result = subprocess.run(
                 [str(CLI), "call", "--json"],
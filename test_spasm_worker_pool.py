@@ -0,0 +1,108 @@
+"""Pruebas del pool de workers SpASM persistentes (con un worker eco en Python)."""
+
+import os
+import pathlib
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import logic_backend
+from spasm_worker_pool import SpasmWorkerError, SpasmWorkerPool
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+ECHO_WORKER = [sys.executable, str(ROOT / "scripts" / "spasm_echo_worker.py")]
+
+
+class SpasmWorkerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = SpasmWorkerPool(ECHO_WORKER, size=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_worker_is_reused_across_calls(self):
+        first = self.pool.call("get_audio_info", ["a.wav"], {}, timeout=10)
+        second = self.pool.call("extract_loudnorm_stats", ["b.wav"], {"target": -14}, timeout=10)
+
+        self.assertTrue(first["ok"])
+        self.assertEqual(second["result"]["kwargs"], {"target": -14})
+        self.assertEqual(first["result"]["pid"], second["result"]["pid"])
+        self.assertEqual(self.pool.metrics["spawned"], 1)
+
+    def test_concurrent_calls_get_their_own_replies(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            replies = list(executor.map(
+                lambda index: self.pool.call("echo", [index], {}, timeout=10) or {"overflow": index},
+                range(20),
+            ))
+        answered = [reply for reply in replies if "result" in reply]
+        self.assertTrue(answered)
+        for index, reply in enumerate(replies):
+            if "result" in reply:
+                self.assertEqual(reply["result"]["args"], [index])
+        self.assertLessEqual(self.pool.metrics["spawned"], 2)
+
+    def test_busy_pool_returns_none_instead_of_waiting(self):
+        pool = SpasmWorkerPool(ECHO_WORKER, size=1)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                slow = executor.submit(pool.call, "sleep", [0.5], {}, 10)
+                time.sleep(0.2)
+                self.assertIsNone(pool.call("echo", [], {}, timeout=10))
+                self.assertTrue(slow.result()["ok"])
+        finally:
+            pool.close()
+
+    def test_timeout_and_crash_replace_the_worker(self):
+        pid = self.pool.call("echo", [], {}, timeout=10)["result"]["pid"]
+        with self.assertRaises(TimeoutError):
+            self.pool.call("sleep", [5], {}, timeout=0.2)
+        after_timeout = self.pool.call("echo", [], {}, timeout=10)["result"]["pid"]
+        self.assertNotEqual(pid, after_timeout)
+
+        with self.assertRaises(SpasmWorkerError):
+            self.pool.call("crash", [], {}, timeout=10)
+        after_crash = self.pool.call("echo", [], {}, timeout=10)["result"]["pid"]
+        self.assertNotIn(after_crash, {pid, after_timeout})
+        self.assertFalse(self.pool.unavailable)
+
+    def test_idle_worker_is_health_checked(self):
+        pool = SpasmWorkerPool(ECHO_WORKER, size=1, health_interval=0.0)
+        try:
+            pid = pool.call("echo", [], {}, timeout=10)["result"]["pid"]
+            self.assertEqual(pool.call("echo", [], {}, timeout=10)["result"]["pid"], pid)
+            self.assertEqual(pool.metrics["respawned"], 0)
+        finally:
+            pool.close()
+
+
+class CallSpasmPoolTests(unittest.TestCase):
+    def tearDown(self):
+        logic_backend._close_spasm_worker_pool()
+
+    def test_call_spasm_goes_through_the_persistent_worker(self):
+        env = {"FINISHER_SPASM_WORKER_CMD": " ".join(ECHO_WORKER), "FINISHER_SPASM_POOL_SIZE": "2"}
+        with patch.dict(os.environ, env), patch.object(logic_backend, "_call_spasm_oneshot") as oneshot:
+            first = logic_backend._call_spasm("get_audio_info", pathlib.Path("a.wav"))
+            second = logic_backend._call_spasm("get_audio_info", pathlib.Path("b.wav"))
+            with self.assertRaisesRegex(RuntimeError, "fallo simulado"):
+                logic_backend._call_spasm("fail")
+
+        self.assertEqual(first["pid"], second["pid"])
+        self.assertEqual(second["args"], [pathlib.Path("b.wav")])
+        oneshot.assert_not_called()
+
+    def test_cli_without_serve_mode_falls_back_to_one_call_per_process(self):
+        env = {"FINISHER_SPASM_WORKER_CMD": "false", "FINISHER_SPASM_POOL_SIZE": "1"}
+        with patch.dict(os.environ, env), patch.object(logic_backend, "_call_spasm_oneshot", return_value="oneshot") as oneshot:
+            self.assertEqual(logic_backend._call_spasm("get_audio_info", "a.wav"), "oneshot")
+            self.assertEqual(logic_backend._call_spasm("get_audio_info", "a.wav"), "oneshot")
+        self.assertEqual(oneshot.call_count, 2)
+        self.assertTrue(logic_backend._spasm_pool.unavailable)
+
+
+if __name__ == "__main__":
+    unittest.main()
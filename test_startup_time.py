@@ -0,0 +1,93 @@
+"""Arranque en frío: dependencias pesadas diferidas y reporte de reproducibilidad en caché."""
+
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import benchmark_suite
+import lazy_imports
+import runtime_reproducibility
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_importing_the_app_defers_heavy_dependencies(self):
+        self.assertEqual(benchmark_suite.cold_start("import ui_app"), [])
+        self.assertEqual(
+            benchmark_suite.cold_start(
+                "import alternative_tools, analysis_mts, auto_master_intelligence, diagnostics, spectrum_analyzer"
+            ),
+            [],
+        )
+
+    def test_proxy_replaces_itself_on_first_use(self):
+        namespace = {}
+        namespace["js"] = lazy_imports.lazy_module("json", namespace, "js")
+        proxy = namespace["js"]
+        self.assertFalse(proxy.is_loaded)
+        self.assertEqual(namespace["js"].dumps([1]), "[1]")
+        self.assertTrue(proxy.is_loaded)
+        self.assertEqual(namespace["js"].__name__, "json")
+        self.assertFalse(lazy_imports.module_available("paquete_que_no_existe"))
+        self.assertIsNone(lazy_imports.optional_import("paquete_que_no_existe"))
+
+
+class ReproducibilityCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.lock = self.dir / "runtime_lock.json"
+        self.lock.write_text('{"ffmpeg": {"version": "7.1"}, "python_packages": {"demo": "1.0"}}', encoding="utf-8")
+        patcher = patch.object(runtime_reproducibility, "RUNTIME_CHECK_CACHE_PATH", self.dir / "runtime_check.json")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(runtime_reproducibility._REPORT_MEMO.clear)
+
+    def check(self):
+        with patch.object(runtime_reproducibility, "_get_ffmpeg_versions", return_value={"version": "7.1"}) as ffmpeg, \
+             patch.object(runtime_reproducibility, "_get_installed_packages", return_value={"demo": "1.0"}) as packages:
+            report = runtime_reproducibility.check_runtime_reproducibility(self.lock)
+        return report, ffmpeg.call_count + packages.call_count
+
+    def test_second_launch_reuses_the_report_until_the_lock_changes(self):
+        first, calls = self.check()
+        self.assertTrue(first.ok)
+        self.assertEqual(calls, 2)
+
+        runtime_reproducibility._REPORT_MEMO.clear()  # nuevo proceso: sólo queda el disco
+        again, calls = self.check()
+        self.assertEqual(calls, 0)
+        self.assertEqual(again, first)
+
+        self.lock.write_text('{"ffmpeg": {"version": "7.2"}}', encoding="utf-8")
+        changed, calls = self.check()
+        self.assertEqual(calls, 2)
+        self.assertFalse(changed.ok)
+
+
+class StartupBudgetTests(unittest.TestCase):
+    def test_startup_cases_exceeding_their_budget_are_reported(self):
+        current = {"results": {
+            "startup.import_ui_app": {"ok": True, "median_s": 2.0, "budget_s": 1.5, "over_budget": True},
+            "startup.reproducibility_check": {"ok": True, "median_s": 0.1, "budget_s": 1.0, "over_budget": False},
+        }}
+        regressions = benchmark_suite.compare_results(current, {"results": {}})
+        self.assertEqual([(item["case"], item["reason"]) for item in regressions],
+                         [("startup.import_ui_app", "budget")])
+        self.assertIn(
+            "PRESUPUESTO startup.import_ui_app: 2.000 s (máximo 1.500 s)",
+            benchmark_suite.format_comparison(current, {"results": {}}, regressions),
+        )
+
+    def test_cold_start_stays_within_budget(self):
+        payload = benchmark_suite.run_suite("quick", only="startup.", repeats=1)
+        self.assertEqual(sorted(payload["results"]), sorted(benchmark_suite.STARTUP_BUDGETS))
+        for case_id, result in payload["results"].items():
+            with self.subTest(case=case_id):
+                self.assertTrue(result["ok"], result)
+                self.assertFalse(result["over_budget"], result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Pruebas de las trazas por etapa (`tracing`) y su exportación Chrome trace-event."""
+
+import contextlib
+import io
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import unittest
+
+import audio_tools
+import tracing
+from cache import get_cached_analysis
+from process_pool import BatchProcessPool, ProcessJob
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing.start_tracing()
+
+    def tearDown(self):
+        tracing.stop_tracing()
+
+    def spans(self):
+        return [event for event in self.tracer.events() if event["ph"] == "X"]
+
+    def test_spans_nest_per_file_and_thread(self):
+        def worker():
+            with tracing.file_scope(pathlib.Path("/music/b.wav")), tracing.span("analysis_stage", "stage"):
+                with tracing.span("analyze_audio", "backend"):
+                    pass
+
+        with tracing.file_scope("a.wav"), tracing.span("render", "batch") as args:
+            args["deliverables"] = 2
+            thread = threading.Thread(target=worker, name="tonefinish-batch-0")
+            thread.start()
+            thread.join()
+        with self.assertRaises(ValueError), tracing.span("copia", "batch"):
+            raise ValueError("disco lleno")
+
+        by_name = {event["name"]: event for event in self.spans()}
+        self.assertEqual(by_name["render"]["args"], {"deliverables": 2, "file": "a.wav"})
+        self.assertEqual(by_name["analyze_audio"]["args"]["file"], "b.wav")
+        self.assertNotEqual(by_name["analyze_audio"]["tid"], by_name["render"]["tid"])
+        outer, inner = by_name["analysis_stage"], by_name["analyze_audio"]
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+        self.assertEqual(by_name["copia"]["args"]["error"], "ValueError")
+        thread_names = {event["args"]["name"] for event in self.tracer.events() if event["ph"] == "M"}
+        self.assertIn("tonefinish-batch-0", thread_names)
+
+        tracing.stop_tracing()
+        with tracing.span("sin_tracer"):
+            pass
+        self.assertNotIn("sin_tracer", [event["name"] for event in self.spans()])
+
+    def test_run_ffmpeg_and_cache_lookups_are_traced(self):
+        result = audio_tools.run_ffmpeg([sys.executable, "-c", "pass"], optimize=False)
+        self.assertEqual(result.returncode, 0)
+        self.assertIsNone(get_cached_analysis(pathlib.Path("/no/existe.wav")))
+
+        by_name = {event["name"]: event for event in self.spans()}
+        self.assertEqual(by_name["run_ffmpeg"]["cat"], "ffmpeg")
+        self.assertEqual(by_name["run_ffmpeg"]["args"]["returncode"], 0)
+        self.assertEqual(by_name["analysis_cache_lookup"]["args"], {"hit": False})
+        self.assertEqual(
+            tracing.ffmpeg_signature(
+                ["ffmpeg", "-i", "in.flac", "-af", "highpass=f=20,loudnorm=I=-14:TP=-1", "-f", "wav", "out.wav"]
+            ),
+            "ffmpeg -f wav [highpass,loudnorm] -> wav",
+        )
+
+    def test_child_process_spans_are_merged(self):
+        with BatchProcessPool(1, memory_cap_mb=0, warmup_modules=()) as pool:
+            signature = pool.run(
+                ProcessJob("tracing:ffmpeg_signature", (["ffmpeg", "-af", "alimiter", "o.mp3"],), label="c.wav")
+            )
+        self.assertEqual(signature, "ffmpeg [alimiter] -> mp3")
+        (job_span,) = [event for event in self.spans() if event["cat"] == "process_job"]
+        self.assertEqual(job_span["name"], "ffmpeg_signature")
+        self.assertEqual(job_span["args"]["file"], "c.wav")
+        self.assertNotEqual(job_span["pid"], os.getpid())
+
+    def test_chrome_export_and_percentile_summary(self):
+        for duration_us in [1000.0, 2000.0, 3000.0, 4000.0, 100000.0]:
+            self.tracer.add("render", "batch", 0.0, duration_us)
+        self.tracer.add("análisis", "batch", 0.0, 500.0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.tracer.write_chrome_trace(tracing.batch_trace_path(pathlib.Path(tmp) / "log"))
+            self.assertTrue(path.name.startswith("batch_trace_"))
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            self.assertEqual(len([e for e in payload["traceEvents"] if e["ph"] == "X"]), 6)
+
+            summary = tracing.summarize(tracing.load_trace_events(path))
+            self.assertEqual(list(summary), ["batch/render", "batch/análisis"])
+            self.assertEqual(summary["batch/render"]["count"], 5)
+            self.assertEqual(summary["batch/render"]["p50_ms"], 3.0)
+            self.assertEqual(summary["batch/render"]["p95_ms"], 100.0)
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(tracing.main([str(path), str(path)]), 0)
+        self.assertRegex(output.getvalue(), r"batch/render\s+10\s+3\.0\s+100\.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
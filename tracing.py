@@ -0,0 +1,313 @@
+"""
+Trazas estructuradas por etapa, exportables como JSON de Chrome trace-event.
+
+`BatchWorker` ya medía sus etapas con `mark()`, pero sólo como texto de log.
+Este módulo registra spans (eventos "X" de Chrome: inicio + duración en µs)
+con proceso, hilo y archivo, de modo que en `chrome://tracing` o Perfetto se
+ven anidados por archivo e hilo:
+
+- `start_tracing()` activa un `Tracer` global; sin tracer activo, `span()` y
+  `traced()` no hacen nada (costo de una comparación).
+- `file_scope(nombre)` fija el archivo en curso para los spans de ese hilo.
+- Los procesos hijos de `BatchProcessPool` capturan sus spans con
+  `capture()` y el padre los incorpora con `merge()`.
+- `python -m tracing lote.trace.json ...` resume p50/p95 por etapa.
+
+`TONEFINISH_TRACE=0` desactiva las trazas del lote.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import contextvars
+import functools
+import json
+import math
+import os
+import pathlib
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
+
+_ACTIVE: "Tracer | None" = None
+_CURRENT_FILE: contextvars.ContextVar[str | None] = contextvars.ContextVar("tonefinish_trace_file", default=None)
+
+
+def tracing_enabled() -> bool:
+    """`TONEFINISH_TRACE=0` desactiva las trazas del lote (activas por defecto)."""
+    return os.getenv("TONEFINISH_TRACE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def now_us() -> float:
+    # CLOCK_MONOTONIC es común a todos los procesos del equipo: los spans de
+    # los hijos del pool se alinean con los del padre sin corrección.
+    return time.monotonic_ns() / 1000.0
+
+
+class Tracer:
+    """Acumula eventos de Chrome trace-event de forma segura entre hilos."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[tuple[int, int], str] = {}
+
+    def add(self, name: str, cat: str, start_us: float, end_us: float, args: dict[str, Any] | None = None) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round(start_us, 3),
+            "dur": round(max(0.0, end_us - start_us), 3),
+            "pid": os.getpid(),
+            "tid": thread.native_id or 0,
+            "args": dict(args or {}),
+        }
+        current_file = _CURRENT_FILE.get()
+        if current_file and "file" not in event["args"]:
+            event["args"]["file"] = current_file
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault((event["pid"], event["tid"]), thread.name)
+
+    def merge(self, events: Iterable[dict[str, Any]]) -> None:
+        with self._lock:
+            for event in events:
+                self._events.append(event)
+                if event.get("ph") == "M" and event.get("name") == "thread_name":
+                    key = (int(event.get("pid", 0)), int(event.get("tid", 0)))
+                    self._threads.setdefault(key, str(event.get("args", {}).get("name", "")))
+
+    def events(self) -> list[dict[str, Any]]:
+        """Spans más metadatos de nombre de hilo (para que el visor los rotule)."""
+        with self._lock:
+            spans = [event for event in self._events if event.get("ph") != "M"]
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for (pid, tid), name in sorted(threads.items())
+        ]
+        return metadata + sorted(spans, key=lambda event: event["ts"])
+
+    def write_chrome_trace(self, path: pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"traceEvents": self.events(), "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(payload, ensure_ascii=False) + "\n", encoding="utf-8")
+        return path
+
+
+def active_tracer() -> Tracer | None:
+    return _ACTIVE
+
+
+def start_tracing() -> Tracer:
+    """Activa (o reemplaza) el tracer global y lo devuelve."""
+    global _ACTIVE
+    _ACTIVE = Tracer()
+    return _ACTIVE
+
+
+def stop_tracing() -> Tracer | None:
+    """Desactiva el tracer global y devuelve el que estaba activo."""
+    global _ACTIVE
+    tracer, _ACTIVE = _ACTIVE, None
+    return tracer
+
+
+@contextlib.contextmanager
+def span(name: str, cat: str = "stage", **args: Any) -> Iterator[dict[str, Any]]:
+    """Registra la duración del bloque; el dict devuelto admite args extra (p. ej. `hit`)."""
+    tracer = _ACTIVE
+    if tracer is None:
+        yield args
+        return
+    start = now_us()
+    try:
+        yield args
+    except BaseException as exc:
+        args["error"] = type(exc).__name__
+        raise
+    finally:
+        tracer.add(name, cat, start, now_us(), args)
+
+
+def record(name: str, cat: str, start_us: float, end_us: float, **args: Any) -> None:
+    """Registra un span ya medido (p. ej. las etapas de `mark()` en `BatchWorker`)."""
+    tracer = _ACTIVE
+    if tracer is not None:
+        tracer.add(name, cat, start_us, end_us, args)
+
+
+def traced(
+    name: str | None = None,
+    cat: str = "analysis",
+    result_args: Callable[[Any], dict[str, Any]] | None = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorador: un span por llamada; `result_args` agrega datos del resultado."""
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _ACTIVE is None:
+                return func(*args, **kwargs)
+            with span(span_name, cat) as span_args:
+                result = func(*args, **kwargs)
+                if result_args is not None:
+                    try:
+                        span_args.update(result_args(result))
+                    except Exception:
+                        pass
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+@contextlib.contextmanager
+def file_scope(file_name: str | os.PathLike[str] | None) -> Iterator[None]:
+    """Asocia los spans de este hilo (y contexto) al archivo indicado."""
+    token = _CURRENT_FILE.set(pathlib.Path(file_name).name if file_name else None)
+    try:
+        yield
+    finally:
+        _CURRENT_FILE.reset(token)
+
+
+def set_current_file(file_name: str | os.PathLike[str] | None) -> None:
+    """Como `file_scope`, sin bloque: el bucle por archivo del lote lo fija en cada vuelta."""
+    _CURRENT_FILE.set(pathlib.Path(file_name).name if file_name else None)
+
+
+@contextlib.contextmanager
+def capture() -> Iterator[list[dict[str, Any]]]:
+    """Activa un tracer temporal (proceso hijo) y deja sus eventos en la lista devuelta."""
+    global _ACTIVE
+    previous = _ACTIVE
+    tracer = Tracer()
+    collected: list[dict[str, Any]] = []
+    _ACTIVE = tracer
+    try:
+        yield collected
+    finally:
+        _ACTIVE = previous
+        collected.extend(tracer.events())
+
+
+def merge(events: Iterable[dict[str, Any]]) -> None:
+    """Incorpora eventos capturados en otro proceso al tracer activo (si hay)."""
+    tracer = _ACTIVE
+    if tracer is not None:
+        tracer.merge(events)
+
+
+_FILTER_FLAGS = {"-af", "-filter:a", "-filter_complex", "-lavfi"}
+_FILTER_NAME = re.compile(r"^(?:\[[^\]]*\]\s*)*([A-Za-z0-9_]+)")
+
+
+def ffmpeg_filter_graphs(cmd: list[str]) -> list[str]:
+    """Valores de `-af`/`-filter_complex` del comando, en orden."""
+    return [str(value) for flag, value in zip(cmd, cmd[1:]) if flag in _FILTER_FLAGS]
+
+
+def ffmpeg_filter_names(cmd: list[str]) -> list[str]:
+    """Nombres de los filtros del comando (sin repetir, sin etiquetas ni opciones)."""
+    names: list[str] = []
+    for graph in ffmpeg_filter_graphs(cmd):
+        for chain in graph.replace(";", ",").split(","):
+            match = _FILTER_NAME.match(chain.strip())
+            if match and match.group(1) not in names:
+                names.append(match.group(1))
+    return names
+
+
+def ffmpeg_signature(cmd: list[str]) -> str:
+    """Firma corta de un comando FFmpeg: binario, filtros usados y formato de salida."""
+    if not cmd:
+        return ""
+    parts = [pathlib.Path(str(cmd[0])).name]
+    filters = ffmpeg_filter_names(cmd)
+    for flag, value in zip(cmd, cmd[1:]):
+        if flag == "-f":
+            parts.append(f"-f {value}")
+    if filters:
+        parts.append("[" + ",".join(filters) + "]")
+    output = str(cmd[-1])
+    suffix = pathlib.Path(output).suffix
+    if suffix and not output.startswith("-"):
+        parts.append(f"-> {suffix.lstrip('.')}")
+    return " ".join(parts)
+
+
+def batch_trace_path(report_dir: pathlib.Path) -> pathlib.Path:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return pathlib.Path(report_dir) / f"batch_trace_{timestamp}.json"
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(events: Iterable[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """Estadísticas por etapa (`cat/name`) en ms: n, p50, p95, máx y total."""
+    durations: dict[str, list[float]] = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        key = f"{event.get('cat', '')}/{event.get('name', '')}"
+        durations.setdefault(key, []).append(float(event.get("dur", 0.0)) / 1000.0)
+    return {
+        key: {
+            "count": len(values),
+            "p50_ms": _percentile(values, 0.50),
+            "p95_ms": _percentile(values, 0.95),
+            "max_ms": max(values),
+            "total_ms": sum(values),
+        }
+        for key, values in sorted(durations.items(), key=lambda item: -sum(item[1]))
+    }
+
+
+def load_trace_events(path: pathlib.Path) -> list[dict[str, Any]]:
+    payload = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    # El formato admite tanto el objeto con `traceEvents` como la lista suelta.
+    return list(payload.get("traceEvents", []) if isinstance(payload, dict) else payload)
+
+
+def format_summary(summary: dict[str, dict[str, float]]) -> str:
+    width = max([len("etapa")] + [len(key) for key in summary])
+    lines = [f"{'etapa':<{width}}  {'n':>5}  {'p50 ms':>10}  {'p95 ms':>10}  {'máx ms':>10}  {'total s':>9}"]
+    for key, stats in summary.items():
+        lines.append(
+            f"{key:<{width}}  {int(stats['count']):>5}  {stats['p50_ms']:>10.1f}  "
+            f"{stats['p95_ms']:>10.1f}  {stats['max_ms']:>10.1f}  {stats['total_ms'] / 1000.0:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Resume p50/p95 por etapa de trazas de lote (Chrome trace-event).")
+    parser.add_argument("traces", nargs="+", type=pathlib.Path, help="archivos batch_trace_*.json")
+    parser.add_argument("--json", action="store_true", help="salida JSON en lugar de tabla")
+    args = parser.parse_args(argv)
+    events: list[dict[str, Any]] = []
+    for path in args.traces:
+        events.extend(load_trace_events(path))
+    summary = summarize(events)
+    print(json.dumps(summary, ensure_ascii=False, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -23,6 +23,7 @@ from auto_master_intelligence import (
 )
 from output_naming import mastered_output_stem
 from compute_backend import ComputeBackend
+from lazy_imports import module_available
 from config import (
     BAND_CONFIG,
     DEFAULT_BAND_RANGE_DB,
@@ -98,7 +99,7 @@ from ui.workers import (
     NormalizeWorker,
     ProcessWorker,
 )
-from resource_monitor import ResourceMonitor
+from resource_monitor import shared_resource_monitor
 from resource_governor import ResourceGovernor
 from runtime_reproducibility import check_runtime_reproducibility
 from bandcamp_bok import (
@@ -174,18 +175,29 @@ except ImportError:
     PREVIEW_AVAILABLE = False
     AudioPreview = None  # type: ignore
 
-# Importaciones opcionales para espectro (requiere matplotlib)
-try:
-    from spectrum_analyzer import analyze_spectrum_fft, generate_spectrum_plot_data
-    import matplotlib
-    matplotlib.use('QtAgg')  # Backend Qt para PySide6
-    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-    from matplotlib.figure import Figure
-    SPECTRUM_AVAILABLE = True
-except ImportError:
-    SPECTRUM_AVAILABLE = False
-    FigureCanvas = None
-    Figure = None
+# Espectro opcional (requiere NumPy y matplotlib). Se comprueba sin importar:
+# matplotlib se carga con el primer canvas, no al arrancar la aplicación.
+SPECTRUM_AVAILABLE = module_available("numpy") and module_available("matplotlib")
+FigureCanvas = None
+Figure = None
+
+
+def _load_spectrum_backend() -> bool:
+    """Importa matplotlib con backend Qt la primera vez que se dibuja un espectro."""
+    global SPECTRUM_AVAILABLE, FigureCanvas, Figure
+    if Figure is not None and FigureCanvas is not None:
+        return True
+    if not SPECTRUM_AVAILABLE:
+        return False
+    try:
+        import matplotlib
+        matplotlib.use('QtAgg')  # Backend Qt para PySide6
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+    except ImportError:
+        SPECTRUM_AVAILABLE = False
+        return False
+    return True
 
 
 if PYSIDE_AVAILABLE:
@@ -317,7 +329,7 @@ if PYSIDE_AVAILABLE:
             self._current_thread = None
             self._current_worker = None
             self._worker_finish_handler = None
-            self._resource_monitor = ResourceMonitor()
+            self._resource_monitor = shared_resource_monitor()
             self._resource_governor = ResourceGovernor(self._resource_monitor)
             self._resource_monitor_timer = None
             self._last_resource_snapshot = None
@@ -1189,6 +1201,9 @@ if PYSIDE_AVAILABLE:
             
             # Variables de preview y espectro
             self.preview_player = None
+            # Preview procesado en curso (archivo) y debounce de sus re-renders.
+            self._preview_plan_input: pathlib.Path | None = None
+            self._preview_refresh_timer: QTimer | None = None
             self.spectrum_canvas = None
             self.spectrum_figure = None
             self.current_spectrum_data = None
@@ -1563,6 +1578,16 @@ if PYSIDE_AVAILABLE:
             self.play_original_btn.clicked.connect(self._play_original)
             self.play_processed_btn.clicked.connect(self._play_processed)
             self.stop_preview_btn.clicked.connect(self._stop_preview)
+            # Con el preview procesado sonando, mover el limitador re-renderiza
+            # sólo el tail sobre el intermedio cacheado.
+            for preview_signal in (
+                self.limiter_ceiling_spin.valueChanged,
+                self.limiter_release_spin.valueChanged,
+                self.true_peak_spin.valueChanged,
+                self.brickwall_cb.stateChanged,
+                self.master_limiter_mode_combo.currentIndexChanged,
+            ):
+                preview_signal.connect(lambda *_args: self._schedule_preview_refresh())
             self.preset_combo.currentIndexChanged.connect(self._apply_preset)
             self.output_preset_combo.currentIndexChanged.connect(self._apply_output_preset)
             self.output_format_combo.currentIndexChanged.connect(self._apply_output_format)
@@ -8491,7 +8516,7 @@ if PYSIDE_AVAILABLE:
             if not SPECTRUM_AVAILABLE or not hasattr(self, 'spectrum_canvas'):
                 return
             
-            if self.spectrum_canvas is None and Figure is not None and FigureCanvas is not None:
+            if self.spectrum_canvas is None and _load_spectrum_backend():
                 self.spectrum_figure = Figure(figsize=(8, 4))
                 self.spectrum_canvas = FigureCanvas(self.spectrum_figure)
                 self.spectrum_canvas.setMinimumHeight(300)
@@ -8568,41 +8593,114 @@ if PYSIDE_AVAILABLE:
                 
                 self.append_log("🎧 Generando preview de 30 segundos...")
                 
-                # Crear preview sin filtros
+                # Preview con el plan de la UI (preproceso + limitador)
                 if AudioPreview is None:
                     self._show_error("AudioPreview no disponible")
                     self._reset_preview_buttons()
                     return
                     
                 self.preview_player = AudioPreview()
-                preview_path = self.preview_player.generate_preview(
-                    input_path=input_path,
-                    filter_complex="",
-                    duration=30
-                )
+                # Streaming: la reproducción arranca mientras el motor renderiza
+                # y el fragmento queda en caché para los siguientes clics.
+                started = self._start_plan_preview(input_path)
                 
                 # Restaurar botones
                 self._reset_preview_buttons()
                 
-                if preview_path and preview_path.exists():
-                    self.append_log(f"✓ Preview generado: {preview_path}")
+                if started:
+                    self.append_log("▶️ Reproduciendo preview...")
                     self.global_progress_label.setText("▶️ Reproduciendo preview...")
-                    
-                    # Reproducir automáticamente
-                    if self.preview_player.play():
-                        self.append_log("▶️ Reproduciendo preview...")
-                    else:
-                        self.append_log("⚠️ No se pudo reproducir el preview automáticamente")
-                        self.global_progress_label.setText("Listo")
                 else:
-                    self.append_log("⚠️ Error al generar preview")
-                    self.global_progress_label.setText("Error en preview")
+                    self.append_log(f"⚠️ No se pudo reproducir el preview: {self.preview_player.last_error}")
+                    self.global_progress_label.setText("Listo")
                     
             except Exception as e:
                 self._reset_preview_buttons()
                 self.append_log(f"❌ Error generando preview: {e}")
                 self._show_error(f"Error al generar preview: {e}")
         
+        def _preview_settings(self) -> Dict[str, Any]:
+            """Opciones de la UI que definen el plan del preview procesado."""
+            return {
+                "true_peak": self.true_peak_spin.value(),
+                "dynamic_eq": self.dynamic_eq_cb.isChecked(),
+                "master_limiter_enabled": self.brickwall_cb.isChecked(),
+                "master_limiter_mode": self.master_limiter_mode_combo.currentText(),
+                "limiter_ceiling_db": self.limiter_ceiling_spin.value(),
+                "limiter_release_ms": self.limiter_release_spin.value(),
+                "stereo_width": self.stereo_width_cb.isChecked(),
+                "deesser": self.deesser_cb.isChecked(),
+                "deesser_freq_hz": self.deesser_freq_spin.value(),
+                "deesser_intensity": self.deesser_intensity_spin.value(),
+                "tone_low_db": self.eq_low_spin.value(),
+                "sub_bass_db": self.sub_bass_spin.value(),
+                "tone_mid_db": self.eq_mid_spin.value(),
+                "tone_high_db": self.eq_high_spin.value(),
+                "tone_tilt_db": self.tilt_eq_spin.value(),
+                "band_adjust_db": self._get_dynamic_band_adjust_db(),
+                "band_widths": self._get_stereo_band_widths(),
+                "auto_band_gain": self.auto_band_gain_cb.isChecked(),
+                "saturation_enabled": self.saturation_enable_cb.isChecked(),
+                "saturation_per_band": self.saturation_per_band_cb.isChecked(),
+                "saturation_type": self.saturation_type_combo.currentText(),
+                "saturation_drive_db": self.saturation_drive_spin.value(),
+                "saturation_mix": self.saturation_mix_spin.value() / 100.0,
+                "saturation_band_drive_db": self._get_saturation_band_drive_db(),
+                "saturation_band_mix": self._get_saturation_band_mix(),
+                "process_order": self._get_process_order(),
+                "stereo_dynamic": self.stereo_dynamic_cb.isChecked(),
+                "stereo_dynamic_band_mix": self._get_stereo_dynamic_band_mix(),
+                "stereo_dynamic_mix": self.stereo_dynamic_mix_spin.value(),
+                "glue_enabled": self.glue_cb.isChecked(),
+                "glue_threshold_db": self.glue_threshold_spin.value(),
+                "glue_ratio": self.glue_ratio_spin.value(),
+                "glue_attack_ms": self.glue_attack_spin.value(),
+                "glue_release_ms": self.glue_release_spin.value(),
+                "glue_makeup_db": self.glue_makeup_spin.value(),
+                "noise_reduction_level": self.noise_reduction_combo.currentText(),
+                "declip_level": self.declip_combo.currentText(),
+                "declick_level": self.declick_combo.currentText(),
+                "pink_noise_level": self.pink_noise_combo.currentText(),
+                "repair_enabled": self.repair_enabled_cb.isChecked(),
+                "mix_enabled": self.mix_enabled_cb.isChecked(),
+                "multiband_limiter_enabled": self.multiband_limiter_cb.isChecked(),
+                "multiband_limiter_thresholds": self._get_multiband_limiter_thresholds(),
+            }
+
+        def _start_plan_preview(self, input_path: pathlib.Path) -> bool:
+            """Reproduce el preview procesado con el plan de la UI (grafos cacheados por hash)."""
+            from audio_preview import build_preview_plan
+
+            actions, context = build_preview_plan(self._preview_settings(), band_stats=self.last_band_stats)
+            started = self.preview_player.stream_plan(input_path, actions, context, duration=30)
+            self._preview_plan_input = input_path if started else None
+            return started
+
+        def _schedule_preview_refresh(self) -> None:
+            if self._preview_plan_input is None:
+                return
+            if self._preview_refresh_timer is None:
+                timer = QTimer(self)
+                timer.setSingleShot(True)
+                timer.setInterval(300)
+                timer.timeout.connect(self._refresh_preview)
+                self._preview_refresh_timer = timer
+            self._preview_refresh_timer.start()
+
+        def _refresh_preview(self) -> None:
+            """Re-arranca el preview procesado: sólo el tail se vuelve a renderizar."""
+            input_path = self._preview_plan_input
+            if input_path is None or self.preview_player is None or not self.preview_player.is_playing():
+                self._preview_plan_input = None
+                return
+            try:
+                started = self._start_plan_preview(input_path)
+            except Exception as e:
+                started = False
+                self.preview_player.last_error = str(e)
+            if not started:
+                self.append_log(f"⚠️ No se pudo actualizar el preview: {self.preview_player.last_error}")
+
         def _reset_preview_buttons(self) -> None:
             """Restaura el estado de los botones de preview."""
             self.preview_btn.setEnabled(True)
@@ -8642,21 +8740,17 @@ if PYSIDE_AVAILABLE:
                     return
                     
                 self.preview_player = AudioPreview()
-                preview_path = self.preview_player.generate_preview(
-                    input_path=input_path,
-                    filter_complex="",
-                    duration=30
-                )
+                started = self.preview_player.stream(input_path=input_path, duration=30)
                 
                 # Restaurar botones
                 self._reset_preview_buttons()
                 self.play_original_btn.setText("▶️ Original")
                 
-                if preview_path and self.preview_player.play():
+                if started:
                     self.append_log("✓ Reproduciendo original (30s)")
                     self.global_progress_label.setText("▶️ Original...")
                 else:
-                    self.append_log("⚠️ Error al reproducir original")
+                    self.append_log(f"⚠️ Error al reproducir original: {self.preview_player.last_error}")
                     
             except Exception as e:
                 self._reset_preview_buttons()
@@ -8692,21 +8786,17 @@ if PYSIDE_AVAILABLE:
                     return
                     
                 self.preview_player = AudioPreview()
-                preview_path = self.preview_player.generate_preview(
-                    input_path=output_path,
-                    filter_complex="",
-                    duration=30
-                )
+                started = self.preview_player.stream(input_path=output_path, duration=30)
                 
                 # Restaurar botones
                 self._reset_preview_buttons()
                 self.play_processed_btn.setText("▶️ Procesado")
                 
-                if preview_path and self.preview_player.play():
+                if started:
                     self.append_log("✓ Reproduciendo procesado (30s)")
                     self.global_progress_label.setText("▶️ Procesado...")
                 else:
-                    self.append_log("⚠️ Error al reproducir procesado")
+                    self.append_log(f"⚠️ Error al reproducir procesado: {self.preview_player.last_error}")
                     
             except Exception as e:
                 self._reset_preview_buttons()
@@ -8715,6 +8805,7 @@ if PYSIDE_AVAILABLE:
         
         def _stop_preview(self) -> None:
             """Detiene la reproducción actual y limpia recursos."""
+            self._preview_plan_input = None
             if self.preview_player is not None:
                 try:
                     self.preview_player.stop()